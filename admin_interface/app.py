@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, send_file
 import os
 import psutil
 import json
@@ -14,6 +14,14 @@ except ImportError:
     GPU_AVAILABLE = False
     print("[WARN] nvidia-ml-py non installé. Les infos GPU ne seront pas disponibles.")
 
+# OpenCV (optionnel) : nécessaire seulement pour l'aperçu vidéo /api/camera/stream
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+    print("[WARN] opencv-python non installé. L'aperçu vidéo ne sera pas disponible.")
+
 # Obtenir le répertoire courant
 base_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -290,19 +298,31 @@ def read_config():
 
 @app.route('/api/config/save', methods=['POST'])
 def save_config():
-    """Enregistre le fichier config.py"""
+    """
+    Enregistre le fichier config.py
+    Le détecteur en cours le relit et applique à chaud les paramètres modifiés
+    """
     try:
         data = request.get_json()
         content = data.get('content', '')
         
         config_path = os.path.join(os.path.dirname(base_dir), 'src', 'config.py')
         
-        with open(config_path, 'w', encoding='utf-8') as f:
+        # Refuser un fichier invalide : le détecteur le relirait
+        try:
+            compile(content, config_path, 'exec')
+        except SyntaxError as e:
+            return jsonify({'success': False, 'error': f'Erreur de syntaxe ligne {e.lineno} : {e.msg}'})
+        
+        # Écriture atomique : le détecteur ne lit jamais un fichier à moitié écrit
+        tmp_path = config_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             f.write(content)
+        os.replace(tmp_path, config_path)
         
         return jsonify({
             'success': True,
-            'message': 'Configuration enregistrée',
+            'message': 'Configuration enregistrée (appliquée à chaud par le détecteur)',
             'path': config_path
         })
     except Exception as e:
@@ -351,24 +371,40 @@ def bins_status():
 
 @app.route('/api/bins/history')
 def bins_history():
-    """Récupère l'historique des détections"""
+    """
+    Récupère l'historique des détections (pagination par curseur)
+    Paramètres : limit, cursor (next_cursor de la page précédente), bin_color,
+    item_name, min_confidence, max_confidence, since, until (ISO, until exclu),
+    include_archive (1 = continuer dans les archives mensuelles)
+    """
     try:
         import sys
         from pathlib import Path
         src_dir = Path(__file__).resolve().parent.parent / 'src'
         sys.path.insert(0, str(src_dir))
         
-        limit = request.args.get('limit', 50, type=int)
+        limit = max(1, min(request.args.get('limit', 50, type=int), 1000))
         
         import waste_classifier
         waste_classifier.init_database()
         
-        history = waste_classifier.get_detection_history(limit)
+        history, next_cursor = waste_classifier.get_detection_history_page(
+            limit,
+            cursor=request.args.get('cursor'),
+            bin_color=request.args.get('bin_color'),
+            item_name=request.args.get('item_name'),
+            min_confidence=request.args.get('min_confidence', type=float),
+            max_confidence=request.args.get('max_confidence', type=float),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            include_archive=request.args.get('include_archive', '0') in ('1', 'true')
+        )
         
         # Formater les données
         data = []
-        for bin_color, item_name, timestamp, confidence in history:
+        for row_id, bin_color, item_name, timestamp, confidence in history:
             data.append({
+                'id': row_id,
                 'bin_color': bin_color,
                 'item_name': item_name,
                 'timestamp': timestamp,
@@ -380,7 +416,110 @@ def bins_history():
         return jsonify({
             'success': True,
             'history': data,
-            'count': len(data)
+            'count': len(data),
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/bins/export')
+def bins_export():
+    """
+    Export de l'historique en streaming (mémoire constante quel que soit le volume)
+    Paramètres : format (csv|ndjson), gzip (1), save (1 = écrire dans data/exports),
+    include_archive (1), et les filtres de /api/bins/history
+    """
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        import history_export
+        
+        fmt = request.args.get('format', 'csv')
+        if fmt not in history_export.FORMATS:
+            return jsonify({'success': False, 'error': 'format doit être csv ou ndjson'})
+        compress = request.args.get('gzip', '0') in ('1', 'true')
+        filters = {
+            'include_archive': request.args.get('include_archive', '0') in ('1', 'true'),
+            'bin_color': request.args.get('bin_color'),
+            'item_name': request.args.get('item_name'),
+            'min_confidence': request.args.get('min_confidence', type=float),
+            'max_confidence': request.args.get('max_confidence', type=float),
+            'since': request.args.get('since'),
+            'until': request.args.get('until'),
+        }
+        
+        if request.args.get('save', '0') in ('1', 'true'):
+            path, size = history_export.export_to_file(fmt, compress, **filters)
+            return jsonify({
+                'success': True,
+                'path': str(path),
+                'bytes': size
+            })
+        
+        # Réponse découpée (chunked) : les lignes sont lues et envoyées au fil de l'eau
+        chunks = history_export.export_chunks(
+            history_export.iter_history_rows(**filters), fmt, compress
+        )
+        filename = history_export.export_filename(fmt, compress)
+        mimetype = 'application/gzip' if compress else history_export.FORMATS[fmt]
+        return Response(chunks, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename={filename}'
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/analytics')
+def analytics():
+    """
+    Statistiques de tri par tranche horaire ou journalière (tables d'agrégats)
+    Les agrégats ne sont jamais archivés : la période archivée est incluse.
+    Paramètres : granularity (hour|day), group_by (bin|item|none), since, until
+    """
+    try:
+        import sys
+        import time
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        granularity = request.args.get('granularity', 'day')
+        group_by = request.args.get('group_by', 'bin')
+        if granularity not in ('hour', 'day'):
+            return jsonify({'success': False, 'error': 'granularity doit être hour ou day'})
+        if group_by not in ('bin', 'item', 'none'):
+            return jsonify({'success': False, 'error': 'group_by doit être bin, item ou none'})
+        
+        import waste_classifier
+        waste_classifier.init_database()
+        
+        start = time.perf_counter()
+        series = waste_classifier.get_analytics(
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            granularity=granularity,
+            group_by=None if group_by == 'none' else group_by
+        )
+        query_ms = (time.perf_counter() - start) * 1000
+        
+        waste_classifier.cleanup()
+        
+        # Totaux sur la période
+        total = sum(point['count'] for point in series)
+        confidence_sum = sum(point['count'] * point['mean_confidence'] for point in series)
+        
+        return jsonify({
+            'success': True,
+            'granularity': granularity,
+            'group_by': group_by,
+            'series': series,
+            'total': total,
+            'mean_confidence': round(confidence_sum / total, 4) if total else 0.0,
+            'query_ms': round(query_ms, 2)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -417,7 +556,10 @@ def empty_bin(bin_color):
 
 @app.route('/api/waste/classify', methods=['POST'])
 def waste_classify():
-    """Classifie un objet et l'ajoute au bac approprié"""
+    """
+    Classifie un objet et dépose le tri physique dans la file (réponse immédiate)
+    Le suivi se fait via /api/waste/jobs/<job_id> ou /api/waste/jobs/events
+    """
     try:
         import sys
         from pathlib import Path
@@ -432,6 +574,15 @@ def waste_classify():
         if not item_name:
             return jsonify({'success': False, 'error': 'item_name requis'})
         
+        # Le port série appartient au détecteur quand il tourne : ne pas l'ouvrir une seconde fois
+        from sort_queue import get_sort_queue, serial_port_owner
+        owner = serial_port_owner()
+        if owner is not None:
+            return jsonify({
+                'success': False,
+                'error': f'Port série utilisé par {owner} : tri manuel indisponible'
+            }), 409
+        
         import waste_classifier
         waste_classifier.init_database()
         
@@ -439,18 +590,23 @@ def waste_classify():
             item_name, 
             ask_if_unknown=False, 
             auto_mode=auto_mode,
-            confidence=confidence
+            confidence=confidence,
+            send_command=False
         )
         
         waste_classifier.cleanup()
         
         if bin_color:
+            job = get_sort_queue().submit(item_name.lower(), bin_color, confidence)
             return jsonify({
                 'success': True,
                 'item_name': item_name,
                 'bin_color': bin_color,
+                'job_id': job['id'],
+                'status': job['status'],
+                'position': job['position'],
                 'timestamp': datetime.now().isoformat()
-            })
+            }), 202
         else:
             return jsonify({
                 'success': False,
@@ -459,6 +615,222 @@ def waste_classify():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/waste/jobs/<job_id>')
+def waste_job_status(job_id):
+    """État d'un tri déposé par /api/waste/classify"""
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        from sort_queue import get_sort_queue
+        job = get_sort_queue().get_job(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': f'Travail inconnu: {job_id}'}), 404
+        return jsonify({'success': True, 'job': job})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/waste/jobs/events')
+def waste_job_events():
+    """
+    Flux Server-Sent Events des changements d'état des tris
+    Reprise possible via l'en-tête Last-Event-ID (ou ?after=<numéro>)
+    """
+    import sys
+    from pathlib import Path
+    src_dir = Path(__file__).resolve().parent.parent / 'src'
+    sys.path.insert(0, str(src_dir))
+    
+    from sort_queue import get_sort_queue
+    sort_queue = get_sort_queue()
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        after = 0
+    
+    def generate():
+        last = after
+        while True:
+            events = sort_queue.wait_events(after=last, timeout=15.0)
+            if not events:
+                # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                yield ": keep-alive\n\n"
+                continue
+            for seq, job in events:
+                last = seq
+                yield f"id: {seq}\nevent: job\ndata: {json.dumps(job)}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/waste/classify/batch', methods=['POST'])
+def waste_classify_batch():
+    """
+    Enregistre un lot de détections en une transaction (postes distants, rejeu)
+    Corps : {"detections": [{"item_name", "confidence", "timestamp"}, ...]} ou la liste seule
+    """
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        data = request.get_json()
+        events = data.get('detections', []) if isinstance(data, dict) else data
+        if not isinstance(events, list) or not events:
+            return jsonify({'success': False, 'error': 'detections (liste non vide) requis'})
+        if len(events) > 50000:
+            return jsonify({'success': False, 'error': 'Lot trop grand (max 50000)'})
+        
+        import waste_classifier
+        waste_classifier.init_database()
+        
+        result = waste_classifier.classify_batch(events)
+        
+        waste_classifier.cleanup()
+        
+        if result is None:
+            return jsonify({'success': False, 'error': "Échec de l'enregistrement du lot"})
+        return jsonify({
+            'success': True,
+            'received': len(events),
+            'logged': result['logged'],
+            'per_bin': result['per_bin'],
+            'unknown': result['unknown'],
+            'invalid': result['invalid'],
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/waste/aliases', methods=['GET', 'POST'])
+def waste_aliases():
+    """
+    Alias d'objets (autre nom → objet connu)
+    GET : liste ; POST {"alias": "soda can", "item_name": "can"} : ajoute un alias
+    """
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        import waste_classifier
+        waste_classifier.init_database()
+        
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            alias = data.get('alias', '').strip()
+            item_name = data.get('item_name', '').strip()
+            if not alias or not item_name:
+                waste_classifier.cleanup()
+                return jsonify({'success': False, 'error': 'alias et item_name requis'})
+            if not waste_classifier.add_alias(alias, item_name):
+                waste_classifier.cleanup()
+                return jsonify({'success': False, 'error': f'Objet inconnu: {item_name}'})
+        
+        aliases = waste_classifier.get_aliases()
+        waste_classifier.cleanup()
+        return jsonify({'success': True, 'aliases': aliases})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# ============= API FILE DE RÉVISION ============= 
+
+@app.route('/api/review')
+def review_list():
+    """
+    Liste la file de révision (mode apprentissage)
+    Paramètres : status (pending|confirmed|relabeled|rejected), limit, after_id
+    """
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        import review_queue
+        status = request.args.get('status', 'pending')
+        if status not in review_queue.REVIEW_STATUSES:
+            return jsonify({'success': False, 'error': f'Statut invalide: {status}'})
+        limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+        after_id = request.args.get('after_id', type=int)
+        
+        items, total = review_queue.list_reviews(status, limit, after_id)
+        return jsonify({
+            'success': True,
+            'items': items,
+            'total': total,
+            'next_after_id': items[-1]['id'] if len(items) == limit else None
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/review/<int:review_id>/image')
+def review_image(review_id):
+    """Image d'un élément en attente de révision"""
+    import sys
+    from pathlib import Path
+    src_dir = Path(__file__).resolve().parent.parent / 'src'
+    sys.path.insert(0, str(src_dir))
+    
+    import review_queue
+    item = review_queue.get_review(review_id)
+    if item is None:
+        return jsonify({'success': False, 'error': 'Élément introuvable'}), 404
+    path = review_queue.frame_path(item)
+    if not path.exists():
+        return jsonify({'success': False, 'error': 'Image déjà traitée ou supprimée'}), 404
+    return send_file(str(path), mimetype='image/jpeg')
+
+
+@app.route('/api/review/<int:review_id>', methods=['POST'])
+def review_resolve(review_id):
+    """
+    Valide un élément de la file de révision
+    Corps : {"action": "confirm"} | {"action": "relabel", "label": "can", "bin_color": "yellow"}
+            | {"action": "reject"}
+    bin_color (optionnel) enregistre le bac du nouveau nom s'il est inconnu.
+    """
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        data = request.get_json() or {}
+        action = data.get('action', '')
+        label = data.get('label')
+        bin_color = data.get('bin_color')
+        
+        import review_queue
+        import waste_classifier
+        from config import VALID_BINS
+        if bin_color and bin_color not in VALID_BINS:
+            return jsonify({'success': False, 'error': f'Bac invalide: {bin_color}'})
+        
+        try:
+            item = review_queue.resolve_review(review_id, action, label)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)})
+        if item is None:
+            return jsonify({'success': False, 'error': 'Élément introuvable ou déjà traité'}), 404
+        
+        if action == 'relabel' and bin_color:
+            waste_classifier.init_database()
+            if waste_classifier.get_bin_color(item['final_class']) is None:
+                waste_classifier.save_to_database(item['final_class'], bin_color)
+            waste_classifier.cleanup()
+        
+        return jsonify({'success': True, 'item': item})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 # ============= API CAMÉRA ============= 
 
 @app.route('/api/camera/status')
@@ -477,6 +849,80 @@ def camera_status():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e), 'connected': False})
 
+_preview_hub = None
+
+
+@app.route('/api/camera/stream')
+def camera_stream():
+    """
+    Aperçu MJPEG de la dernière image annotée du détecteur (mémoire partagée)
+    Paramètres : width (320|640|960, largeur la plus proche), fps (cadence max pour ce client)
+    """
+    global _preview_hub
+    if not CV2_AVAILABLE:
+        return jsonify({'success': False, 'error': 'opencv-python non installé'}), 503
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        import frame_share
+        from config import PREVIEW_MAX_FPS
+        if not frame_share.preview_available():
+            return jsonify({'success': False, 'error': 'Aucun aperçu publié (détecteur arrêté ?)'}), 503
+        if _preview_hub is None:
+            _preview_hub = frame_share.PreviewHub()
+        width = request.args.get('width', 640, type=int)
+        fps = request.args.get('fps', PREVIEW_MAX_FPS, type=float)
+        
+        return Response(_preview_hub.stream(width, fps),
+                        mimetype=f'multipart/x-mixed-replace; boundary={frame_share.BOUNDARY}',
+                        headers={'Cache-Control': 'no-cache'})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# ============= API ÉTAT DES COMPOSANTS ============= 
+
+@app.route('/api/runtime/status')
+def runtime_status():
+    """Récupère l'état publié par les composants (détecteur, postes, ...)"""
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        import status_report
+        
+        return jsonify({
+            'success': True,
+            'components': status_report.read_all_status(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/shadow/status')
+def shadow_status():
+    """Accord et latences du modèle candidat en observation (SHADOW_MODEL_PATH)"""
+    try:
+        import sys
+        from pathlib import Path
+        src_dir = Path(__file__).resolve().parent.parent / 'src'
+        sys.path.insert(0, str(src_dir))
+        
+        import status_report
+        
+        shadow = status_report.read_status('shadow')
+        return jsonify({
+            'success': True,
+            'active': shadow is not None,
+            'shadow': shadow
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 # ============= API ARDUINO ============= 
 
 @app.route('/api/arduino/status')
@@ -47,13 +47,35 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // ============= CAMERA REFRESH ============= 
+    // ============= APERÇU CAMÉRA (MJPEG) ============= 
+    const cameraStream = document.getElementById('camera-stream');
+    const cameraPlaceholder = document.getElementById('camera-placeholder');
+    const cameraWidth = document.getElementById('camera-width');
+    
+    function startCameraStream() {
+        if (!cameraStream) return;
+        const width = cameraWidth ? cameraWidth.value : 640;
+        // Paramètre t : nouvelle connexion (le navigateur ne réutilise pas l'ancien flux)
+        cameraStream.src = `/api/camera/stream?width=${width}&fps=10&t=${Date.now()}`;
+        cameraStream.style.display = 'block';
+        cameraPlaceholder.style.display = 'none';
+    }
+    
+    if (cameraStream) {
+        // Erreur : détecteur arrêté (aucun aperçu publié) ou OpenCV absent côté admin
+        cameraStream.addEventListener('error', () => {
+            cameraStream.style.display = 'none';
+            cameraPlaceholder.style.display = 'flex';
+        });
+        startCameraStream();
+    }
+    if (cameraWidth) cameraWidth.addEventListener('change', startCameraStream);
+    
     const cameraRefreshBtn = document.getElementById('camera-refresh');
     if (cameraRefreshBtn) {
         cameraRefreshBtn.addEventListener('click', () => {
             console.log('Actualisation de la caméra');
-            // TODO: Intégrer avec le streaming caméra réel
-            alert('Caméra actualisée');
+            startCameraStream();
         });
     }
 
@@ -401,6 +423,8 @@ document.addEventListener('DOMContentLoaded', () => {
     setInterval(updateGPUInfo, 3000);
     setInterval(updateBinsStatus, 5000);
     setInterval(updateDetectionsHistory, 10000);
+    updateShadowStatus();
+    setInterval(updateShadowStatus, 10000);
 
     // ============= GESTION DES BACS ============= 
     
@@ -485,6 +509,45 @@ document.addEventListener('DOMContentLoaded', () => {
             .catch(err => console.error('Erreur detections history:', err));
     }
     
+    function updateShadowStatus() {
+        fetch('/api/shadow/status')
+            .then(res => res.json())
+            .then(data => {
+                if (!data.success || !data.active) return;
+                const shadow = data.shadow;
+                const latency = shadow.latency_ms || {};
+                const p50 = stats => (stats ? stats.p50.toFixed(1) : '-');
+                const updated = new Date(shadow.updated_at * 1000).toLocaleString('fr-FR');
+                
+                document.getElementById('shadow-model').textContent =
+                    `${shadow.model_name} - une image sur ${shadow.sample_every}, ` +
+                    (shadow.sizes && Object.keys(shadow.sizes).length
+                        ? `YOLO complet (${Object.keys(shadow.sizes).map(size =>
+                            size === 'auto' ? size : `${size} px`).join(' / ')}), ` : '') +
+                    `budget CPU ${Math.round(shadow.cpu_budget * 100)}% (mis à jour ${updated})`;
+                document.getElementById('shadow-agreement').textContent =
+                    shadow.agreement === null ? '-' : (shadow.agreement * 100).toFixed(1) + '%';
+                document.getElementById('shadow-latency').textContent =
+                    `${p50(latency.shadow)} / ${p50(latency.primary)} ms`;
+                document.getElementById('shadow-compared').textContent = shadow.compared;
+                document.getElementById('shadow-cpu').textContent =
+                    shadow.cpu_share === null ? '-' : Math.round(shadow.cpu_share * 100) + '%';
+                
+                const tbody = document.querySelector('#shadow-disagreements tbody');
+                tbody.innerHTML = '';
+                shadow.disagreements.forEach(item => {
+                    const row = document.createElement('tr');
+                    row.innerHTML = `
+                        <td>${item.primary}</td>
+                        <td>${item.shadow}</td>
+                        <td>${item.count}</td>
+                    `;
+                    tbody.appendChild(row);
+                });
+            })
+            .catch(err => console.error('Erreur shadow status:', err));
+    }
+    
     // Boutons "Vider" pour les bacs
     document.querySelectorAll('.section#section-bins .btn-secondary').forEach(btn => {
         btn.addEventListener('click', function() {
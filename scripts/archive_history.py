@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Archivage de l'historique
+Déplace les détections plus anciennes que HISTORY_RETENTION_DAYS (ou le
+nombre de jours donné) vers data/archive/ (un fichier NDJSON gzip par mois)
+et compacte la base (VACUUM).
+Usage : python3 scripts/archive_history.py [jours]
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def main():
+    import waste_classifier
+    import history_archive
+
+    retention_days = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    if retention_days is None and history_archive.HISTORY_RETENTION_DAYS is None:
+        print("ℹ Rétention désactivée (HISTORY_RETENTION_DAYS = None) : préciser un nombre de jours")
+        return 1
+
+    waste_classifier.init_database()
+    try:
+        # Script lancé à la main : on peut compacter la base (VACUUM) après l'archivage
+        archived = waste_classifier.apply_retention_policy(retention_days, vacuum=True)
+        print(f"\n✓ {archived} détections archivées")
+        for month, meta in sorted(history_archive.load_index().items()):
+            print(f"  {month} : {meta['rows']:8} lignes  {meta['bytes'] // 1024:6} Ko  ({meta['file']})")
+    finally:
+        waste_classifier.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
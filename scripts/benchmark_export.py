@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Benchmark de l'export en streaming
+Crée une base temporaire de N détections (10 millions par défaut), puis
+exporte l'historique en CSV / NDJSON, avec et sans gzip, en mesurant le débit
+et le pic de mémoire : le pic doit rester stable quel que soit N.
+Usage : python3 scripts/benchmark_export.py [nombre_de_lignes]
+"""
+
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus (Mo, Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def fill_database(conn, total, batch=50000):
+    """Insère total détections synthétiques, par paquets (mémoire constante)."""
+    items = [("plastic_bottle", "yellow"), ("paper", "yellow"), ("can", "yellow"),
+             ("banana_peel", "green"), ("food", "green"), ("tissue", "brown")]
+    start = datetime(2020, 1, 1)
+    inserted = 0
+    while inserted < total:
+        n = min(batch, total - inserted)
+        rows = []
+        for i in range(inserted, inserted + n):
+            item, bin_color = items[i % len(items)]
+            timestamp = (start + timedelta(seconds=i * 10)).isoformat()
+            rows.append((bin_color, item, timestamp, round(random.uniform(0.5, 1.0), 3)))
+        conn.executemany("""
+            INSERT INTO sorting_history (bin_color, item_name, timestamp, confidence)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        inserted += n
+        print(f"\r  {inserted:,} / {total:,} lignes", end="", flush=True)
+    print()
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+
+    import waste_classifier
+    import history_export
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path = tmp / "benchmark.db"
+
+        print(f"[*] Création de la base de test ({total:,} lignes)...")
+        waste_classifier.DB_PATH = db_path
+        waste_classifier.init_database()
+        fill_database(waste_classifier._conn, total)
+        waste_classifier.cleanup()
+        print(f"[✓] Base : {db_path.stat().st_size / 1024**2:.0f} Mo, pic mémoire {peak_rss_mb():.0f} Mo\n")
+
+        print(f"{'format':14} {'durée':>8} {'lignes/s':>12} {'taille':>10} {'pic mém.':>10}")
+        print("-" * 58)
+        for fmt in ("csv", "ndjson"):
+            for compress in (False, True):
+                out = tmp / history_export.export_filename(fmt, compress)
+                start = time.perf_counter()
+                _, size = history_export.export_to_file(fmt, compress, path=out, db_path=db_path)
+                elapsed = time.perf_counter() - start
+                label = fmt + (" + gzip" if compress else "")
+                print(f"{label:14} {elapsed:7.1f}s {total / elapsed:12,.0f} "
+                      f"{size / 1024**2:8.0f}Mo {peak_rss_mb():8.0f}Mo")
+                out.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
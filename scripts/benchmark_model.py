@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Banc d'essai d'un modèle
+Évalue un modèle sur le jeu de données construit (scripts/build_dataset.py) :
+mAP, précision / rappel par classe, latence par image, pic de mémoire.
+Le résultat est enregistré en JSON dans data/benchmarks/ ; --compare affiche
+les résultats précédents côte à côte.
+Usage : python3 scripts/benchmark_model.py [--model best.pt] [--backend torch] [--size 640]
+        python3 scripts/benchmark_model.py --compare
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def print_comparison(results):
+    """Tableau des résultats enregistrés (un par ligne)"""
+    print(f"\n{'date':19}  {'modèle':18} {'moteur':8} {'taille':>6} {'mAP50':>6} {'mAP50-95':>8}"
+          f" {'p50 ms':>7} {'p99 ms':>7} {'RSS Mo':>7}")
+    for r in results:
+        latency = r.get("latency_ms") or {}
+        print(f"{r['created_at']:19}  {Path(r['model']).name[:18]:18} {r['backend']:8} "
+              f"{str(r.get('size') or '-'):>6} {r['map50']:6.3f} {r.get('map50_95', 0.0):8.3f}"
+              f" {latency.get('p50', 0):7.1f} {latency.get('p99', 0):7.1f} {r.get('peak_rss_mb', 0):7.0f}")
+
+
+def main():
+    from config import MODEL_PATH
+    import model_eval
+
+    parser = argparse.ArgumentParser(description="Banc d'essai d'un modèle YOLO")
+    parser.add_argument("--model", default=MODEL_PATH, help="poids du modèle")
+    parser.add_argument("--backend", default="torch", choices=sorted(model_eval.BACKENDS))
+    parser.add_argument("--split", default="val", choices=("val", "test", "train"))
+    parser.add_argument("--size", type=int, default=None, help="taille d'entrée du modèle")
+    parser.add_argument("--compare", action="store_true", help="afficher les résultats enregistrés")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(model_eval.load_results())
+        return 0
+
+    result = model_eval.evaluate(args.model, split=args.split, size=args.size, backend=args.backend)
+    path = model_eval.save_result(result)
+
+    print(f"\n✓ {result['images']} images ({result['split']}) - {result['model']} [{result['backend']}]")
+    print(f"  mAP@0.5 {result['map50']:.3f}   mAP@0.5:0.95 {result['map50_95']:.3f}"
+          f"   (précision / rappel à conf ≥ {result['confidence_threshold']})")
+    for name, entry in result["per_class"].items():
+        precision = f"{entry['precision']:.2f}" if entry["precision"] is not None else "  - "
+        recall = f"{entry['recall']:.2f}" if entry["recall"] is not None else "  - "
+        ap = f"{entry['ap']:.3f}" if entry["ap"] is not None else "  -  "
+        print(f"  {name:20} AP {ap}  P {precision}  R {recall}  ({entry['truths']} objets)")
+    if result["latency_ms"]:
+        lat = result["latency_ms"]
+        print(f"  Latence : moyenne {lat['mean']} ms, p50 {lat['p50']}, p90 {lat['p90']}, "
+              f"p99 {lat['p99']}, max {lat['max']}")
+    if result["breakdown_ms"]:
+        parts = ", ".join(f"{stage} {values['mean']} ms" for stage, values in result["breakdown_ms"].items())
+        print(f"  Détail : {parts}")
+    print(f"  Pic mémoire : {result['peak_rss_mb']} Mo")
+    print(f"  → {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Banc d'essai du prétraitement des images
+1. Temps et mémoire allouée par image : tampons neufs à chaque image contre
+   tampons réutilisés (src/preprocess.py)
+2. Avec un modèle .pt (torch installé) : latence et détections des chemins
+   BGR (ancien comportement), AutoShape (RGB) et prétraitement explicite,
+   comparés au chemin AutoShape
+Les images viennent de data/training_images/ (sinon des images aléatoires à la
+résolution de la caméra).
+Usage : python3 scripts/benchmark_preprocess.py [--model best.pt] [--size 640] [--images 50]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def load_frames(count):
+    """Images d'entraînement (toutes classes), sinon images aléatoires"""
+    import cv2
+    import numpy as np
+    from config import FRAME_WIDTH, FRAME_HEIGHT
+    from quantize import calibration_images
+
+    frames = [cv2.imread(str(path)) for path in calibration_images(count)]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        print("ℹ Aucune image d'entraînement : images aléatoires")
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+                  for _ in range(min(count, 10))]
+    return frames
+
+
+def main():
+    from config import MODEL_PATH
+    import preprocess
+
+    parser = argparse.ArgumentParser(description="Banc d'essai du prétraitement")
+    parser.add_argument("--model", default=MODEL_PATH, help="poids du modèle (.pt)")
+    parser.add_argument("--size", type=int, default=640, help="taille d'entrée du modèle")
+    parser.add_argument("--images", type=int, default=50, help="nombre d'images")
+    parser.add_argument("--iterations", type=int, default=200, help="répétitions du prétraitement")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images)
+    print(f"\n📐 Prétraitement ({len(frames)} images, entrée {args.size})")
+    for name, entry in preprocess.benchmark(frames, args.size, args.iterations).items():
+        print(f"  {name:11} {entry['ms']:7.3f} ms/image   {entry['alloc_kb']:9.1f} Ko alloués/image")
+
+    if Path(args.model).suffix != ".pt" or not Path(args.model).exists():
+        print(f"\nℹ Pas de modèle .pt ({args.model}) : comparaison des détections ignorée")
+        return 0
+    try:
+        from yolo_detector import load_model
+        detector = load_model(args.model)
+    except ImportError as e:
+        print(f"\nℹ Comparaison des détections ignorée : dépendance manquante ({e.name})")
+        return 0
+
+    print(f"\n🔍 Détections comparées au chemin AutoShape (RGB) - {Path(args.model).name}")
+    print(f"  {'chemin':10} {'p50 ms':>7} {'p90 ms':>7} {'accord':>7} {'app.':>5} {'manq.':>5}"
+          f" {'en +':>5} {'écart px':>8}")
+    for path, entry in preprocess.compare_paths(detector, frames, args.size).items():
+        latency = entry["latency_ms"] or {}
+        error = f"{entry['box_error_px']:8.2f}" if entry["box_error_px"] is not None else f"{'-':>8}"
+        print(f"  {path:10} {latency.get('p50', 0):7.1f} {latency.get('p90', 0):7.1f}"
+              f" {entry['agreement'] * 100:6.1f}% {entry['matched']:5} {entry['missing']:5}"
+              f" {entry['extra']:5} {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
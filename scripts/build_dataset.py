@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Construction du jeu de données YOLO
+Transforme data/training_images/ en jeu de données entraînable
+(data/dataset/ : images, labels, data.yaml). Incrémental : relancer ne traite
+que les images ajoutées ou modifiées depuis la dernière construction.
+Les ids de classe suivent ceux du modèle en service (--model, best.pt par défaut).
+Usage : python3 scripts/build_dataset.py [--rebuild] [--workers N] [--model PATH | --no-model]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def main():
+    from config import DATASET_DIR, MODEL_PATH
+    import dataset_builder
+
+    parser = argparse.ArgumentParser(description="Construction du jeu de données YOLO")
+    parser.add_argument("--rebuild", action="store_true", help="tout retraiter")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="modèle dont les ids de classe sont repris")
+    parser.add_argument("--no-model", action="store_true", help="ids des constructions précédentes seulement")
+    args = parser.parse_args()
+
+    model_names = None if args.no_model else dataset_builder.model_class_names(args.model)
+    if model_names is None and not args.no_model:
+        print(f"⚠ Classes de {args.model} indisponibles : ids des constructions précédentes")
+    report = dataset_builder.build_dataset(workers=args.workers, rebuild=args.rebuild,
+                                           model_names=model_names)
+    print(f"\n✓ Jeu de données : {DATASET_DIR}  ({report['seconds']} s)")
+    print(f"  {report['sources']} images sources : {report['processed']} traitées, "
+          f"{report['unchanged']} inchangées, {report['removed']} retirées")
+    for status, count in sorted(report["status"].items()):
+        print(f"  {status:10} {count:6}")
+    print(f"  train {report['splits']['train']}  /  val {report['splits']['val']}"
+          f"  /  test {report['splits']['test']}")
+    for class_id, name in enumerate(report["classes"]):
+        print(f"  {class_id:3} {name:20} {report['per_class'][name]:6}")
+    if report["splits"]["train"] and not (report["splits"]["val"] and report["splits"]["test"]):
+        print("⚠ Aucune image de validation ou de test : ajoutez des exemples avant d'entraîner")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Planificateur de réentraînement
+Tourne à côté du détecteur : réentraîne le modèle pendant les périodes calmes
+avec les images collectées, et remplace src/models/best.pt si le nouveau
+modèle fait mieux sur la partie test du jeu de données (PROMOTION_SPLIT),
+que l'entraînement ne voit jamais.
+Usage : python3 scripts/finetune_scheduler.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def main():
+    from config import FINETUNE_CHECK_INTERVAL, FINETUNE_NICE
+    from finetune import FineTuneScheduler
+
+    # Le planificateur (construction du jeu de données, évaluation) reste lui aussi discret
+    os.nice(FINETUNE_NICE)
+    scheduler = FineTuneScheduler()
+    print(f"🏋 Planificateur de réentraînement : état {scheduler.state['status']}")
+    try:
+        while True:
+            scheduler.step()
+            time.sleep(FINETUNE_CHECK_INTERVAL)
+    except KeyboardInterrupt:
+        print("\n⚠ Interrompu par l'utilisateur")
+    finally:
+        if scheduler.process is not None:
+            # L'entraînement sera repris au prochain lancement
+            scheduler.interrupt()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
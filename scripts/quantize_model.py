@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Modèles réduits et compromis précision / latence
+Exporte best.pt en ONNX (FP32), le convertit en FP16 et le quantifie en INT8
+(calibration sur data/training_images/), puis compare les variantes sur les
+images de validation (scripts/build_dataset.py) : mAP, latence, mémoire.
+Usage : python3 scripts/quantize_model.py [--model best.pt] [--size 416]
+                                          [--precisions fp32,fp16,int8] [--no-eval]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def main():
+    from config import MODEL_PATH, QUANTIZE_IMAGE_SIZE, QUANTIZE_CALIBRATION_IMAGES
+    import quantize
+
+    parser = argparse.ArgumentParser(description="Modèles ONNX FP32 / FP16 / INT8")
+    parser.add_argument("--model", default=MODEL_PATH, help="poids du modèle (.pt)")
+    parser.add_argument("--size", type=int, default=QUANTIZE_IMAGE_SIZE, help="taille d'entrée fixe")
+    parser.add_argument("--precisions", default=",".join(quantize.PRECISIONS))
+    parser.add_argument("--calibration", type=int, default=QUANTIZE_CALIBRATION_IMAGES,
+                        help="nombre d'images de calibration INT8")
+    parser.add_argument("--no-eval", action="store_true", help="ne pas comparer les variantes")
+    args = parser.parse_args()
+
+    precisions = [p.strip() for p in args.precisions.split(",") if p.strip()]
+    produced = quantize.quantize_model(args.model, precisions, args.size, args.calibration)
+    if args.no_eval or not produced:
+        return 0
+
+    models = {"pt": args.model}
+    models.update(produced)
+    rows = quantize.compare_models(models, reference="pt", size=args.size)
+    print(f"\n{'variante':8} {'Mo':>6} {'mAP50':>6} {'écart':>7} {'p50 ms':>7} {'p99 ms':>7}"
+          f" {'gain':>5} {'RSS Mo':>7}")
+    for row in rows:
+        speedup = f"x{row['speedup']}" if row["speedup"] else "-"
+        print(f"{row['name']:8} {row['size_mb']:6.1f} {row['map50']:6.3f} {row['map50_delta']:+7.3f}"
+              f" {row['p50_ms'] or 0:7.1f} {row['p99_ms'] or 0:7.1f} {speedup:>5} {row['peak_rss_mb']:7.0f}")
+    print("\nPour utiliser une variante : MODEL_PATH = str(MODELS_DIR / \"<fichier>.onnx\") dans src/config.py")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
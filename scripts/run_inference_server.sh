@@ -0,0 +1,4 @@
+#!/bin/bash
+# Serveur d'inférence : charge le modèle YOLO une seule fois pour tous les clients locaux
+cd "$(dirname "$0")/.."
+exec python3 src/inference_server.py
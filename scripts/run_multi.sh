@@ -0,0 +1,4 @@
+#!/bin/bash
+# Mode multi-postes : plusieurs caméras + un seul modèle YOLO → tri (multi_station)
+cd "$(dirname "$0")/.."
+exec python3 src/multi_station.py
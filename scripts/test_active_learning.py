@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la capture des cas incertains (apprentissage actif)
+Horloge simulée : raisons de capture, limite par classe et budget horaire.
+Usage : python3 scripts/test_active_learning.py
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+BOX = [100, 100, 200, 200]
+NEAR = [105, 102, 205, 198]
+FAR = [400, 300, 480, 380]
+
+
+def det(class_name, confidence, bbox=BOX):
+    return {'class': class_name, 'confidence': confidence, 'bbox': list(bbox)}
+
+
+def policy(**kwargs):
+    from active_learning import CapturePolicy
+
+    options = dict(threshold=0.5, margin=0.15, flicker_window=8, class_interval=30.0, max_per_hour=60)
+    options.update(kwargs)
+    return CapturePolicy(**options)
+
+
+def test_box_iou():
+    """Test 1 : intersection sur union"""
+    print("\n[1] IoU")
+    try:
+        from active_learning import box_iou
+
+        assert box_iou(BOX, BOX) == 1.0
+        assert box_iou(BOX, FAR) == 0.0
+        assert abs(box_iou([0, 0, 10, 10], [5, 0, 15, 10]) - 50 / 150) < 1e-9
+        assert box_iou([0, 0, 0, 0], [0, 0, 0, 0]) == 0.0
+        print("   ✓ boîtes identiques, disjointes, à moitié superposées, vides")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_reasons():
+    """Test 2 : confiance faible, changement de classe, désaccord, cas sûr"""
+    print("\n[2] Raisons de capture")
+    try:
+        p = policy()
+        assert p.evaluate([det("can", 0.95)], now=0.0) is None
+        reason, best = p.evaluate([det("paper", 0.55)], now=1.0)
+        assert reason == "low_confidence" and best['class'] == "paper"
+
+        p = policy()
+        frames = [det("can", 0.9), det("plastic_bottle", 0.9, NEAR), det("can", 0.9)]
+        outcomes = [p.evaluate([d], now=float(t)) for t, d in enumerate(frames)]
+        assert outcomes[:2] == [None, None] and outcomes[2][0] == "flicker", outcomes
+
+        p = policy()
+        for t, d in enumerate([det("can", 0.9), det("plastic_bottle", 0.9, FAR), det("can", 0.9)]):
+            assert p.evaluate([d], now=float(t)) is None  # Objets différents : pas de changement
+
+        p = policy()
+        reason, best = p.evaluate([det("can", 0.9), det("glass", 0.8, NEAR)], now=0.0)
+        assert reason == "disagreement" and best['class'] == "can"
+        assert p.evaluate([], now=1.0) is None and not p._history
+        assert p.report()['captured'] == {"low_confidence": 0, "flicker": 0, "disagreement": 1}
+        print("   ✓ low_confidence, flicker (même objet seulement), disagreement")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_limits():
+    """Test 3 : une capture par classe et par intervalle, budget horaire"""
+    print("\n[3] Limites")
+    try:
+        p = policy(class_interval=30.0, max_per_hour=3)
+        assert p.evaluate([det("can", 0.55)], now=0.0)
+        assert p.evaluate([det("can", 0.55)], now=10.0) is None
+        assert p.evaluate([det("paper", 0.55)], now=10.0)
+        assert p.evaluate([det("can", 0.55)], now=31.0)
+        assert p.evaluate([det("glass", 0.55)], now=40.0) is None and p.rate_limited == 1
+        assert p.evaluate([det("glass", 0.55)], now=3601.0)  # Première capture sortie du budget
+        assert p.report()['last_hour'] == 3
+        print("   ✓ intervalle par classe et budget de 3 captures par heure respectés")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test apprentissage actif\n" + "=" * 50)
+    results = [test_box_iou(), test_reasons(), test_limits()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
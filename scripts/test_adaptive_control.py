@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la régulation de cadence (taille d'entrée / pas d'images)
+Horloge simulée : descente quand la boucle est trop lente, pas d'oscillation,
+nouvel essai après expiration d'une mesure, marge plafonnée par la caméra.
+Usage : python3 scripts/test_adaptive_control.py
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def controller(**kwargs):
+    from adaptive_control import AdaptiveController
+
+    options = dict(target_fps=25, sizes=[640, 480, 320], max_stride=3, window=1.0, camera_fps=30)
+    options.update(kwargs)
+    ctrl = AdaptiveController(**options)
+    ctrl._window_start = 0.0
+    return ctrl
+
+
+def run_window(ctrl, start, fps):
+    """Une fenêtre d'une seconde à fps images ; retourne True si le point a changé"""
+    for _ in range(fps - 1):
+        assert not ctrl.record_frame(start)
+    return ctrl.record_frame(start + 1.0)
+
+
+def test_degrade():
+    """Test 1 : trop lent → taille inférieure, puis pas supérieur"""
+    print("\n[1] Descente")
+    try:
+        ctrl = controller()
+        points = []
+        for t in range(5):
+            run_window(ctrl, float(t), 10)
+            points.append((ctrl.size, ctrl.stride))
+        assert points == [(480, 1), (320, 1), (320, 2), (320, 3), (320, 3)], points
+        assert ctrl.adjustments == 4 and ctrl.report()['input_size'] == 320
+        assert [ctrl.should_infer() for _ in range(6)] == [False, False, True, False, False, True]
+        print("   ✓ 640 → 480 → 320, puis une image sur 2 puis sur 3")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_no_oscillation_then_retry():
+    """Test 2 : point mesuré trop lent non réessayé avant expiration, puis réessayé"""
+    print("\n[2] Mesures et nouvel essai")
+    try:
+        from adaptive_control import MEASURE_EXPIRY
+
+        ctrl = controller()
+        assert run_window(ctrl, 0.0, 20) and ctrl.size == 480
+        # 28 FPS < 25 × 1,3 : sans nouvel essai, la taille 640 ne serait jamais retrouvée
+        t = 1.0
+        while t < MEASURE_EXPIRY + 1.0:
+            assert not run_window(ctrl, t, 28), t
+            t += 1.0
+        assert run_window(ctrl, t, 28) and ctrl.size == 640
+        assert ctrl.last_adjustment['reason'] == "nouvel essai"
+        print(f"   ✓ 640 réessayé après {MEASURE_EXPIRY:.0f} s, pas avant")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_camera_ceiling():
+    """Test 3 : point jamais mesuré, boucle au plafond de la caméra → essayé"""
+    print("\n[3] Plafond caméra")
+    try:
+        ctrl = controller(target_fps=25, camera_fps=30)
+        ctrl.size_index, ctrl.stride = 1, 2
+        assert run_window(ctrl, 0.0, 28) and (ctrl.size, ctrl.stride) == (480, 1)
+        assert run_window(ctrl, 1.0, 28) and (ctrl.size, ctrl.stride) == (640, 1)
+        assert not run_window(ctrl, 2.0, 28)
+
+        ctrl = controller(target_fps=25, camera_fps=None)
+        ctrl.size_index = 1
+        assert not run_window(ctrl, 0.0, 28)
+        assert run_window(ctrl, 1.0, 33) and ctrl.size == 640
+        print("   ✓ marge plafonnée par la cadence caméra, marge de 30 % sinon")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test régulation de cadence\n" + "=" * 50)
+    results = [test_degrade(), test_no_oscillation_then_retry(), test_camera_ceiling()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
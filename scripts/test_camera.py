@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la capture caméra basse latence (sans caméra)
+Vérifie le pipeline CSI borné et FrameGrabber avec une fausse caméra.
+Usage : python3 scripts/test_camera.py
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+class FakeCapture:
+    """Fausse cv2.VideoCapture : images numérotées, panne après `frames` images"""
+
+    def __init__(self, frames=1000, delay=0.002):
+        self.frames = frames
+        self.delay = delay
+        self.grabbed = 0
+        self.released = False
+        self._lock = threading.Lock()
+
+    def grab(self):
+        time.sleep(self.delay)
+        with self._lock:
+            if self.grabbed >= self.frames:
+                return False
+            self.grabbed += 1
+            return True
+
+    def retrieve(self):
+        with self._lock:
+            return True, self.grabbed
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        self.released = True
+
+
+def test_csi_pipeline():
+    """Test 1 : appsink borné à une image en basse latence"""
+    print("\n[1] Pipeline CSI")
+    try:
+        from camera import get_csi_pipeline
+
+        pipeline = get_csi_pipeline(width=640, height=480, fps=30)
+        assert "drop=true max-buffers=1 sync=false" in pipeline
+        assert "drop=true" not in get_csi_pipeline(low_latency=False)
+        print("   ✓ appsink drop=true max-buffers=1 sync=false")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_threaded_latest_frame():
+    """Test 2 : le thread ne rend que l'image la plus récente, jamais deux fois"""
+    print("\n[2] FrameGrabber (thread)")
+    try:
+        from camera import FrameGrabber, frame_age_ms
+
+        cap = FakeCapture()
+        grabber = FrameGrabber(cap, threaded=True).start()
+        seen = []
+        for _ in range(5):
+            ok, frame, capture_ts = grabber.read()
+            assert ok and frame_age_ms(capture_ts) >= 0
+            seen.append(frame)
+            time.sleep(0.02)  # Boucle plus lente que la caméra
+        assert seen == sorted(set(seen)), seen
+        assert seen[-1] - seen[0] > len(seen), "images intermédiaires non jetées"
+        grabber.release()
+        assert cap.released
+        print(f"   ✓ images lues {seen} (les autres jetées)")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_camera_failure():
+    """Test 3 : caméra en panne → read() échoue sans bloquer, failed = True"""
+    print("\n[3] Panne caméra")
+    try:
+        from camera import FrameGrabber
+
+        grabber = FrameGrabber(FakeCapture(frames=1), threaded=True).start()
+        assert grabber.read()[0]
+        start = time.monotonic()
+        ok, frame, _ = grabber.read(timeout=1.0)
+        assert not ok and frame is None
+        assert time.monotonic() - start < 1.0
+        assert grabber.failed
+        grabber.release()
+
+        sync = FrameGrabber(FakeCapture(frames=1), threaded=False)
+        assert sync.read()[0] and not sync.read()[0]
+        print("   ✓ panne détectée (thread et synchrone)")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test capture caméra\n" + "=" * 50)
+    results = [test_csi_pipeline(), test_threaded_latest_frame(), test_camera_failure()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la cascade classifieur de zone / YOLO
+Classifieur simulé : zone vide, objet reconnu, repli sur YOLO quand le
+classifieur hésite ou que la zone sort de l'image, statistiques par étage.
+Usage : python3 scripts/test_cascade.py
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+FRAME = np.zeros((480, 640, 3), dtype=np.uint8)
+ROI = (100, 50, 300, 250)
+YOLO_DETECTION = {'class': 'can', 'class_id': 0, 'confidence': 0.7, 'bbox': [120, 80, 180, 160]}
+
+
+class ScriptedClassifier:
+    """Classifieur qui rend les réponses prévues et garde la taille des zones reçues"""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.crops = []
+
+    def classify(self, crop):
+        self.crops.append(crop.shape[:2])
+        return self.answers.pop(0)
+
+
+def run(answers, roi=ROI, calls=None):
+    """Cascade passée sur FRAME (une image par réponse prévue, sauf calls)"""
+    from cascade import DetectionCascade
+
+    classifier = ScriptedClassifier(answers)
+    cascade = DetectionCascade(classifier, confidence=0.8, empty_class="empty",
+                               model_names={0: "can", 1: "paper"})
+    yolo_calls = []
+
+    def detect(image):
+        yolo_calls.append(image.shape[:2])
+        return [dict(YOLO_DETECTION)]
+
+    outputs = [cascade.infer(FRAME, roi, detect) for _ in range(calls or len(answers))]
+    return cascade, classifier, yolo_calls, outputs
+
+
+def test_decisions():
+    """Test 1 : vide, reconnu, hésitant"""
+    print("\n[1] Décisions")
+    try:
+        cascade, classifier, yolo_calls, outputs = run([("empty", 0.95), ("paper", 0.9), ("paper", 0.6)])
+        assert outputs[0] == []
+        assert outputs[1] == [{'class': 'paper', 'class_id': 1, 'confidence': 0.9,
+                               'bbox': [100.0, 50.0, 300.0, 250.0], 'source': 'classifier'}]
+        assert outputs[2] == [YOLO_DETECTION] and yolo_calls == [(480, 640)]
+        assert classifier.crops == [(200, 200)] * 3
+        assert cascade.counts == {"empty": 1, "classified": 1, "fallback": 1}
+        print("   ✓ zone vide → rien, sûr → boîte de la zone, hésitant → YOLO sur l'image entière")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_roi_outside_frame():
+    """Test 2 : zone hors de l'image ou absente"""
+    print("\n[2] Zone de dépôt")
+    try:
+        cascade, classifier, yolo_calls, outputs = run([], roi=(700, 500, 800, 600), calls=1)
+        assert classifier.crops == [] and outputs == [[YOLO_DETECTION]] and len(yolo_calls) == 1
+
+        cascade, classifier, _, outputs = run([("glass", 0.99)], roi=None)
+        assert classifier.crops == [(480, 640)]
+        assert outputs[0][0]['bbox'] == [0.0, 0.0, 640.0, 480.0] and outputs[0][0]['class_id'] is None
+        print("   ✓ zone hors image → YOLO sans classifieur, sans zone → image entière")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_report():
+    """Test 3 : taux de décisions du classifieur et latences"""
+    print("\n[3] Statistiques")
+    try:
+        from cascade import DetectionCascade
+
+        assert DetectionCascade(ScriptedClassifier([])).report()['classifier_rate'] is None
+        cascade, _, _, _ = run([("empty", 0.9), ("can", 0.9), ("can", 0.5), ("can", 0.1)])
+        report = cascade.report()
+        assert report['frames'] == 4 and report['classifier_rate'] == 0.5
+        assert report['yolo_ms'] is not None and report['avg_ms'] >= report['classifier_ms']
+        print(f"   ✓ 2 images sur 4 décidées par le classifieur")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_read_labels(tmp):
+    """Test 4 : classes lues dans <modèle>.json ou <modèle>.txt"""
+    print("\n[4] Classes du classifieur")
+    try:
+        from cascade import read_labels
+
+        json_model = Path(tmp) / "cls_json.onnx"
+        json_model.with_suffix(".json").write_text(json.dumps({"names": {"1": "can", "0": "empty", "10": "paper"}}))
+        assert read_labels(json_model) == ["empty", "can", "paper"]
+
+        txt_model = Path(tmp) / "cls_txt.onnx"
+        txt_model.with_suffix(".txt").write_text("empty\ncan\n\npaper\n")
+        assert read_labels(txt_model) == ["empty", "can", "paper"]
+        print("   ✓ ids triés numériquement, lignes vides ignorées")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test cascade\n" + "=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [test_decisions(), test_roi_outside_frame(), test_report(), test_read_labels(tmp)]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
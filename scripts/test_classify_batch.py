@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de l'ingestion par lot (/api/waste/classify/batch)
+Base temporaire : évènements valides, inconnus et invalides (timestamps compris).
+Usage : python3 scripts/test_classify_batch.py
+"""
+
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def test_timestamps():
+    """Test 1 : timestamps normalisés au format stocké, illisibles refusés"""
+    print("\n[1] Timestamps")
+    try:
+        from waste_classifier import normalize_timestamp
+
+        assert normalize_timestamp("2026-01-05T10:20:30") == "2026-01-05T10:20:30"
+        assert normalize_timestamp("2026-01-05 10:20:30.500000") == "2026-01-05T10:20:30.500000"
+        utc = normalize_timestamp("2026-01-05T10:20:30Z")
+        assert utc == datetime.fromisoformat("2026-01-05T10:20:30+00:00").astimezone() \
+            .replace(tzinfo=None).isoformat()
+        for bad in ("garbage", "2026-13-01", "", "10:20"):
+            assert normalize_timestamp(bad) is None, bad
+        print("   ✓ ISO normalisé, fuseau converti en heure locale, texte libre refusé")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_batch():
+    """Test 2 : comptes du lot, historique, agrégats et bacs cohérents"""
+    print("\n[2] Lot mixte")
+    try:
+        import waste_classifier
+
+        conn = waste_classifier._conn
+        result = waste_classifier.classify_batch([
+            {"item_name": "can", "confidence": 0.8, "timestamp": "2026-01-05T10:20:30"},
+            {"item_name": "Can", "timestamp": "2026-01-05T10:40:00"},
+            {"item_name": "can", "timestamp": "garbage"},
+            {"item_name": "can", "confidence": "haute"},
+            {"item_name": ""},
+            "pas un dict",
+            {"item_name": "objet_inconnu"},
+        ])
+        assert result['logged'] == 2, result
+        assert result['invalid'] == 4, result
+        assert result['unknown'] == ["objet_inconnu"], result
+        timestamps = [row[0] for row in conn.execute("SELECT timestamp FROM sorting_history ORDER BY id")]
+        assert timestamps == ["2026-01-05T10:20:30", "2026-01-05T10:40:00"], timestamps
+        buckets = [row[0] for row in conn.execute("SELECT bucket FROM sorting_rollup_hourly")]
+        assert buckets == ["2026-01-05T10"], buckets
+        bin_color = waste_classifier.get_bin_color("can")
+        counts = dict(conn.execute("SELECT bin_color, item_count FROM bin_status"))
+        assert counts[bin_color] == 2
+        print("   ✓ 2 enregistrés, 4 invalides, 1 inconnu ; une seule tranche d'agrégat")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test ingestion par lot\n" + "=" * 50)
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        waste_classifier.DB_PATH = Path(tmp) / "waste_items.db"
+        waste_classifier.init_database()
+        try:
+            results = [test_timestamps(), test_batch()]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
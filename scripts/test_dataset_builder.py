@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la construction du jeu de données YOLO
+Dossiers temporaires : ids de classe repris du modèle, nouveaux dossiers à la
+fin, construction incrémentale, labels réécrits quand les ids changent.
+Usage : python3 scripts/test_dataset_builder.py
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def make_training_dir(root, per_class=6):
+    """Images + labels YOLO (id 0 : les labels d'origine sont renumérotés par le builder)"""
+    import cv2
+
+    for class_index, class_name in enumerate(("can", "paper", "plastic_bottle")):
+        folder = root / class_name
+        folder.mkdir(parents=True)
+        for i in range(per_class):
+            image = np.full((120, 160, 3), 40 * class_index + i, dtype=np.uint8)
+            cv2.imwrite(str(folder / f"ok_{i}.jpg"), image)
+            (folder / f"ok_{i}.txt").write_text("0 0.5 0.5 0.25 0.25\n")
+    (root / "_errors" / "can").mkdir(parents=True)
+
+
+def label_ids(dataset_dir):
+    """{classe du fichier: ids lus dans ses labels}"""
+    ids = {}
+    for label in dataset_dir.glob("labels/*/*.txt"):
+        class_name = label.name.split("__")[0]
+        ids.setdefault(class_name, set()).update(int(line.split()[0]) for line in label.read_text().splitlines())
+    return ids
+
+
+def test_class_list():
+    """Test 1 : classes du modèle d'abord, dossiers correspondants par nom normalisé"""
+    print("\n[1] Liste des classes")
+    try:
+        from dataset_builder import class_list
+
+        assert class_list([], {"paper", "can"}) == ["can", "paper"]
+        assert class_list(["paper", "can"], {"can", "glass"}) == ["paper", "can", "glass"]
+        assert class_list(["can", "paper"], {"plastic_bottle", "can"}, ["Plastic Bottle", "can"]) == \
+            ["Plastic Bottle", "can", "paper"]
+        print("   ✓ ordre du modèle, puis classes connues, puis nouveaux dossiers")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_build(tmp):
+    """Test 2 : construction, incrémental, ids du modèle appliqués aux labels"""
+    print("\n[2] Construction")
+    try:
+        from dataset_builder import build_dataset, load_manifest
+
+        training_dir, dataset_dir = Path(tmp) / "training", Path(tmp) / "dataset"
+        make_training_dir(training_dir)
+        report = build_dataset(training_dir, dataset_dir, image_size=64, val_fraction=0.3, workers=1)
+        assert report["classes"] == ["can", "paper", "plastic_bottle"]
+        assert report["status"] == {"ok": 18} and sum(report["splits"].values()) == 18
+        assert label_ids(dataset_dir) == {"can": {0}, "paper": {1}, "plastic_bottle": {2}}
+        assert build_dataset(training_dir, dataset_dir, image_size=64, val_fraction=0.3,
+                             workers=1)["processed"] == 0
+
+        # Réentraînement depuis un modèle dont l'ordre diffère : ids du modèle, labels réécrits
+        report = build_dataset(training_dir, dataset_dir, image_size=64, val_fraction=0.3, workers=1,
+                               model_names=["Plastic Bottle", "can", "glass"])
+        assert report["classes"] == ["Plastic Bottle", "can", "glass", "paper"], report["classes"]
+        assert report["processed"] == 18
+        assert label_ids(dataset_dir) == {"plastic_bottle": {0}, "can": {1}, "paper": {3}}
+        assert report["per_class"] == {"Plastic Bottle": 6, "can": 6, "glass": 0, "paper": 6}
+        names = (dataset_dir / "data.yaml").read_text().splitlines()[-1]
+        assert json.loads(names.split(": ", 1)[1]) == report["classes"]
+        assert load_manifest(dataset_dir)["classes"] == report["classes"]
+        assert build_dataset(training_dir, dataset_dir, image_size=64, val_fraction=0.3, workers=1,
+                             model_names=["Plastic Bottle", "can", "glass"])["processed"] == 0
+        print("   ✓ ids repris du modèle, nouveau dossier à la fin, rien à refaire ensuite")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test construction du jeu de données\n" + "=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [test_class_list(), test_build(tmp)]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la déduplication des images (empreintes dHash)
+Dossiers temporaires : quasi-doublons écartés avant l'écriture en file de
+révision et dans TRAINING_DIR, statistiques publiées par le processus qui écrit.
+Usage : python3 scripts/test_dedup.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def scene(seed, noise=0):
+    """Image de test : blocs aléatoires (seed), avec un léger bruit capteur optionnel"""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    image = np.kron(blocks, np.ones((40, 40, 1), dtype=np.uint8))
+    if noise:
+        jitter = np.random.default_rng(seed + 1000).integers(-noise, noise + 1, image.shape)
+        image = np.clip(image.astype(int) + jitter, 0, 255).astype(np.uint8)
+    return image
+
+
+def test_dhash():
+    """Test 1 : même scène bruitée → proche, scènes différentes → éloignées"""
+    print("\n[1] Empreintes dHash")
+    try:
+        from training_data import frame_dhash, hamming_distances
+
+        base = frame_dhash(scene(1))
+        assert base == frame_dhash(scene(1))
+        assert int(hamming_distances([base], frame_dhash(scene(1, noise=3)))[0]) <= 4
+        far = hamming_distances([frame_dhash(scene(s)) for s in range(2, 12)], base)
+        assert int(far.min()) > 10, far
+        print(f"   ✓ bruit ≤ 4 bits, scènes différentes ≥ {int(far.min())} bits")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_review_dedup(tmp):
+    """Test 2 : quasi-doublons écartés avant l'écriture dans data/review"""
+    print("\n[2] File de révision")
+    try:
+        import review_queue
+        import waste_classifier
+
+        review_dir = Path(tmp) / "review"
+        queue = review_queue.ReviewQueue(db_path=waste_classifier.DB_PATH, review_dir=review_dir,
+                                         max_distance=4).start()
+        detection = {'class': 'can', 'confidence': 0.5, 'bbox': [80, 80, 560, 400]}
+        try:
+            accepted = [queue.enqueue(scene(1, noise=i), detection) for i in range(5)]
+            accepted.append(queue.enqueue(scene(2), detection))
+            accepted.append(queue.enqueue(scene(1), dict(detection, **{'class': 'paper'})))
+        finally:
+            queue.close()
+        assert accepted == [True, False, False, False, False, True, True], accepted
+        assert len(list(review_dir.glob("*.jpg"))) == 3
+        report = queue.report()['dedup']
+        assert report['skipped'] == 4 and report['bytes_saved'] > 0, report
+
+        # Même objet devant un autre arrière-plan : doublon (seule la zone détectée compte)
+        moved = scene(5)
+        moved[80:400, 80:560] = scene(2)[80:400, 80:560]
+        assert queue.fingerprint(moved, detection['bbox']) == queue.fingerprint(scene(2), detection['bbox'])
+        assert queue.is_duplicate(queue.fingerprint(moved, detection['bbox']), 'can')
+
+        # File pleine : l'image écartée n'est pas retenue comme déjà vue
+        full = review_queue.ReviewQueue(db_path=waste_classifier.DB_PATH, review_dir=review_dir,
+                                        max_distance=4)
+        full._writes = review_queue.queue.Queue(maxsize=1)
+        assert full.enqueue(scene(3), detection) and not full.enqueue(scene(4), detection)
+        full._writes.get_nowait()
+        assert full.enqueue(scene(4), detection) and full.dropped == 1 and full.duplicates == 0
+
+        unfiltered = review_queue.ReviewQueue(db_path=waste_classifier.DB_PATH, review_dir=review_dir,
+                                              max_distance=None)
+        assert unfiltered.enqueue(scene(1), detection) and unfiltered.enqueue(scene(1), detection)
+        print("   ✓ 4 images sur 7 non écrites, arrière-plan ignoré, image écartée non retenue")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_training_dedup(tmp):
+    """Test 3 : exemples d'apprentissage dédupliqués, statistiques publiées"""
+    print("\n[3] Exemples d'apprentissage")
+    try:
+        import status_report
+        import training_data
+
+        training_dir = Path(tmp) / "training"
+        training_data.TRAINING_DIR = training_dir
+        training_data._hash_index = training_data.PerceptualHashIndex(
+            path=training_dir / ".phash_index.tsv", root=training_dir, max_distance=4)
+        assert training_data.write_training_sample(scene(1), "Can") is not None
+        assert training_data.write_training_sample(scene(1, noise=2), "can") is None
+        assert training_data.write_training_sample(scene(1), "can", correct=False) is not None
+        assert training_data.write_training_sample(scene(3), "can") is not None
+        published = status_report.read_status("training_dedup")
+        assert published['writes'] == 3 and published['skipped'] == 1, published
+
+        # Index relu depuis le journal : mêmes décisions
+        reloaded = training_data.PerceptualHashIndex(path=training_dir / ".phash_index.tsv",
+                                                     root=training_dir, max_distance=4)
+        assert reloaded.stats()['indexed'] == 3 and reloaded.skipped == 1
+        assert reloaded.find_duplicate("can", training_data.frame_dhash(scene(3, noise=2)))
+        print("   ✓ doublon non écrit, journal relu, statistiques dans training_dedup.json")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test déduplication\n" + "=" * 50)
+    import status_report
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status_report.STATUS_DIR = Path(tmp) / "status"
+        waste_classifier.DB_PATH = Path(tmp) / "waste_items.db"
+        waste_classifier.init_database()
+        try:
+            results = [test_dhash(), test_review_dedup(tmp), test_training_dedup(tmp)]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test du réentraînement : partie test et promotion
+Dossiers temporaires : répartition train/val/test stable, partie test écrite
+dans data.yaml, nouveau modèle comparé à best.pt sur la partie test seulement,
+jeu de données reconstruit seulement s'il peut apporter assez d'images.
+Usage : python3 scripts/test_finetune.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def test_split_for():
+    """Test 1 : répartition déterministe et proportions respectées"""
+    print("\n[1] Répartition train/val/test")
+    try:
+        from dataset_builder import split_for
+
+        sources = [f"can/img_{i}.jpg" for i in range(4000)]
+        splits = [split_for(s, 0.2, 0.1) for s in sources]
+        assert splits == [split_for(s, 0.2, 0.1) for s in sources]
+        shares = {name: splits.count(name) / len(splits) for name in ("train", "val", "test")}
+        assert abs(shares["val"] - 0.2) < 0.03 and abs(shares["test"] - 0.1) < 0.03, shares
+        # Sans partie test, les images de validation restent les mêmes
+        assert all(split_for(s, 0.2, 0.0) == "val" for s, split in zip(sources, splits) if split == "val")
+        assert "test" not in {split_for(s, 0.2, 0.0) for s in sources}
+        print(f"   ✓ val {shares['val']:.2f}, test {shares['test']:.2f}, même résultat à chaque appel")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_dataset_test_split(tmp):
+    """Test 2 : partie test construite et déclarée dans data.yaml"""
+    print("\n[2] Jeu de données")
+    try:
+        import cv2
+        from dataset_builder import build_dataset, buildable_images, split_for
+
+        training_dir, dataset_dir = Path(tmp) / "training", Path(tmp) / "dataset"
+        (training_dir / "can").mkdir(parents=True)
+        for i in range(30):
+            cv2.imwrite(str(training_dir / "can" / f"img_{i}.jpg"), np.full((60, 80, 3), i, dtype=np.uint8))
+            (training_dir / "can" / f"img_{i}.txt").write_text("0 0.5 0.5 0.25 0.25\n")
+        report = build_dataset(training_dir, dataset_dir, image_size=64, val_fraction=0.3,
+                               test_fraction=0.3, workers=1)
+        expected = [split_for(f"can/img_{i}.jpg", 0.3, 0.3) for i in range(30)]
+        assert report["splits"] == {name: expected.count(name) for name in ("train", "val", "test")}
+        assert report["splits"]["test"] > 0
+        assert len(list((dataset_dir / "images" / "test").glob("*.jpg"))) == report["splits"]["test"]
+        assert "test: images/test" in (dataset_dir / "data.yaml").read_text()
+        (training_dir / "can" / "img_0.txt").write_text("invalide\n")
+        assert buildable_images(training_dir, dataset_dir) == 30  # Label modifié : compté valide
+
+        # Part de test modifiée : tout est réparti à nouveau
+        report = build_dataset(training_dir, dataset_dir, image_size=64, val_fraction=0.3,
+                               test_fraction=0.0, workers=1)
+        assert report["processed"] == 30 and report["splits"]["test"] == 0
+        assert buildable_images(training_dir, dataset_dir) == sum(report["splits"].values()) == 29
+        assert not list((dataset_dir / "images" / "test").glob("*.jpg"))
+        print("   ✓ images/test rempli selon split_for, reconstruit si la part change")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_promotion_on_test_split(tmp):
+    """Test 3 : promotion décidée sur la partie test, jamais sur val"""
+    print("\n[3] Promotion")
+    try:
+        import finetune
+        import model_eval
+
+        finetune.FINETUNE_DIR = Path(tmp) / "finetune"
+        finetune.STATE_PATH = finetune.FINETUNE_DIR / "state.json"
+        finetune.MODELS_DIR = Path(tmp) / "models"
+        finetune.MODELS_DIR.mkdir()
+        model_path = finetune.MODELS_DIR / "best.pt"
+        model_path.write_bytes(b"current")
+        candidate = Path(tmp) / "candidate.pt"
+        candidate.write_bytes(b"candidate")
+
+        # Scores : le nouveau modèle est meilleur sur val (choisi dessus) mais pas sur test
+        scores = {("candidate.pt", "val"): 0.9, ("candidate.pt", "test"): 0.5,
+                  ("best.pt", "val"): 0.6, ("best.pt", "test"): 0.6}
+        calls = []
+
+        def fake_evaluate(path, dataset_dir, split="val", **kwargs):
+            calls.append(split)
+            return {"map50": scores[(Path(path).name, split)], "images": 10}
+
+        original = model_eval.evaluate
+        model_eval.evaluate = fake_evaluate
+        try:
+            scheduler = finetune.FineTuneScheduler(dataset_dir=Path(tmp) / "dataset", model_path=model_path)
+            result = scheduler.evaluate_and_promote(candidate)
+            assert calls == ["test", "test"], calls
+            assert not result.get("promoted") and model_path.read_bytes() == b"current"
+            assert result["test_images"] == 10
+
+            scores[("candidate.pt", "test")] = 0.8
+            result = scheduler.evaluate_and_promote(candidate)
+            assert result.get("promoted") and model_path.read_bytes() == b"candidate"
+        finally:
+            model_eval.evaluate = original
+        print("   ✓ meilleur sur val seulement → refusé ; meilleur sur test → promu")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_idle_check(tmp):
+    """Test 4 : pas de construction sans assez d'images nouvelles, classes du modèle en cache"""
+    print("\n[4] Vérification en période calme")
+    try:
+        import cv2
+        import dataset_builder
+        import finetune
+
+        finetune.FINETUNE_DIR = Path(tmp) / "finetune_idle"
+        finetune.STATE_PATH = finetune.FINETUNE_DIR / "state.json"
+        finetune.FINETUNE_MIN_NEW_IMAGES = 3
+        training_dir = Path(tmp) / "training_idle"
+        (training_dir / "can").mkdir(parents=True)
+        model_path = Path(tmp) / "idle.pt"
+        model_path.write_bytes(b"model")
+
+        builds, loads = [], []
+
+        def fake_build(training_dir, dataset_dir, **kwargs):
+            builds.append(kwargs["model_names"])
+            return {"splits": {"train": 4, "val": 0, "test": 0}}
+
+        def add_images(first, last):
+            for i in range(first, last):
+                cv2.imwrite(str(training_dir / "can" / f"img_{i}.jpg"), np.zeros((8, 8, 3), dtype=np.uint8))
+
+        patched = {"recent_sorts": lambda *a, **k: 0, "hourly_average": lambda *a, **k: 0,
+                   "find_yolov5_script": lambda name="train.py": Path("train.py")}
+        originals = {name: getattr(finetune, name) for name in patched}
+        original_build, original_names = dataset_builder.build_dataset, dataset_builder.model_class_names
+        for name, value in patched.items():
+            setattr(finetune, name, value)
+        dataset_builder.build_dataset = fake_build
+        dataset_builder.model_class_names = lambda path: loads.append(path) or ["can"]
+        try:
+            scheduler = finetune.FineTuneScheduler(dataset_dir=Path(tmp) / "dataset_idle",
+                                                   model_path=model_path, training_dir=training_dir)
+            add_images(0, 2)
+            scheduler.step()
+            assert builds == [] and loads == []
+
+            add_images(2, 4)
+            scheduler.step()
+            scheduler.step()
+            assert builds == [["can"], ["can"]] and len(loads) == 1, (builds, loads)
+
+            stat = model_path.stat()
+            os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            scheduler.step()
+            assert len(loads) == 2 and scheduler.state["status"] == "idle"
+        finally:
+            for name, value in originals.items():
+                setattr(finetune, name, value)
+            dataset_builder.build_dataset, dataset_builder.model_class_names = original_build, original_names
+        print("   ✓ 2 images : rien construit ; 4 images : construit, modèle lu une fois par version")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test réentraînement\n" + "=" * 50)
+    import status_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status_report.STATUS_DIR = Path(tmp) / "status"
+        results = [test_split_for(), test_dataset_test_split(tmp), test_promotion_on_test_split(tmp),
+                   test_idle_check(tmp)]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de l'aperçu vidéo partagé (mémoire partagée + MJPEG)
+Segment temporaire : publication et lecture protégées par le compteur de
+séquence, image réduite si trop grande, un seul encodage JPEG par image et
+par largeur quel que soit le nombre de spectateurs. Le lecteur tourne dans un
+autre processus Python, comme l'interface admin face au détecteur.
+Usage : python3 scripts/test_frame_share.py
+"""
+
+import json
+import os
+import struct
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+SHM_NAME = f"smartbin_test_{os.getpid()}"
+
+
+def frame_of(value, shape=(120, 160, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def jpeg_width(chunk):
+    """Largeur de l'image JPEG contenue dans une partie du flux MJPEG"""
+    import cv2
+
+    jpeg = chunk.split(b"\r\n\r\n", 1)[1][:-2]
+    return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR).shape[1]
+
+
+def reader_main(name):
+    """Processus lecteur : exécute les commandes JSON reçues sur stdin, une réponse par ligne"""
+    import time
+    from frame_share import FrameReader, PreviewHub, preview_available
+
+    reader = FrameReader(name)
+    hub, streams = None, []
+    for line in sys.stdin:
+        command, *args = json.loads(line)
+        if command == "available":
+            reply = preview_available(name)
+        elif command == "read":
+            result = reader.read(*args)
+            reply = None if result is None else [result[0], list(result[1].shape),
+                                                 int(result[1].min()), int(result[1].max())]
+        elif command == "watch":
+            hub = PreviewHub(FrameReader(name), max_fps=50)
+            streams = [hub.stream(width, 50) for width in args[0]]
+            reply = [[jpeg_width(next(stream)) for stream in streams], hub.encoded,
+                     hub.snap_width(330), hub.snap_width(5000)]
+        elif command == "next":
+            reply = [[jpeg_width(next(stream)) for stream in streams], hub.encoded]
+        else:  # "leave" : plus aucun spectateur
+            for stream in streams:
+                stream.close()
+            deadline = time.monotonic() + 2.0
+            while hub._thread is not None and time.monotonic() < deadline:
+                time.sleep(0.02)
+            reply = hub._thread is None and not hub._latest
+            hub.reader._detach()
+        print(json.dumps(reply), flush=True)
+    reader._detach()
+
+
+class ReaderProcess:
+    """Lecteur lancé dans un autre processus Python (voir reader_main)"""
+
+    def __init__(self, name):
+        self.process = subprocess.Popen([sys.executable, __file__, "--reader", name],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+    def __call__(self, *command):
+        self.process.stdin.write(json.dumps(command) + "\n")
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+
+    def close(self):
+        self.process.stdin.close()
+        return self.process.wait(timeout=10)
+
+
+def test_publish_read():
+    """Test 1 : dernière image lue une fois, séquence paire, écriture en cours ignorée"""
+    print("\n[1] Publication / lecture")
+    publisher = reader = None
+    try:
+        from frame_share import FramePublisher
+
+        reader = ReaderProcess(SHM_NAME)
+        assert reader("read") is None and not reader("available")
+        publisher = FramePublisher(SHM_NAME, capacity=160 * 120 * 3)
+        assert reader("read") is None  # Rien de publié
+
+        publisher.publish(frame_of(7))
+        assert reader("read") == [2, [120, 160, 3], 7, 7]
+        assert reader("read", 2) is None and reader("available")
+
+        # Trop grande : réduite dans la capacité du segment
+        publisher.publish(frame_of(9, (240, 320, 3)))
+        assert reader("read", 2) == [4, [120, 160, 3], 9, 9]
+
+        # Écrivain interrompu au milieu d'une écriture (séquence impaire) : pas de lecture
+        struct.pack_into("<Q", publisher.shm.buf, 0, 5)
+        assert reader("read", 4, 3) is None
+        assert reader.close() == 0
+        reader = None
+        print("   ✓ séquences 2 et 4 lues une fois, image réduite, écriture en cours jamais lue")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+    finally:
+        if reader is not None:
+            reader.close()
+        if publisher is not None:
+            publisher.close()
+
+
+def test_preview_hub():
+    """Test 2 : un encodage par image et par largeur pour plusieurs spectateurs"""
+    print("\n[2] Flux MJPEG partagé")
+    publisher = reader = None
+    try:
+        from frame_share import FramePublisher
+
+        publisher = FramePublisher(SHM_NAME, capacity=640 * 480 * 3)
+        publisher.publish(frame_of(50, (480, 640, 3)))
+        reader = ReaderProcess(SHM_NAME)
+        assert reader("watch", [320, 300]) == [[320, 320], 1, 320, 960]
+
+        publisher.publish(frame_of(100, (480, 640, 3)))
+        assert reader("next") == [[320, 320], 2]
+
+        assert reader("leave") is True
+        assert reader.close() == 0
+        reader = None
+        print("   ✓ 2 spectateurs en 320 px : 1 encodage par image, thread arrêté sans spectateur")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+    finally:
+        if reader is not None:
+            reader.close()
+        if publisher is not None:
+            publisher.close()
+
+
+def main():
+    print("Smart Bin SI - Test aperçu partagé\n" + "=" * 50)
+    results = [test_publish_read(), test_preview_hub()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--reader"]:
+        sys.exit(reader_main(sys.argv[2]))
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de l'archivage de l'historique (base et archives temporaires)
+Vérifie l'aller-retour base → archives → pagination, les lignes arrivées en
+retard ou pendant l'archivage, et la reprise après un arrêt brutal.
+Usage : python3 scripts/test_history_archive.py
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+class Crash(Exception):
+    """Arrêt brutal simulé"""
+
+
+def insert(conn, days_ago, count, item="can"):
+    base = datetime.now() - timedelta(days=days_ago)
+    conn.executemany(
+        "INSERT INTO sorting_history (bin_color, item_name, timestamp, confidence) VALUES (?, ?, ?, ?)",
+        [("yellow", item, (base + timedelta(minutes=i)).isoformat(), 0.9) for i in range(count)]
+    )
+    conn.commit()
+
+
+def all_rows(include_archive):
+    """Historique complet par pagination (du plus récent au plus ancien)"""
+    import waste_classifier
+
+    rows, cursor = [], None
+    while True:
+        page, cursor = waste_classifier.get_detection_history_page(
+            limit=17, cursor=cursor, include_archive=include_archive)
+        rows.extend(tuple(row) for row in page)
+        if cursor is None:
+            return rows
+
+
+def archived_ids():
+    import history_archive
+
+    ids = [row[0] for row in history_archive.iter_archived_rows()]
+    assert len(ids) == len(set(ids)), "lignes archivées en double"
+    return set(ids)
+
+
+def db_ids(conn):
+    return {row[0] for row in conn.execute("SELECT id FROM sorting_history")}
+
+
+def test_round_trip(conn):
+    """Test 1 : lignes anciennes archivées, pagination identique avec les archives"""
+    print("\n[1] Aller-retour")
+    try:
+        import history_archive
+
+        insert(conn, 200, 40)
+        insert(conn, 120, 40)
+        insert(conn, 1, 10)
+        before = all_rows(include_archive=False)
+        assert history_archive.archive_old_history(conn, 30) == 80
+        assert len(db_ids(conn)) == 10
+        assert archived_ids() == {row[0] for row in before} - db_ids(conn)
+        assert all_rows(include_archive=True) == before
+        assert history_archive.archive_old_history(conn, 30) == 0
+        print("   ✓ 80 lignes archivées, pagination inchangée, second passage sans effet")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_late_and_concurrent_rows(conn):
+    """Test 2 : ligne ancienne arrivée en retard, ligne insérée pendant l'archivage"""
+    print("\n[2] Lignes en retard / concurrentes")
+    try:
+        import history_archive
+
+        insert(conn, 200, 1, item="late")
+        real_save = history_archive._save_index
+        concurrent = []
+
+        def save_and_insert(index):
+            if not concurrent:
+                # Insérée entre la lecture des lignes du mois et leur suppression
+                insert(conn, 199, 1, item="concurrent")
+                concurrent.append(conn.execute("SELECT MAX(id) FROM sorting_history").fetchone()[0])
+            real_save(index)
+
+        history_archive._save_index = save_and_insert
+        try:
+            assert history_archive.archive_old_history(conn, 30) == 1
+        finally:
+            history_archive._save_index = real_save
+        assert concurrent[0] in db_ids(conn), "ligne concurrente supprimée sans être archivée"
+        assert history_archive.archive_old_history(conn, 30) == 1
+        assert concurrent[0] in archived_ids() and concurrent[0] not in db_ids(conn)
+        index = history_archive.load_index()
+        files = sorted(p.name for p in history_archive.ARCHIVE_DIR.glob("*.gz"))
+        assert files == sorted(meta["file"] for meta in index.values()), files
+        print("   ✓ aucune ligne perdue, un seul fichier par mois")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_crash_recovery(conn):
+    """Test 3 : arrêt avant l'index puis avant la suppression → ni perte ni doublon"""
+    print("\n[3] Reprise après arrêt brutal")
+    try:
+        import history_archive
+
+        real_save, real_delete = history_archive._save_index, history_archive._delete_ids
+
+        def crash(*args):
+            raise Crash()
+
+        cutoff = (datetime.now() - timedelta(days=30)).isoformat()
+        for name, patched in (("_save_index", crash), ("_delete_ids", crash)):
+            insert(conn, 150, 20)
+            expected = archived_ids() | {row[0] for row in conn.execute(
+                "SELECT id FROM sorting_history WHERE timestamp < ?", (cutoff,))}
+            setattr(history_archive, name, patched)
+            try:
+                history_archive.archive_old_history(conn, 30)
+                raise AssertionError("arrêt simulé non déclenché")
+            except Crash:
+                pass
+            finally:
+                history_archive._save_index, history_archive._delete_ids = real_save, real_delete
+            history_archive.archive_old_history(conn, 30)
+            assert archived_ids() == expected, name
+            assert not db_ids(conn) & expected, name
+        assert not list(history_archive.ARCHIVE_DIR.glob("*.tmp"))
+        print("   ✓ reprise sans doublon après arrêt avant l'index et avant la suppression")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test archivage historique\n" + "=" * 50)
+    import history_archive
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history_archive.ARCHIVE_DIR = Path(tmp) / "archive"
+        history_archive.INDEX_PATH = history_archive.ARCHIVE_DIR / "index.json"
+        waste_classifier.DB_PATH = Path(tmp) / "waste_items.db"
+        waste_classifier.init_database()
+        conn = waste_classifier._conn
+        try:
+            results = [test_round_trip(conn), test_late_and_concurrent_rows(conn),
+                       test_crash_recovery(conn)]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
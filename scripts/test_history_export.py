@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de l'export de l'historique (CSV / NDJSON, gzip)
+Base temporaire : l'export relu doit redonner exactement l'historique filtré,
+archives comprises, sans décompresser les mois hors de la période demandée.
+Usage : python3 scripts/test_history_export.py
+"""
+
+import csv
+import gzip
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def read_back(data, fmt, compress):
+    """Lignes (ordre COLUMNS) relues depuis les octets d'un export"""
+    from history_export import COLUMNS
+
+    text = (gzip.decompress(data) if compress else data).decode("utf-8")
+    if fmt == "csv":
+        rows = list(csv.reader(io.StringIO(text)))
+        assert tuple(rows[0]) == COLUMNS
+        return [(int(r[0]), r[1], r[2], r[3], float(r[4])) for r in rows[1:]]
+    return [tuple(json.loads(line)[c] for c in COLUMNS) for line in text.splitlines()]
+
+
+def test_round_trip(db_path, conn):
+    """Test 1 : CSV et NDJSON, avec et sans gzip, filtres appliqués"""
+    print("\n[1] Export relu")
+    try:
+        import history_export
+
+        history_export.CHUNK_ROWS = 7  # Plusieurs morceaux même sur une petite base
+        expected = conn.execute("SELECT id, bin_color, item_name, timestamp, confidence "
+                                "FROM sorting_history ORDER BY timestamp, id").fetchall()
+        for fmt in history_export.FORMATS:
+            for compress in (False, True):
+                chunks = list(history_export.export_chunks(
+                    history_export.iter_history_rows(db_path), fmt, compress))
+                assert len(chunks) > 1
+                assert read_back(b"".join(chunks), fmt, compress) == expected, (fmt, compress)
+        green = list(history_export.iter_history_rows(db_path, bin_color="green"))
+        assert green == [row for row in expected if row[1] == "green"]
+        print(f"   ✓ {len(expected)} lignes relues à l'identique (csv/ndjson, gzip ou non)")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_export_file(db_path, tmp):
+    """Test 2 : export vers un fichier, taille annoncée exacte"""
+    print("\n[2] Export fichier")
+    try:
+        import history_export
+
+        path, written = history_export.export_to_file("ndjson", True, path=Path(tmp) / "out.ndjson.gz",
+                                                      db_path=db_path)
+        assert path.stat().st_size == written
+        assert len(read_back(path.read_bytes(), "ndjson", True)) == 30
+        try:
+            next(history_export.export_chunks([], "xml"))
+            raise AssertionError("format inconnu accepté")
+        except ValueError:
+            pass
+        print(f"   ✓ {written} octets écrits, format inconnu refusé")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_archive_range(db_path, conn):
+    """Test 3 : archives incluses, mois hors période non décompressés"""
+    print("\n[3] Export avec archives")
+    try:
+        import history_archive
+        import history_export
+
+        conn.executemany(
+            "INSERT INTO sorting_history (bin_color, item_name, timestamp, confidence) VALUES (?, ?, ?, ?)",
+            [("yellow", "paper", f"2025-{month:02d}-10T08:00:{i:02d}", 0.7)
+             for month in (1, 3, 5) for i in range(5)]
+        )
+        conn.commit()
+        expected = conn.execute("SELECT id, bin_color, item_name, timestamp, confidence FROM sorting_history "
+                                "WHERE timestamp >= '2025-03-01' AND timestamp < '2025-04-01' "
+                                "ORDER BY timestamp, id").fetchall()
+        assert history_archive.archive_old_history(conn, 30) == 45  # Lignes du test 1 comprises
+
+        read = []
+        original = history_archive.iter_month
+
+        def counting_iter_month(month, meta=None):
+            read.append(month)
+            return original(month, meta)
+
+        history_archive.iter_month = counting_iter_month
+        try:
+            rows = list(history_export.iter_history_rows(db_path, include_archive=True,
+                                                         since="2025-03-01", until="2025-04-01"))
+            everything = list(history_export.iter_history_rows(db_path, include_archive=True))
+        finally:
+            history_archive.iter_month = original
+        assert rows == expected and len(rows) == 5, rows
+        assert read[0] == "2025-03" and len(everything) == 45, (read, len(everything))
+        assert read[1:] == ["2025-01", "2025-03", "2025-05", "2026-01"], read
+        print("   ✓ 5 lignes de mars, seul le mois 2025-03 décompressé")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test export historique\n" + "=" * 50)
+    import history_archive
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history_archive.ARCHIVE_DIR = Path(tmp) / "archive"
+        history_archive.INDEX_PATH = history_archive.ARCHIVE_DIR / "index.json"
+        db_path = Path(tmp) / "waste_items.db"
+        waste_classifier.DB_PATH = db_path
+        waste_classifier.init_database()
+        conn = waste_classifier._conn
+        conn.executemany(
+            "INSERT INTO sorting_history (bin_color, item_name, timestamp, confidence) VALUES (?, ?, ?, ?)",
+            [(["yellow", "green"][i % 2], "can, \"métal\"", f"2026-01-01T10:{i:02d}:00", 0.5)
+             for i in range(30)]
+        )
+        conn.commit()
+        try:
+            results = [test_round_trip(db_path, conn), test_export_file(db_path, tmp),
+                       test_archive_range(db_path, conn)]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la pagination de l'historique par curseur
+Base temporaire : parcours complet page par page, avec et sans filtres.
+Usage : python3 scripts/test_history_pagination.py
+"""
+
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def fill_history(conn, count=500):
+    """Historique aléatoire, avec des timestamps en double (égalités départagées par id)"""
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1)
+    rows = []
+    for _ in range(count):
+        timestamp = (start + timedelta(minutes=rng.randrange(2000))).isoformat()
+        rows.append((rng.choice(["yellow", "green", "brown"]), rng.choice(["can", "plastic_bottle"]),
+                     timestamp, round(rng.random(), 2)))
+    conn.executemany("INSERT INTO sorting_history (bin_color, item_name, timestamp, confidence) "
+                     "VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+
+
+def walk(limit, **filters):
+    """Toutes les pages d'une requête ; retourne (ids dans l'ordre, nombre de pages)"""
+    import waste_classifier
+
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = waste_classifier.get_detection_history_page(limit=limit, cursor=cursor, **filters)
+        ids.extend(row[0] for row in rows)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+def test_full_walk():
+    """Test 1 : pages successives = requête complète triée, sans doublon ni oubli"""
+    print("\n[1] Parcours complet")
+    try:
+        import waste_classifier
+
+        conn = waste_classifier._conn
+        for limit, filters in [(7, {}), (50, {"bin_color": "green"}),
+                               (13, {"item_name": "Can", "min_confidence": 0.3}),
+                               (9, {"since": "2026-01-01T10", "until": "2026-01-02T03"})]:
+            ids, pages = walk(limit, **filters)
+            clauses, params = waste_classifier.history_filters(**filters)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            expected = [row[0] for row in conn.execute(
+                f"SELECT id FROM sorting_history {where} ORDER BY timestamp DESC, id DESC", params)]
+            assert ids == expected, filters
+            assert pages == max(1, -(-len(expected) // limit)), (pages, len(expected))
+        print("   ✓ mêmes lignes que la requête complète, dans le même ordre")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_cursor():
+    """Test 2 : curseur opaque, curseur invalide refusé"""
+    print("\n[2] Curseur")
+    try:
+        import waste_classifier
+
+        cursor = waste_classifier.encode_history_cursor("2026-01-01T10:00:00", 42)
+        assert waste_classifier.decode_history_cursor(cursor) == ("2026-01-01T10:00:00", 42)
+        assert waste_classifier.decode_history_cursor("n'importe quoi") is None
+        assert waste_classifier.get_detection_history_page(cursor="abc") == ([], None)
+        print("   ✓ encodage / décodage, curseur invalide → page vide")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test pagination historique\n" + "=" * 50)
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        waste_classifier.DB_PATH = Path(tmp) / "waste_items.db"
+        waste_classifier.init_database()
+        fill_history(waste_classifier._conn)
+        try:
+            results = [test_full_walk(), test_cursor()]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
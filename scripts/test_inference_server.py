@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test du serveur d'inférence (modèle factice, sans torch)
+Vérifie l'aller-retour socket + mémoire partagée, le remplacement du segment
+quand l'image grandit et le compteur de clients.
+Usage : python3 scripts/test_inference_server.py
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+class FakeModel:
+    """Une détection par image, dont la boîte couvre toute l'image"""
+
+    names = {0: "plastic", 1: "can"}
+
+    def __call__(self, frames):
+        from onnx_detector import OnnxResults
+
+        xyxy = [np.array([[0, 0, f.shape[1], f.shape[0], 0.9, 1]], dtype=np.float32) for f in frames]
+        return OnnxResults(xyxy, (0.0, 0.0, 0.0))
+
+
+def start_server(socket_path):
+    import inference_server
+
+    connections = []
+
+    class RecordingConnection(inference_server._ClientConnection):
+        def __init__(self, sock):
+            super().__init__(sock)
+            connections.append(self)
+
+    inference_server._ClientConnection = RecordingConnection
+    server = inference_server.InferenceServer.__new__(inference_server.InferenceServer)
+    server.model = FakeModel()
+    server.names = dict(FakeModel.names)
+    server.socket_path = str(socket_path)
+    server._requests = inference_server.queue.Queue()
+    server._running = False
+    server._lock = threading.Lock()
+    server.clients = server.requests = server.batches = 0
+    server.inference_total_ms = 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(100):
+        if socket_path.exists():
+            break
+        time.sleep(0.05)
+    return server, connections
+
+
+def test_round_trip_and_segments():
+    """Test 1 : détections correctes, ancien segment abandonné, compteur de clients"""
+    print("\n[1] Serveur d'inférence")
+    try:
+        from inference_server import InferenceClient
+
+        with tempfile.TemporaryDirectory() as tmp:
+            server, connections = start_server(Path(tmp) / "inference.sock")
+            client = InferenceClient(Path(tmp) / "inference.sock")
+            assert client.names == FakeModel.names
+
+            small = np.zeros((48, 64, 3), dtype=np.uint8)
+            detections = client.detect(small)
+            assert detections[0]['class'] == "can" and detections[0]['bbox'][2:] == [64.0, 48.0]
+            first = client._shm.name
+
+            # Image plus grande : le client recrée son segment
+            big = np.zeros((96, 128, 3), dtype=np.uint8)
+            assert client.detect(big)[0]['bbox'][2:] == [128.0, 96.0]
+            client.detect(big)
+            assert client._shm.name != first
+            connection = connections[-1]
+            assert list(connection.segments) == [client._shm.name], connection.segments
+            assert not connection._retired, "ancien segment toujours attaché"
+            assert server.clients == 1
+
+            client.close()
+            for _ in range(50):
+                if server.clients == 0:
+                    break
+                time.sleep(0.02)
+            assert server.clients == 0
+        print("   ✓ aller-retour, segment remplacé puis détaché, clients comptés")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test serveur d'inférence\n" + "=" * 50)
+    results = [test_round_trip_and_segments()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
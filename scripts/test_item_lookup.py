@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la recherche objet → bac (noms normalisés, alias, classes)
+Base temporaire : pluriels, séparateurs, alias de config et de base, ids de classe.
+Usage : python3 scripts/test_item_lookup.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def test_normalize():
+    """Test 1 : casse, séparateurs et pluriel ignorés"""
+    print("\n[1] Normalisation des noms")
+    try:
+        from waste_classifier import normalize_item_name
+
+        for name in ("Plastic Bottles", "plastic-bottle", "plastic_bottle", " PLASTIC.bottle "):
+            assert normalize_item_name(name) == "plastic_bottle", name
+        assert normalize_item_name("Boxes") == "box"
+        assert normalize_item_name("batteries") == "battery"
+        assert normalize_item_name("glass") == "glass"
+        assert normalize_item_name("bus") == "bus"
+        assert normalize_item_name(" - ") == ""
+        print("   ✓ mêmes clés quelle que soit l'écriture, mots en -ss / -us intacts")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_aliases():
+    """Test 2 : alias de config, alias ajouté en base, base prioritaire sur config"""
+    print("\n[2] Alias et priorités")
+    try:
+        import waste_classifier
+
+        waste_classifier.set_default_mapping({"can": "yellow", "plastic_bottle": "yellow", "paper": "blue"},
+                                             aliases={"soda_can": "can"})
+        assert waste_classifier.get_bin_color("Soda Cans") == "yellow"
+        assert waste_classifier.get_bin_color("tin can") is None
+        assert not waste_classifier.add_alias("mug", "objet_inconnu")
+        assert waste_classifier.add_alias("Tin Can", "can")
+        assert waste_classifier.get_bin_color("tin-cans") == "yellow"
+        assert waste_classifier.get_aliases()["tin_can"] == "can"
+        waste_classifier.save_to_database("Paper", "green")
+        assert waste_classifier.get_bin_color("papers") == "green"
+        # Index reconstruit depuis la base : mêmes réponses
+        waste_classifier.build_lookup_index()
+        assert waste_classifier.get_bin_color("tin can") == "yellow"
+        assert waste_classifier.get_bin_color("paper") == "green"
+        print("   ✓ alias de config et de base, association apprise prioritaire")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_class_index():
+    """Test 3 : ids de classe du modèle, classes sans bac signalées"""
+    print("\n[3] Classes du modèle")
+    try:
+        import waste_classifier
+
+        missing = waste_classifier.register_model_classes({0: "Plastic Bottle", 1: "soda can", 2: "Unicorn"})
+        assert missing == ["Unicorn"], missing
+        assert waste_classifier.get_bin_color(0) == "yellow"
+        assert waste_classifier.get_bin_color(1) == "yellow"
+        assert waste_classifier.get_bin_color(2) is None
+        assert waste_classifier.get_bin_color(7) is None
+        assert waste_classifier.resolve_item(0) == ("plastic_bottle", "yellow")
+        print("   ✓ ids résolus par l'index, classe sans bac listée")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test recherche objet → bac\n" + "=" * 50)
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        waste_classifier.DB_PATH = Path(tmp) / "waste_items.db"
+        waste_classifier.init_database()
+        try:
+            results = [test_normalize(), test_aliases(), test_class_index()]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
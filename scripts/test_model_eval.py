@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test des métriques d'évaluation d'un modèle
+Détections simulées : association aux vérités terrain, AP, mAP et noms de
+classe du modèle différents de ceux du jeu de données.
+Usage : python3 scripts/test_model_eval.py
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+BOX = [100, 100, 200, 200]
+FAR = [400, 300, 480, 380]
+
+
+def det(class_name, confidence, bbox=BOX):
+    return {'class': class_name, 'confidence': confidence, 'bbox': list(bbox)}
+
+
+def test_match_image():
+    """Test 1 : une vérité trouvée une fois, par la détection la plus sûre"""
+    print("\n[1] Association détections / vérités")
+    try:
+        from model_eval import match_image
+
+        truths = [("plastic_bottle", BOX)]
+        outcomes = match_image([det("Plastic Bottle", 0.6), det("Plastic Bottle", 0.9)], truths)
+        assert outcomes == [("Plastic Bottle", 0.9, True), ("Plastic Bottle", 0.6, False)], outcomes
+        assert match_image([det("can", 0.9)], truths) == [("can", 0.9, False)]
+        assert match_image([det("plastic_bottle", 0.9, FAR)], truths)[0][2] is False
+        print("   ✓ noms normalisés, doublon compté faux positif, mauvaise classe ou boîte refusée")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_average_precision():
+    """Test 2 : AP sur des cas calculables à la main"""
+    print("\n[2] Précision moyenne")
+    try:
+        from model_eval import average_precision
+
+        assert average_precision([(0.9, True), (0.8, True)], 2) == 1.0
+        assert average_precision([(0.9, True)], 2) == 0.5
+        assert abs(average_precision([(0.9, False), (0.8, True)], 1) - 0.5) < 1e-9
+        assert average_precision([], 0) is None and average_precision([], 3) == 0.0
+        print("   ✓ parfait 1.0, rappel moitié 0.5, faux positif en tête 0.5, sans vérité None")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_metrics_model_names():
+    """Test 3 : noms du modèle avec majuscules/espaces évalués comme ceux du jeu de données"""
+    print("\n[3] mAP avec noms du modèle")
+    try:
+        from model_eval import detection_metrics
+
+        classes = ["plastic_bottle", "Can"]
+        records = [
+            ([det("Plastic Bottle", 0.9), det("can", 0.8, FAR)], [("plastic_bottle", BOX), ("Can", FAR)]),
+            ([det("plastic bottle", 0.7)], [("plastic_bottle", BOX)]),
+            ([det("glass", 0.9)], []),
+        ]
+        map50, map50_95, per_class = detection_metrics(records, classes, threshold=0.5)
+        assert map50 == 1.0 and map50_95 == 1.0, (map50, map50_95)
+        assert per_class["plastic_bottle"] == {'ap': 1.0, 'ap50_95': 1.0, 'precision': 1.0,
+                                               'recall': 1.0, 'truths': 2, 'detections': 2}
+        assert per_class["Can"]['detections'] == 1 and per_class["Can"]['recall'] == 1.0
+        print("   ✓ \"Plastic Bottle\" et \"can\" comptés pour plastic_bottle et Can, glass ignoré")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test évaluation de modèle\n" + "=" * 50)
+    results = [test_match_image(), test_average_precision(), test_metrics_model_names()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test du mode multi-postes (sans caméra ni modèle)
+Vérifie le tour de rôle des lots, le mapping propre à un poste et les
+rapports d'état.
+Usage : python3 scripts/test_multi_station.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+class FakeGrabber:
+    """Une image toujours prête, numérotée par poste"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.failed = False
+
+    def read(self, timeout=0):
+        self.count += 1
+        return True, f"{self.name}-{self.count}", 0.0
+
+
+def test_round_robin():
+    """Test 1 : une image par poste, MAX_BATCH_SIZE au plus, premier poste tournant"""
+    print("\n[1] Lots en tour de rôle")
+    try:
+        from multi_station import MultiStationRunner, Station
+        from config import MAX_BATCH_SIZE
+
+        runner = MultiStationRunner.__new__(MultiStationRunner)
+        runner.stations = []
+        for i in range(MAX_BATCH_SIZE + 2):
+            station = Station(f"poste{i}")
+            station.grabber = FakeGrabber(station.name)
+            runner.stations.append(station)
+        runner._next = 0
+
+        firsts = []
+        for _ in range(len(runner.stations)):
+            batch = runner.next_batch()
+            assert len(batch) == MAX_BATCH_SIZE
+            assert len({station.name for station, _, _ in batch}) == len(batch)
+            firsts.append(batch[0][0].name)
+        assert firsts == [s.name for s in runner.stations], firsts
+        counts = [s.grabber.count for s in runner.stations]
+        assert max(counts) - min(counts) <= 1, counts
+        print(f"   ✓ {len(runner.stations)} postes, lots de {MAX_BATCH_SIZE}, images lues {counts}")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_station_mapping():
+    """Test 2 : le mapping du poste est prioritaire, bacs invalides ignorés"""
+    print("\n[2] Mapping par poste")
+    try:
+        import waste_classifier
+        from multi_station import Station
+
+        waste_classifier.build_lookup_index()
+        station = Station("a", bin_mapping={"Plastic Bottles": "green", "can": "purple"})
+        assert station.resolve_bin("plastic_bottle") == "green"
+        assert station.resolve_bin("can") == waste_classifier.get_bin_color("can")
+        print("   ✓ mapping du poste, sinon mapping global")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_status_report():
+    """Test 3 : écriture atomique et relecture des rapports d'état"""
+    print("\n[3] Rapports d'état")
+    try:
+        import status_report
+
+        with tempfile.TemporaryDirectory() as tmp:
+            status_report.STATUS_DIR = Path(tmp) / "status"
+            assert status_report.read_status("multi_station") is None
+            status_report.write_status("multi_station", {'batches': 3})
+            data = status_report.read_status("multi_station")
+            assert data['batches'] == 3 and data['updated_at'] > 0
+            assert list(status_report.read_all_status()) == ["multi_station"]
+            assert not list(status_report.STATUS_DIR.glob("*.tmp"))
+        print("   ✓ état écrit puis relu")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test multi-postes\n" + "=" * 50)
+    results = [test_round_robin(), test_station_mapping(), test_status_report()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
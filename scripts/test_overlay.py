@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de l'affichage des détections
+Sans fenêtre : copie des étiquettes rognée aux bords, cache des étiquettes,
+thread d'affichage qui ne dessine que l'image la plus récente.
+Usage : python3 scripts/test_overlay.py
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+class RecordingPublisher:
+    """Garde les images publiées par le thread d'affichage"""
+
+    def __init__(self):
+        self.images = []
+        self.closed = False
+
+    def publish(self, image):
+        self.images.append(image)
+
+    def close(self):
+        self.closed = True
+
+
+def test_blit():
+    """Test 1 : copie complète, rognée aux bords, hors image"""
+    print("\n[1] Copie des étiquettes")
+    try:
+        from overlay import blit
+
+        sprite = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+        frame = np.zeros((10, 12, 3), dtype=np.uint8)
+        assert blit(frame, sprite, 2, 3) == 8 and np.array_equal(frame[3:7, 2:8], sprite)
+
+        frame[:] = 0
+        assert blit(frame, sprite, -2, -1) == 4
+        assert np.array_equal(frame[0:3, 0:4], sprite[1:4, 2:6]) and not frame[3:, :].any()
+
+        frame[:] = 0
+        assert blit(frame, sprite, 9, 8) == 12 and np.array_equal(frame[8:10, 9:12], sprite[0:2, 0:3])
+        frame[:] = 0
+        blit(frame, sprite, 20, 20)
+        assert not frame.any()
+        print("   ✓ dans l'image, coin haut-gauche et coin bas-droit rognés, hors image ignorée")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_sprites():
+    """Test 2 : une étiquette rendue une fois par (classe, bac) et par centième"""
+    print("\n[2] Cache des étiquettes")
+    try:
+        from config import BIN_COLORS
+        from overlay import LabelSprites
+
+        sprites = LabelSprites()
+        label = sprites.label("can", "yellow")
+        assert sprites.label("can", "yellow") is label and len(sprites) == 1
+        assert tuple(int(v) for v in label[0, 0]) == BIN_COLORS["yellow"]
+        unknown = sprites.label("mystery", None)
+        assert tuple(int(v) for v in unknown[0, 0]) == BIN_COLORS["unknown"]
+        assert sprites.confidence(0.871, "yellow") is sprites.confidence(0.874, "yellow")
+        assert sprites.confidence(0.88, "yellow") is not sprites.confidence(0.87, "yellow")
+        assert len(sprites) == 4
+        print("   ✓ réutilisées, couleur du bac (gris si inconnu), confiance au centième")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_renderer():
+    """Test 3 : image non modifiée, seule la plus récente dessinée"""
+    print("\n[3] Thread d'affichage")
+    try:
+        from overlay import OverlayRenderer, draw_overlay, LabelSprites
+
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        boxes = [(20, 40, 80, 100, "can", 0.9, "yellow")]
+        drawn = draw_overlay(frame.copy(), boxes, [("FPS: 10", (5, 15), 0.5, (255, 255, 255))],
+                             (10, 10, 150, 110), LabelSprites())
+        assert drawn.any() and not frame.any()
+
+        publisher = RecordingPublisher()
+        renderer = OverlayRenderer(max_fps=None, window=None, publisher=publisher)
+        with renderer._cond:  # Thread retenu : les trois images arrivent avant le dessin
+            renderer.start()
+            for value in (1, 2, 3):
+                renderer.submit(np.full((120, 160, 3), value, dtype=np.uint8), boxes)
+        deadline = time.monotonic() + 2.0
+        while not publisher.images and time.monotonic() < deadline:
+            time.sleep(0.01)
+        renderer.close()
+        assert renderer.replaced == 2 and renderer.shown == 1 and len(publisher.images) == 1
+        assert publisher.images[0][5, 5, 0] == 3 and publisher.closed
+        assert not any(t.name == "overlay-renderer" for t in threading.enumerate())
+
+        limited = OverlayRenderer(max_fps=5, window=None)
+        assert limited.due()
+        limited.submit(frame, [])
+        assert not limited.due()
+        print("   ✓ 3 images soumises, 1 dessinée (la dernière), cadence plafonnée")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test affichage\n" + "=" * 50)
+    results = [test_blit(), test_sprites(), test_renderer()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
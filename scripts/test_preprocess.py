@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test du prétraitement des images avant le modèle
+Images synthétiques : géométrie des bandes, retour des boîtes dans l'image
+d'origine, tenseur RGB normalisé et tampons réutilisés.
+Usage : python3 scripts/test_preprocess.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def test_geometry():
+    """Test 1 : entrée carrée ou rectangulaire multiple du pas"""
+    print("\n[1] Géométrie des bandes")
+    try:
+        from preprocess import letterbox_geometry
+
+        assert letterbox_geometry(480, 640, 640) == ((640, 640), (640, 480), 1.0, (0, 80))
+        assert letterbox_geometry(480, 640, 320) == ((320, 320), (320, 240), 0.5, (0, 40))
+        assert letterbox_geometry(480, 640, 320, stride=32) == ((256, 320), (320, 240), 0.5, (0, 8))
+        assert letterbox_geometry(720, 1280, 640, stride=32) == ((384, 640), (640, 360), 0.5, (0, 12))
+        print("   ✓ 640x480 → bandes de 80 px (carré) ou 8 px (pas de 32)")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_scale_boxes():
+    """Test 2 : boîtes ramenées dans l'image d'origine et bornées"""
+    print("\n[2] Boîtes dans l'image d'origine")
+    try:
+        from preprocess import letterbox_geometry, scale_boxes
+
+        _, _, scale, pad = letterbox_geometry(480, 640, 320)
+        boxes = np.array([[50.0, 90.0, 150.0, 140.0, 0.9, 1.0],
+                          [-10.0, 30.0, 330.0, 300.0, 0.5, 0.0]])
+        scale_boxes(boxes, scale, pad, (480, 640, 3))
+        assert np.allclose(boxes[0], [100, 100, 300, 200, 0.9, 1.0]), boxes[0]
+        assert np.allclose(boxes[1, :4], [0, 0, 640, 480]), boxes[1]
+        print("   ✓ décalage et échelle retirés, confiance et classe intactes, bornes respectées")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_preprocessor():
+    """Test 3 : tenseur RGB 0-1, bandes grises, tampons réutilisés"""
+    print("\n[3] Préprocesseur")
+    try:
+        from preprocess import PAD_VALUE, Preprocessor, letterbox_blob
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame[..., 0] = 255  # Bleu en BGR
+        pre = Preprocessor(320)
+        blob, scale, pad = pre(frame)
+        assert blob.shape == (1, 3, 320, 320) and blob.dtype == np.float32
+        assert scale == 0.5 and pad == (0, 40)
+        assert np.allclose(blob[0, :, 160, 160], [0.0, 0.0, 1.0])  # RGB : bleu en dernier
+        assert np.allclose(blob[0, :, 10, 160], PAD_VALUE / 255)
+        first, buffer = blob.copy(), pre.blob
+
+        blob, _, _ = pre(np.full((480, 640, 3), 255, dtype=np.uint8))
+        assert pre.allocations == 1 and np.shares_memory(blob, buffer) and blob.max() == 1.0
+        blob, _, _ = pre([frame, frame])
+        assert pre.allocations == 2 and blob.shape[0] == 2
+        blob, _, _ = pre(frame)
+        assert pre.allocations == 2 and blob.shape[0] == 1
+        pre(np.zeros((240, 320, 3), dtype=np.uint8))
+        assert pre.allocations == 3
+
+        kept, _, _ = letterbox_blob(frame, 320, np.float16)
+        assert kept.dtype == np.float16 and not np.shares_memory(kept, pre.blob)
+        assert np.allclose(kept.astype(np.float32), first, atol=1e-3)
+        print("   ✓ même tampon d'une image à l'autre, réalloué pour un lot ou une autre taille")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test prétraitement\n" + "=" * 50)
+    results = [test_geometry(), test_scale_boxes(), test_preprocessor()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test du choix des images de calibration INT8
+Dossier temporaire : images prises à tour de rôle dans chaque classe, jamais
+dans les parties val/test qui servent à comparer FP32 et INT8.
+Usage : python3 scripts/test_quantize.py
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+CLASSES = ("can", "paper", "plastic_bottle")
+
+
+def make_training_dir(root, per_class=40):
+    """Fichiers image vides : seuls les noms comptent pour le choix"""
+    for class_name in CLASSES:
+        (root / class_name).mkdir(parents=True)
+        for i in range(per_class):
+            (root / class_name / f"img_{i}.jpg").write_bytes(b"")
+    (root / "_errors" / "can").mkdir(parents=True)
+    (root / "_errors" / "can" / "img_0.jpg").write_bytes(b"")
+
+
+def test_excludes_evaluation_splits(tmp):
+    """Test 1 : aucune image des parties val/test, répartition entre les classes"""
+    print("\n[1] Parties d'évaluation exclues")
+    try:
+        from dataset_builder import split_for
+        from quantize import calibration_images
+
+        training_dir, dataset_dir = Path(tmp) / "training", Path(tmp) / "dataset"
+        make_training_dir(training_dir)
+        images = calibration_images(limit=1000, training_dir=training_dir, dataset_dir=dataset_dir)
+        sources = [path.relative_to(training_dir).as_posix() for path in images]
+        assert sources and all(split_for(s) == "train" for s in sources)
+        expected = sum(split_for(f"{c}/img_{i}.jpg") == "train" for c in CLASSES for i in range(40))
+        assert len(sources) == expected, (len(sources), expected)
+
+        few = calibration_images(limit=6, training_dir=training_dir, dataset_dir=dataset_dir)
+        assert [path.parent.name for path in few] == list(CLASSES) * 2
+        print(f"   ✓ {expected} images de train sur 120, classes à tour de rôle")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_follows_manifest(tmp):
+    """Test 2 : répartition reprise de la dernière construction du jeu de données"""
+    print("\n[2] Parts du manifest")
+    try:
+        from dataset_builder import MANIFEST_VERSION, manifest_path, split_for
+        from quantize import calibration_images
+
+        training_dir, dataset_dir = Path(tmp) / "training", Path(tmp) / "dataset"
+        dataset_dir.mkdir()
+        manifest = {"version": MANIFEST_VERSION, "params": {"val_fraction": 0.5, "test_fraction": 0.3},
+                    "classes": list(CLASSES), "files": {}}
+        manifest_path(dataset_dir).write_text(json.dumps(manifest))
+        images = calibration_images(limit=1000, training_dir=training_dir, dataset_dir=dataset_dir)
+        sources = [path.relative_to(training_dir).as_posix() for path in images]
+        assert all(split_for(s, 0.5, 0.3) == "train" for s in sources)
+        assert len(sources) == sum(split_for(f"{c}/img_{i}.jpg", 0.5, 0.3) == "train"
+                                   for c in CLASSES for i in range(40))
+        print(f"   ✓ {len(sources)} images avec val 0.5 / test 0.3")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test calibration INT8\n" + "=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [test_excludes_evaluation_splits(tmp), test_follows_manifest(tmp)]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la file de révision (mode apprentissage)
+Base et dossiers temporaires : place libérée par les validations faites depuis
+l'admin, échecs d'écriture d'image, objets inconnus envoyés en révision,
+image renommée gardée par le jeu de données avec la boîte détectée.
+Usage : python3 scripts/test_review_queue.py
+"""
+
+import builtins
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+DETECTION = {'class': 'can', 'confidence': 0.9, 'bbox': [10, 10, 50, 50]}
+
+
+def frame(seed=0):
+    """Image aléatoire (deux graines différentes ne sont pas des quasi-doublons)"""
+    return np.random.default_rng(seed).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_pending_refresh(tmp):
+    """Test 1 : file pleine, puis place libérée par l'admin (autre connexion)"""
+    print("\n[1] Éléments en attente")
+    try:
+        import review_queue
+        import waste_classifier
+
+        review_queue.PENDING_REFRESH_SECONDS = 0.1
+        queue = review_queue.ReviewQueue(db_path=waste_classifier.DB_PATH, review_dir=Path(tmp) / "review",
+                                         max_pending=3).start()
+        try:
+            assert all(queue.enqueue(frame(i), DETECTION, 0, "sort") for i in range(3))
+            assert not queue.enqueue(frame(3), DETECTION, 0, "sort") and queue.dropped == 1
+            assert wait_for(lambda: review_queue.list_reviews(db_path=waste_classifier.DB_PATH)[1] == 3)
+            items, _ = review_queue.list_reviews(db_path=waste_classifier.DB_PATH)
+            assert all(review_queue.frame_path(item, queue.review_dir).exists() for item in items)
+            for item in items[:2]:
+                review_queue.resolve_review(item['id'], "reject", db_path=waste_classifier.DB_PATH,
+                                            review_dir=queue.review_dir)
+            assert wait_for(lambda: queue.pending == 1), queue.pending
+            assert queue.enqueue(frame(4), DETECTION, 0, "sort")
+        finally:
+            queue.close()
+        print("   ✓ file pleine refusée, place rendue après validation depuis l'admin")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_write_failure(tmp):
+    """Test 2 : image non écrite → pas de ligne en base, échec compté"""
+    print("\n[2] Échec d'écriture")
+    try:
+        import review_queue
+        import waste_classifier
+
+        queue = review_queue.ReviewQueue(db_path=waste_classifier.DB_PATH, review_dir=Path(tmp) / "review2",
+                                         max_pending=10).start()
+        before = review_queue.list_reviews(db_path=waste_classifier.DB_PATH)[1]
+        queue.review_dir = Path(tmp) / "absent" / "review"  # imwrite retourne False
+        try:
+            assert queue.enqueue(frame(), DETECTION, 0, "sort")
+            assert wait_for(lambda: queue.write_failures == 1)
+            assert wait_for(lambda: queue.pending == before), queue.pending
+        finally:
+            queue.close()
+        assert review_queue.list_reviews(db_path=waste_classifier.DB_PATH)[1] == before
+        assert queue.report()['write_failures'] == 1
+        print("   ✓ aucune ligne sans image, échec compté dans le rapport")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_unknown_item(tmp):
+    """Test 3 : objet inconnu du détecteur → file de révision, jamais input()"""
+    print("\n[3] Objet inconnu")
+    try:
+        import review_queue
+        import waste_classifier
+        from yolo_detector import WasteDetector
+
+        def no_input(*args):
+            raise AssertionError("input() appelé depuis la boucle caméra")
+
+        detector = WasteDetector.__new__(WasteDetector)
+        detector.inference_client = None
+        detector.model = None
+        detector.review_queue = review_queue.ReviewQueue(db_path=waste_classifier.DB_PATH,
+                                                         review_dir=Path(tmp) / "review3").start()
+        real_input, builtins.input = builtins.input, no_input
+        try:
+            unknown = dict(DETECTION, **{'class': 'objet_jamais_vu'})
+            assert detector.sort_detection(frame(), unknown) is None
+            assert detector.sort_detection(frame(), DETECTION) == waste_classifier.get_bin_color("can")
+        finally:
+            builtins.input = real_input
+            detector.review_queue.close()
+        items, _ = review_queue.list_reviews(db_path=waste_classifier.DB_PATH, limit=500)
+        assert [(i['detected_class'], i['reason']) for i in items][-1] == ('objet_jamais_vu', 'unknown')
+        print("   ✓ objet inconnu non trié et mis en révision, objet connu trié")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_relabel_reaches_dataset(tmp):
+    """Test 4 : image renommée → label YOLO écrit, image gardée par build_dataset"""
+    print("\n[4] Renommage vers l'apprentissage")
+    try:
+        import review_queue
+        import training_data
+        import waste_classifier
+        from dataset_builder import build_dataset
+
+        training_dir = Path(tmp) / "training"
+        training_data.TRAINING_DIR = training_dir
+        training_data._hash_index = training_data.PerceptualHashIndex(
+            path=training_dir / ".phash_index.tsv", root=training_dir, max_distance=4)
+        queue = review_queue.ReviewQueue(db_path=waste_classifier.DB_PATH,
+                                         review_dir=Path(tmp) / "review4").start()
+        try:
+            assert queue.enqueue(frame(40), DETECTION, 0, "sort")
+            assert queue.enqueue(frame(41), DETECTION, None, "unknown")
+        finally:
+            queue.close()  # Écritures terminées
+        assert queue.images_written == 2
+        items, _ = review_queue.list_reviews(db_path=waste_classifier.DB_PATH, limit=500)
+        for item in items[-2:]:
+            review_queue.resolve_review(item['id'], "relabel", label="Plastic Bottle",
+                                        db_path=waste_classifier.DB_PATH, review_dir=queue.review_dir)
+
+        labels = sorted((training_dir / "plastic_bottle").glob("*.txt"))
+        assert len(labels) == 2, labels
+        x, y, w, h = (float(v) for v in labels[0].read_text().split()[1:])
+        assert (round(x, 4), round(y, 4), round(w, 4), round(h, 4)) == (0.4688, 0.4688, 0.625, 0.625)
+        assert not list((training_dir / "_errors" / "can").glob("*.txt"))
+        report = build_dataset(training_dir, Path(tmp) / "dataset", image_size=64, workers=1)
+        assert report["status"] == {"ok": 2} and report["per_class"]["plastic_bottle"] == 2, report
+        print("   ✓ 2 images renommées (avec ou sans id de classe) gardées par le jeu de données")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test file de révision\n" + "=" * 50)
+    import status_report
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status_report.STATUS_DIR = Path(tmp) / "status"
+        waste_classifier.DB_PATH = Path(tmp) / "waste_items.db"
+        waste_classifier.init_database()
+        try:
+            results = [test_pending_refresh(tmp), test_write_failure(tmp), test_unknown_item(tmp),
+                       test_relabel_reaches_dataset(tmp)]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
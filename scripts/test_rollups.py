@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test des agrégats horaires / journaliers (/api/analytics)
+Base temporaire : les agrégats tenus à jour à chaque détection doivent être
+égaux à un calcul direct sur l'historique, et à une reconstruction complète.
+Usage : python3 scripts/test_rollups.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def direct_counts(conn, length, key_column):
+    """{(tranche, clé): (nombre, somme des confiances)} calculé sur l'historique brut"""
+    return {
+        (bucket, key): (count, round(total, 6))
+        for bucket, key, count, total in conn.execute(f"""
+            SELECT substr(timestamp, 1, {length}), {key_column}, COUNT(*), SUM(confidence)
+            FROM sorting_history GROUP BY 1, 2
+        """)
+    }
+
+
+def analytics_counts(granularity, group_by, **bounds):
+    import waste_classifier
+
+    return {
+        (point['bucket'], point['key']): (point['count'], round(point['mean_confidence'] * point['count'], 6))
+        for point in waste_classifier.get_analytics(granularity=granularity, group_by=group_by, **bounds)
+    }
+
+
+def test_incremental_rollups():
+    """Test 1 : agrégats incrémentaux = calcul direct (heure/jour, par bac/par objet)"""
+    print("\n[1] Agrégats incrémentaux")
+    try:
+        import waste_classifier
+
+        for i in range(60):
+            waste_classifier.log_detection(["yellow", "green"][i % 2], ["can", "apple"][i % 3 == 0],
+                                           0.5 + (i % 5) / 10)
+        conn = waste_classifier._conn
+        for granularity, length in waste_classifier.ROLLUP_BUCKET_LENGTH.items():
+            for group_by, column in (("bin", "bin_color"), ("item", "item_name")):
+                got = {k: (c, round(s, 4)) for k, (c, s) in analytics_counts(granularity, group_by).items()}
+                want = {k: (c, round(s, 4)) for k, (c, s) in direct_counts(conn, length, column).items()}
+                assert got == want, (granularity, group_by)
+        total = analytics_counts("day", None)
+        assert sum(count for count, _ in total.values()) == 60
+        print("   ✓ 60 détections, agrégats identiques au calcul direct")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_rebuild_and_bounds():
+    """Test 2 : reconstruction complète identique, bornes since / until"""
+    print("\n[2] Reconstruction et bornes")
+    try:
+        import waste_classifier
+
+        before = analytics_counts("hour", "item")
+        assert waste_classifier.rebuild_rollups()
+        assert analytics_counts("hour", "item") == before
+        bucket = min(b for b, _ in before)
+        assert analytics_counts("hour", "item", until=bucket) == {}
+        assert analytics_counts("hour", "item", since=bucket) == before
+        # Bornes au milieu d'une tranche : ramenées au début de la tranche, des deux côtés
+        assert analytics_counts("hour", "item", since=bucket + ":30") == before
+        assert analytics_counts("hour", "item", until=bucket + ":30") == {}
+        day = bucket[:10]
+        assert analytics_counts("day", "item", until=day + "T23:59") == {}
+        assert waste_classifier.get_analytics(granularity="week") == []
+        print("   ✓ reconstruction identique, bornes respectées")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test agrégats\n" + "=" * 50)
+    import history_archive
+    import waste_classifier
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history_archive.ARCHIVE_DIR = Path(tmp) / "archive"
+        history_archive.INDEX_PATH = history_archive.ARCHIVE_DIR / "index.json"
+        waste_classifier.DB_PATH = Path(tmp) / "waste_items.db"
+        waste_classifier.init_database()
+        try:
+            results = [test_incremental_rollups(), test_rebuild_and_bounds()]
+        finally:
+            waste_classifier.cleanup()
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
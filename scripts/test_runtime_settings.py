@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test du rechargement de la configuration à chaud
+Fichier de configuration temporaire : détection des changements, fichier
+invalide ignoré, répartition des paramètres par composant, détecteur
+reconfiguré (régulateur d'un modèle ONNX, textes de l'affichage).
+Usage : python3 scripts/test_runtime_settings.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+CONFIG = """
+CONFIDENCE_THRESHOLD = 0.5
+MIN_DETECTIONS = 3
+FRAME_WIDTH = 640
+WASTE_TO_BIN_MAPPING = {"can": "yellow"}
+BAUD_RATE = 9600
+_prive = 1
+"""
+
+
+def write(path, text, tick):
+    """Écrit le fichier avec une date de modification distincte (tick)"""
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(tick * 10**9, tick * 10**9))
+
+
+def test_poll(tmp):
+    """Test 1 : seuls les paramètres modifiés sont retournés, au plus une fois par intervalle"""
+    print("\n[1] Détection des changements")
+    try:
+        from runtime_settings import SettingsWatcher
+
+        path = Path(tmp) / "config.py"
+        write(path, CONFIG, 1)
+        watcher = SettingsWatcher(path, interval=1.0)
+        assert "_prive" not in watcher.values and watcher.values["MIN_DETECTIONS"] == 3
+        assert watcher.poll(0.0) == {}
+        write(path, CONFIG.replace("0.5", "0.6").replace('"yellow"', '"blue"'), 2)
+        assert watcher.poll(0.5) == {}  # Avant la fin de l'intervalle
+        changes = watcher.poll(1.0)
+        assert changes == {"CONFIDENCE_THRESHOLD": 0.6, "WASTE_TO_BIN_MAPPING": {"can": "blue"}}, changes
+        assert watcher.poll(2.0) == {} and watcher.reloads == 1
+        print("   ✓ changements détectés par date de modification, intervalle respecté")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_invalid_file(tmp):
+    """Test 2 : fichier invalide → valeurs en cours conservées, puis rechargé une fois corrigé"""
+    print("\n[2] Fichier invalide")
+    try:
+        from runtime_settings import SettingsWatcher
+
+        path = Path(tmp) / "config_invalide.py"
+        write(path, CONFIG, 1)
+        watcher = SettingsWatcher(path, interval=0.0)
+        write(path, CONFIG + "MIN_DETECTIONS = (\n", 2)
+        assert watcher.poll(1.0) == {}
+        assert watcher.values["MIN_DETECTIONS"] == 3
+        write(path, CONFIG.replace("MIN_DETECTIONS = 3", "MIN_DETECTIONS = 5"), 3)
+        assert watcher.poll(2.0) == {"MIN_DETECTIONS": 5}
+        print("   ✓ erreur de syntaxe ignorée, correction prise en compte")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_group_changes():
+    """Test 3 : paramètres regroupés par composant, les autres demandent un redémarrage"""
+    print("\n[3] Répartition par composant")
+    try:
+        from runtime_settings import group_changes
+
+        groups, restart = group_changes({
+            "CONFIDENCE_THRESHOLD": 0.6, "IOU_THRESHOLD": 0.4, "FRAME_WIDTH": 320,
+            "MIN_DETECTIONS": 5, "BAUD_RATE": 115200, "ARDUINO_PORT": "/dev/ttyUSB1",
+        })
+        assert groups == {
+            "model": {"CONFIDENCE_THRESHOLD": 0.6, "IOU_THRESHOLD": 0.4},
+            "camera": {"FRAME_WIDTH": 320},
+            "tracker": {"MIN_DETECTIONS": 5},
+        }, groups
+        assert restart == ["ARDUINO_PORT", "BAUD_RATE"]
+        print("   ✓ composants à reconstruire, paramètres nécessitant un redémarrage")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+class FixedSizeModel:
+    """Modèle ONNX simulé : taille d'entrée fixe"""
+    fixed_size = True
+    names = {0: "can"}
+
+
+def test_detector_reload():
+    """Test 4 : nouveau modèle → régulateur reconfiguré ; textes suivant les réglages"""
+    print("\n[4] Détecteur reconfiguré à chaud")
+    try:
+        import numpy as np
+        from adaptive_control import AdaptiveController
+        from yolo_detector import DetectionTracker, WasteDetector
+
+        detector = WasteDetector.__new__(WasteDetector)
+        detector.inference_client = None
+        detector.model = None
+        detector.cascade = detector.capture_policy = detector.shadow = detector.thermal = None
+        detector.grabber = None
+        detector.frame_age = 0.0
+        detector.tracker = DetectionTracker(min_detections=3)
+        detector.controller = AdaptiveController(target_fps=12, sizes=[640, 320], camera_fps=30)
+        detector.settings = type("Settings", (), {"values": {
+            "MODEL_PATH": "best.onnx", "CONFIDENCE_THRESHOLD": 0.5, "IOU_THRESHOLD": 0.45,
+            "MIN_DETECTIONS": 7, "AUTO_SORT_DELAY": 1.0,
+        }})()
+        detector.load_model = lambda path: FixedSizeModel()
+
+        detector.apply_settings({"MODEL_PATH": "best.onnx", "MIN_DETECTIONS": 7})
+        assert detector.controller.sizes == [None] and detector.controller.size is None
+        assert (detector.controller.target_fps, detector.controller.camera_fps) == (12, 30)
+
+        detector.tracker.last_detection = {"class": "can"}
+        texts = detector.overlay_texts(10, [], np.zeros((240, 320, 3)).shape[0])
+        assert any(text.endswith("/7)") for text, *_ in texts), texts
+        assert texts[-1][1] == (10, 230)
+        print("   ✓ taille fixe pour le modèle ONNX, cadences gardées, seuil et hauteur à jour")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test configuration à chaud\n" + "=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [test_poll(tmp), test_invalid_file(tmp), test_group_changes(),
+                   test_detector_reload()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
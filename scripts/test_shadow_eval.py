@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test du modèle candidat en observation (shadow)
+Modèles simulés : appariement des boîtes, accord sur la classe principale,
+candidat à la taille d'entrée et face aux détections du modèle en service.
+Usage : python3 scripts/test_shadow_eval.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+BOX = [10, 10, 30, 30]
+NEAR = [11, 10, 31, 29]
+FAR = [40, 20, 60, 40]
+
+
+def det(class_name, confidence, bbox=BOX):
+    return {'class': class_name, 'confidence': confidence, 'bbox': list(bbox)}
+
+
+def test_compare_detections():
+    """Test 1 : boîtes appariées par classe et IoU, chacune une seule fois"""
+    print("\n[1] Comparaison des boîtes")
+    try:
+        from shadow_eval import EMPTY, compare_detections, top_class
+
+        primary = [det("can", 0.9), det("can", 0.8, NEAR), det("paper", 0.7, FAR)]
+        shadow = [det("can", 0.6, NEAR), det("glass", 0.9, FAR)]
+        assert compare_detections(primary, shadow) == (1, 2, 1)
+        assert compare_detections([], shadow) == (0, 0, 2)
+        assert compare_detections(primary, []) == (0, 3, 0)
+        assert top_class(primary) == "can" and top_class(shadow) == "glass" and top_class([]) == EMPTY
+        print("   ✓ 1 appariée, 2 du modèle en service seules, 1 du candidat seule")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_record():
+    """Test 2 : accord, désaccords et seuil de confiance"""
+    print("\n[2] Accord sur la classe principale")
+    try:
+        from shadow_eval import ShadowEvaluator
+
+        evaluator = ShadowEvaluator(lambda image, size: [], "candidate.onnx", threshold=0.5)
+        evaluator.record([det("can", 0.9)], [det("can", 0.7, NEAR)], 20.0, 10.0, 640)
+        evaluator.record([det("can", 0.9)], [det("paper", 0.8), det("can", 0.3)], 20.0, 10.0, 640)
+        evaluator.record([det("can", 0.4)], [], 20.0, 10.0, 320)  # Sous le seuil : image vide des deux côtés
+        report = evaluator.report()
+        assert report['compared'] == 3 and report['agreement'] == round(2 / 3, 4)
+        assert report['boxes'] == {"matched": 1, "primary_only": 1, "shadow_only": 1}
+        assert report['disagreements'] == [{'primary': "can", 'shadow': "paper", 'count': 1}]
+        assert report['speedup'] == 2.0 and report['sizes'] == {"640": 2, "320": 1}
+        print("   ✓ accord 2/3, désaccord can → paper, candidat 2× plus rapide")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_submit():
+    """Test 3 : une image sur N, candidat à la taille du modèle en service"""
+    print("\n[3] Images proposées")
+    try:
+        from shadow_eval import ShadowEvaluator
+
+        shadow_sizes = []
+
+        def detect_shadow(image, size):
+            shadow_sizes.append(size)
+            return [det("can", 0.8, NEAR)]
+
+        evaluator = ShadowEvaluator(detect_shadow, "candidate.onnx",
+                                    sample_every=3, cpu_budget=1.0, threshold=0.5).start()
+        try:
+            accepted = []
+            for i in range(9):
+                accepted.append(evaluator.submit(FRAME, [det("can", 0.9)], 20.0 + i, 320 if i < 6 else None))
+                deadline = time.monotonic() + 2.0
+                while evaluator.compared < sum(accepted) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+        finally:
+            evaluator.close()
+        assert accepted == [False, False, True] * 3, accepted
+        assert shadow_sizes == [320, 320, None] and evaluator.compared == 3
+        report = evaluator.report()
+        assert report['agreement'] == 1.0 and report['latency_ms']['primary']['p50'] == 25.0
+        assert report['sizes'] == {"320": 2, "auto": 1}
+        print("   ✓ une image sur 3, même taille d'entrée, latence du modèle en service reprise")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test modèle candidat\n" + "=" * 50)
+    import status_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status_report.STATUS_DIR = Path(tmp) / "status"
+        results = [test_compare_detections(), test_record(), test_submit()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
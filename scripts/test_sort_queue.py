@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test de la file des tris physiques (sans Arduino)
+Port série simulé : ordre des travaux, positions, événements et reprise,
+refus d'ouvrir le port quand le détecteur le détient, port rendu quand la
+file est inactive ou qu'un détecteur démarre.
+Usage : python3 scripts/test_sort_queue.py
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+class FakeSerial:
+    """Port série simulé : chaque commande attend le feu vert du test"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Semaphore(0)
+        self.is_open = True
+        self.closed = threading.Event()
+
+    def close(self):
+        self.is_open = False
+        self.closed.set()
+
+
+def install_fake_serial():
+    """Remplace l'ouverture du port et l'envoi des commandes ; retourne le port simulé"""
+    import waste_classifier
+
+    fake = FakeSerial()
+
+    def send_sort_command(bin_color, ser=None):
+        fake.release.acquire(timeout=5)
+        fake.sent.append(bin_color)
+        return bin_color != "refus"
+
+    waste_classifier.open_serial = lambda port, baud_rate=None: fake
+    waste_classifier.send_sort_command = send_sort_command
+    return fake
+
+
+def wait_status(queue, job_id, status):
+    """Attendre qu'un travail atteigne un état (via les événements)"""
+    after = 0
+    for _ in range(50):
+        for seq, job in queue.wait_events(after=after, timeout=0.1):
+            after = seq
+            if job['id'] == job_id and job['status'] == status:
+                return True
+    return False
+
+
+def test_order_and_positions():
+    """Test 1 : ordre d'arrivée, position comptant le tri en cours, échecs"""
+    print("\n[1] Ordre et positions")
+    try:
+        from sort_queue import SortQueue
+
+        fake = install_fake_serial()
+        queue = SortQueue(sorting_duration=0).start()
+        first = queue.submit("can", "yellow")
+        assert first['position'] == 1
+        assert wait_status(queue, first['id'], 'sorting')
+        second = queue.submit("apple", "brown")
+        third = queue.submit("x", "refus")
+        assert (second['position'], third['position']) == (2, 3), (second, third)
+        for _ in range(3):
+            fake.release.release()
+        assert wait_status(queue, third['id'], 'failed')
+        assert fake.sent == ["yellow", "brown", "refus"]
+        assert queue.get_job(first['id'])['status'] == 'done'
+        assert queue.get_job(third['id'])['error']
+        assert queue.stats()['jobs'] == {'done': 2, 'failed': 1}
+        print("   ✓ tris dans l'ordre, le tri en cours compte dans la position")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_events_resume():
+    """Test 2 : reprise après un numéro d'événement et après redémarrage du serveur"""
+    print("\n[2] Événements")
+    try:
+        from sort_queue import SortQueue
+
+        fake = install_fake_serial()
+        queue = SortQueue(sorting_duration=0).start()
+        job = queue.submit("can", "yellow")
+        fake.release.release()
+        assert wait_status(queue, job['id'], 'done')
+        events = queue.wait_events(after=0, timeout=0)
+        assert [j['status'] for _, j in events] == ['queued', 'sorting', 'done']
+        assert [j['status'] for _, j in queue.wait_events(after=events[0][0], timeout=0)] == ['sorting', 'done']
+        assert queue.wait_events(after=events[-1][0], timeout=0.05) == []
+        # Last-Event-ID d'avant un redémarrage : plus grand que tout numéro publié
+        assert queue.wait_events(after=10_000, timeout=1.0) == events
+        print("   ✓ reprise par numéro, numéro inconnu → depuis le début (sans attente)")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_serial_owner():
+    """Test 3 : port série non ouvert tant que le détecteur publie son état"""
+    print("\n[3] Port série détenu par le détecteur")
+    try:
+        import sort_queue
+        import status_report
+        import waste_classifier
+        from sort_queue import SortQueue, serial_port_owner
+
+        opened = []
+        install_fake_serial()
+        waste_classifier.open_serial = lambda port, baud_rate=None: opened.append(port)
+
+        assert serial_port_owner() is None
+        status_report.write_status("detector", {'fps': 10})
+        assert serial_port_owner() == "detector"
+        queue = SortQueue(sorting_duration=0).start()
+        job = queue.submit("can", "yellow")
+        assert wait_status(queue, job['id'], 'failed')
+        assert opened == [] and "detector" in queue.get_job(job['id'])['error']
+
+        sort_queue.OWNER_STALE_SECONDS = 0  # État trop ancien : détecteur arrêté
+        assert serial_port_owner() is None
+        print("   ✓ travail refusé sans ouvrir le port, état périmé ignoré")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_serial_released():
+    """Test 4 : port refermé quand la file est inactive ou qu'un détecteur démarre"""
+    print("\n[4] Port série rendu")
+    try:
+        import sort_queue
+        import status_report
+        from sort_queue import SortQueue
+
+        sort_queue.OWNER_STALE_SECONDS = 60
+        # État du détecteur publié dans "status" ; "status_empty" : aucun détecteur
+        status_report.write_status("detector", {'fps': 0})
+        status_report.STATUS_DIR = status_report.STATUS_DIR.with_name("status_empty")
+
+        fake = install_fake_serial()
+        queue = SortQueue(sorting_duration=0, idle_seconds=0.1).start()
+        job = queue.submit("can", "yellow")
+        fake.release.release()
+        assert wait_status(queue, job['id'], 'done')
+        assert fake.closed.wait(2.0) and queue._serial is None
+
+        # Port ouvert pour une série de tris, puis un détecteur démarre
+        fake = install_fake_serial()
+        queue = SortQueue(sorting_duration=0, idle_seconds=60).start()
+        job = queue.submit("can", "yellow")
+        fake.release.release()
+        assert wait_status(queue, job['id'], 'done') and not fake.closed.is_set()
+        status_report.STATUS_DIR = status_report.STATUS_DIR.with_name("status")
+        job = queue.submit("apple", "brown")
+        assert wait_status(queue, job['id'], 'failed')
+        assert fake.closed.is_set() and fake.sent == ["yellow"]
+        print("   ✓ refermé après inactivité, rendu au détecteur avant le travail suivant")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test file de tri\n" + "=" * 50)
+    import status_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status_report.STATUS_DIR = Path(tmp) / "status"
+        results = [test_order_and_positions(), test_events_resume(), test_serial_owner(),
+                   test_serial_released()]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Smart Bin SI - Test des niveaux thermiques (sysfs simulé dans un dossier temporaire)
+Lecture des zones et fréquences, niveaux avec hystérésis, décision d'inférence.
+Usage : python3 scripts/test_thermal.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def fake_sysfs(root):
+    """Arborescence sysfs minimale d'un Jetson ; retourne une fonction qui règle la température"""
+    root = Path(root)
+    for index, name in enumerate(("CPU-therm", "GPU-therm")):
+        zone = root / "class" / "thermal" / f"thermal_zone{index}"
+        zone.mkdir(parents=True)
+        (zone / "type").write_text(name + "\n")
+        (zone / "temp").write_text("40000\n")
+    cpufreq = root / "devices" / "system" / "cpu" / "cpu0" / "cpufreq"
+    cpufreq.mkdir(parents=True)
+    (cpufreq / "scaling_cur_freq").write_text("1479000\n")
+    (cpufreq / "cpuinfo_max_freq").write_text("1479000\n")
+    gpu = root / "class" / "devfreq" / "57000000.gpu"
+    gpu.mkdir(parents=True)
+    (gpu / "cur_freq").write_text("921600000\n")
+    (gpu / "max_freq").write_text("921600000\n")
+
+    def set_gpu_temp(celsius):
+        (root / "class" / "thermal" / "thermal_zone1" / "temp").write_text(f"{int(celsius * 1000)}\n")
+    return set_gpu_temp
+
+
+def monitor(root):
+    from thermal import ThermalMonitor
+
+    return ThermalMonitor(root=root, interval=1.0, reduced_c=70.0, motion_only_c=80.0,
+                          hysteresis_c=5.0, reduced_stride=3)
+
+
+def test_sysfs(tmp):
+    """Test 1 : zones, fréquences CPU / GPU, sysfs absent"""
+    print("\n[1] Lecture sysfs")
+    try:
+        import thermal
+
+        fake_sysfs(tmp)
+        assert thermal.read_thermal_zones(tmp) == {"CPU-therm": 40.0, "GPU-therm": 40.0}
+        assert thermal.read_cpu_freqs(tmp) == {"cpu0": (1479, 1479)}
+        assert thermal.read_gpu_freq(tmp) == (921, 921)
+        empty = Path(tmp) / "vide"
+        assert thermal.read_thermal_zones(empty) == {} and not monitor(empty).poll(0.0)
+        print("   ✓ températures en °C, fréquences en MHz, sysfs absent sans effet")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_tiers(tmp):
+    """Test 2 : montée par seuils, descente seulement sous seuil - hystérésis"""
+    print("\n[2] Niveaux et hystérésis")
+    try:
+        set_gpu_temp = fake_sysfs(Path(tmp) / "jetson")
+        mon = monitor(Path(tmp) / "jetson")
+        tiers = []
+        for t, celsius in enumerate((60, 72, 68, 66, 64, 85, 77, 74, 50)):
+            set_gpu_temp(celsius)
+            mon.poll(float(t))
+            tiers.append(mon.tier)
+        assert tiers == ["full", "reduced", "reduced", "reduced", "full",
+                         "motion_only", "motion_only", "reduced", "full"], tiers
+        assert mon.hottest_zone == "GPU-therm" and mon.transitions == 5
+        set_gpu_temp(90)
+        assert not mon.poll(8.5)  # Avant la fin de l'intervalle
+        report = mon.report(now=9.0)
+        assert abs(sum(report['time_in_tier_s'].values()) - 9.0) < 1e-6, report
+        print("   ✓ 72 °C → reduced, maintenu jusqu'à 65 °C ; 85 °C → motion_only")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def test_allow_inference(tmp):
+    """Test 3 : toutes les images, une sur N, seulement en cas de mouvement"""
+    print("\n[3] Décision d'inférence")
+    try:
+        from thermal import MOTION_HOLD_SECONDS
+
+        mon = monitor(Path(tmp) / "vide")
+        still = np.zeros((240, 320, 3), dtype=np.uint8)
+        assert all(mon.allow_inference(still) for _ in range(3))
+        mon.tier = "reduced"
+        mon._frame = 0
+        assert [mon.allow_inference(still) for _ in range(6)] == [False, False, True] * 2
+        mon.tier = "motion_only"
+        assert not mon.allow_inference(still, now=0.0)
+        assert not mon.allow_inference(still, now=0.1)
+        moved = still.copy()
+        moved[60:180, 80:240] = 255
+        assert mon.allow_inference(moved, now=0.2)
+        assert mon.allow_inference(moved, now=0.2 + MOTION_HOLD_SECONDS / 2)  # Maintien
+        assert not mon.allow_inference(moved, now=0.3 + MOTION_HOLD_SECONDS)
+        print("   ✓ full / reduced / motion_only (avec maintien après mouvement)")
+        return True
+    except Exception as e:
+        print("   ✗", e)
+        return False
+
+
+def main():
+    print("Smart Bin SI - Test niveaux thermiques\n" + "=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [test_sysfs(tmp), test_tiers(tmp), test_allow_inference(tmp)]
+    print("\n" + "=" * 50)
+    print(f"{sum(results)}/{len(results)} tests réussis")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
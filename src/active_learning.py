@@ -0,0 +1,128 @@
+"""
+Smart Bin SI - Capture automatique des cas incertains (apprentissage actif)
+Plutôt que d'enregistrer chaque tri, on ne met en file de révision que les
+images où le modèle hésite, celles qui apprennent le plus au réentraînement :
+- low_confidence : meilleure détection à peine au-dessus du seuil de confiance
+- flicker        : la classe détectée change d'une image à l'autre sur le même objet
+- disagreement   : deux détections superposées de classes différentes dans l'image
+Les captures sont limitées par classe (CAPTURE_INTERVAL_PER_CLASS) et au total
+(CAPTURE_MAX_PER_HOUR). L'écriture se fait hors de la boucle caméra (ReviewQueue).
+"""
+
+import time
+from collections import deque
+
+from config import (
+    CONFIDENCE_THRESHOLD, UNCERTAINTY_MARGIN, FLICKER_WINDOW,
+    CAPTURE_INTERVAL_PER_CLASS, CAPTURE_MAX_PER_HOUR,
+)
+
+REASONS = ("low_confidence", "flicker", "disagreement")
+
+# Recouvrement minimal pour considérer deux boîtes comme le même objet
+SAME_OBJECT_IOU = 0.5
+
+
+def box_iou(a, b):
+    """Intersection sur union de deux boîtes [x1, y1, x2, y2]"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class CapturePolicy:
+    """
+    Décide, image analysée par image analysée, s'il faut capturer l'image
+    pour révision, et pourquoi.
+    """
+
+    def __init__(self, threshold=CONFIDENCE_THRESHOLD, margin=UNCERTAINTY_MARGIN,
+                 flicker_window=FLICKER_WINDOW, class_interval=CAPTURE_INTERVAL_PER_CLASS,
+                 max_per_hour=CAPTURE_MAX_PER_HOUR):
+        """
+        Args:
+            threshold: Seuil de confiance du modèle
+            margin: Confiance < threshold + margin → détection incertaine
+            flicker_window: Nombre d'images analysées observées pour le changement de classe
+            class_interval: Délai minimum entre deux captures d'une même classe (secondes)
+            max_per_hour: Nombre maximum de captures par heure, toutes classes confondues
+        """
+        self.threshold = threshold
+        self.margin = margin
+        self.class_interval = class_interval
+        self.max_per_hour = max_per_hour
+        self._history = deque(maxlen=max(2, int(flicker_window)))  # (classe, bbox) de la meilleure détection
+        self._last_capture = {}  # classe → heure de la dernière capture
+        self._recent = deque()   # heures des captures de la dernière heure
+        self.captured = {reason: 0 for reason in REASONS}
+        self.rate_limited = 0
+
+    def _flicker(self, best):
+        """Changements de classe successifs sur le même objet, dans la fenêtre"""
+        switches = 0
+        previous = None
+        for class_name, bbox in self._history:
+            if previous is not None and box_iou(previous[1], bbox) >= SAME_OBJECT_IOU:
+                if class_name != previous[0]:
+                    switches += 1
+            elif previous is not None:
+                switches = 0  # Autre objet : on repart de zéro
+            previous = (class_name, bbox)
+        return switches >= 2
+
+    def _disagreement(self, detections):
+        for i, a in enumerate(detections):
+            for b in detections[i + 1:]:
+                if a['class'] != b['class'] and box_iou(a['bbox'], b['bbox']) >= SAME_OBJECT_IOU:
+                    return True
+        return False
+
+    def evaluate(self, detections, now=None):
+        """
+        Examiner les détections d'une image analysée (dans la zone de détection)
+
+        Args:
+            detections: Liste de dict avec 'class', 'confidence', 'bbox'
+
+        Retourne:
+            (raison, détection) si l'image doit être capturée, sinon None
+        """
+        if not detections:
+            self._history.clear()
+            return None
+        now = time.monotonic() if now is None else now
+        best = max(detections, key=lambda d: d['confidence'])
+        self._history.append((best['class'], best['bbox']))
+
+        if self._disagreement(detections):
+            reason = "disagreement"
+        elif self._flicker(best):
+            reason = "flicker"
+        elif best['confidence'] < self.threshold + self.margin:
+            reason = "low_confidence"
+        else:
+            return None
+
+        # Limites : par classe, puis budget horaire global
+        last = self._last_capture.get(best['class'])
+        if last is not None and now - last < self.class_interval:
+            return None
+        while self._recent and now - self._recent[0] > 3600:
+            self._recent.popleft()
+        if self.max_per_hour is not None and len(self._recent) >= self.max_per_hour:
+            self.rate_limited += 1
+            return None
+        self._last_capture[best['class']] = now
+        self._recent.append(now)
+        self.captured[reason] += 1
+        return reason, best
+
+    def report(self):
+        """Captures par raison et captures refusées par le budget horaire"""
+        return {
+            'captured': dict(self.captured),
+            'rate_limited': self.rate_limited,
+            'last_hour': len(self._recent),
+        }
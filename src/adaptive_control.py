@@ -0,0 +1,147 @@
+"""
+Smart Bin SI - Régulation de la cadence de détection
+- Mesure la cadence réelle de la boucle sur des fenêtres de quelques secondes
+- Trop lent : réduit d'abord la taille d'entrée du modèle, puis n'exécute
+  l'inférence qu'une image sur N (pas d'images)
+- Marge suffisante : revient d'abord à chaque image, puis à la taille supérieure
+- Chaque point de fonctionnement garde sa dernière cadence mesurée : on ne
+  remonte pas vers un point récemment mesuré sous l'objectif (pas d'oscillation) ;
+  une fois la mesure expirée, le point est réessayé
+- La marge demandée pour essayer un point jamais mesuré est plafonnée par la
+  cadence de la caméra (la boucle ne peut pas aller plus vite qu'elle)
+"""
+
+import time
+
+from config import TARGET_FPS, ADAPTIVE_INPUT_SIZES, MAX_FRAME_STRIDE, ADAPTIVE_WINDOW, CAMERA_FPS
+
+MEASURE_EXPIRY = 60.0  # Au-delà (secondes), une mesure ancienne ne bloque plus la remontée
+UPGRADE_MARGIN = 1.3   # Marge demandée pour essayer un point jamais mesuré
+CAMERA_CEILING = 0.9   # Fraction de la cadence caméra considérée comme « au plafond »
+
+
+class AdaptiveController:
+    """
+    Régulateur taille d'entrée / pas d'images pour tenir TARGET_FPS
+    Point de fonctionnement : (taille d'entrée du modèle, pas d'images).
+    """
+
+    def __init__(self, target_fps=TARGET_FPS, sizes=ADAPTIVE_INPUT_SIZES,
+                 max_stride=MAX_FRAME_STRIDE, window=ADAPTIVE_WINDOW, camera_fps=CAMERA_FPS):
+        """
+        Args:
+            target_fps: Cadence visée pour la boucle (images traitées par seconde)
+            camera_fps: Cadence de la caméra (plafond de la boucle ; None = inconnue)
+            sizes: Tailles d'entrée du modèle, de la plus grande à la plus petite
+            max_stride: Pas maximum (1 = inférence sur toutes les images)
+            window: Durée d'une fenêtre de mesure (secondes)
+        """
+        self.target_fps = target_fps
+        self.sizes = list(sizes) or [None]
+        self.max_stride = max(1, int(max_stride))
+        self.window = window
+        self.camera_fps = camera_fps
+        self.size_index = 0
+        self.stride = 1
+        self.fps = 0.0
+        self.adjustments = 0
+        self.last_adjustment = None
+        self._measured = {}  # (index de taille, pas) → (dernière cadence mesurée, heure)
+        self._frame = 0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+
+    @property
+    def size(self):
+        """Taille d'entrée actuelle du modèle (None = taille par défaut du modèle)"""
+        return self.sizes[self.size_index]
+
+    def should_infer(self):
+        """True si l'inférence doit tourner sur l'image courante (une image sur stride)"""
+        self._frame += 1
+        return self.stride == 1 or self._frame % self.stride == 0
+
+    def record_frame(self, now=None):
+        """
+        Compter une image traitée par la boucle ; ajuste le point de
+        fonctionnement à la fin de chaque fenêtre de mesure.
+
+        Retourne:
+            bool: True si le point de fonctionnement a changé
+        """
+        now = time.monotonic() if now is None else now
+        self._window_frames += 1
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return False
+        self.fps = self._window_frames / elapsed
+        self._window_start = now
+        self._window_frames = 0
+        self._measured[(self.size_index, self.stride)] = (self.fps, now)
+        if not self.target_fps:
+            return False
+        if self.fps < self.target_fps * 0.9:
+            return self._degrade()
+        return self._upgrade(now)
+
+    def _degrade(self):
+        """Trop lent : taille inférieure, sinon pas supérieur"""
+        if self.size_index < len(self.sizes) - 1:
+            return self._move(self.size_index + 1, self.stride, "trop lent")
+        if self.stride < self.max_stride:
+            return self._move(self.size_index, self.stride + 1, "trop lent")
+        return False
+
+    def _upgrade(self, now):
+        """
+        Marge disponible : pas inférieur, sinon taille supérieure, à condition
+        que le point visé n'ait pas déjà été mesuré sous l'objectif
+        """
+        if self.stride > 1:
+            candidate = (self.size_index, self.stride - 1)
+        elif self.size_index > 0:
+            candidate = (self.size_index - 1, self.stride)
+        else:
+            return False
+        known, measured_at = self._measured.get(candidate, (None, None))
+        if known is not None:
+            if now - measured_at > MEASURE_EXPIRY:
+                # Mesure expirée (charge, température...) : réessayer le point
+                return self._move(candidate[0], candidate[1], "nouvel essai")
+            if known < self.target_fps:
+                return False
+            return self._move(candidate[0], candidate[1], "marge disponible")
+        # Point jamais mesuré : il faut une vraie marge pour l'essayer, sauf si
+        # la boucle tourne déjà à la cadence de la caméra (marge impossible)
+        needed = self.target_fps * UPGRADE_MARGIN
+        if self.camera_fps:
+            needed = min(needed, self.camera_fps * CAMERA_CEILING)
+        if self.fps < needed:
+            return False
+        return self._move(candidate[0], candidate[1], "marge disponible")
+
+    def _move(self, size_index, stride, reason):
+        before = (self.size, self.stride)
+        self.size_index, self.stride = size_index, stride
+        self.adjustments += 1
+        self.last_adjustment = {
+            'time': time.time(),
+            'reason': reason,
+            'fps': round(self.fps, 1),
+            'from': {'size': before[0], 'stride': before[1]},
+            'to': {'size': self.size, 'stride': self.stride},
+        }
+        print(f"⚙ Régulation ({reason}, {self.fps:.1f}/{self.target_fps} FPS) : "
+              f"taille {before[0]} → {self.size}, pas {before[1]} → {self.stride}")
+        return True
+
+    def report(self):
+        """Point de fonctionnement courant pour les rapports d'état"""
+        return {
+            'target_fps': self.target_fps,
+            'fps': round(self.fps, 1),
+            'input_size': self.size,
+            'stride': self.stride,
+            'adjustments': self.adjustments,
+            'last_adjustment': self.last_adjustment,
+        }
@@ -0,0 +1,203 @@
+"""
+Smart Bin SI - Capture caméra basse latence
+- Pipeline GStreamer CSI (Jetson) avec appsink borné : on jette les vieilles images
+- Caméra USB (V4L2) : tampon d'une seule image, capture MJPEG optionnelle
+- Thread de capture qui ne garde que l'image la plus récente, horodatée,
+  pour mesurer l'âge de chaque image au moment du traitement
+"""
+
+import threading
+import time
+
+import cv2
+
+from config import (
+    CAMERA_SOURCE, USE_CSI_CAMERA, FRAME_WIDTH, FRAME_HEIGHT,
+    CAMERA_FPS, CAMERA_BUFFER_SIZE, CAMERA_FOURCC, CAMERA_THREADED_CAPTURE,
+)
+
+
+# ============================================
+# OUVERTURE DE LA CAMÉRA
+# ============================================
+
+def get_csi_pipeline(camera_id=0, width=640, height=480, fps=30, low_latency=True):
+    """
+    Créer un pipeline GStreamer pour caméra CSI Jetson
+
+    Args:
+        camera_id: ID du capteur caméra (0 ou 1)
+        width: Largeur de l'image
+        height: Hauteur de l'image
+        fps: Fréquence d'images
+        low_latency: appsink borné à une image (drop=true, max-buffers=1, sync=false)
+
+    Retourne:
+        str: Chaîne de pipeline GStreamer
+    """
+    # Sans drop/max-buffers, appsink accumule les images tant que la boucle
+    # de détection est plus lente que la caméra → on traite des images périmées
+    sink = "appsink drop=true max-buffers=1 sync=false" if low_latency else "appsink"
+    return (
+        f"nvarguscamerasrc sensor-id={camera_id} ! "
+        f"video/x-raw(memory:NVMM), width={width}, height={height}, "
+        f"format=NV12, framerate={fps}/1 ! "
+        f"nvvidconv flip-method=0 ! "
+        f"video/x-raw, width={width}, height={height}, format=BGRx ! "
+        f"videoconvert ! "
+        f"video/x-raw, format=BGR ! {sink}"
+    )
+
+
+def open_camera(source=CAMERA_SOURCE, use_csi=USE_CSI_CAMERA,
+                width=FRAME_WIDTH, height=FRAME_HEIGHT, fps=CAMERA_FPS,
+                fourcc=CAMERA_FOURCC, buffer_size=CAMERA_BUFFER_SIZE):
+    """
+    Ouvrir la caméra (CSI via GStreamer ou USB via V4L2) en mode basse latence
+
+    Args:
+        source: Index ou chemin de la caméra USB (ID du capteur en CSI)
+        use_csi: True pour la caméra CSI Jetson
+        width: Largeur de l'image
+        height: Hauteur de l'image
+        fps: Fréquence d'images demandée
+        fourcc: Format USB (ex: "MJPG", None = format du pilote)
+        buffer_size: Taille du tampon V4L2 (None = valeur du pilote)
+
+    Retourne:
+        cv2.VideoCapture: Capture ouverte (vérifier isOpened())
+    """
+    if use_csi:
+        print("📷 Ouverture caméra CSI...")
+        # Pour la CSI, la source est l'identifiant du capteur (0 ou 1)
+        camera_id = source if isinstance(source, int) else 0
+        pipeline = get_csi_pipeline(camera_id=camera_id, width=width, height=height, fps=fps)
+        return cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+
+    print(f"📷 Ouverture caméra : {source}")
+    cap = cv2.VideoCapture(source)
+    # Le FOURCC doit être fixé avant la résolution pour que le pilote
+    # négocie le mode MJPEG (moins de bande passante USB qu'en YUYV)
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    # Une seule image en file côté pilote : la prochaine lecture est la plus récente
+    if buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return cap
+
+
+def _capture_timestamp(cap):
+    """
+    Horodatage (time.monotonic) de l'image qui vient d'être saisie.
+    Utilise l'horodatage du tampon V4L2 (CLOCK_MONOTONIC) quand il est
+    cohérent, sinon l'heure de sortie de grab().
+    """
+    now = time.monotonic()
+    try:
+        buffer_ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+    except cv2.error:
+        return now
+    # Certains backends renvoient une position dans le flux, pas une horloge :
+    # on ne garde la valeur que si elle est plausible (quelques secondes au plus)
+    if 0 < now - buffer_ts < 5.0:
+        return buffer_ts
+    return now
+
+
+# ============================================
+# LECTURE DE L'IMAGE LA PLUS RÉCENTE
+# ============================================
+
+class FrameGrabber:
+    """
+    Lecture caméra qui renvoie toujours l'image la plus récente
+    En mode thread, la caméra est vidée en continu et seule la dernière image
+    est conservée ; sinon la lecture est synchrone (grab + retrieve).
+    """
+
+    def __init__(self, cap, threaded=CAMERA_THREADED_CAPTURE):
+        """
+        Args:
+            cap: cv2.VideoCapture ouverte
+            threaded: True pour lire la caméra dans un thread dédié
+        """
+        self.cap = cap
+        self.threaded = threaded
+        self._cond = threading.Condition()
+        self._frame = None
+        self._capture_ts = 0.0
+        self._seq = 0
+        self._read_seq = 0
+        self._ok = True
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Démarrer le thread de capture (sans effet en mode synchrone)"""
+        if self.threaded and not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name="camera-grabber", daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        while self._running:
+            if not self.cap.grab():
+                with self._cond:
+                    self._ok = False
+                    self._cond.notify_all()
+                return
+            capture_ts = _capture_timestamp(self.cap)
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                continue
+            with self._cond:
+                self._frame = frame
+                self._capture_ts = capture_ts
+                self._seq += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=2.0):
+        """
+        Lire l'image la plus récente (jamais deux fois la même en mode thread)
+
+        Retourne:
+            tuple: (ok, image, horodatage de capture en time.monotonic())
+        """
+        if not self.threaded:
+            if not self.cap.grab():
+                return False, None, 0.0
+            capture_ts = _capture_timestamp(self.cap)
+            ret, frame = self.cap.retrieve()
+            return ret, frame, capture_ts
+
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq != self._read_seq or not self._ok,
+                timeout=timeout
+            )
+            if self._seq == self._read_seq:
+                return False, None, 0.0
+            self._read_seq = self._seq
+            return True, self._frame, self._capture_ts
+
+    @property
+    def failed(self):
+        """True si la caméra ne renvoie plus d'images (mode thread)"""
+        return not self._ok
+
+    def release(self):
+        """Arrêter le thread et libérer la caméra"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.cap.release()
+
+
+def frame_age_ms(capture_ts):
+    """Âge d'une image (ms) entre sa capture et maintenant"""
+    return (time.monotonic() - capture_ts) * 1000.0
@@ -0,0 +1,148 @@
+"""
+Smart Bin SI - Cascade classifieur de zone / détecteur YOLO
+Pour une goulotte où un seul objet tombe à la fois, un détecteur complet sur
+chaque image est superflu :
+1. Un petit classifieur d'images (ONNX exécuté par cv2.dnn) regarde la zone
+   de dépôt (DETECTION_ROI, sinon l'image entière)
+2. S'il est sûr de lui (probabilité ≥ CASCADE_CONFIDENCE) :
+   - zone vide (CASCADE_EMPTY_CLASS) → aucune détection, YOLO n'est pas lancé
+   - objet reconnu → une détection couvrant la zone, YOLO n'est pas lancé
+3. Sinon, l'image part au modèle YOLO complet
+Chaque étage compte ses décisions et son temps : taux de décisions prises par
+le classifieur et latence moyenne résultante par image.
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import CASCADE_INPUT_SIZE, CASCADE_CONFIDENCE, CASCADE_EMPTY_CLASS
+from onnx_detector import read_sidecar
+
+# Normalisation ImageNet (classifieurs YOLOv5-cls, MobileNet, EfficientNet...)
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(1, 3, 1, 1)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(1, 3, 1, 1)
+STAGES = ("empty", "classified", "fallback")
+
+
+def read_labels(model_path):
+    """Classes du classifieur : <modèle>.json ("names") ou <modèle>.txt (une par ligne)"""
+    names = read_sidecar(model_path).get("names")
+    if names is not None:
+        if isinstance(names, dict):
+            return [names[key] for key in sorted(names, key=int)]
+        return list(names)
+    labels_path = Path(model_path).with_suffix(".txt")
+    with open(labels_path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class RoiClassifier:
+    """Classifieur d'images ONNX exécuté par cv2.dnn (CUDA si OpenCV le permet)"""
+
+    def __init__(self, model_path, input_size=CASCADE_INPUT_SIZE):
+        """
+        Args:
+            model_path: Modèle ONNX (sortie : un score par classe)
+            input_size: Côté de l'image d'entrée du classifieur
+        """
+        import cv2
+
+        self.net = cv2.dnn.readNetFromONNX(str(model_path))
+        if hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0:
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
+        self.input_size = input_size
+        self.labels = read_labels(model_path)
+
+    def classify(self, crop):
+        """
+        Retourne:
+            (classe, probabilité) de la classe la plus probable
+        """
+        import cv2
+
+        blob = cv2.dnn.blobFromImage(crop, 1.0 / 255, (self.input_size, self.input_size),
+                                     swapRB=True, crop=False)
+        self.net.setInput((blob - MEAN) / STD)
+        scores = self.net.forward().reshape(-1).astype(np.float64)
+        # Sortie en logits ou déjà en probabilités : normaliser dans les deux cas
+        if scores.min() < 0 or abs(scores.sum() - 1.0) > 1e-3:
+            scores = np.exp(scores - scores.max())
+            scores /= scores.sum()
+        best = int(scores.argmax())
+        return self.labels[best], float(scores[best])
+
+
+class DetectionCascade:
+    """Décision par le classifieur de zone quand il est sûr, YOLO sinon"""
+
+    def __init__(self, classifier, confidence=CASCADE_CONFIDENCE,
+                 empty_class=CASCADE_EMPTY_CLASS, model_names=None):
+        """
+        Args:
+            classifier: RoiClassifier
+            confidence: Probabilité minimale pour décider sans YOLO
+            empty_class: Classe du classifieur signifiant « zone vide »
+            model_names: Classes du modèle YOLO (dict id → nom), pour l'id des détections
+        """
+        self.classifier = classifier
+        self.confidence = confidence
+        self.empty_class = empty_class
+        self.class_ids = {name: idx for idx, name in (model_names or {}).items()}
+        self.counts = {stage: 0 for stage in STAGES}
+        self.time_ms = {"classifier": 0.0, "yolo": 0.0}
+
+    def infer(self, frame, roi, detect):
+        """
+        Détections pour une image
+
+        Args:
+            frame: Image OpenCV (BGR)
+            roi: Zone de dépôt (x1, y1, x2, y2) ou None (image entière)
+            detect: Fonction image → détections (modèle YOLO complet)
+        """
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = [int(v) for v in roi] if roi is not None else (0, 0, width, height)
+        x1, x2 = max(0, x1), min(width, x2)
+        y1, y2 = max(0, y1), min(height, y2)
+        t0 = time.perf_counter()
+        if x2 > x1 and y2 > y1:
+            class_name, probability = self.classifier.classify(frame[y1:y2, x1:x2])
+        else:
+            # Zone hors de l'image (résolution changée) : YOLO sur l'image entière
+            class_name, probability = None, 0.0
+        t1 = time.perf_counter()
+        self.time_ms["classifier"] += (t1 - t0) * 1000
+
+        if class_name is not None and probability >= self.confidence:
+            if class_name == self.empty_class:
+                self.counts["empty"] += 1
+                return []
+            self.counts["classified"] += 1
+            return [{
+                'class': class_name,
+                'class_id': self.class_ids.get(class_name),
+                'confidence': probability,
+                'bbox': [float(x1), float(y1), float(x2), float(y2)],
+                'source': 'classifier',
+            }]
+
+        self.counts["fallback"] += 1
+        detections = detect(frame)
+        self.time_ms["yolo"] += (time.perf_counter() - t1) * 1000
+        return detections
+
+    def report(self):
+        """Part des images décidées par chaque étage et latence moyenne par image"""
+        frames = sum(self.counts.values())
+        return {
+            'frames': frames,
+            'counts': dict(self.counts),
+            'classifier_rate': round((frames - self.counts["fallback"]) / frames, 3) if frames else None,
+            'classifier_ms': round(self.time_ms["classifier"] / frames, 2) if frames else None,
+            'yolo_ms': (round(self.time_ms["yolo"] / self.counts["fallback"], 2)
+                        if self.counts["fallback"] else None),
+            'avg_ms': round(sum(self.time_ms.values()) / frames, 2) if frames else None,
+        }
@@ -25,6 +25,8 @@ MODELS_DIR.mkdir(exist_ok=True)
 MODEL_PATH = str(MODELS_DIR / "best.pt")  # Chemin vers le modèle YOLO entraîné
 CONFIDENCE_THRESHOLD = 0.6                # Seuil de confiance pour les détections
 IOU_THRESHOLD = 0.45                      # Seuil d'intersection sur union pour NMS
+EXPLICIT_PREPROCESS = True                # Prétraitement dans des tampons réutilisés (preprocess.py) ;
+                                          # False = prétraitement interne d'AutoShape (YOLOv5 .pt)
 
 # ============================================
 # CONFIGURATION DE LA CAMÉRA
@@ -34,6 +36,51 @@ USE_CSI_CAMERA = False   # Utiliser la caméra CSI sur Raspberry Pi
 FRAME_WIDTH = 640        # Largeur de l'image capturée
 FRAME_HEIGHT = 480       # Hauteur de l'image capturée
 SHOW_DISPLAY = True      # Afficher la fenêtre de visualisation OpenCV
+DISPLAY_MAX_FPS = 15     # Images affichées par seconde au plus (thread d'affichage)
+CAMERA_FPS = 30          # Fréquence d'images demandée à la caméra
+
+# Capture basse latence : toujours traiter l'image la plus récente
+CAMERA_BUFFER_SIZE = 1          # Taille du tampon V4L2 (1 = pas d'images en attente)
+CAMERA_FOURCC = "MJPG"          # Format USB compressé (None = format brut du pilote)
+CAMERA_THREADED_CAPTURE = True  # Thread de capture qui ne garde que la dernière image
+
+# Aperçu vidéo dans l'interface admin (/api/camera/stream) : dernière image annotée
+# publiée en mémoire partagée par le thread d'affichage, encodée en JPEG côté admin
+PREVIEW_STREAM = True               # Publier l'aperçu (aussi sans fenêtre, SHOW_DISPLAY = False)
+PREVIEW_SHM_NAME = "smartbin_preview"
+PREVIEW_WIDTHS = (320, 640, 960)    # Largeurs proposées (un encodage par largeur utilisée)
+PREVIEW_MAX_FPS = 15                # Cadence maximale de l'aperçu (par spectateur)
+PREVIEW_JPEG_QUALITY = 70
+
+# Régulation de cadence : si la boucle passe sous TARGET_FPS, la taille d'entrée
+# du modèle est réduite, puis l'inférence n'est faite qu'une image sur N
+TARGET_FPS = None                          # Cadence visée (ex: 10 ; None = pas de régulation)
+ADAPTIVE_INPUT_SIZES = (640, 512, 416, 320)  # Tailles d'entrée essayées, de la plus grande à la plus petite
+MAX_FRAME_STRIDE = 3                       # Au plus une inférence toutes les 3 images
+ADAPTIVE_WINDOW = 2.0                      # Fenêtre de mesure de la cadence en secondes
+
+# Niveaux de performance selon la température (zones thermiques sysfs)
+# full → reduced → motion_only quand la zone la plus chaude dépasse les seuils
+THERMAL_MONITOR = True          # Surveiller la température (sans effet si sysfs est absent)
+THERMAL_SYSFS_ROOT = "/sys"     # Racine sysfs (modifiable pour les tests)
+THERMAL_POLL_INTERVAL = 2.0     # Intervalle de lecture des capteurs en secondes
+THERMAL_REDUCED_C = 70.0        # Au-delà : une inférence toutes les THERMAL_REDUCED_STRIDE images
+THERMAL_MOTION_ONLY_C = 80.0    # Au-delà : inférence seulement si l'image bouge
+THERMAL_HYSTERESIS_C = 5.0      # Écart sous le seuil pour revenir au niveau inférieur
+THERMAL_REDUCED_STRIDE = 3
+MOTION_THRESHOLD = 6.0          # Différence moyenne de niveaux de gris (0-255) = mouvement
+MOTION_HOLD_SECONDS = 1.5       # Durée d'inférence après le dernier mouvement
+
+# Zone de détection (x1, y1, x2, y2) en pixels : seules les détections dont le
+# centre est dans la zone déclenchent un tri (None = image entière)
+DETECTION_ROI = None
+
+# Cascade : un petit classifieur d'images (ONNX, cv2.dnn) regarde la zone de
+# dépôt ; s'il est sûr de lui (vide ou objet reconnu), YOLO n'est pas lancé
+CASCADE_CLASSIFIER = None       # Modèle ONNX du classifieur (None = cascade désactivée)
+CASCADE_INPUT_SIZE = 224        # Taille d'entrée du classifieur
+CASCADE_CONFIDENCE = 0.85       # Probabilité minimale pour décider sans YOLO
+CASCADE_EMPTY_CLASS = "empty"   # Classe du classifieur signifiant « zone vide »
 
 # ============================================
 # CONFIGURATION ARDUINO
@@ -42,14 +89,102 @@ ARDUINO_PORT = '/dev/ttyACM0'  # Port série pour la communication Arduino
 BAUD_RATE = 9600               # Vitesse de communication en bauds
 SORTING_DURATION = 10          # Durée d'attente pour le tri en secondes
 
+# ============================================
+# MODE MULTI-POSTES (plusieurs caméras, un seul modèle)
+# ============================================
+# Chaque poste a sa caméra, son Arduino et éventuellement son propre mapping.
+# Clés : name, camera_source, use_csi (optionnel), arduino_port, bin_mapping (optionnel)
+STATIONS = [
+    # {"name": "poste_1", "camera_source": 0, "arduino_port": "/dev/ttyACM0"},
+    # {"name": "poste_2", "camera_source": 1, "arduino_port": "/dev/ttyACM1",
+    #  "bin_mapping": {"can": "yellow"}},
+]
+MAX_BATCH_SIZE = 4        # Nombre max d'images par passe d'inférence (postes / clients du serveur)
+
+# ============================================
+# SERVEUR D'INFÉRENCE (modèle chargé une seule fois par machine)
+# ============================================
+USE_INFERENCE_SERVER = False                         # True = le détecteur délègue l'inférence au serveur
+INFERENCE_SOCKET_PATH = "/tmp/smartbin_inference.sock"  # Socket Unix du serveur
+INFERENCE_BATCH_WAIT_MS = 5                          # Attente max pour compléter un lot (ms)
+
+# ============================================
+# RAPPORTS D'ÉTAT (lus par l'interface admin)
+# ============================================
+STATUS_DIR = DATA_DIR / "status"   # Un fichier JSON par composant
+STATUS_REPORT_INTERVAL = 2.0       # Intervalle entre deux rapports en secondes
+
+# Rechargement à chaud : le détecteur relit ce fichier quand il est modifié
+# (seuils, délais, zone, mapping, caméra et modèle ; le reste au redémarrage)
+CONFIG_RELOAD_INTERVAL = 1.0       # Intervalle de vérification en secondes (None = désactivé)
+
 # ============================================
 # CONFIGURATION DE L'APPRENTISSAGE
 # ============================================
 LEARNING_MODE = True      # Mode apprentissage : validation manuelle des détections
 SAVE_IMAGES = True        # Sauvegarder les images de détection
+DEDUP_HAMMING_DISTANCE = 4  # Image non sauvegardée si une image du même dossier est à moins
+                            # de N bits (empreinte dHash 64 bits) ; None = pas de déduplication
 MIN_DETECTIONS = 3        # Nombre minimum de détections consécutives avant tri
 AUTO_SORT_DELAY = 2.0     # Délai entre deux opérations de tri en secondes
 
+# File de révision : en mode apprentissage, les détections à valider sont mises
+# en file (image + détection) et validées plus tard depuis l'interface admin
+REVIEW_DIR = DATA_DIR / "review"   # Images en attente de validation
+REVIEW_MAX_PENDING = 500           # Au-delà, les nouvelles détections ne sont plus mises en file
+
+# Apprentissage actif : en mode apprentissage, seules les images où le modèle
+# hésite sont mises en file (confiance proche du seuil, classe qui change,
+# détections superposées en désaccord) au lieu de chaque tri
+ACTIVE_LEARNING = True             # False = chaque tri déclenché est mis en file
+UNCERTAINTY_MARGIN = 0.15          # Incertain si confiance < CONFIDENCE_THRESHOLD + marge
+FLICKER_WINDOW = 8                 # Images analysées observées pour les changements de classe
+CAPTURE_INTERVAL_PER_CLASS = 30.0  # Délai minimum entre deux captures d'une classe (secondes)
+CAPTURE_MAX_PER_HOUR = 60          # Captures maximum par heure (None = illimité)
+
+# Jeu de données YOLO construit depuis TRAINING_DIR (scripts/build_dataset.py)
+DATASET_DIR = DATA_DIR / "dataset"  # images/, labels/, data.yaml, manifest.json
+DATASET_IMAGE_SIZE = 640            # Côté maximum des images (réduites si plus grandes)
+DATASET_VAL_FRACTION = 0.2          # Part des images en validation (choix de best.pt par train.py)
+DATASET_TEST_FRACTION = 0.1         # Part gardée pour la promotion, jamais vue par l'entraînement
+DATASET_WORKERS = None              # Processus de traitement (None = nombre de cœurs)
+
+# Réentraînement en arrière-plan (scripts/finetune_scheduler.py) : lancé pendant
+# les périodes calmes, mis en pause dès qu'un tri a lieu, promu s'il fait mieux
+FINETUNE_DIR = DATA_DIR / "finetune"  # Entraînements, journaux et état du planificateur
+YOLOV5_DIR = None                   # Dépôt yolov5 contenant train.py (None = cache torch.hub)
+FINETUNE_EPOCHS = 30                # Époques par entraînement
+FINETUNE_BATCH = 8                  # Taille de lot (CPU : rester petit)
+FINETUNE_IMAGE_SIZE = 416           # Taille d'entrée pendant l'entraînement
+FINETUNE_NICE = 19                  # Priorité CPU (19 = la plus basse)
+FINETUNE_THREADS = 2                # Cœurs utilisés par l'entraînement
+FINETUNE_IDLE_MINUTES = 15          # Aucun tri depuis N minutes → période calme
+FINETUNE_QUIET_HOUR_MAX = 2.0       # Tris par heure (moyenne 14 jours) max pour démarrer
+FINETUNE_MIN_NEW_IMAGES = 50        # Nouvelles images nécessaires pour un nouvel entraînement
+FINETUNE_MAX_PAUSE = 600            # Pause plus longue (s) → arrêt, reprise au point de sauvegarde
+FINETUNE_MIN_GAIN = 0.005           # Gain de mAP@0.5 minimum pour remplacer best.pt
+FINETUNE_CHECK_INTERVAL = 30        # Intervalle entre deux vérifications (secondes)
+BENCHMARKS_DIR = DATA_DIR / "benchmarks"  # Résultats de scripts/benchmark_model.py (JSON)
+
+# Modèles réduits (scripts/quantize_model.py) : ONNX FP32 / FP16 / INT8 dans MODELS_DIR,
+# utilisables directement avec MODEL_PATH = str(MODELS_DIR / "best_int8.onnx")
+QUANTIZE_IMAGE_SIZE = 416           # Taille d'entrée fixée à l'export
+QUANTIZE_CALIBRATION_IMAGES = 200   # Images de TRAINING_DIR utilisées pour calibrer l'INT8
+
+# Modèle candidat en observation (« shadow ») : évalué sur une partie des images
+# réelles par un thread de basse priorité, sans aucun effet sur le tri
+SHADOW_MODEL_PATH = None            # Ex: str(MODELS_DIR / "candidate_int8.onnx") (None = inactif)
+SHADOW_SAMPLE_EVERY = 5             # Une image analysée sur N proposée au candidat
+SHADOW_CPU_BUDGET = 0.25            # Part maximale d'un cœur occupée par le candidat
+SHADOW_THREADS = 1                  # Threads d'inférence du candidat (modèle ONNX)
+
+# ============================================
+# RÉTENTION DE L'HISTORIQUE
+# ============================================
+ARCHIVE_DIR = DATA_DIR / "archive"   # Archives mensuelles compressées (NDJSON gzip)
+HISTORY_RETENTION_DAYS = None        # Jours gardés en base (ex: 90 ; None = ne jamais archiver)
+EXPORTS_DIR = DATA_DIR / "exports"   # Exports CSV / NDJSON de l'historique
+
 # ============================================
 # CONFIGURATION DES BACS DE TRI
 # ============================================
@@ -74,6 +209,20 @@ WASTE_TO_BIN_MAPPING = {
     "trash": "brown",
 }
 
+# Autres noms d'objets (ex: classes d'un autre modèle) → objet du mapping
+# La casse, les séparateurs (espace, -, _) et le pluriel sont déjà ignorés
+# Les alias ajoutés depuis l'interface admin sont stockés en base de données
+ITEM_ALIASES = {
+    "pet_bottle": "plastic_bottle",
+    "water_bottle": "plastic_bottle",
+    "aluminium_can": "can",
+    "soda_can": "can",
+    "newspaper": "paper",
+    "carton": "cardboard",
+    "food_waste": "food",
+    "napkin": "tissue",
+}
+
 # Couleurs pour l'affichage OpenCV (format BGR)
 BIN_COLORS = {
     "yellow": (0, 255, 255),  # Jaune
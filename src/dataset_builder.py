@@ -0,0 +1,357 @@
+"""
+Smart Bin SI - Construction du jeu de données YOLO
+Transforme TRAINING_DIR (une image + un label YOLO par exemple, un dossier par
+classe) en jeu de données entraînable sous DATASET_DIR :
+- images/{train,val,test}/<classe>__<fichier>.jpg et labels/{train,val,test}/<...>.txt
+- data.yaml (chemins, nombre de classes, noms) pour train.py
+- manifest.json : index des fichiers sources (signature, statut, sorties)
+
+- Les images sont validées, réduites (côté max DATASET_IMAGE_SIZE) et
+  réencodées dans un pool de processus
+- Les ids de classe sont ceux du modèle en service (model.names) : un
+  réentraînement depuis best.pt ne renumérote pas ses classes. Les dossiers
+  inconnus du modèle sont ajoutés à la fin, et les ids sont conservés d'une
+  construction à l'autre (manifest)
+- Répartition train/val/test déterministe (hash du chemin source) : une image
+  reste dans la même partie quelle que soit la construction. train.py utilise
+  val pour choisir best.pt ; test n'est jamais vu par l'entraînement et sert
+  à comparer un nouveau modèle au modèle en service
+- Incrémental : seuls les fichiers ajoutés ou modifiés depuis la dernière
+  construction sont traités, les fichiers disparus sont retirés
+- Les dossiers commençant par "_" (ex: _errors) ne sont pas inclus : ils
+  servent à analyser les erreurs, pas à l'entraînement
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from config import (
+    TRAINING_DIR, DATASET_DIR, DATASET_IMAGE_SIZE, DATASET_VAL_FRACTION, DATASET_TEST_FRACTION,
+    DATASET_WORKERS,
+)
+from training_data import IMAGE_EXTENSIONS, normalize_class_name
+
+MANIFEST_VERSION = 1
+SPLITS = ("train", "val", "test")
+JPEG_QUALITY = 95
+
+
+# ============================================
+# MANIFEST
+# ============================================
+
+def manifest_path(dataset_dir=DATASET_DIR):
+    return dataset_dir / "manifest.json"
+
+
+def load_manifest(dataset_dir=DATASET_DIR):
+    """Manifest de la dernière construction (vide s'il n'existe pas ou est illisible)"""
+    try:
+        with open(manifest_path(dataset_dir), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "params": {}, "classes": [], "files": {}}
+
+
+def _save_manifest(manifest, dataset_dir):
+    """Écrit le manifest (remplacement atomique)"""
+    path = manifest_path(dataset_dir)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def write_data_yaml(dataset_dir, classes):
+    """data.yaml au format YOLOv5 (listes en syntaxe JSON, valide en YAML)"""
+    lines = [
+        f"path: {dataset_dir.resolve()}",
+        "train: images/train",
+        "val: images/val",
+        "test: images/test",
+        f"nc: {len(classes)}",
+        f"names: {json.dumps(classes, ensure_ascii=False)}",
+    ]
+    with open(dataset_dir / "data.yaml", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# ============================================
+# CLASSES
+# ============================================
+
+def model_class_names(model_path):
+    """
+    Noms des classes d'un modèle, dans l'ordre de ses ids, ou None si le
+    modèle est absent ou ne peut pas être chargé (torch / onnxruntime absents).
+    """
+    model_path = Path(model_path)
+    if not model_path.exists():
+        return None
+    try:
+        if model_path.suffix == ".onnx":
+            from onnx_detector import OnnxDetector
+            names = OnnxDetector(model_path).names
+        else:
+            from yolo_detector import load_model
+            names = load_model(str(model_path)).names
+    except Exception as e:
+        print(f"⚠ Classes du modèle {model_path.name} illisibles ({e})")
+        return None
+    if isinstance(names, dict):
+        return [names[index] for index in sorted(names)]
+    return list(names)
+
+
+def class_list(previous, folders, model_names=None):
+    """
+    Liste des classes du jeu de données (l'index est l'id de classe) :
+    classes du modèle d'abord (mêmes ids), puis classes des constructions
+    précédentes, puis nouveaux dossiers. Un dossier correspond à une classe
+    du modèle quand leurs noms normalisés sont égaux.
+    """
+    classes = list(model_names or [])
+    known = {normalize_class_name(name) for name in classes}
+    for name in list(previous) + sorted(folders):
+        key = normalize_class_name(name)
+        if key not in known:
+            classes.append(name)
+            known.add(key)
+    return classes
+
+
+# ============================================
+# RÉPARTITION ET PARCOURS
+# ============================================
+
+def split_for(source, val_fraction=DATASET_VAL_FRACTION, test_fraction=DATASET_TEST_FRACTION):
+    """Partie ('train', 'val' ou 'test') d'un fichier source, déterministe (hash du chemin)"""
+    digest = hashlib.sha1(source.encode("utf-8")).digest()
+    position = int.from_bytes(digest[:4], "big") / 2 ** 32
+    if position < val_fraction:
+        return "val"
+    if position < val_fraction + test_fraction:
+        return "test"
+    return "train"
+
+
+def scan_training_dir(training_dir=TRAINING_DIR):
+    """
+    Parcourt les dossiers de classe.
+    Retourne {chemin source relatif: (classe, signature)} ; la signature change
+    dès que l'image ou son label est modifié.
+    """
+    sources = {}
+    if not training_dir.exists():
+        return sources
+    for class_entry in sorted(os.scandir(training_dir), key=lambda e: e.name):
+        if not class_entry.is_dir() or class_entry.name.startswith(("_", ".")):
+            continue
+        entries = {entry.name: entry for entry in os.scandir(class_entry.path)}
+        for name, entry in entries.items():
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            stat = entry.stat()
+            label = entries.get(os.path.splitext(name)[0] + ".txt")
+            label_mtime = label.stat().st_mtime_ns if label is not None else None
+            signature = [stat.st_mtime_ns, stat.st_size, label_mtime]
+            sources[f"{class_entry.name}/{name}"] = (class_entry.name, signature)
+    return sources
+
+
+def buildable_images(training_dir=TRAINING_DIR, dataset_dir=DATASET_DIR):
+    """
+    Nombre maximum d'images qu'aurait le jeu de données après une construction,
+    sans la faire : images déjà valides et inchangées, plus images nouvelles ou
+    modifiées (comptées valides). Seuls les dossiers et le manifest sont lus.
+    """
+    files = load_manifest(dataset_dir)["files"]
+    count = 0
+    for source, (_, signature) in scan_training_dir(training_dir).items():
+        entry = files.get(source)
+        if entry is None or entry["signature"] != signature or entry["status"] == "ok":
+            count += 1
+    return count
+
+
+# ============================================
+# TRAITEMENT D'UN EXEMPLE (processus du pool)
+# ============================================
+
+def _read_label(label_path, class_id):
+    """Lignes YOLO valides du label, avec l'id de classe du jeu de données"""
+    lines = []
+    with open(label_path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) != 5:
+                continue
+            try:
+                x, y, w, h = (float(v) for v in fields[1:])
+            except ValueError:
+                continue
+            if 0.0 <= x <= 1.0 and 0.0 <= y <= 1.0 and 0.0 < w <= 1.0 and 0.0 < h <= 1.0:
+                lines.append(f"{class_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}")
+    return lines
+
+
+def _process_sample(task):
+    """
+    Valide, réduit et réencode une image, et réécrit son label.
+    Exécuté dans un processus du pool : ne retourne qu'un petit résultat.
+    """
+    import cv2
+
+    source, label_source, image_out, label_out, class_id, image_size = task
+    if not os.path.exists(label_source):
+        return {"status": "unlabeled"}
+    try:
+        lines = _read_label(label_source, class_id)
+    except (OSError, UnicodeDecodeError):
+        lines = []
+    if not lines:
+        return {"status": "invalid", "reason": "label vide ou invalide"}
+
+    image = cv2.imread(source, cv2.IMREAD_COLOR)
+    if image is None:
+        return {"status": "invalid", "reason": "image illisible"}
+    height, width = image.shape[:2]
+    scale = image_size / max(height, width)
+    if scale < 1.0:
+        # Réduction uniforme : les coordonnées YOLO (normalisées) restent valides
+        image = cv2.resize(image, (round(width * scale), round(height * scale)),
+                           interpolation=cv2.INTER_AREA)
+    if not cv2.imwrite(image_out, image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]):
+        return {"status": "invalid", "reason": "écriture impossible"}
+    with open(label_out, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return {"status": "ok", "boxes": len(lines)}
+
+
+def _remove_outputs(dataset_dir, entry):
+    for key in ("image", "label"):
+        if entry.get(key):
+            try:
+                os.remove(dataset_dir / entry[key])
+            except OSError:
+                pass
+
+
+# ============================================
+# CONSTRUCTION
+# ============================================
+
+def build_dataset(training_dir=TRAINING_DIR, dataset_dir=DATASET_DIR,
+                  image_size=DATASET_IMAGE_SIZE, val_fraction=DATASET_VAL_FRACTION,
+                  test_fraction=DATASET_TEST_FRACTION, workers=DATASET_WORKERS, rebuild=False,
+                  model_names=None):
+    """
+    Construit (ou met à jour) le jeu de données YOLO.
+
+    Args:
+        training_dir: Dossier des images d'apprentissage (un sous-dossier par classe)
+        dataset_dir: Dossier du jeu de données produit
+        image_size: Côté maximum des images produites
+        val_fraction: Part des images en validation
+        test_fraction: Part des images gardées hors entraînement (promotion)
+        workers: Nombre de processus (None = nombre de cœurs)
+        rebuild: Tout retraiter, même les fichiers inchangés
+        model_names: Classes du modèle de départ, dans l'ordre de ses ids
+            (voir model_class_names) ; None = ordre des constructions précédentes
+
+    Retourne:
+        dict: Rapport (fichiers traités, inchangés, retirés, invalides, par classe)
+    """
+    start = time.monotonic()
+    manifest = load_manifest(dataset_dir)
+    params = {"image_size": image_size, "val_fraction": val_fraction, "test_fraction": test_fraction}
+    sources = scan_training_dir(training_dir)
+    previous = manifest["classes"]
+    classes = class_list(previous, {class_name for class_name, _ in sources.values()}, model_names)
+    # Ids déjà attribués modifiés (ordre du modèle) : tous les labels sont à réécrire
+    ids_changed = classes[:len(previous)] != previous
+    if rebuild or manifest["params"] != params or ids_changed:
+        # Paramètres changés : toutes les sorties sont à refaire
+        for split_dir in ("images", "labels"):
+            shutil.rmtree(dataset_dir / split_dir, ignore_errors=True)
+        manifest["files"] = {}
+        manifest["params"] = params
+    manifest["classes"] = classes
+    for split_dir in ("images", "labels"):
+        for split in SPLITS:
+            (dataset_dir / split_dir / split).mkdir(parents=True, exist_ok=True)
+
+    class_ids = {normalize_class_name(name): index for index, name in enumerate(classes)}
+
+    files = manifest["files"]
+    removed = 0
+    for source in list(files):
+        if source not in sources:
+            _remove_outputs(dataset_dir, files.pop(source))
+            removed += 1
+
+    tasks = []
+    pending = []
+    for source, (class_name, signature) in sources.items():
+        entry = files.get(source)
+        if entry is not None and entry["signature"] == signature:
+            continue
+        if entry is not None:
+            _remove_outputs(dataset_dir, entry)
+        split = split_for(source, val_fraction, test_fraction)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        image_rel = f"images/{split}/{class_name}__{stem}.jpg"
+        label_rel = f"labels/{split}/{class_name}__{stem}.txt"
+        tasks.append((
+            str(training_dir / source),
+            str(training_dir / class_name / f"{stem}.txt"),
+            str(dataset_dir / image_rel),
+            str(dataset_dir / label_rel),
+            class_ids[normalize_class_name(class_name)],
+            image_size,
+        ))
+        pending.append((source, class_name, signature, split, image_rel, label_rel))
+
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_process_sample, tasks, chunksize=chunksize))
+        for (source, class_name, signature, split, image_rel, label_rel), result in zip(pending, results):
+            entry = {"class": class_name, "signature": signature, "status": result["status"]}
+            if result["status"] == "ok":
+                entry.update(split=split, image=image_rel, label=label_rel, boxes=result["boxes"])
+            elif "reason" in result:
+                entry["reason"] = result["reason"]
+            files[source] = entry
+
+    manifest["built_at"] = datetime.now().isoformat()
+    write_data_yaml(dataset_dir, classes)
+    _save_manifest(manifest, dataset_dir)
+
+    report = {
+        "sources": len(sources),
+        "processed": len(tasks),
+        "unchanged": len(sources) - len(tasks),
+        "removed": removed,
+        "status": {},
+        "splits": {split: 0 for split in SPLITS},
+        "per_class": {name: 0 for name in classes},
+        "classes": list(classes),
+        "seconds": round(time.monotonic() - start, 2),
+    }
+    for entry in files.values():
+        report["status"][entry["status"]] = report["status"].get(entry["status"], 0) + 1
+        if entry["status"] == "ok":
+            report["splits"][entry["split"]] += 1
+            report["per_class"][classes[class_ids[normalize_class_name(entry["class"])]]] += 1
+    return report
@@ -0,0 +1,373 @@
+"""
+Smart Bin SI - Réentraînement en arrière-plan
+- Attend une période calme (aucun tri depuis FINETUNE_IDLE_MINUTES, et heure
+  habituellement peu active d'après les agrégats horaires)
+- Met à jour le jeu de données (dataset_builder) seulement si TRAINING_DIR
+  peut apporter assez de nouvelles images (simple parcours des dossiers) ;
+  s'il en contient assez, lance train.py (YOLOv5) dans un processus séparé, en
+  priorité minimale (nice) et limité à FINETUNE_THREADS cœurs
+- Un tri pendant l'entraînement → pause immédiate (SIGSTOP) ; pause trop longue
+  → arrêt, puis reprise plus tard depuis le dernier point de sauvegarde (last.pt)
+- En fin d'entraînement, le nouveau modèle et best.pt sont évalués sur la partie
+  test, que train.py ne voit jamais (val lui sert à choisir son best.pt : le
+  score du nouveau modèle y serait optimiste) ; le nouveau ne remplace best.pt
+  (os.replace, atomique) que s'il fait mieux
+L'état est conservé dans FINETUNE_DIR/state.json : le planificateur peut être
+redémarré sans perdre un entraînement en cours.
+"""
+
+import json
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import (
+    DB_PATH, MODEL_PATH, MODELS_DIR, DATASET_DIR, FINETUNE_DIR, YOLOV5_DIR, TRAINING_DIR,
+    FINETUNE_EPOCHS, FINETUNE_BATCH, FINETUNE_IMAGE_SIZE, FINETUNE_NICE, FINETUNE_THREADS,
+    FINETUNE_IDLE_MINUTES, FINETUNE_QUIET_HOUR_MAX, FINETUNE_MIN_NEW_IMAGES,
+    FINETUNE_MAX_PAUSE, FINETUNE_MIN_GAIN,
+)
+from status_report import write_status
+
+STATE_PATH = FINETUNE_DIR / "state.json"
+RUNS_DIR = FINETUNE_DIR / "runs"
+BUSY_SECONDS = 60       # Un tri dans la dernière minute → l'entraînement se met en pause
+QUIET_HISTORY_DAYS = 14  # Profondeur de l'historique pour les heures calmes
+MAX_HISTORY = 20
+PROMOTION_SPLIT = "test"  # Partie du jeu de données jamais vue par train.py
+
+
+# ============================================
+# ACTIVITÉ DE TRI
+# ============================================
+
+def recent_sorts(seconds, db_path=DB_PATH):
+    """Nombre de tris enregistrés pendant les dernières secondes"""
+    cutoff = (datetime.now() - timedelta(seconds=seconds)).isoformat()
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM sorting_history WHERE timestamp >= ?", (cutoff,)
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0  # Base pas encore créée
+    finally:
+        conn.close()
+
+
+def hourly_average(hour, days=QUIET_HISTORY_DAYS, db_path=DB_PATH):
+    """Nombre moyen de tris pendant une heure de la journée (0-23), sur les derniers jours"""
+    since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%dT%H")
+    conn = sqlite3.connect(str(db_path))
+    try:
+        total = conn.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM sorting_rollup_hourly "
+            "WHERE bucket >= ? AND substr(bucket, 12, 2) = ?",
+            (since, f"{hour:02d}")
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0.0
+    finally:
+        conn.close()
+    return total / days
+
+
+def find_yolov5_script(name="train.py"):
+    """Chemin d'un script du dépôt yolov5 (YOLOV5_DIR, sinon cache torch.hub), ou None"""
+    if YOLOV5_DIR:
+        candidates = [Path(YOLOV5_DIR)]
+    else:
+        try:
+            import torch
+            candidates = [Path(torch.hub.get_dir()) / "ultralytics_yolov5_master"]
+        except ImportError:
+            candidates = []
+    for directory in candidates:
+        if (directory / name).exists():
+            return directory / name
+    return None
+
+
+def _limit_resources():
+    """Exécuté dans le processus d'entraînement avant train.py : priorité et cœurs"""
+    os.nice(FINETUNE_NICE)
+    if FINETUNE_THREADS and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        # Les derniers cœurs : le premier reste libre pour la caméra et le détecteur
+        os.sched_setaffinity(0, cpus[-FINETUNE_THREADS:])
+
+
+# ============================================
+# PLANIFICATEUR
+# ============================================
+
+class FineTuneScheduler:
+    """
+    Machine à états du réentraînement :
+    idle → running ⇄ paused → (interrupted → running) → évaluation → idle
+    """
+
+    def __init__(self, db_path=DB_PATH, dataset_dir=DATASET_DIR, model_path=MODEL_PATH,
+                 training_dir=TRAINING_DIR):
+        """
+        Args:
+            db_path: Base SQLite (activité de tri)
+            dataset_dir: Jeu de données construit par dataset_builder
+            model_path: Modèle en service (remplacé en cas de promotion)
+            training_dir: Images d'apprentissage (source du jeu de données)
+        """
+        self.db_path = db_path
+        self.dataset_dir = Path(dataset_dir)
+        self.model_path = Path(model_path)
+        self.training_dir = Path(training_dir)
+        self._model_names = (None, None)  # (date de modification du modèle, classes)
+        self.process = None
+        self.paused_at = None
+        self.state = self._load_state()
+        if self.state["status"] in ("running", "paused"):
+            # Planificateur arrêté pendant un entraînement : reprendre plus tard
+            self._stop_orphan(self.state.get("pid"))
+            self.state["status"] = "interrupted"
+            self._save_state()
+
+    # ---------- état ----------
+
+    def _load_state(self):
+        try:
+            with open(STATE_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"status": "idle", "run": None, "pid": None,
+                    "dataset_images": 0, "history": []}
+
+    def _save_state(self):
+        FINETUNE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = STATE_PATH.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, STATE_PATH)
+        write_status("finetune", self.report())
+
+    def _set_status(self, status):
+        self.state["status"] = status
+        self._save_state()
+
+    def _stop_orphan(self, pid):
+        """Arrête un train.py laissé par un planificateur précédent (vérifie la ligne de commande)"""
+        if not pid:
+            return
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"train.py" not in f.read():
+                    return
+            os.kill(pid, signal.SIGCONT)
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+    def run_dir(self, run=None):
+        return RUNS_DIR / (run or self.state["run"])
+
+    # ---------- lancement ----------
+
+    def _launch(self, args):
+        env = dict(os.environ)
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            env[var] = str(FINETUNE_THREADS)
+        run_dir = self.run_dir()
+        run_dir.mkdir(parents=True, exist_ok=True)
+        log = open(run_dir / "train.log", "ab")
+        try:
+            self.process = subprocess.Popen(
+                args, cwd=str(args[1].parent), env=env, stdout=log, stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL, preexec_fn=_limit_resources,
+            )
+        finally:
+            log.close()
+        self.paused_at = None
+        self.state["pid"] = self.process.pid
+        self._set_status("running")
+
+    def start_run(self, train_script):
+        """Nouvel entraînement à partir du modèle en service"""
+        self.state["run"] = datetime.now().strftime("%Y%m%d_%H%M%S")
+        weights = str(self.model_path) if self.model_path.exists() else "yolov5s.pt"
+        print(f"🏋 Réentraînement {self.state['run']} lancé ({FINETUNE_EPOCHS} époques, "
+              f"{FINETUNE_THREADS} cœurs, nice {FINETUNE_NICE})")
+        self._launch([
+            sys.executable, train_script,
+            "--data", str(self.dataset_dir / "data.yaml"),
+            "--weights", weights,
+            "--epochs", str(FINETUNE_EPOCHS),
+            "--batch-size", str(FINETUNE_BATCH),
+            "--img", str(FINETUNE_IMAGE_SIZE),
+            "--device", "cpu",
+            "--workers", "0",
+            "--project", str(RUNS_DIR),
+            "--name", self.state["run"],
+            "--exist-ok",
+        ])
+
+    def resume_run(self, train_script):
+        """Reprendre l'entraînement interrompu depuis son dernier point de sauvegarde"""
+        last = self.run_dir() / "weights" / "last.pt"
+        if not last.exists():
+            # Arrêté avant la fin de la première époque : on recommence
+            self.start_run(train_script)
+            return
+        print(f"▶ Reprise du réentraînement {self.state['run']} depuis {last.name}")
+        self._launch([sys.executable, train_script, "--resume", str(last)])
+
+    # ---------- pause / arrêt ----------
+
+    def pause(self, now):
+        self.process.send_signal(signal.SIGSTOP)
+        self.paused_at = now
+        print("⏸ Tri en cours : réentraînement en pause")
+        self._set_status("paused")
+
+    def unpause(self):
+        self.process.send_signal(signal.SIGCONT)
+        self.paused_at = None
+        print("▶ Période calme : réentraînement repris")
+        self._set_status("running")
+
+    def interrupt(self):
+        """Arrêter le processus (la reprise se fera depuis last.pt)"""
+        if self.process is None:
+            return
+        self.process.send_signal(signal.SIGCONT)
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+        self.paused_at = None
+        self.state["pid"] = None
+        self._set_status("interrupted")
+
+    # ---------- fin d'entraînement ----------
+
+    def finish(self, returncode):
+        self.process = None
+        self.state["pid"] = None
+        entry = {"run": self.state["run"], "finished_at": datetime.now().isoformat(),
+                 "returncode": returncode, "promoted": False}
+        candidate = self.run_dir() / "weights" / "best.pt"
+        if returncode == 0 and candidate.exists():
+            self._set_status("evaluating")
+            entry.update(self.evaluate_and_promote(candidate))
+        else:
+            print(f"✗ Réentraînement {self.state['run']} terminé en erreur (code {returncode})")
+        self.state["history"] = (self.state["history"] + [entry])[-MAX_HISTORY:]
+        self.state["run"] = None
+        self._set_status("idle")
+
+    def evaluate_and_promote(self, candidate):
+        """Compare le nouveau modèle à best.pt sur la partie test ; remplace best.pt s'il fait mieux"""
+        from model_eval import evaluate
+
+        new = evaluate(candidate, self.dataset_dir, split=PROMOTION_SPLIT)
+        current = (evaluate(self.model_path, self.dataset_dir, split=PROMOTION_SPLIT)
+                   if self.model_path.exists() else None)
+        result = {"candidate_map50": new["map50"],
+                  "current_map50": current["map50"] if current else None,
+                  "test_images": new["images"]}
+        if not new["images"]:
+            print("⚠ Aucune image de test : modèle non promu")
+            return result
+        if current is not None and new["map50"] < current["map50"] + FINETUNE_MIN_GAIN:
+            print(f"↩ Nouveau modèle non retenu (mAP@0.5 {new['map50']:.3f} "
+                  f"contre {current['map50']:.3f})")
+            return result
+
+        # Copie à côté de best.pt puis remplacement atomique (même système de fichiers)
+        MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.model_path.with_suffix(".pt.tmp")
+        shutil.copyfile(candidate, tmp_path)
+        if self.model_path.exists():
+            shutil.copy2(self.model_path, self.model_path.with_name("best.prev.pt"))
+        os.replace(tmp_path, self.model_path)
+        result["promoted"] = True
+        print(f"🏆 Nouveau modèle en service : mAP@0.5 {new['map50']:.3f}"
+              + (f" (avant {current['map50']:.3f})" if current else "")
+              + " - pris en compte au prochain démarrage du détecteur")
+        return result
+
+    def model_names(self):
+        """Classes du modèle en service, relues seulement quand le fichier change"""
+        from dataset_builder import model_class_names
+
+        try:
+            mtime = self.model_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        if self._model_names[0] != mtime:
+            self._model_names = (mtime, model_class_names(self.model_path))
+        return self._model_names[1]
+
+    # ---------- boucle ----------
+
+    def step(self, now=None):
+        """Une vérification : pause / reprise / fin / lancement selon l'activité"""
+        now = time.monotonic() if now is None else now
+
+        if self.process is not None:
+            returncode = self.process.poll()
+            if returncode is not None:
+                self.finish(returncode)
+                return
+            busy = recent_sorts(BUSY_SECONDS, self.db_path) > 0
+            if self.paused_at is None and busy:
+                self.pause(now)
+            elif self.paused_at is not None and not busy:
+                self.unpause()
+            elif self.paused_at is not None and now - self.paused_at > FINETUNE_MAX_PAUSE:
+                print("⏹ Pause prolongée : réentraînement arrêté (reprise plus tard)")
+                self.interrupt()
+            return
+
+        if recent_sorts(FINETUNE_IDLE_MINUTES * 60, self.db_path) > 0:
+            return
+        train_script = find_yolov5_script("train.py")
+        if train_script is None:
+            print("⚠ train.py (YOLOv5) introuvable : définir YOLOV5_DIR")
+            return
+        if self.state["status"] == "interrupted":
+            self.resume_run(train_script)
+            return
+        if hourly_average(datetime.now().hour, db_path=self.db_path) > FINETUNE_QUIET_HOUR_MAX:
+            return
+
+        from dataset_builder import build_dataset, buildable_images
+
+        # Pas assez d'images nouvelles même si toutes étaient valides : pas de construction
+        if buildable_images(self.training_dir, self.dataset_dir) - self.state["dataset_images"] \
+                < FINETUNE_MIN_NEW_IMAGES:
+            return
+        # Ids de classe du modèle de départ : le réentraînement ne renumérote pas ses classes
+        report = build_dataset(self.training_dir, self.dataset_dir, workers=FINETUNE_THREADS,
+                               model_names=self.model_names())
+        images = sum(report["splits"].values())
+        if images - self.state["dataset_images"] < FINETUNE_MIN_NEW_IMAGES \
+                or not report["splits"]["val"] or not report["splits"][PROMOTION_SPLIT]:
+            return
+        self.state["dataset_images"] = images
+        self.start_run(train_script)
+
+    def report(self):
+        """État du réentraînement (fichier d'état lu par l'interface admin)"""
+        return {
+            'status': self.state["status"],
+            'run': self.state["run"],
+            'dataset_images': self.state["dataset_images"],
+            'last': self.state["history"][-1] if self.state["history"] else None,
+        }
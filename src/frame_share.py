@@ -0,0 +1,238 @@
+"""
+Smart Bin SI - Aperçu vidéo partagé entre processus
+- Le détecteur publie sa dernière image annotée dans une mémoire partagée
+  (multiprocessing.shared_memory) depuis le thread d'affichage : la boucle
+  de tri ne fait aucun travail supplémentaire
+- En-tête protégé par un compteur de séquence (seqlock) : impair pendant
+  l'écriture, pair ensuite ; le lecteur recommence s'il a changé pendant sa copie
+- Côté interface admin, PreviewHub encode chaque nouvelle image une seule fois
+  par largeur demandée, quel que soit le nombre de spectateurs, et chaque client
+  reçoit au plus sa propre cadence (flux MJPEG /api/camera/stream)
+"""
+
+import struct
+import threading
+import time
+from collections import Counter
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from config import (
+    FRAME_WIDTH, FRAME_HEIGHT, PREVIEW_SHM_NAME,
+    PREVIEW_WIDTHS, PREVIEW_MAX_FPS, PREVIEW_JPEG_QUALITY,
+)
+
+# seq, largeur, hauteur, canaux, horodatage (time.time())
+HEADER = struct.Struct("<QIIId")
+HEADER_SIZE = 64
+STALE_SECONDS = 5.0  # Plus de nouvelle image depuis N s : le lecteur se rattache
+BOUNDARY = "frame"
+
+
+# ============================================
+# CÔTÉ DÉTECTEUR : PUBLICATION
+# ============================================
+
+class FramePublisher:
+    """Dernière image du détecteur en mémoire partagée (un seul écrivain)"""
+
+    def __init__(self, name=PREVIEW_SHM_NAME, capacity=FRAME_WIDTH * FRAME_HEIGHT * 3):
+        """
+        Args:
+            name: Nom du segment de mémoire partagée
+            capacity: Taille maximale d'une image en octets (plus grande : réduite)
+        """
+        self.name = name
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Segment laissé par un détecteur arrêté brutalement : le recréer
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.seq = 0
+        HEADER.pack_into(self.shm.buf, 0, 0, 0, 0, 0, 0.0)
+        self.published = 0
+
+    def publish(self, frame):
+        """Écrire une image BGR (réduite si elle dépasse la capacité)"""
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        if height * width * channels > self.capacity:
+            import cv2
+            scale = (self.capacity / (height * width * channels)) ** 0.5
+            width, height = int(width * scale), int(height * scale)
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        # Séquence impaire : écriture en cours
+        self.seq += 1
+        struct.pack_into("<Q", self.shm.buf, 0, self.seq)
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_SIZE)
+        view[:] = frame
+        self.seq += 1
+        HEADER.pack_into(self.shm.buf, 0, self.seq, width, height, channels, time.time())
+        self.published += 1
+
+    def close(self):
+        """Libérer le segment (les lecteurs voient le flux s'arrêter)"""
+        if self.shm is not None:
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = None
+
+
+# ============================================
+# CÔTÉ ADMIN : LECTURE ET ENCODAGE PARTAGÉ
+# ============================================
+
+class FrameReader:
+    """Lecture de la dernière image publiée (sans jamais bloquer l'écrivain)"""
+
+    def __init__(self, name=PREVIEW_SHM_NAME):
+        self.name = name
+        self.shm = None
+
+    def _attach(self):
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return False
+        try:
+            # Le segment appartient au détecteur : ne pas le supprimer à la sortie
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        except Exception:
+            pass
+        return True
+
+    def _detach(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+    def read(self, last_seq=0, retries=5):
+        """
+        Retourne:
+            tuple: (seq, image copiée, horodatage), ou None si pas de nouvelle image
+        """
+        if self.shm is None and not self._attach():
+            return None
+        for _ in range(retries):
+            seq, width, height, channels, timestamp = HEADER.unpack_from(self.shm.buf, 0)
+            if seq == 0:
+                return None
+            if seq % 2:
+                time.sleep(0.001)  # Écriture en cours
+                continue
+            if seq == last_seq:
+                if time.time() - timestamp > STALE_SECONDS:
+                    # Détecteur arrêté ou redémarré (nouveau segment) : se rattacher
+                    self._detach()
+                return None
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_SIZE).copy()
+            if struct.unpack_from("<Q", self.shm.buf, 0)[0] == seq:
+                return seq, frame, timestamp
+        return None
+
+
+def preview_available(name=PREVIEW_SHM_NAME):
+    """True si un détecteur publie actuellement l'aperçu"""
+    reader = FrameReader(name)
+    if not reader._attach():
+        return False
+    try:
+        seq, _, _, _, timestamp = HEADER.unpack_from(reader.shm.buf, 0)
+        return seq > 0 and time.time() - timestamp < STALE_SECONDS
+    finally:
+        reader._detach()
+
+
+class PreviewHub:
+    """
+    Encodage JPEG partagé entre tous les spectateurs : une fois par nouvelle
+    image et par largeur demandée, dans un seul thread (arrêté sans spectateur)
+    """
+
+    def __init__(self, reader=None, quality=PREVIEW_JPEG_QUALITY, max_fps=PREVIEW_MAX_FPS):
+        self.reader = reader or FrameReader()
+        self.quality = quality
+        self.interval = 1.0 / max_fps
+        self._cond = threading.Condition()
+        self._clients = Counter()  # largeur → nombre de spectateurs
+        self._latest = {}          # largeur → (seq, jpeg)
+        self._thread = None
+        self.encoded = 0
+
+    @staticmethod
+    def snap_width(width):
+        """Largeur autorisée la plus proche (limite le nombre d'encodages)"""
+        return min(PREVIEW_WIDTHS, key=lambda w: abs(w - width))
+
+    def _run(self):
+        import cv2
+
+        last_seq = 0
+        while True:
+            with self._cond:
+                widths = [w for w, count in self._clients.items() if count > 0]
+                if not widths:
+                    self._thread = None
+                    self._latest.clear()
+                    return
+            started = time.monotonic()
+            item = self.reader.read(last_seq)
+            if item is not None:
+                last_seq, frame, _ = item
+                encoded = {}
+                for width in widths:
+                    image = frame
+                    if width < frame.shape[1]:
+                        height = round(frame.shape[0] * width / frame.shape[1])
+                        image = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                    ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                    if ok:
+                        encoded[width] = (last_seq, jpeg.tobytes())
+                        self.encoded += 1
+                with self._cond:
+                    self._latest.update(encoded)
+                    self._cond.notify_all()
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stream(self, width, fps):
+        """
+        Générateur MJPEG (multipart/x-mixed-replace) pour un spectateur
+
+        Args:
+            width: Largeur voulue (ramenée à PREVIEW_WIDTHS)
+            fps: Cadence maximale pour ce spectateur
+        """
+        width = self.snap_width(width)
+        interval = 1.0 / max(0.1, min(fps, PREVIEW_MAX_FPS))
+        with self._cond:
+            self._clients[width] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="preview-hub", daemon=True)
+                self._thread.start()
+        last_seq = 0
+        try:
+            while True:
+                started = time.monotonic()
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: self._latest.get(width, (last_seq, None))[0] != last_seq, timeout=2.0)
+                    seq, jpeg = self._latest.get(width, (last_seq, None))
+                if seq != last_seq:
+                    last_seq = seq
+                    yield (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                           f"Content-Length: {len(jpeg)}\r\n\r\n").encode() + jpeg + b"\r\n"
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            with self._cond:
+                self._clients[width] -= 1
@@ -0,0 +1,265 @@
+"""
+Smart Bin SI - Archivage de l'historique de tri
+- Les lignes de sorting_history plus anciennes que HISTORY_RETENTION_DAYS sont
+  déplacées dans des fichiers mensuels compressés (NDJSON gzip) sous ARCHIVE_DIR
+- Un petit index (index.json) décrit chaque mois : fichier courant, nombre de
+  lignes, bornes de timestamp et d'id → on ne lit que les mois utiles à une requête
+- Désactivé par défaut (HISTORY_RETENTION_DAYS = None)
+- Les agrégats (sorting_rollup_*) ne sont jamais archivés : les statistiques
+  couvrent donc toujours toute la période, archives comprises
+"""
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from config import ARCHIVE_DIR, HISTORY_RETENTION_DAYS
+
+INDEX_PATH = ARCHIVE_DIR / "index.json"
+COLUMNS = ("id", "bin_color", "item_name", "timestamp", "confidence")
+
+
+# ============================================
+# INDEX DES ARCHIVES
+# ============================================
+
+def load_index():
+    """Retourne l'index des archives {mois 'YYYY-MM': métadonnées}."""
+    try:
+        with open(INDEX_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index):
+    """Écrit l'index (remplacement atomique)."""
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = INDEX_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, INDEX_PATH)
+
+
+def month_path(month, rows):
+    """
+    Chemin d'un fichier d'archive : un nouveau fichier à chaque ajout
+    ('YYYY-MM' + nombre total de lignes), seul celui de l'index est lu.
+    """
+    return ARCHIVE_DIR / f"sorting_history_{month}.{rows}.ndjson.gz"
+
+
+def _delete_ids(conn, ids):
+    """Supprime de la base les lignes dont l'id est donné (sans commit)."""
+    conn.executemany("DELETE FROM sorting_history WHERE id = ?", ((row_id,) for row_id in ids))
+
+
+# ============================================
+# ARCHIVAGE (base → fichiers)
+# ============================================
+
+def archive_old_history(conn, retention_days=HISTORY_RETENTION_DAYS, vacuum=False):
+    """
+    Déplace les lignes plus anciennes que retention_days vers les archives mensuelles.
+    Pour chaque mois, l'archive complétée est écrite dans un fichier temporaire puis
+    renommée en un nouveau fichier ; l'index, qui désigne le fichier de chaque mois,
+    est enregistré ensuite : c'est le seul point de validation. Seules les lignes
+    écrites sont ensuite supprimées de la base (par id).
+    Après un arrêt brutal :
+    - avant l'enregistrement de l'index : l'ancien fichier reste celui de l'index,
+      les lignes sont toujours en base et seront archivées au passage suivant ;
+    - après : le mois est marqué "deleting" ; le passage suivant supprime de la base
+      les ids présents dans l'archive avant d'archiver quoi que ce soit d'autre.
+    - vacuum: rendre l'espace libéré au système de fichiers (VACUUM réécrit toute la
+      base : à réserver à scripts/archive_history.py, pas au démarrage du détecteur)
+    Retourne le nombre de lignes archivées.
+    """
+    if conn is None or retention_days is None:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    index = load_index()
+    months = [
+        row[0] for row in conn.execute("""
+            SELECT DISTINCT substr(timestamp, 1, 7) FROM sorting_history
+            WHERE timestamp < ? ORDER BY 1
+        """, (cutoff,))
+    ]
+    # Mois dont la suppression en base a été interrompue
+    months = sorted(set(months) | {m for m, meta in index.items() if meta.get("deleting")})
+    if not months:
+        return 0
+
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    archived = 0
+
+    for month in months:
+        meta = index.get(month, {"rows": 0, "max_id": 0, "min_id": None,
+                                 "min_ts": None, "max_ts": None})
+        if meta.get("deleting"):
+            _delete_ids(conn, (row[0] for row in iter_month(month, meta)))
+            conn.commit()
+            meta["deleting"] = False
+            _save_index(index)
+
+        # Mois suivant (borne haute exclue), limité à la date de coupure
+        year, mon = int(month[:4]), int(month[5:7])
+        next_month = f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+        upper = min(next_month, cutoff)
+
+        cursor = conn.execute("""
+            SELECT id, bin_color, item_name, timestamp, confidence FROM sorting_history
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp, id
+        """, (month, upper))
+
+        # Ancienne archive + nouvelles lignes (membre gzip ajouté) dans un fichier temporaire
+        tmp_path = ARCHIVE_DIR / f"sorting_history_{month}.ndjson.gz.tmp"
+        old_path = ARCHIVE_DIR / meta["file"] if meta.get("file") else None
+        if old_path is not None and old_path.exists():
+            shutil.copyfile(old_path, tmp_path)
+        else:
+            tmp_path.unlink(missing_ok=True)
+        new_meta = dict(meta)
+        written_ids = []
+        with gzip.open(tmp_path, "at", encoding="utf-8") as f:
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for row in rows:
+                    f.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n")
+                    written_ids.append(row[0])
+                    new_meta["max_id"] = max(new_meta["max_id"], row[0])
+                    new_meta["min_id"] = row[0] if new_meta["min_id"] is None else min(new_meta["min_id"], row[0])
+                    new_meta["min_ts"] = row[3] if new_meta["min_ts"] is None else min(new_meta["min_ts"], row[3])
+                    new_meta["max_ts"] = row[3] if new_meta["max_ts"] is None else max(new_meta["max_ts"], row[3])
+        if not written_ids:
+            tmp_path.unlink(missing_ok=True)
+            continue
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+
+        new_meta["rows"] += len(written_ids)
+        new_path = month_path(month, new_meta["rows"])
+        os.replace(tmp_path, new_path)
+        new_meta["file"] = new_path.name
+        new_meta["bytes"] = new_path.stat().st_size
+        new_meta["deleting"] = True
+        index[month] = new_meta
+        _save_index(index)
+        if old_path is not None and old_path != new_path:
+            old_path.unlink(missing_ok=True)
+
+        # L'archive est sur disque et indexée : on supprime de la base les lignes écrites
+        _delete_ids(conn, written_ids)
+        conn.commit()
+        new_meta["deleting"] = False
+        _save_index(index)
+        archived += len(written_ids)
+        print(f"🗄 Archive {month} : {len(written_ids)} lignes ({new_meta['bytes'] // 1024} Ko)")
+
+    if vacuum and archived:
+        # Rendre l'espace libéré au système de fichiers (carte SD)
+        conn.execute("VACUUM")
+    return archived
+
+
+# ============================================
+# LECTURE DES ARCHIVES
+# ============================================
+
+# Dernier mois lu par read_archived_page : (fichier, lignes triées du plus récent au plus ancien)
+_page_cache = (None, [])
+
+
+def iter_month(month, meta=None):
+    """Itère les lignes archivées d'un mois (tuples dans l'ordre COLUMNS)."""
+    if meta is None:
+        meta = load_index().get(month, {})
+    if not meta.get("file"):
+        return
+    path = ARCHIVE_DIR / meta["file"]
+    if not path.exists():
+        return
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield tuple(record[c] for c in COLUMNS)
+
+
+def iter_archived_rows(since=None, until=None):
+    """
+    Itère les lignes archivées, du plus ancien au plus récent. Avec since / until,
+    les mois dont les bornes de l'index sont hors de la période ne sont pas
+    décompressés (les lignes restent à filtrer par matches_filters).
+    """
+    index = load_index()
+    for month in sorted(index):
+        meta = index[month]
+        if meta.get("rows"):
+            if since and meta["max_ts"] < since:
+                continue
+            if until and meta["min_ts"] >= until:
+                break
+        yield from iter_month(month, meta)
+
+
+def _month_rows_newest_first(month, meta):
+    """Lignes d'un mois du plus récent au plus ancien (le dernier mois lu reste en mémoire)."""
+    global _page_cache
+    path = ARCHIVE_DIR / meta["file"]
+    if _page_cache[0] != path:
+        rows = sorted(iter_month(month, meta), key=lambda row: (row[3], row[0]), reverse=True)
+        _page_cache = (path, rows)
+    return _page_cache[1]
+
+
+def matches_filters(row, bin_color, item_name, min_confidence, max_confidence, since, until):
+    """Mêmes filtres que l'historique en base, appliqués à une ligne archivée."""
+    _, row_bin, row_item, timestamp, confidence = row
+    if bin_color and row_bin != bin_color:
+        return False
+    if item_name and row_item != item_name.strip().lower():
+        return False
+    if min_confidence is not None and confidence < min_confidence:
+        return False
+    if max_confidence is not None and confidence > max_confidence:
+        return False
+    if since and timestamp < since:
+        return False
+    if until and timestamp >= until:
+        return False
+    return True
+
+
+def read_archived_page(limit, position=None, bin_color=None, item_name=None,
+                       min_confidence=None, max_confidence=None, since=None, until=None):
+    """
+    Lignes archivées strictement avant position (timestamp, id), du plus récent
+    au plus ancien, au plus limit lignes. Seuls les mois dont les bornes de
+    l'index recoupent la requête sont décompressés.
+    """
+    index = load_index()
+    page = []
+    for month in sorted(index, reverse=True):
+        meta = index[month]
+        if not meta.get("rows"):
+            continue
+        if position is not None and meta["min_ts"] > position[0]:
+            continue
+        if until and meta["min_ts"] >= until:
+            continue
+        if since and meta["max_ts"] < since:
+            break
+        for row in _month_rows_newest_first(month, meta):
+            if position is not None and (row[3], row[0]) >= position:
+                continue
+            if matches_filters(row, bin_color, item_name, min_confidence, max_confidence, since, until):
+                page.append(row)
+                if len(page) >= limit:
+                    return page
+    return page
@@ -0,0 +1,123 @@
+"""
+Smart Bin SI - Export de l'historique de tri (CSV / NDJSON, gzip optionnel)
+- Les lignes sont lues par paquets depuis un curseur SQLite (générateur) et
+  converties en morceaux d'octets au fil de l'eau : la mémoire utilisée ne
+  dépend pas du nombre de lignes exportées
+- Les mêmes morceaux alimentent une réponse HTTP en streaming ou un fichier
+"""
+
+import csv
+import io
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+
+from config import DB_PATH, EXPORTS_DIR
+
+COLUMNS = ("id", "bin_color", "item_name", "timestamp", "confidence")
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+CHUNK_ROWS = 2000  # Lignes lues par fetchmany et regroupées par morceau
+
+
+def iter_history_rows(db_path=DB_PATH, include_archive=False, bin_color=None, item_name=None,
+                      min_confidence=None, max_confidence=None, since=None, until=None):
+    """
+    Itère l'historique du plus ancien au plus récent, paquet par paquet.
+    Ouvre sa propre connexion en lecture seule (utilisable depuis une réponse
+    Flask en streaming, après la fin de la vue).
+    """
+    import waste_classifier
+    import history_archive
+
+    filters = (bin_color, item_name, min_confidence, max_confidence, since, until)
+    if include_archive:
+        # Les archives sont toujours plus anciennes que la base
+        for row in history_archive.iter_archived_rows(since, until):
+            if history_archive.matches_filters(row, *filters):
+                yield row
+
+    clauses, params = waste_classifier.history_filters(*filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(f"""
+            SELECT id, bin_color, item_name, timestamp, confidence
+            FROM sorting_history
+            {where}
+            ORDER BY timestamp, id
+        """, params)
+        while True:
+            rows = cursor.fetchmany(CHUNK_ROWS)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+def _encode_rows(rows, fmt):
+    """Convertit les lignes en morceaux de texte (CHUNK_ROWS lignes par morceau)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(COLUMNS)
+    count = 0
+    for row in rows:
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False))
+            buffer.write("\n")
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_chunks(rows, fmt="csv", compress=False):
+    """
+    Générateur de morceaux d'octets pour un export.
+
+    Args:
+        rows: Itérable de lignes (ordre COLUMNS)
+        fmt: "csv" ou "ndjson"
+        compress: True pour un flux gzip
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu : {fmt}")
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31 = en-tête gzip
+    for text in _encode_rows(rows, fmt):
+        data = text.encode("utf-8")
+        if compressor:
+            data = compressor.compress(data)
+            if not data:
+                continue
+        yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def export_filename(fmt="csv", compress=False):
+    """Nom de fichier horodaté pour un export."""
+    suffix = ".gz" if compress else ""
+    return f"sorting_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}{suffix}"
+
+
+def export_to_file(fmt="csv", compress=False, path=None, **filters):
+    """
+    Écrit un export dans EXPORTS_DIR (ou path) et retourne (chemin, octets écrits).
+    Les filtres sont ceux de iter_history_rows.
+    """
+    if path is None:
+        EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = EXPORTS_DIR / export_filename(fmt, compress)
+    written = 0
+    with open(path, "wb") as f:
+        for chunk in export_chunks(iter_history_rows(**filters), fmt, compress):
+            f.write(chunk)
+            written += len(chunk)
+    return path, written
@@ -0,0 +1,371 @@
+"""
+Smart Bin SI - Serveur d'inférence local
+- Un seul processus charge le modèle YOLO (une fois par machine)
+- Les clients (détecteur, interface, outils) se connectent par socket Unix
+- Les pixels passent par mémoire partagée : seul un petit en-tête JSON
+  circule sur la socket (pas de pickle, pas de copie de l'image)
+- Les requêtes de plusieurs clients sont regroupées en lots (batching dynamique)
+
+Protocole (une ligne JSON par message) :
+  client → serveur : {"op": "detect", "id": 1, "shm": "<nom>", "shape": [h, w, 3]}
+                     {"op": "info"}
+  serveur → client : {"id": 1, "detections": [...], "batch": 2, "inference_ms": 12.3}
+                     {"names": {"0": "plastic", ...}}
+"""
+
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from config import (
+    MODEL_PATH, INFERENCE_SOCKET_PATH, MAX_BATCH_SIZE, INFERENCE_BATCH_WAIT_MS,
+    STATUS_REPORT_INTERVAL,
+)
+
+
+def _attach_shm(name):
+    """
+    S'attacher à un segment de mémoire partagée créé par un autre processus.
+    Le segment appartient au client : on ne doit pas le détruire en quittant.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 : pas d'option track, on désinscrit le segment à la main
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _send_message(sock, message, lock=None):
+    """Envoyer un message JSON (une ligne) sur la socket"""
+    data = (json.dumps(message) + "\n").encode()
+    if lock is None:
+        sock.sendall(data)
+    else:
+        with lock:
+            sock.sendall(data)
+
+
+# ============================================
+# SERVEUR
+# ============================================
+
+class _ClientConnection:
+    """Connexion d'un client : socket, verrou d'écriture, segments attachés"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.segments = {}
+        self._retired = []
+
+    def frame(self, name, shape):
+        """Vue numpy (sans copie) sur l'image déposée par le client"""
+        shm = self.segments.get(name)
+        if shm is None:
+            # Nouveau segment (le client l'a recréé plus grand) : l'ancien ne
+            # servira plus, on s'en détache dès que le lot en cours l'a libéré
+            self._retired.extend(self.segments.values())
+            self.segments.clear()
+            shm = _attach_shm(name)
+            self.segments[name] = shm
+        self._close_retired()
+        return np.ndarray(tuple(shape), dtype=np.uint8, buffer=shm.buf)
+
+    def _close_retired(self):
+        """Se détacher des segments abandonnés qui ne sont plus utilisés par un lot"""
+        in_use = []
+        for shm in self._retired:
+            try:
+                shm.close()
+            except BufferError:
+                # Une vue est encore utilisée par le lot en cours
+                in_use.append(shm)
+        self._retired = in_use
+
+    def close(self):
+        self._retired.extend(self.segments.values())
+        self.segments.clear()
+        self._close_retired()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class InferenceServer:
+    """
+    Serveur d'inférence : possède le modèle et traite les requêtes par lots
+    Un thread par client lit les requêtes ; un thread unique exécute le modèle
+    sur des lots de MAX_BATCH_SIZE images au plus, en attendant au plus
+    INFERENCE_BATCH_WAIT_MS pour compléter un lot.
+    """
+
+    def __init__(self, socket_path=INFERENCE_SOCKET_PATH, model_path=MODEL_PATH):
+        """
+        Args:
+            socket_path: Chemin de la socket Unix d'écoute
+            model_path: Chemin vers les poids YOLO
+        """
+        # Import tardif : seul le serveur a besoin de torch
+        from yolo_detector import load_model
+        self.model = load_model(model_path)
+        self.names = {int(k): v for k, v in dict(self.model.names).items()}
+        self.socket_path = str(socket_path)
+        self._requests = queue.Queue()
+        self._running = False
+        self._lock = threading.Lock()  # Compteur de clients (un thread par client)
+
+        # Statistiques
+        self.clients = 0
+        self.requests = 0
+        self.batches = 0
+        self.inference_total_ms = 0.0
+
+    def serve_forever(self):
+        """Écouter les clients et traiter les requêtes jusqu'à Ctrl+C"""
+        from yolo_detector import results_to_detections
+        self._results_to_detections = results_to_detections
+
+        if os.path.exists(self.socket_path):
+            # Socket d'un serveur encore vivant : ne pas lui voler sa place
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                print(f"✗ Un serveur d'inférence écoute déjà sur {self.socket_path}")
+                return
+            except OSError:
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen()
+        self._running = True
+
+        threading.Thread(target=self._batch_loop, name="inference-batcher", daemon=True).start()
+        print(f"✓ Serveur d'inférence à l'écoute sur {self.socket_path}")
+
+        try:
+            while True:
+                sock, _ = server.accept()
+                client = _ClientConnection(sock)
+                with self._lock:
+                    self.clients += 1
+                threading.Thread(target=self._client_loop, args=(client,), daemon=True).start()
+        except KeyboardInterrupt:
+            print("\n\n⚠ Interrompu par l'utilisateur")
+        finally:
+            self._running = False
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            print("\n✓ Serveur d'inférence arrêté\n")
+
+    def _client_loop(self, client):
+        """Lire les requêtes d'un client et les mettre en file"""
+        try:
+            for line in client.sock.makefile("rb"):
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                op = message.get("op")
+                if op == "info":
+                    _send_message(client.sock, {"names": self.names}, client.lock)
+                elif op == "detect":
+                    try:
+                        frame = client.frame(message["shm"], message["shape"])
+                    except (KeyError, OSError, ValueError, TypeError) as e:
+                        _send_message(client.sock, {"id": message.get("id"), "error": str(e)}, client.lock)
+                        continue
+                    self._requests.put((client, message["id"], frame))
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self.clients -= 1
+            client.close()
+
+    def _next_batch(self):
+        """Attendre une requête puis compléter le lot pendant INFERENCE_BATCH_WAIT_MS"""
+        try:
+            batch = [self._requests.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + INFERENCE_BATCH_WAIT_MS / 1000.0
+        while len(batch) < MAX_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _batch_loop(self):
+        """Exécuter le modèle sur chaque lot et répondre aux clients"""
+        last_report = time.monotonic()
+        while self._running:
+            batch = self._next_batch()
+            if batch:
+                n = len(batch)
+                t0 = time.monotonic()
+                try:
+                    results = self.model([frame for _, _, frame in batch])
+                    error = None
+                except Exception as e:
+                    results, error = None, str(e)
+                inference_ms = (time.monotonic() - t0) * 1000.0
+
+                for i, (client, request_id, _) in enumerate(batch):
+                    if error is None:
+                        detections = [
+                            {
+                                'class': d['class'],
+                                'class_id': d.get('class_id'),
+                                'confidence': float(d['confidence']),
+                                'bbox': [float(v) for v in d['bbox']],
+                            }
+                            for d in self._results_to_detections(results, self.names, i)
+                        ]
+                        reply = {"id": request_id, "detections": detections,
+                                 "batch": n, "inference_ms": round(inference_ms, 2)}
+                    else:
+                        reply = {"id": request_id, "error": error}
+                    try:
+                        _send_message(client.sock, reply, client.lock)
+                    except OSError:
+                        pass
+                # Libérer les vues sur la mémoire partagée avant la requête suivante
+                del batch, results
+
+                self.requests += n
+                self.batches += 1
+                self.inference_total_ms += inference_ms
+
+            if time.monotonic() - last_report >= STATUS_REPORT_INTERVAL:
+                self._report()
+                last_report = time.monotonic()
+
+    def _report(self):
+        """Publier l'état du serveur (clients, taille moyenne des lots, latence)"""
+        from status_report import write_status
+        write_status("inference_server", {
+            'clients': self.clients,
+            'requests': self.requests,
+            'batches': self.batches,
+            'avg_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0,
+            'avg_inference_ms': round(self.inference_total_ms / self.batches, 2) if self.batches else 0.0,
+        })
+
+
+# ============================================
+# CLIENT (léger : numpy seulement, pas de torch)
+# ============================================
+
+class InferenceClient:
+    """
+    Client du serveur d'inférence
+    L'image est copiée dans un segment de mémoire partagée propre au client,
+    puis seul son nom et sa forme sont envoyés sur la socket.
+    """
+
+    def __init__(self, socket_path=INFERENCE_SOCKET_PATH):
+        """
+        Args:
+            socket_path: Chemin de la socket Unix du serveur
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(socket_path))
+        self._reader = self.sock.makefile("rb")
+        self._shm = None
+        self._next_id = 0
+        self.names = {}
+
+        _send_message(self.sock, {"op": "info"})
+        info = self._receive()
+        self.names = {int(k): v for k, v in info.get("names", {}).items()}
+        print(f"✓ Connecté au serveur d'inférence ({socket_path})")
+
+    def _receive(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Serveur d'inférence déconnecté")
+        return json.loads(line)
+
+    def _ensure_segment(self, nbytes):
+        """(Re)créer le segment partagé si l'image ne tient pas dedans"""
+        if self._shm is not None and self._shm.size >= nbytes:
+            return
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def detect(self, frame):
+        """
+        Détecter les déchets sur une image via le serveur
+
+        Args:
+            frame: Image OpenCV (uint8, HxWx3)
+
+        Retourne:
+            list: Détections [{'class', 'confidence', 'bbox'}]
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        self._ensure_segment(frame.nbytes)
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf)
+        view[...] = frame
+        del view
+
+        self._next_id += 1
+        _send_message(self.sock, {
+            "op": "detect", "id": self._next_id,
+            "shm": self._shm.name, "shape": list(frame.shape),
+        })
+        reply = self._receive()
+        if "error" in reply:
+            print(f"⚠ Erreur serveur d'inférence : {reply['error']}")
+            return []
+        return reply["detections"]
+
+    def close(self):
+        """Fermer la connexion et détruire le segment partagé"""
+        try:
+            self._reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+# ============================================
+# POINT D'ENTRÉE PRINCIPAL
+# ============================================
+
+def main():
+    """Lancer le serveur d'inférence"""
+    print("\n" + "="*50)
+    print("🤖 SMART BIN SI - SERVEUR D'INFÉRENCE")
+    print("="*50)
+    InferenceServer().serve_forever()
+
+
+if __name__ == "__main__":
+    main()
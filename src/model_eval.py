@@ -0,0 +1,316 @@
+"""
+Smart Bin SI - Évaluation et banc d'essai d'un modèle
+- Fait tourner un modèle sur une partie du jeu de données construit par
+  dataset_builder (val par défaut ; test : images que l'entraînement ne voit
+  jamais, pas même pour choisir best.pt)
+- Précision : mAP@0.5, mAP@0.5:0.95, et par classe AP, précision et rappel
+  au seuil de confiance utilisé en service (CONFIDENCE_THRESHOLD)
+- Vitesse : latence par image (percentiles), détail prétraitement /
+  inférence / NMS quand le modèle le fournit, pic de mémoire du processus
+- Les résultats sont enregistrés en JSON sous BENCHMARKS_DIR pour comparer
+  les modèles et les moteurs d'exécution (backends) d'une fois sur l'autre
+- Les classes sont comparées par nom normalisé (minuscules, espaces → _,
+  comme les dossiers) : un modèle dont les ids ou l'écriture des noms diffèrent
+  de ceux du jeu de données (ex: ancien best.pt, "Plastic Bottle") est évalué
+  correctement
+"""
+
+import json
+import resource
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import DATASET_DIR, BENCHMARKS_DIR, CONFIDENCE_THRESHOLD
+from dataset_builder import load_manifest
+from active_learning import box_iou
+from training_data import normalize_class_name
+
+EVAL_CONFIDENCE = 0.001  # Seuil très bas : la courbe précision/rappel couvre toutes les détections
+MATCH_IOU = 0.5
+IOU_THRESHOLDS = [0.5 + 0.05 * i for i in range(10)]  # mAP@0.5:0.95
+WARMUP_IMAGES = 3  # Premières images exclues des mesures de latence
+
+
+# ============================================
+# JEU DE DONNÉES
+# ============================================
+
+def load_split(dataset_dir=DATASET_DIR, split="val"):
+    """
+    Images et vérités terrain d'une partie du jeu de données
+
+    Retourne:
+        (classes, [(chemin image, [(classe, cx, cy, w, h normalisés)])])
+    """
+    classes = load_manifest(dataset_dir)["classes"]
+    samples = []
+    for image_path in sorted(Path(dataset_dir, "images", split).glob("*.jpg")):
+        label_path = Path(dataset_dir, "labels", split, image_path.stem + ".txt")
+        truths = []
+        if label_path.exists():
+            for line in label_path.read_text(encoding="utf-8").splitlines():
+                fields = line.split()
+                if len(fields) == 5 and int(fields[0]) < len(classes):
+                    truths.append((classes[int(fields[0])], *(float(v) for v in fields[1:])))
+        samples.append((image_path, truths))
+    return classes, samples
+
+
+def _to_pixels(truth, width, height):
+    class_name, cx, cy, w, h = truth
+    return class_name, [(cx - w / 2) * width, (cy - h / 2) * height,
+                        (cx + w / 2) * width, (cy + h / 2) * height]
+
+
+# ============================================
+# MÉTRIQUES
+# ============================================
+
+def match_image(detections, truths, iou=MATCH_IOU):
+    """
+    Associe les détections d'une image aux vérités terrain (par confiance décroissante,
+    une vérité ne peut être trouvée qu'une fois). Classes comparées par nom normalisé.
+
+    Retourne:
+        [(classe, confiance, True si vrai positif)]
+    """
+    matched = set()
+    outcomes = []
+    for detection in sorted(detections, key=lambda d: d['confidence'], reverse=True):
+        best, best_iou = None, iou
+        detected = normalize_class_name(detection['class'])
+        for index, (class_name, box) in enumerate(truths):
+            if index in matched or normalize_class_name(class_name) != detected:
+                continue
+            overlap = box_iou(detection['bbox'], box)
+            if overlap >= best_iou:
+                best, best_iou = index, overlap
+        if best is not None:
+            matched.add(best)
+        outcomes.append((detection['class'], float(detection['confidence']), best is not None))
+    return outcomes
+
+
+def average_precision(outcomes, truth_count):
+    """AP (interpolation sur tous les points) à partir des (confiance, vrai positif) d'une classe"""
+    if truth_count == 0:
+        return None
+    outcomes = sorted(outcomes, key=lambda o: o[0], reverse=True)
+    precisions, recalls = [], []
+    hits = 0
+    for rank, (_, hit) in enumerate(outcomes, start=1):
+        hits += hit
+        precisions.append(hits / rank)
+        recalls.append(hits / truth_count)
+    # Précision rendue décroissante, puis aire sous la courbe
+    for i in range(len(precisions) - 2, -1, -1):
+        precisions[i] = max(precisions[i], precisions[i + 1])
+    ap, previous_recall = 0.0, 0.0
+    for precision, recall in zip(precisions, recalls):
+        ap += (recall - previous_recall) * precision
+        previous_recall = recall
+    return ap
+
+
+def percentiles(values):
+    """Moyenne, p50, p90, p99 et max d'une liste de durées (ms)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {'mean': round(sum(ordered) / len(ordered), 2), 'p50': pick(0.50),
+            'p90': pick(0.90), 'p99': pick(0.99), 'max': round(ordered[-1], 2)}
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus (Mo, Linux)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def detection_metrics(records, classes, threshold=CONFIDENCE_THRESHOLD):
+    """
+    Métriques de précision à partir des (détections, vérités) de chaque image
+
+    Retourne:
+        (mAP@0.5, mAP@0.5:0.95, {classe: {'ap', 'ap50_95', 'precision', 'recall', 'truths', 'detections'}})
+    """
+    # Nom normalisé → nom du jeu de données (les détections portent les noms du modèle)
+    dataset_names = {normalize_class_name(name): name for name in classes}
+    truth_counts = {name: 0 for name in classes}
+    for _, boxes in records:
+        for class_name, _ in boxes:
+            truth_counts[class_name] += 1
+
+    aps = {name: [] for name in classes}
+    at_threshold = {name: [0, 0] for name in classes}  # vrais positifs, détections
+    detection_counts = {name: 0 for name in classes}
+    for iou in IOU_THRESHOLDS:
+        outcomes = {name: [] for name in classes}
+        for detections, boxes in records:
+            for detected, confidence, hit in match_image(detections, boxes, iou):
+                class_name = dataset_names.get(normalize_class_name(detected))
+                # Classe inconnue du jeu de données : ignorée (rien à retrouver)
+                if class_name is None:
+                    continue
+                outcomes[class_name].append((confidence, hit))
+                if iou == MATCH_IOU and confidence >= threshold:
+                    at_threshold[class_name][0] += hit
+                    at_threshold[class_name][1] += 1
+        for name in classes:
+            aps[name].append(average_precision(outcomes[name], truth_counts[name]))
+            if iou == MATCH_IOU:
+                detection_counts[name] = len(outcomes[name])
+
+    per_class = {}
+    for name in classes:
+        hits, found = at_threshold[name]
+        ap50 = aps[name][0]
+        per_class[name] = {
+            'ap': round(ap50, 4) if ap50 is not None else None,
+            'ap50_95': round(sum(aps[name]) / len(aps[name]), 4) if ap50 is not None else None,
+            'precision': round(hits / found, 4) if found else None,
+            'recall': round(hits / truth_counts[name], 4) if truth_counts[name] else None,
+            'truths': truth_counts[name],
+            'detections': detection_counts[name],
+        }
+    scored = [entry for entry in per_class.values() if entry['ap'] is not None]
+    map50 = round(sum(e['ap'] for e in scored) / len(scored), 4) if scored else 0.0
+    map50_95 = round(sum(e['ap50_95'] for e in scored) / len(scored), 4) if scored else 0.0
+    return map50, map50_95, per_class
+
+
+# ============================================
+# MOTEURS D'EXÉCUTION
+# ============================================
+
+def _torch_runner(model_path, size):
+    """Modèle PyTorch (torch.hub, comme le détecteur) ; détail des temps via results.t"""
+    from yolo_detector import load_model, results_to_detections
+
+    model = load_model(str(model_path))
+    model.conf = EVAL_CONFIDENCE
+
+    def run(frame):
+        results = model(frame, size=size) if size else model(frame)
+        times = getattr(results, "t", None)  # (prétraitement, inférence, NMS) en ms
+        return results_to_detections(results, model.names), times
+
+    return run
+
+
+def _onnx_runner(model_path, size):
+    """Modèle ONNX avec onnxruntime (sans torch) ; la taille est celle de l'export"""
+    from onnx_detector import OnnxDetector
+    from yolo_detector import results_to_detections
+
+    model = OnnxDetector(model_path)
+    model.conf = EVAL_CONFIDENCE
+
+    def run(frame):
+        results = model(frame)
+        return results_to_detections(results, model.names), results.t
+
+    return run
+
+
+# Moteur → fabrique (chemin du modèle, taille) → fonction image → (détections, temps détaillés)
+BACKENDS = {"torch": _torch_runner, "onnxruntime": _onnx_runner}
+
+
+# ============================================
+# ÉVALUATION
+# ============================================
+
+def evaluate(model_path, dataset_dir=DATASET_DIR, split="val", size=None, backend="torch"):
+    """
+    Évalue un modèle sur une partie du jeu de données (précision et vitesse).
+
+    Args:
+        model_path: Poids du modèle
+        dataset_dir: Jeu de données (dataset_builder)
+        split: "val", "test" ou "train"
+        size: Taille d'entrée du modèle (None = taille par défaut)
+        backend: Moteur d'exécution (voir BACKENDS)
+
+    Retourne:
+        dict: {'model', 'backend', 'split', 'images', 'map50', 'map50_95', 'per_class',
+               'latency_ms', 'breakdown_ms', 'peak_rss_mb', ...}
+    """
+    import cv2
+
+    if not Path(model_path).exists():
+        raise FileNotFoundError(f"Modèle introuvable : {model_path}")
+    if backend not in BACKENDS:
+        raise ValueError(f"Moteur inconnu : {backend} (disponibles : {', '.join(BACKENDS)})")
+    classes, samples = load_split(dataset_dir, split)
+    run = BACKENDS[backend](model_path, size)
+
+    records = []
+    latencies = []
+    breakdowns = []
+    for index, (image_path, truths) in enumerate(samples):
+        frame = cv2.imread(str(image_path))
+        if frame is None:
+            continue
+        height, width = frame.shape[:2]
+        start = time.perf_counter()
+        detections, times = run(frame)
+        elapsed = (time.perf_counter() - start) * 1000
+        if index >= WARMUP_IMAGES:
+            latencies.append(elapsed)
+            if times:
+                breakdowns.append(times)
+        records.append((detections, [_to_pixels(truth, width, height) for truth in truths]))
+
+    map50, map50_95, per_class = detection_metrics(records, classes)
+    breakdown = None
+    if breakdowns:
+        breakdown = {
+            stage: percentiles([float(t[k]) for t in breakdowns])
+            for k, stage in enumerate(("preprocess", "inference", "nms"))
+        }
+    return {
+        'model': str(model_path),
+        'backend': backend,
+        'size': size,
+        'split': split,
+        'images': len(records),
+        'map50': map50,
+        'map50_95': map50_95,
+        'confidence_threshold': CONFIDENCE_THRESHOLD,
+        'per_class': per_class,
+        'latency_ms': percentiles(latencies),
+        'breakdown_ms': breakdown,
+        'peak_rss_mb': peak_rss_mb(),
+        'created_at': datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+# ============================================
+# RÉSULTATS ENREGISTRÉS
+# ============================================
+
+def save_result(result, benchmarks_dir=BENCHMARKS_DIR):
+    """Enregistre un résultat en JSON ; retourne le chemin du fichier"""
+    benchmarks_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = benchmarks_dir / f"{stamp}_{Path(result['model']).stem}_{result['backend']}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def load_results(benchmarks_dir=BENCHMARKS_DIR):
+    """Résultats enregistrés, du plus ancien au plus récent"""
+    results = []
+    for path in sorted(benchmarks_dir.glob("*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                results.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return results
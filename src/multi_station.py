@@ -0,0 +1,288 @@
+"""
+Smart Bin SI - Mode multi-postes
+- Un seul processus pilote plusieurs caméras (un poste de tri par caméra)
+- Chaque poste a son suivi des détections, son mapping de bacs et son Arduino
+- Un seul modèle YOLO en mémoire : les images des postes sont regroupées en lot,
+  avec un tour de rôle pour qu'aucun poste ne monopolise l'inférence
+"""
+
+import time
+
+import waste_classifier
+from camera import open_camera, FrameGrabber, frame_age_ms
+from status_report import write_status
+from yolo_detector import load_model, results_to_detections, DetectionTracker
+from config import (
+    MODEL_PATH, STATIONS, MAX_BATCH_SIZE, ARDUINO_PORT, SORTING_DURATION,
+    STATUS_REPORT_INTERVAL, VALID_BINS,
+)
+
+
+# ============================================
+# POSTE DE TRI
+# ============================================
+
+class Station:
+    """
+    Un poste de tri : une caméra, un Arduino, un suivi des détections
+    Le tri ne bloque jamais la boucle : pendant SORTING_DURATION le poste est
+    simplement marqué occupé et ses détections ne déclenchent rien.
+    """
+
+    def __init__(self, name, camera_source=0, use_csi=False,
+                 arduino_port=ARDUINO_PORT, bin_mapping=None):
+        """
+        Args:
+            name: Nom du poste (affiché dans les rapports)
+            camera_source: Index/chemin de la caméra (ID du capteur en CSI)
+            use_csi: True pour une caméra CSI Jetson
+            arduino_port: Port série de l'Arduino du poste
+            bin_mapping: Mapping objet → bac propre au poste (prioritaire sur la DB)
+        """
+        self.name = name
+        self.camera_source = camera_source
+        self.use_csi = use_csi
+        self.arduino_port = arduino_port
+        self.bin_mapping = {
+            waste_classifier.normalize_item_name(k): v
+            for k, v in (bin_mapping or {}).items() if v in VALID_BINS
+        }
+
+        self.tracker = DetectionTracker()
+        self.grabber = None
+        self.serial = None
+        self.busy_until = 0.0
+
+        # Statistiques (fenêtre glissante entre deux rapports)
+        self.frames = 0
+        self.sorts = 0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._inference_total = 0.0
+        self.fps = 0.0
+        self.latency_avg = 0.0
+        self.latency_max = 0.0
+        self.inference_avg = 0.0
+
+    def open(self):
+        """Ouvrir la caméra et l'Arduino du poste. Retourne False si la caméra échoue."""
+        cap = open_camera(self.camera_source, use_csi=self.use_csi)
+        if not cap.isOpened():
+            print(f"✗ [{self.name}] Échec d'ouverture de la caméra")
+            return False
+        # Thread de capture obligatoire : la boucle interroge les postes sans attendre
+        self.grabber = FrameGrabber(cap, threaded=True).start()
+        self.serial = waste_classifier.open_serial(self.arduino_port)
+        print(f"✓ [{self.name}] Poste prêt")
+        return True
+
+    def poll(self):
+        """Image la plus récente pas encore traitée, sans attendre (ok, image, horodatage)"""
+        return self.grabber.read(timeout=0)
+
+    def resolve_bin(self, item_name):
+        """Bac pour un objet : mapping du poste, sinon DB / mapping global"""
+        bin_color = self.bin_mapping.get(waste_classifier.normalize_item_name(item_name))
+        if bin_color:
+            return bin_color
+        return waste_classifier.get_bin_color(item_name)
+
+    def handle_detections(self, detections):
+        """
+        Appliquer le filtrage temporel et déclencher le tri si besoin
+
+        Args:
+            detections: Détections de la dernière image du poste
+        """
+        if not detections or time.time() < self.busy_until:
+            return
+
+        best = max(detections, key=lambda x: x['confidence'])
+        if not self.tracker.should_trigger_sort(best):
+            return
+
+        waste_class = best['class']
+        bin_color = self.resolve_bin(waste_class)
+        if bin_color is None:
+            # Pas de question interactive en multi-postes : l'objet est ignoré
+            print(f"⊘ [{self.name}] Objet inconnu ignoré : {waste_class}")
+            return
+
+        print(f"🎯 [{self.name}] TRI AUTO : {waste_class} → {bin_color}")
+        waste_classifier.log_detection(bin_color, waste_class.strip().lower(), float(best['confidence']))
+        waste_classifier.send_sort_command(bin_color, ser=self.serial)
+        self.sorts += 1
+        if self.serial and self.serial.is_open:
+            self.busy_until = time.time() + SORTING_DURATION
+
+    def record(self, latency_ms, inference_ms):
+        """
+        Enregistrer le traitement d'une image
+
+        Args:
+            latency_ms: Capture → détections disponibles (ms)
+            inference_ms: Part de l'inférence du lot attribuée à cette image (ms)
+        """
+        self.frames += 1
+        self._window_frames += 1
+        self._latency_total += latency_ms
+        self._latency_max = max(self._latency_max, latency_ms)
+        self._inference_total += inference_ms
+
+    def roll_window(self):
+        """Clore la fenêtre de mesure courante et calculer FPS / latences"""
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        n = self._window_frames
+        self.fps = n / elapsed if elapsed > 0 else 0.0
+        self.latency_avg = self._latency_total / n if n else 0.0
+        self.latency_max = self._latency_max
+        self.inference_avg = self._inference_total / n if n else 0.0
+        self._window_start = now
+        self._window_frames = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._inference_total = 0.0
+
+    def report(self):
+        """État du poste pour les rapports"""
+        return {
+            'name': self.name,
+            'fps': round(self.fps, 1),
+            'latency_avg_ms': round(self.latency_avg, 1),
+            'latency_max_ms': round(self.latency_max, 1),
+            'inference_avg_ms': round(self.inference_avg, 1),
+            'frames': self.frames,
+            'sorts': self.sorts,
+            'busy': time.time() < self.busy_until,
+        }
+
+    def close(self):
+        """Libérer la caméra et l'Arduino"""
+        if self.grabber is not None:
+            self.grabber.release()
+            self.grabber = None
+        if self.serial and self.serial.is_open:
+            self.serial.close()
+        self.serial = None
+
+
+# ============================================
+# ORDONNANCEMENT MULTI-POSTES
+# ============================================
+
+class MultiStationRunner:
+    """
+    Pilote plusieurs postes avec un seul modèle YOLO
+    À chaque passe, on prend au plus une image par poste (MAX_BATCH_SIZE au total),
+    en commençant par un poste différent à chaque fois (tour de rôle).
+    """
+
+    def __init__(self, stations_config=STATIONS, model_path=MODEL_PATH):
+        """
+        Args:
+            stations_config: Liste de dictionnaires décrivant les postes
+            model_path: Chemin vers les poids YOLO partagés
+        """
+        print("\n" + "="*50)
+        print("🤖 SMART BIN SI - MODE MULTI-POSTES")
+        print("="*50)
+
+        self.model = load_model(model_path)
+        self.stations = [Station(**cfg) for cfg in stations_config]
+        self._next = 0
+        self.batches = 0
+
+    def next_batch(self):
+        """
+        Collecter les images prêtes, une par poste, en tour de rôle
+
+        Retourne:
+            list: Tuples (poste, image, horodatage de capture)
+        """
+        ready = []
+        n = len(self.stations)
+        for k in range(n):
+            station = self.stations[(self._next + k) % n]
+            ok, frame, capture_ts = station.poll()
+            if ok:
+                ready.append((station, frame, capture_ts))
+                if len(ready) >= MAX_BATCH_SIZE:
+                    break
+        self._next = (self._next + 1) % n
+        return ready
+
+    def report(self):
+        """Afficher et publier l'état de tous les postes"""
+        for station in self.stations:
+            station.roll_window()
+        reports = [station.report() for station in self.stations]
+        for r in reports:
+            print(f"📊 [{r['name']}] {r['fps']:.1f} FPS | latence {r['latency_avg_ms']:.0f} ms "
+                  f"(max {r['latency_max_ms']:.0f}) | inférence {r['inference_avg_ms']:.0f} ms "
+                  f"| {r['sorts']} tris")
+        write_status("multi_station", {'stations': reports, 'batches': self.batches})
+
+    def run(self):
+        """Boucle principale : lots d'images → inférence partagée → tri par poste"""
+        waste_classifier.init_database()
+        self.stations = [station for station in self.stations if station.open()]
+        if not self.stations:
+            print("✗ Aucun poste disponible")
+            waste_classifier.cleanup()
+            return
+
+        print(f"\n✓ {len(self.stations)} poste(s) actif(s) - Ctrl+C pour quitter\n")
+        last_report = time.monotonic()
+
+        try:
+            while True:
+                batch = self.next_batch()
+                if not batch:
+                    if all(station.grabber.failed for station in self.stations):
+                        print("✗ Plus aucune caméra ne répond")
+                        break
+                    time.sleep(0.002)
+                else:
+                    # Une seule passe d'inférence pour toutes les images du lot
+                    t0 = time.monotonic()
+                    results = self.model([frame for _, frame, _ in batch])
+                    inference_ms = (time.monotonic() - t0) * 1000.0 / len(batch)
+                    self.batches += 1
+
+                    for i, (station, frame, capture_ts) in enumerate(batch):
+                        detections = results_to_detections(results, self.model.names, i)
+                        station.record(frame_age_ms(capture_ts), inference_ms)
+                        station.handle_detections(detections)
+
+                if time.monotonic() - last_report >= STATUS_REPORT_INTERVAL:
+                    self.report()
+                    last_report = time.monotonic()
+
+        except KeyboardInterrupt:
+            print("\n\n⚠ Interrompu par l'utilisateur")
+
+        finally:
+            for station in self.stations:
+                station.close()
+            waste_classifier.cleanup()
+            print("\n✓ Mode multi-postes arrêté\n")
+
+
+# ============================================
+# POINT D'ENTRÉE PRINCIPAL
+# ============================================
+
+def main():
+    """Lancer le mode multi-postes à partir de STATIONS (config.py)"""
+    if not STATIONS:
+        print("✗ Aucun poste défini : renseigner STATIONS dans src/config.py")
+        return 1
+    MultiStationRunner().run()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+"""
+Smart Bin SI - Exécution d'un modèle YOLOv5 exporté en ONNX (onnxruntime)
+- Sans torch : utilisable sur les petites machines où seul onnxruntime est installé
+- Même interface que le modèle torch.hub pour le détecteur : model(frame),
+  model.names, model.conf / model.iou, résultats lus par results_to_detections
+- Taille d'entrée fixée à l'export (fixed_size) : la régulation de cadence ne
+  fait alors varier que le pas d'images
+- Les modèles produits par quantize.py (FP32, FP16, INT8) ont un fichier
+  <modèle>.json à côté : noms des classes, taille d'entrée, précision
+"""
+
+import ast
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import CONFIDENCE_THRESHOLD, IOU_THRESHOLD
+from preprocess import Preprocessor, scale_boxes
+
+MAX_DETECTIONS = 300
+CLASS_OFFSET = 4096  # Décalage par classe : une seule NMS, sans mélange entre classes
+
+
+def read_sidecar(model_path):
+    """Métadonnées <modèle>.json écrites par quantize.py, ou {}"""
+    try:
+        with open(Path(model_path).with_suffix(".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def decode_predictions(output, conf, iou):
+    """
+    Sortie brute YOLOv5 (N, 5 + classes) → tableau (k, 6)
+    [x1, y1, x2, y2, conf, classe] dans les coordonnées de l'entrée du modèle
+    """
+    import cv2
+
+    scores = output[:, 5:] * output[:, 4:5]
+    classes = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(scores)), classes]
+    keep = confidences >= conf
+    if not keep.any():
+        return np.zeros((0, 6), dtype=np.float32)
+    boxes, confidences, classes = output[keep, :4], confidences[keep], classes[keep]
+
+    # (cx, cy, w, h) → (x, y, w, h) ; décalage par classe pour une NMS par classe
+    xywh = boxes.copy()
+    xywh[:, :2] -= xywh[:, 2:] / 2
+    shifted = xywh.copy()
+    shifted[:, :2] += classes[:, None] * CLASS_OFFSET
+    indices = cv2.dnn.NMSBoxes(shifted.tolist(), confidences.tolist(), conf, iou)
+    indices = np.array(indices, dtype=int).reshape(-1)[:MAX_DETECTIONS]
+
+    result = np.zeros((len(indices), 6), dtype=np.float32)
+    result[:, :2] = xywh[indices, :2]
+    result[:, 2:4] = xywh[indices, :2] + xywh[indices, 2:4]
+    result[:, 4] = confidences[indices]
+    result[:, 5] = classes[indices]
+    return result
+
+
+class OnnxResults:
+    """Résultats au format lu par results_to_detections : xyxy par image, temps en ms"""
+
+    def __init__(self, xyxy, times):
+        self.xyxy = xyxy
+        self.t = times  # (prétraitement, inférence, NMS) en ms par image
+
+
+class OnnxDetector:
+    """Modèle YOLOv5 ONNX exécuté avec onnxruntime (GPU si disponible, sinon CPU)"""
+
+    fixed_size = True
+
+    def __init__(self, model_path, providers=None, threads=None):
+        """
+        Args:
+            model_path: Fichier .onnx (exporté par quantize.py ou export.py de YOLOv5)
+            providers: Fournisseurs onnxruntime (None = CUDA si disponible, sinon CPU)
+            threads: Threads de calcul CPU (None = choix d'onnxruntime, tous les cœurs)
+        """
+        import onnxruntime as ort
+
+        if providers is None:
+            available = ort.get_available_providers()
+            providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in available]
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), options, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.float16 if "float16" in model_input.type else np.float32
+        sidecar = read_sidecar(model_path)
+        height = model_input.shape[2]
+        self.input_size = height if isinstance(height, int) else sidecar.get("imgsz", 640)
+        self.precision = sidecar.get("precision")
+        self.names = self._read_names(sidecar)
+        self.conf = CONFIDENCE_THRESHOLD
+        self.iou = IOU_THRESHOLD
+        self.preprocessor = Preprocessor(self.input_size, self.input_dtype)
+
+    def _read_names(self, sidecar):
+        names = sidecar.get("names")
+        if names is None:
+            # Métadonnées ajoutées par export.py de YOLOv5
+            raw = self.session.get_modelmeta().custom_metadata_map.get("names")
+            names = ast.literal_eval(raw) if raw else {}
+        if isinstance(names, list):
+            names = dict(enumerate(names))
+        return {int(k): v for k, v in names.items()}
+
+    def __call__(self, frames, size=None):
+        """
+        Détection sur une image ou une liste d'images (size ignoré : taille fixée à l'export)
+        """
+        if not isinstance(frames, (list, tuple)):
+            frames = [frames]
+        xyxy = []
+        totals = [0.0, 0.0, 0.0]
+        for frame in frames:
+            t0 = time.perf_counter()
+            blob, scale, pad = self.preprocessor(frame)
+            t1 = time.perf_counter()
+            output = self.session.run(None, {self.input_name: blob})[0][0]
+            t2 = time.perf_counter()
+            detections = decode_predictions(output.astype(np.float32), self.conf, self.iou)
+            xyxy.append(scale_boxes(detections, scale, pad, frame.shape))
+            t3 = time.perf_counter()
+            for i, (start, end) in enumerate(((t0, t1), (t1, t2), (t2, t3))):
+                totals[i] += (end - start) * 1000
+        return OnnxResults(xyxy, tuple(t / len(frames) for t in totals))
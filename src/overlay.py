@@ -0,0 +1,208 @@
+"""
+Smart Bin SI - Affichage des détections (fenêtre OpenCV)
+- Thread d'affichage séparé : dessin, imshow et waitKey ne ralentissent plus
+  la boucle d'inférence ; les touches sont renvoyées au détecteur par une file
+- Cadence d'affichage plafonnée (DISPLAY_MAX_FPS) : le détecteur ne prépare
+  l'affichage que pour les images qui seront réellement montrées, et seule la
+  plus récente est dessinée
+- Étiquettes pré-rendues (fond couleur du bac + texte) mises en cache par
+  (classe, bac) et par valeur de confiance : plus de getTextSize / putText par
+  boîte et par image
+- Sans fenêtre (SHOW_DISPLAY = False), le thread ne sert qu'à l'aperçu de
+  l'interface admin (PREVIEW_STREAM) ; sans l'un ni l'autre, il n'est pas créé
+"""
+
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config import BIN_COLORS, DISPLAY_MAX_FPS
+
+WINDOW_NAME = 'Smart Bin - Detection'
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_SCALE = 0.5
+LABEL_THICKNESS = 2
+ROI_COLOR = (255, 255, 255)
+
+
+# ============================================
+# ÉTIQUETTES PRÉ-RENDUES
+# ============================================
+
+def render_sprite(text, background, scale=LABEL_SCALE, thickness=LABEL_THICKNESS):
+    """Texte noir sur fond de couleur, rendu une fois dans une petite image"""
+    (width, height), _ = cv2.getTextSize(text, FONT, scale, thickness)
+    sprite = np.empty((height + 10, width, 3), dtype=np.uint8)
+    sprite[:] = background
+    cv2.putText(sprite, text, (0, height + 5), FONT, scale, (0, 0, 0), thickness)
+    return sprite
+
+
+def blit(frame, sprite, x, y):
+    """Copier sprite dans frame, coin supérieur gauche en (x, y), rogné aux bords"""
+    height, width = frame.shape[:2]
+    sh, sw = sprite.shape[:2]
+    x1, y1 = max(x, 0), max(y, 0)
+    x2, y2 = min(x + sw, width), min(y + sh, height)
+    if x2 > x1 and y2 > y1:
+        frame[y1:y2, x1:x2] = sprite[y1 - y:y2 - y, x1 - x:x2 - x]
+    return x2
+
+
+class LabelSprites:
+    """Cache des étiquettes : « classe -> bac » par (classe, bac), « (0.87) » par confiance"""
+
+    def __init__(self):
+        self._labels = {}
+        self._confidences = {}
+
+    def label(self, class_name, bin_color):
+        key = (class_name, bin_color)
+        sprite = self._labels.get(key)
+        if sprite is None:
+            color = BIN_COLORS.get(bin_color, BIN_COLORS["unknown"])
+            sprite = render_sprite(f"{class_name} -> {bin_color or '?'}", color)
+            self._labels[key] = sprite
+        return sprite
+
+    def confidence(self, confidence, bin_color):
+        # Centièmes : au plus 101 valeurs par couleur de bac
+        key = (round(float(confidence) * 100), bin_color)
+        sprite = self._confidences.get(key)
+        if sprite is None:
+            color = BIN_COLORS.get(bin_color, BIN_COLORS["unknown"])
+            sprite = render_sprite(f" ({key[0] / 100:.2f})", color)
+            self._confidences[key] = sprite
+        return sprite
+
+    def __len__(self):
+        return len(self._labels) + len(self._confidences)
+
+
+def draw_overlay(frame, boxes, texts, roi, sprites):
+    """
+    Dessiner les détections et les lignes d'information sur frame
+
+    Args:
+        boxes: [(x1, y1, x2, y2, classe, confiance, bac)]
+        texts: [(texte, (x, y), échelle, couleur)]
+        roi: Zone de détection (x1, y1, x2, y2) ou None
+        sprites: LabelSprites
+    """
+    for x1, y1, x2, y2, class_name, confidence, bin_color in boxes:
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), BIN_COLORS.get(bin_color, BIN_COLORS["unknown"]), 2)
+        label = sprites.label(class_name, bin_color)
+        top = y1 - label.shape[0]
+        x = blit(frame, label, x1, top)
+        blit(frame, sprites.confidence(confidence, bin_color), x, top)
+    if roi is not None:
+        x1, y1, x2, y2 = [int(v) for v in roi]
+        cv2.rectangle(frame, (x1, y1), (x2, y2), ROI_COLOR, 1)
+    for text, position, scale, color in texts:
+        cv2.putText(frame, text, position, FONT, scale, color, 2)
+    return frame
+
+
+# ============================================
+# THREAD D'AFFICHAGE
+# ============================================
+
+class OverlayRenderer:
+    """Fenêtre OpenCV et aperçu partagé tenus par un thread dédié, à cadence plafonnée"""
+
+    def __init__(self, max_fps=DISPLAY_MAX_FPS, window=WINDOW_NAME, publisher=None):
+        """
+        Args:
+            max_fps: Images affichées par seconde au plus
+            window: Titre de la fenêtre (None = pas de fenêtre)
+            publisher: FramePublisher recevant chaque image annotée (ou None)
+        """
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.window = window
+        self.publisher = publisher
+        self.sprites = LabelSprites()
+        self._cond = threading.Condition()
+        self._pending = None
+        self._next_at = 0.0
+        self._running = False
+        self._thread = None
+        self._keys = queue.Queue()
+        self.shown = 0
+        self.replaced = 0
+
+    def start(self):
+        """Démarrer le thread d'affichage"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="overlay-renderer", daemon=True)
+            self._thread.start()
+        return self
+
+    def due(self):
+        """True si l'image courante sera affichée (sinon inutile de préparer l'affichage)"""
+        return time.monotonic() >= self._next_at
+
+    def submit(self, frame, boxes, texts=(), roi=None):
+        """
+        Confier une image à afficher (retour immédiat ; remplace l'image pas encore affichée)
+
+        Args:
+            frame: Image non annotée (elle n'est pas modifiée)
+            boxes, texts, roi: Voir draw_overlay
+        """
+        self._next_at = time.monotonic() + self.interval
+        with self._cond:
+            if self._pending is not None:
+                self.replaced += 1
+            self._pending = (frame, list(boxes), list(texts), roi)
+            self._cond.notify()
+
+    def poll_key(self):
+        """Dernière touche pressée dans la fenêtre, ou -1"""
+        try:
+            return self._keys.get_nowait()
+        except queue.Empty:
+            return -1
+
+    def _run(self):
+        # Toutes les fonctions HighGUI (imshow, waitKey, destroy) restent dans ce thread
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._pending is not None or not self._running,
+                                        timeout=0.05)
+                    if not self._running:
+                        break
+                    item, self._pending = self._pending, None
+                if item is not None:
+                    frame, boxes, texts, roi = item
+                    image = draw_overlay(frame.copy(), boxes, texts, roi, self.sprites)
+                    if self.publisher is not None:
+                        self.publisher.publish(image)
+                    if self.window is not None:
+                        cv2.imshow(self.window, image)
+                    self.shown += 1
+                if self.window is None:
+                    continue
+                # waitKey aussi sans nouvelle image : la fenêtre reste réactive
+                key = cv2.waitKey(1) & 0xFF
+                if key != 0xFF:
+                    self._keys.put(key)
+        finally:
+            if self.window is not None:
+                cv2.destroyAllWindows()
+            if self.publisher is not None:
+                self.publisher.close()
+
+    def close(self, timeout=2.0):
+        """Fermer la fenêtre et arrêter le thread"""
+        if self._thread is not None:
+            with self._cond:
+                self._running = False
+                self._cond.notify()
+            self._thread.join(timeout=timeout)
+            self._thread = None
@@ -0,0 +1,250 @@
+"""
+Smart Bin SI - Prétraitement des images avant le modèle
+- Image OpenCV (BGR) → tenseur (1, 3, H, W) RGB normalisé 0-1, proportions
+  conservées (bandes grises comme YOLOv5)
+- Tampons alloués une fois et réutilisés d'une image à l'autre (la caméra a
+  une résolution fixe) : seule une nouvelle taille d'image ou d'entrée réalloue
+- Sur GPU, tampon hôte en mémoire verrouillée (pinned) et tampon GPU réutilisé :
+  la copie vers le GPU est asynchrone
+- scale_boxes ramène les boîtes du modèle dans les coordonnées de l'image
+"""
+
+import math
+
+import numpy as np
+
+PAD_VALUE = 114  # Gris des bandes ajoutées (comme YOLOv5)
+
+
+def letterbox_geometry(height, width, size, stride=None):
+    """
+    Géométrie du redimensionnement avec bandes
+
+    Args:
+        height, width: Taille de l'image d'origine
+        size: Plus grand côté de l'entrée du modèle
+        stride: None = entrée carrée size x size ; sinon entrée rectangulaire
+                minimale, multiple de stride (comme AutoShape de YOLOv5)
+
+    Retourne:
+        tuple: ((hauteur, largeur) de l'entrée, (largeur, hauteur) redimensionnées,
+                échelle, (décalage x, décalage y))
+    """
+    scale = min(size / height, size / width)
+    new_w, new_h = round(width * scale), round(height * scale)
+    if stride is None:
+        input_h = input_w = size
+    else:
+        input_h = math.ceil(height * scale / stride) * stride
+        input_w = math.ceil(width * scale / stride) * stride
+    pad_x, pad_y = (input_w - new_w) // 2, (input_h - new_h) // 2
+    return (input_h, input_w), (new_w, new_h), scale, (pad_x, pad_y)
+
+
+def scale_boxes(boxes, scale, pad, shape):
+    """
+    Boîtes [x1, y1, x2, y2, ...] dans l'entrée du modèle → pixels de l'image
+    d'origine (modifiées sur place, bornées à l'image)
+
+    Args:
+        boxes: Tableau numpy (k, >=4)
+        scale, pad: Retournés par le prétraitement
+        shape: Forme de l'image d'origine
+    """
+    height, width = shape[:2]
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes[:, :4] /= scale
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height)
+    return boxes
+
+
+class Preprocessor:
+    """Prétraitement dans des tampons réutilisés (un objet par taille d'entrée)"""
+
+    def __init__(self, size, dtype=np.float32, stride=None, pin_memory=False):
+        """
+        Args:
+            size: Plus grand côté de l'entrée du modèle
+            dtype: Type du tenseur (np.float32, np.float16)
+            stride: Voir letterbox_geometry (None = entrée carrée)
+            pin_memory: Tampon hôte en mémoire verrouillée (torch + CUDA)
+        """
+        self.size = size
+        self.dtype = np.dtype(dtype)
+        self.stride = stride
+        self.pin_memory = pin_memory
+        self._norm = np.array(1.0 / 255, dtype=self.dtype)
+        self._frame_shape = None
+        self._batch = 0
+        self._geometry = None
+        self._resized = None
+        self.canvas = None
+        self.blob = None
+        self._host_tensor = None
+        self._device_tensor = None
+        self._count = 0
+        self.allocations = 0
+
+    def _allocate(self, frame_shape, batch):
+        """(Ré)alloue les tampons pour une nouvelle taille d'image ou un lot plus grand"""
+        height, width = frame_shape[:2]
+        self._geometry = letterbox_geometry(height, width, self.size, self.stride)
+        (input_h, input_w), (new_w, new_h), _, _ = self._geometry
+        self._resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self.canvas = np.full((input_h, input_w, 3), PAD_VALUE, dtype=np.uint8)
+        shape = (batch, 3, input_h, input_w)
+        self._host_tensor = self._device_tensor = None
+        if self.pin_memory:
+            import torch
+            self._host_tensor = torch.empty(shape, dtype=getattr(torch, self.dtype.name),
+                                            pin_memory=True)
+            self.blob = self._host_tensor.numpy()
+        else:
+            self.blob = np.empty(shape, dtype=self.dtype)
+        self._frame_shape = frame_shape
+        self._batch = batch
+        self.allocations += 1
+
+    def __call__(self, frames):
+        """
+        Prétraiter une image BGR, ou une liste d'images BGR de même taille (lot)
+
+        Retourne:
+            tuple: (tenseur (n, 3, H, W) RGB 0-1, échelle, (décalage x, décalage y)).
+            Le tenseur est le tampon interne : il est réécrit à l'appel suivant.
+        """
+        import cv2
+
+        if not isinstance(frames, (list, tuple)):
+            frames = [frames]
+        if frames[0].shape != self._frame_shape or len(frames) > self._batch:
+            self._allocate(frames[0].shape, max(len(frames), self._batch))
+        _, (new_w, new_h), scale, (pad_x, pad_y) = self._geometry
+        for index, frame in enumerate(frames):
+            cv2.resize(frame, (new_w, new_h), dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            self.canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = self._resized
+            # BGR → RGB, HWC → CHW et normalisation en une passe, dans le tampon
+            np.multiply(self.canvas[:, :, ::-1].transpose(2, 0, 1), self._norm, out=self.blob[index])
+        self._count = len(frames)
+        return self.blob[:self._count], scale, (pad_x, pad_y)
+
+    def tensor(self, device):
+        """
+        Tenseur torch du dernier prétraitement sur device (copie asynchrone
+        vers un tampon GPU réutilisé si le tampon hôte est verrouillé)
+        """
+        import torch
+
+        host = self._host_tensor if self._host_tensor is not None else torch.from_numpy(self.blob)
+        if device.type == "cpu":
+            return host[:self._count]
+        if self._device_tensor is None or self._device_tensor.shape != host.shape \
+                or self._device_tensor.device != device:
+            self._device_tensor = torch.empty(host.shape, dtype=host.dtype, device=device)
+        self._device_tensor[:self._count].copy_(host[:self._count], non_blocking=self._host_tensor is not None)
+        return self._device_tensor[:self._count]
+
+
+def letterbox_blob(frame, size, dtype=np.float32):
+    """
+    Image BGR → tenseur (1, 3, size, size) RGB normalisé, dans des tampons neufs
+    (le résultat peut être conservé). Retourne (tenseur, échelle, (décalage x, décalage y)).
+    """
+    return Preprocessor(size, dtype)(frame)
+
+
+# ============================================
+# BANC D'ESSAI (scripts/benchmark_preprocess.py)
+# ============================================
+
+def benchmark(frames, size, iterations=200):
+    """
+    Temps et mémoire allouée par image : tampons neufs à chaque image
+    (letterbox_blob) contre tampons réutilisés (Preprocessor)
+
+    Retourne:
+        dict: {'allocating' | 'reused': {'ms': moyenne, 'alloc_kb': pic alloué par image}}
+    """
+    import time
+    import tracemalloc
+
+    reused = Preprocessor(size)
+    paths = {"allocating": lambda frame: letterbox_blob(frame, size), "reused": reused}
+    report = {}
+    for name, run in paths.items():
+        for frame in frames[:3]:
+            run(frame)  # Premiers appels : allocation des tampons réutilisés
+        start = time.perf_counter()
+        for i in range(iterations):
+            run(frames[i % len(frames)])
+        elapsed_ms = (time.perf_counter() - start) * 1000 / iterations
+        tracemalloc.start()
+        run(frames[0])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report[name] = {'ms': round(elapsed_ms, 3), 'alloc_kb': round(peak / 1024, 1)}
+    return report
+
+
+def compare_paths(detector, frames, size):
+    """
+    Mêmes images par trois chemins du modèle torch (TorchDetector) :
+    - "bgr" : images BGR données à AutoShape (ancien comportement du détecteur)
+    - "autoshape" : images RGB, prétraitement interne d'AutoShape
+    - "explicit" : prétraitement de ce module
+    Chaque chemin est comparé à "autoshape" (accord sur la classe principale,
+    boîtes appariées, écart moyen des boîtes appariées en pixels).
+
+    Retourne:
+        dict: {chemin: {'latency_ms', 'agreement', 'matched', 'missing', 'extra', 'box_error_px'}}
+    """
+    import time
+
+    from active_learning import box_iou
+    from model_eval import percentiles
+    from shadow_eval import compare_detections, top_class
+    from yolo_detector import results_to_detections
+
+    def run(path, frame):
+        detector.explicit = path == "explicit"
+        image = frame[:, :, ::-1] if path == "bgr" else frame  # "bgr" : annule la conversion
+        start = time.perf_counter()
+        results = detector(image, size)
+        elapsed = (time.perf_counter() - start) * 1000
+        return results_to_detections(results, detector.names), elapsed
+
+    explicit = detector.explicit
+    outputs = {path: [] for path in ("bgr", "autoshape", "explicit")}
+    latencies = {path: [] for path in outputs}
+    try:
+        for frame in frames:
+            for path in outputs:
+                detections, elapsed = run(path, frame)
+                outputs[path].append(detections)
+                latencies[path].append(elapsed)
+    finally:
+        detector.explicit = explicit
+
+    report = {}
+    for path, per_frame in outputs.items():
+        agreed, totals, errors = 0, [0, 0, 0], []
+        for detections, reference in zip(per_frame, outputs["autoshape"]):
+            agreed += top_class(detections) == top_class(reference)
+            for i, count in enumerate(compare_detections(reference, detections)):
+                totals[i] += count
+            for ref in reference:
+                same = [d for d in detections if d['class'] == ref['class']]
+                best = max(same, key=lambda d: box_iou(d['bbox'], ref['bbox']), default=None)
+                if best is not None and box_iou(best['bbox'], ref['bbox']) >= 0.5:
+                    errors.append(float(np.mean(np.abs(np.subtract(best['bbox'], ref['bbox'])))))
+        report[path] = {
+            'latency_ms': percentiles(latencies[path][1:] or latencies[path]),
+            'agreement': round(agreed / len(frames), 4) if frames else None,
+            'matched': totals[0],
+            'missing': totals[1],
+            'extra': totals[2],
+            'box_error_px': round(float(np.mean(errors)), 2) if errors else None,
+        }
+    return report
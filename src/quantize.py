@@ -0,0 +1,267 @@
+"""
+Smart Bin SI - Modèles réduits (ONNX FP32 / FP16 / INT8)
+- Export ONNX du modèle .pt avec export.py de YOLOv5 (taille d'entrée fixe)
+- FP16 : conversion des poids (onnxconverter-common), surtout utile sur GPU (Jetson)
+- INT8 : quantification statique onnxruntime, calibrée sur des images de
+  TRAINING_DIR réparties entre les classes (les images réelles de la poubelle),
+  hors parties val/test du jeu de données qui servent à mesurer la précision
+- Chaque modèle produit a un <modèle>.json (classes, taille, précision) et se
+  charge directement par load_model / WasteDetector (MODEL_PATH = "...onnx")
+- compare_models évalue chaque variante dans un processus séparé (latence et
+  pic de mémoire non faussés par les autres) pour choisir selon la machine
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from config import (
+    MODEL_PATH, MODELS_DIR, TRAINING_DIR, DATASET_DIR,
+    DATASET_VAL_FRACTION, DATASET_TEST_FRACTION,
+    QUANTIZE_IMAGE_SIZE, QUANTIZE_CALIBRATION_IMAGES,
+)
+from dataset_builder import load_manifest, scan_training_dir, split_for
+from preprocess import letterbox_blob
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+# ============================================
+# IMAGES DE CALIBRATION
+# ============================================
+
+def calibration_images(limit=QUANTIZE_CALIBRATION_IMAGES, training_dir=TRAINING_DIR,
+                       dataset_dir=DATASET_DIR):
+    """
+    Images de calibration, prises à tour de rôle dans chaque classe (déterministe)
+    pour que les plages de valeurs couvrent tous les types de déchets.
+    Seulement des images de la partie train : val et test servent ensuite à
+    comparer FP32 et INT8, la calibration ne doit pas les avoir vues.
+    """
+    # Même répartition que la dernière construction du jeu de données
+    params = load_manifest(dataset_dir)["params"]
+    val_fraction = params.get("val_fraction", DATASET_VAL_FRACTION)
+    test_fraction = params.get("test_fraction", DATASET_TEST_FRACTION)
+    per_class = {}
+    for source, (class_name, _) in sorted(scan_training_dir(training_dir).items()):
+        if split_for(source, val_fraction, test_fraction) == "train":
+            per_class.setdefault(class_name, []).append(training_dir / source)
+    images = []
+    queues = [iter(paths) for paths in per_class.values()]
+    while queues and len(images) < limit:
+        for queue in list(queues):
+            path = next(queue, None)
+            if path is None:
+                queues.remove(queue)
+            elif len(images) < limit:
+                images.append(path)
+    return images
+
+
+def _calibration_reader(images, input_name, size):
+    """Lecteur de calibration onnxruntime (mêmes prétraitements que l'inférence)"""
+    import cv2
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self._images = iter(images)
+
+        def get_next(self):
+            for path in self._images:
+                frame = cv2.imread(str(path))
+                if frame is not None:
+                    return {input_name: letterbox_blob(frame, size)[0]}
+            return None
+
+    return Reader()
+
+
+# ============================================
+# EXPORT ET CONVERSIONS
+# ============================================
+
+def write_sidecar(onnx_path, names, size, precision, source):
+    """<modèle>.json : ce qu'il faut à OnnxDetector pour utiliser le modèle"""
+    with open(Path(onnx_path).with_suffix(".json"), "w", encoding="utf-8") as f:
+        json.dump({"names": {str(k): v for k, v in names.items()}, "imgsz": size,
+                   "precision": precision, "source": str(source)}, f, indent=2, ensure_ascii=False)
+
+
+def export_onnx(model_path=MODEL_PATH, output_path=None, size=QUANTIZE_IMAGE_SIZE):
+    """
+    Export ONNX FP32 (export.py de YOLOv5, entrée fixe size x size).
+    Retourne le chemin du modèle exporté.
+    """
+    from finetune import find_yolov5_script
+    from onnx_detector import OnnxDetector
+
+    model_path = Path(model_path)
+    output_path = Path(output_path or MODELS_DIR / f"{model_path.stem}_fp32.onnx")
+    export_script = find_yolov5_script("export.py")
+    if export_script is None:
+        raise FileNotFoundError("export.py (YOLOv5) introuvable : définir YOLOV5_DIR")
+    subprocess.run([
+        sys.executable, str(export_script), "--weights", str(model_path),
+        "--include", "onnx", "--imgsz", str(size), "--opset", "13",
+    ], cwd=str(export_script.parent), check=True)
+    # export.py écrit le modèle à côté des poids (best.pt → best.onnx)
+    shutil.move(str(model_path.with_suffix(".onnx")), output_path)
+    names = OnnxDetector(output_path, providers=["CPUExecutionProvider"]).names
+    write_sidecar(output_path, names, size, "fp32", model_path)
+    return output_path
+
+
+def convert_fp16(fp32_path, output_path):
+    """Conversion FP16 des poids et calculs (entrée / sortie en float16)"""
+    import onnx
+    from onnxconverter_common import float16
+
+    model = onnx.load(str(fp32_path))
+    onnx.save(float16.convert_float_to_float16(model), str(output_path))
+    return output_path
+
+
+def _detect_head_nodes(model):
+    """
+    Nœuds du décodage final de YOLOv5 (dernier module, hors convolutions) : ils
+    combinent des grandeurs d'échelles très différentes et restent en float.
+    """
+    indices = [int(m.group(1)) for node in model.graph.node
+               for m in [re.search(r"model\.(\d+)", node.name)] if m]
+    if not indices:
+        return []
+    head = f"model.{max(indices)}"
+    return [node.name for node in model.graph.node
+            if re.search(rf"{re.escape(head)}\b", node.name) and node.op_type != "Conv"]
+
+
+def quantize_int8(fp32_path, output_path, images, size=QUANTIZE_IMAGE_SIZE):
+    """Quantification statique INT8 (format QDQ, poids par canal), calibrée sur images"""
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    if not images:
+        raise ValueError(f"Aucune image de calibration dans {TRAINING_DIR}")
+    source = Path(fp32_path)
+    try:
+        # Inférence des formes : la quantification couvre plus de nœuds
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        prepared = source.with_name(source.stem + "_prep.onnx")
+        quant_pre_process(str(source), str(prepared), skip_symbolic_shape=True)
+        source = prepared
+    except Exception as e:
+        print(f"⚠ Prétraitement de quantification ignoré ({type(e).__name__}: {e})")
+
+    input_name = ort.InferenceSession(str(source), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    try:
+        quantize_static(
+            str(source), str(output_path),
+            _calibration_reader(images, input_name, size),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=_detect_head_nodes(onnx.load(str(source))),
+        )
+    finally:
+        if source != Path(fp32_path):
+            source.unlink(missing_ok=True)
+    return output_path
+
+
+def quantize_model(model_path=MODEL_PATH, precisions=PRECISIONS, size=QUANTIZE_IMAGE_SIZE,
+                   calibration=QUANTIZE_CALIBRATION_IMAGES):
+    """
+    Produit les variantes demandées du modèle dans MODELS_DIR.
+
+    Retourne:
+        dict: {précision: chemin du modèle} (les variantes en échec sont signalées et omises)
+    """
+    model_path = Path(model_path)
+    stem = model_path.stem
+    fp32_path = export_onnx(model_path, MODELS_DIR / f"{stem}_fp32.onnx", size)
+    with open(fp32_path.with_suffix(".json"), "r", encoding="utf-8") as f:
+        names = {int(k): v for k, v in json.load(f)["names"].items()}
+    print(f"✓ Export ONNX FP32 : {fp32_path.name}")
+    produced = {"fp32": fp32_path}
+
+    conversions = {
+        "fp16": lambda out: convert_fp16(fp32_path, out),
+        "int8": lambda out: quantize_int8(fp32_path, out, calibration_images(calibration), size),
+    }
+    for precision in precisions:
+        if precision not in conversions:
+            continue
+        output_path = MODELS_DIR / f"{stem}_{precision}.onnx"
+        try:
+            conversions[precision](output_path)
+        except ImportError as e:
+            print(f"⚠ {precision.upper()} ignoré : dépendance manquante ({e.name})")
+            continue
+        except Exception as e:
+            print(f"✗ {precision.upper()} en échec : {e}")
+            continue
+        write_sidecar(output_path, names, size, precision, model_path)
+        produced[precision] = output_path
+        print(f"✓ Modèle {precision.upper()} : {output_path.name}")
+    if "fp32" not in precisions:
+        produced.pop("fp32")
+    return produced
+
+
+# ============================================
+# COMPROMIS PRÉCISION / LATENCE
+# ============================================
+
+def _evaluate_in_process(model_path, backend, size, dataset_dir):
+    from model_eval import evaluate, save_result
+
+    result = evaluate(model_path, dataset_dir, size=size, backend=backend)
+    save_result(result)
+    return result
+
+
+def compare_models(models, reference=None, size=QUANTIZE_IMAGE_SIZE, dataset_dir=DATASET_DIR):
+    """
+    Évalue chaque modèle (un processus neuf par modèle) et calcule l'écart à la référence.
+
+    Args:
+        models: {nom: chemin} (.onnx évalués avec onnxruntime, .pt avec torch)
+        reference: Nom du modèle de référence (par défaut le premier)
+
+    Retourne:
+        list: Lignes {'name', 'model', 'size_mb', 'map50', 'map50_delta', 'p50_ms', 'speedup', 'peak_rss_mb'}
+    """
+    rows = []
+    for name, path in models.items():
+        backend = "onnxruntime" if Path(path).suffix == ".onnx" else "torch"
+        try:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(_evaluate_in_process, str(path), backend, size, dataset_dir).result()
+        except Exception as e:
+            print(f"✗ Évaluation de {name} impossible : {e}")
+            continue
+        latency = result["latency_ms"] or {}
+        rows.append({
+            'name': name,
+            'model': str(path),
+            'size_mb': round(os.path.getsize(path) / 1e6, 1),
+            'map50': result["map50"],
+            'p50_ms': latency.get("p50"),
+            'p99_ms': latency.get("p99"),
+            'peak_rss_mb': result["peak_rss_mb"],
+        })
+    ref = next((row for row in rows if row['name'] == reference), rows[0] if rows else None)
+    for row in rows:
+        row['map50_delta'] = round(row['map50'] - ref['map50'], 4)
+        row['speedup'] = (round(ref['p50_ms'] / row['p50_ms'], 2)
+                          if ref['p50_ms'] and row['p50_ms'] else None)
+    return rows
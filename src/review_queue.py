@@ -0,0 +1,344 @@
+"""
+Smart Bin SI - File de révision (mode apprentissage)
+- Le détecteur ne bloque plus sur input() : chaque détection à valider est
+  mise en file (image + détection) et le tri continue immédiatement
+- L'image est encodée et écrite par un thread dédié, avec sa propre connexion
+  SQLite : la boucle caméra ne fait qu'une copie de l'image
+- Le nombre d'éléments en attente est relu en base par ce thread : les
+  validations faites depuis l'admin (autre processus) libèrent de la place
+- Déduplication avant écriture : une détection presque identique (dHash de
+  la zone détectée à moins de DEDUP_HAMMING_DISTANCE bits) à une détection
+  récente de la même classe n'est ni copiée ni écrite sur la carte SD
+- L'interface admin liste les éléments en attente et les confirme, les
+  renomme ou les rejette ; la confirmation alimente TRAINING_DIR
+"""
+
+import json
+import queue
+from collections import deque
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config import DB_PATH, REVIEW_DIR, REVIEW_MAX_PENDING, DEDUP_HAMMING_DISTANCE
+from training_data import frame_dhash, hamming_distances
+
+REVIEW_STATUSES = ("pending", "confirmed", "relabeled", "rejected")
+COLUMNS = ("id", "status", "detected_class", "class_id", "confidence", "bbox",
+           "frame_path", "width", "height", "created_at", "reviewed_at", "final_class", "reason")
+PENDING_REFRESH_SECONDS = 5.0   # Relecture du nombre d'éléments en attente (même sans écriture)
+DEDUP_WINDOW = 200              # Empreintes récentes gardées par classe pour la déduplication
+
+
+# ============================================
+# CÔTÉ DÉTECTEUR : MISE EN FILE SANS BLOCAGE
+# ============================================
+
+class ReviewQueue:
+    """
+    Mise en file des détections à valider (thread d'écriture en arrière-plan)
+    La table review_queue est créée par waste_classifier.init_database().
+    """
+
+    def __init__(self, db_path=DB_PATH, review_dir=REVIEW_DIR, max_pending=REVIEW_MAX_PENDING,
+                 max_distance=DEDUP_HAMMING_DISTANCE):
+        """
+        Args:
+            db_path: Base SQLite (table review_queue)
+            review_dir: Dossier des images en attente
+            max_pending: Nombre maximum d'éléments en attente de validation
+            max_distance: Distance de Hamming d'un quasi-doublon (bits ; None = pas de déduplication)
+        """
+        self.db_path = str(db_path)
+        self.review_dir = Path(review_dir)
+        self.max_pending = max_pending
+        self.max_distance = max_distance
+        self._hashes = {}  # classe détectée → empreintes récentes (deque)
+        self._writes = queue.Queue(maxsize=32)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._unwritten = 0  # Mis en file mais pas encore en base
+        self.pending = 0
+        self.queued = 0
+        self.dropped = 0
+        self.write_failures = 0
+        self.duplicates = 0
+        self.bytes_written = 0
+        self.images_written = 0
+
+    def start(self):
+        """Démarrer le thread d'écriture"""
+        if self._thread is None:
+            self.review_dir.mkdir(parents=True, exist_ok=True)
+            with _connect(self.db_path) as conn:
+                self._refresh_pending(conn)
+            self._thread = threading.Thread(target=self._writer, name="review-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def enqueue(self, frame, detection, class_id=None, reason=None):
+        """
+        Mettre une détection en file de révision (retour immédiat)
+
+        Args:
+            frame: Image de la détection (copiée ici)
+            detection: dict avec 'class', 'confidence', 'bbox'
+            class_id: index de la classe dans le modèle (pour le label YOLO)
+            reason: Raison de la mise en file (sort, manual, unknown, low_confidence, flicker...)
+
+        Retourne:
+            bool: False si la file est pleine ou si l'image est un quasi-doublon
+            (détection non mise en file)
+        """
+        if self.pending >= self.max_pending:
+            self.dropped += 1
+            return False
+        value = self.fingerprint(frame, detection["bbox"]) if self.max_distance is not None else None
+        if self.is_duplicate(value, detection["class"]):
+            self.duplicates += 1
+            return False
+        item = (frame.copy(), dict(detection), class_id, reason, datetime.now().isoformat())
+        with self._lock:
+            try:
+                self._writes.put_nowait(item)
+            except queue.Full:
+                # Le disque ne suit pas : on privilégie le tri en cours
+                self.dropped += 1
+                return False
+            self._unwritten += 1
+            self.pending += 1
+        # Empreinte retenue seulement une fois en file : une image écartée reste nouvelle
+        if value is not None:
+            self._hashes.setdefault(detection["class"], deque(maxlen=DEDUP_WINDOW)).append(value)
+        self.queued += 1
+        return True
+
+    @staticmethod
+    def fingerprint(frame, bbox):
+        """
+        Empreinte de la zone détectée (l'arrière-plan ne compte pas)
+
+        Args:
+            frame: Image de la détection
+            bbox: [x1, y1, x2, y2] en pixels
+
+        Retourne:
+            int: dHash de la zone, ou de l'image entière si la boîte est vide ou hors image
+        """
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = (int(v) for v in bbox)
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+        return frame_dhash(frame[y1:y2, x1:x2] if x2 > x1 and y2 > y1 else frame)
+
+    def is_duplicate(self, value, class_name):
+        """
+        True si l'empreinte est proche de celle d'une détection récente de la
+        même classe (None = déduplication désactivée)
+        """
+        if value is None:
+            return False
+        recent = self._hashes.get(class_name)
+        return bool(recent) and int(hamming_distances(recent, value).min()) <= self.max_distance
+
+    def report(self):
+        """Compteurs de la file (rapport d'état du détecteur)"""
+        # Octets évités estimés : taille moyenne des images écrites
+        average = self.bytes_written // self.images_written if self.images_written else 0
+        return {
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'queued': self.queued,
+            'dropped': self.dropped,
+            'write_failures': self.write_failures,
+            'dedup': {
+                'skipped': self.duplicates,
+                'bytes_saved': self.duplicates * average,
+                'max_distance': self.max_distance,
+            },
+        }
+
+    def _refresh_pending(self, conn):
+        """Éléments en attente = en base (validations admin comprises) + pas encore écrits"""
+        count = conn.execute("SELECT COUNT(*) FROM review_queue WHERE status = 'pending'").fetchone()[0]
+        with self._lock:
+            self.pending = count + self._unwritten
+
+    def _writer(self):
+        import cv2
+
+        conn = sqlite3.connect(self.db_path)
+        last_refresh = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self._writes.get(timeout=PENDING_REFRESH_SECONDS)
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if item:
+                    self._write(cv2, conn, *item)
+                if not item or self._writes.empty() \
+                        or time.monotonic() - last_refresh >= PENDING_REFRESH_SECONDS:
+                    self._refresh_pending(conn)
+                    last_refresh = time.monotonic()
+        finally:
+            conn.close()
+
+    def _write(self, cv2, conn, frame, detection, class_id, reason, created_at):
+        """Écrire l'image puis sa ligne ; aucune ligne sans image sur le disque"""
+        path = self.review_dir / f"{uuid.uuid4().hex}.jpg"
+        try:
+            if not cv2.imwrite(str(path), frame):
+                self.write_failures += 1
+                print(f"⚠ File de révision : image non écrite ({path.name})")
+                return
+            self.images_written += 1
+            self.bytes_written += path.stat().st_size
+            try:
+                h, w = frame.shape[:2]
+                bbox = detection.get("bbox")
+                conn.execute("""
+                    INSERT INTO review_queue
+                        (detected_class, class_id, confidence, bbox, frame_path, width, height,
+                         created_at, reason)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    detection["class"], class_id, float(detection.get("confidence", 0.0)),
+                    json.dumps([float(v) for v in bbox]) if bbox is not None else None,
+                    path.name, w, h, created_at, reason,
+                ))
+                conn.commit()
+            except Exception:
+                path.unlink(missing_ok=True)
+                raise
+        except Exception as e:
+            self.write_failures += 1
+            print(f"⚠ Erreur file de révision : {e}")
+        finally:
+            with self._lock:
+                self._unwritten -= 1
+
+    def close(self, timeout=5.0):
+        """Terminer les écritures en cours puis arrêter le thread"""
+        if self._thread is not None:
+            self._writes.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+# ============================================
+# CÔTÉ ADMIN : CONSULTATION ET VALIDATION
+# ============================================
+
+@contextmanager
+def _connect(db_path):
+    """Connexion courte (une par appel) : commit en sortie, puis fermeture"""
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _row_to_dict(row):
+    item = {column: row[column] for column in COLUMNS}
+    item["bbox"] = json.loads(item["bbox"]) if item["bbox"] else None
+    return item
+
+
+def list_reviews(status="pending", limit=50, after_id=None, db_path=DB_PATH):
+    """
+    Éléments de la file (les plus anciens d'abord), par pages de limit.
+    after_id: dernier id de la page précédente.
+    Retourne (éléments, nombre total pour ce statut).
+    """
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT * FROM review_queue WHERE status = ? AND id > ? ORDER BY id LIMIT ?",
+            (status, after_id or 0, limit)
+        ).fetchall()
+        total = conn.execute(
+            "SELECT COUNT(*) FROM review_queue WHERE status = ?", (status,)
+        ).fetchone()[0]
+    return [_row_to_dict(row) for row in rows], total
+
+
+def get_review(review_id, db_path=DB_PATH):
+    """Un élément de la file, ou None"""
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM review_queue WHERE id = ?", (review_id,)).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def frame_path(item, review_dir=REVIEW_DIR):
+    """Chemin de l'image d'un élément"""
+    return Path(review_dir) / item["frame_path"]
+
+
+def resolve_review(review_id, action, label=None, db_path=DB_PATH, review_dir=REVIEW_DIR):
+    """
+    Valider un élément en attente.
+    - confirm : la détection est correcte → exemple d'apprentissage (+ label YOLO)
+    - relabel : le vrai nom est label → exemple pour label, erreur pour la classe détectée
+    - reject : rien n'est sauvegardé
+    L'image en attente est supprimée une fois l'élément validé.
+    Retourne l'élément mis à jour, ou None s'il n'est pas (ou plus) en attente.
+    """
+    from training_data import import_training_sample, normalize_class_name
+
+    item = get_review(review_id, db_path)
+    if item is None or item["status"] != "pending":
+        return None
+    source = frame_path(item, review_dir)
+
+    if action == "confirm":
+        status, final_class = "confirmed", item["detected_class"]
+    elif action == "relabel":
+        if not label or not label.strip():
+            raise ValueError("label requis pour relabel")
+        status, final_class = "relabeled", normalize_class_name(label)
+    elif action == "reject":
+        status, final_class = "rejected", None
+    else:
+        raise ValueError(f"Action inconnue : {action}")
+
+    # Réserver l'élément d'abord : deux validations simultanées n'écrivent qu'un exemple
+    with _connect(db_path) as conn:
+        claimed = conn.execute("""
+            UPDATE review_queue SET status = ?, final_class = ?, reviewed_at = ?
+            WHERE id = ? AND status = 'pending'
+        """, (status, final_class, datetime.now().isoformat(), review_id)).rowcount
+    if not claimed:
+        return None
+
+    # Même boîte pour confirm et relabel (seule la classe change). L'id écrit dans le
+    # label n'est qu'indicatif : dataset_builder renumérote d'après le dossier de classe
+    label = dict(bbox=item["bbox"], width=item["width"], height=item["height"],
+                 class_id=item["class_id"] if item["class_id"] is not None else 0)
+    try:
+        if status == "confirmed":
+            import_training_sample(source, final_class, correct=True, **label)
+        elif status == "relabeled":
+            import_training_sample(source, final_class, correct=True, **label)
+            import_training_sample(source, item["detected_class"], correct=False)
+    except Exception:
+        # Remettre l'élément en attente pour pouvoir réessayer
+        with _connect(db_path) as conn:
+            conn.execute("""
+                UPDATE review_queue SET status = 'pending', final_class = NULL, reviewed_at = NULL
+                WHERE id = ?
+            """, (review_id,))
+        raise
+
+    try:
+        source.unlink()
+    except OSError:
+        pass
+    return get_review(review_id, db_path)
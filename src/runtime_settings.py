@@ -0,0 +1,108 @@
+"""
+Smart Bin SI - Rechargement de la configuration à chaud
+- Surveille src/config.py (date de modification) pendant que le détecteur tourne
+- Relit le fichier dans un dictionnaire neuf (runpy) sans toucher au module
+  config déjà importé, puis compare avec les valeurs en cours
+- Classe chaque paramètre modifié par composant : seuls les composants
+  concernés sont reconstruits (seuils → modèle, caméra → réouverture, etc.)
+"""
+
+import os
+import runpy
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).resolve().parent / "config.py"
+
+# Paramètres appliqués à chaud, regroupés par composant à mettre à jour
+SETTING_GROUPS = {
+    "model": ("CONFIDENCE_THRESHOLD", "IOU_THRESHOLD"),
+    "tracker": ("MIN_DETECTIONS", "AUTO_SORT_DELAY"),
+    "roi": ("DETECTION_ROI",),
+    "mapping": ("WASTE_TO_BIN_MAPPING", "ITEM_ALIASES"),
+    "sorting": ("SORTING_DURATION",),
+    "adaptive": ("TARGET_FPS",),
+    "camera": (
+        "CAMERA_SOURCE", "USE_CSI_CAMERA", "FRAME_WIDTH", "FRAME_HEIGHT", "CAMERA_FPS",
+        "CAMERA_BUFFER_SIZE", "CAMERA_FOURCC", "CAMERA_THREADED_CAPTURE",
+    ),
+    "weights": ("MODEL_PATH",),
+}
+
+
+def load_config_values(path=CONFIG_PATH):
+    """Paramètres (noms en MAJUSCULES) d'un fichier de configuration"""
+    namespace = runpy.run_path(str(path))
+    return {key: value for key, value in namespace.items() if key.isupper()}
+
+
+def group_changes(changes):
+    """
+    Répartit les paramètres modifiés par composant.
+    Retourne ({composant: {paramètre: nouvelle valeur}}, [paramètres nécessitant un redémarrage])
+    """
+    groups = {}
+    restart = []
+    for key, value in changes.items():
+        for group, keys in SETTING_GROUPS.items():
+            if key in keys:
+                groups.setdefault(group, {})[key] = value
+                break
+        else:
+            restart.append(key)
+    return groups, sorted(restart)
+
+
+class SettingsWatcher:
+    """
+    Surveillance du fichier de configuration
+    poll() est appelé depuis la boucle du détecteur ; il ne relit le fichier que
+    si sa date de modification a changé et au plus une fois par intervalle.
+    """
+
+    def __init__(self, path=CONFIG_PATH, interval=1.0):
+        """
+        Args:
+            path: Fichier de configuration surveillé
+            interval: Intervalle minimum entre deux vérifications (secondes)
+        """
+        self.path = Path(path)
+        self.interval = interval
+        self.values = load_config_values(self.path)
+        self._mtime = self._stat()
+        self._next_check = 0.0
+        self.reloads = 0
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self, now):
+        """
+        Vérifier le fichier ; retourne {paramètre: nouvelle valeur} (vide si rien n'a changé).
+
+        Args:
+            now: Heure courante (time.monotonic)
+        """
+        if now < self._next_check:
+            return {}
+        self._next_check = now + self.interval
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return {}
+        self._mtime = mtime
+        try:
+            values = load_config_values(self.path)
+        except Exception as e:
+            # Fichier en cours d'édition ou invalide : on garde les valeurs en cours
+            print(f"⚠ Configuration non rechargée ({type(e).__name__}: {e})")
+            return {}
+        changes = {
+            key: value for key, value in values.items()
+            if key not in self.values or self.values[key] != value
+        }
+        self.values = values
+        if changes:
+            self.reloads += 1
+        return changes
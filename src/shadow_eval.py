@@ -0,0 +1,241 @@
+"""
+Smart Bin SI - Modèle candidat en observation (« shadow »)
+Avant de remplacer models/best.pt, un modèle candidat tourne sur une partie
+des images réelles, à côté du modèle en service :
+- Une image analysée sur SHADOW_SAMPLE_EVERY lui est proposée ; le thread
+  candidat ne prend une image que s'il est libre et dans son budget CPU
+  (SHADOW_CPU_BUDGET), sinon elle est ignorée : la boucle caméra n'attend jamais
+  le candidat
+- Seules les images passées par YOLO complet (pas celles décidées par le
+  classifieur de la cascade) sont proposées, avec les détections et la durée
+  d'inférence du modèle en service : le candidat tourne à la même taille
+  d'entrée ; le modèle en service n'est jamais relancé, seul le candidat
+  consomme le budget CPU
+- Le thread candidat tourne en priorité minimale ; ses détections ne servent
+  qu'à la comparaison, jamais au tri
+- Mesures : taux d'accord sur la classe principale, correspondance des boîtes,
+  latences des deux modèles, désaccords les plus fréquents
+- L'état est publié dans STATUS_DIR/shadow.json (interface admin)
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from config import (
+    CONFIDENCE_THRESHOLD, STATUS_REPORT_INTERVAL,
+    SHADOW_SAMPLE_EVERY, SHADOW_CPU_BUDGET,
+)
+from active_learning import box_iou
+from model_eval import percentiles
+from status_report import write_status
+
+MATCH_IOU = 0.5
+LATENCY_WINDOW = 500  # Dernières mesures gardées pour les percentiles
+SHADOW_NICE = 19
+EMPTY = "(vide)"
+
+
+def top_class(detections):
+    """Classe de la détection la plus sûre, ou EMPTY sans détection"""
+    if not detections:
+        return EMPTY
+    return max(detections, key=lambda d: d['confidence'])['class']
+
+
+def compare_detections(primary, shadow, iou=MATCH_IOU):
+    """
+    Compare les détections des deux modèles sur une image
+
+    Retourne:
+        tuple: (nb boîtes appariées, boîtes du modèle en service seulement,
+                boîtes du candidat seulement)
+    """
+    unmatched = list(shadow)
+    matched = 0
+    for det in sorted(primary, key=lambda d: -d['confidence']):
+        best, best_iou = None, iou
+        for other in unmatched:
+            if other['class'] != det['class']:
+                continue
+            overlap = box_iou(det['bbox'], other['bbox'])
+            if overlap >= best_iou:
+                best, best_iou = other, overlap
+        if best is not None:
+            unmatched.remove(best)
+            matched += 1
+    return matched, len(primary) - matched, len(unmatched)
+
+
+def _lower_priority():
+    """Priorité CPU minimale pour le thread courant (Linux : nice par thread)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), SHADOW_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class ShadowEvaluator:
+    """Fait tourner un modèle candidat sur des images échantillonnées, dans un budget CPU"""
+
+    def __init__(self, detect, model_path, sample_every=SHADOW_SAMPLE_EVERY,
+                 cpu_budget=SHADOW_CPU_BUDGET, threshold=CONFIDENCE_THRESHOLD):
+        """
+        Args:
+            detect: Fonction (image, taille d'entrée) → détections du modèle candidat
+            model_path: Fichier du modèle candidat (pour le rapport)
+            sample_every: Une image analysée sur N proposée au candidat
+            cpu_budget: Part maximale du temps passée à l'inférence du candidat (0-1)
+            threshold: Confiance minimale des détections comparées
+        """
+        self.detect = detect
+        self.model_path = str(model_path)
+        self.sample_every = max(1, int(sample_every))
+        self.cpu_budget = min(1.0, max(0.01, cpu_budget))
+        self.threshold = threshold
+        self._jobs = queue.Queue(maxsize=1)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._ready_at = 0.0
+        self.started_at = time.monotonic()
+        # Côté boucle caméra
+        self.offered = 0
+        self.sampled = 0
+        self.skipped = 0
+        # Côté thread candidat
+        self.compared = 0
+        self.agreed = 0
+        self.errors = 0
+        self.boxes = {"matched": 0, "primary_only": 0, "shadow_only": 0}
+        self.disagreements = Counter()
+        self.sizes = Counter()  # Taille d'entrée → images comparées
+        self.latency_ms = {"primary": deque(maxlen=LATENCY_WINDOW),
+                           "shadow": deque(maxlen=LATENCY_WINDOW)}
+        self.busy_s = 0.0
+
+    def start(self):
+        """Démarrer le thread du modèle candidat"""
+        if self._thread is None:
+            self.started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._worker, name="shadow-eval", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, frame, detections, primary_ms, size=None):
+        """
+        Proposer une image analysée au candidat (retour immédiat si elle n'est pas retenue)
+
+        Args:
+            frame: Image analysée par le modèle en service (copiée si retenue)
+            detections: Détections du modèle en service sur cette image (YOLO complet)
+            primary_ms: Durée de cette inférence (latence comparée à celle du candidat)
+            size: Taille d'entrée utilisée (None = taille par défaut), reprise par le candidat
+
+        Retourne:
+            bool: True si l'image a été confiée au candidat
+        """
+        self.offered += 1
+        if self.offered % self.sample_every:
+            return False
+        if time.monotonic() < self._ready_at or self._jobs.full():
+            # Candidat occupé ou au repos (budget CPU)
+            self.skipped += 1
+            return False
+        try:
+            self._jobs.put_nowait((frame.copy(), list(detections), primary_ms, size))
+        except queue.Full:
+            self.skipped += 1
+            return False
+        # Occupé jusqu'à ce que le thread candidat fixe sa prochaine disponibilité
+        self._ready_at = float("inf")
+        self.sampled += 1
+        return True
+
+    def _worker(self):
+        _lower_priority()
+        last_report = 0.0
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            frame, primary, primary_ms, size = job
+            t0 = time.perf_counter()
+            try:
+                shadow = self.detect(frame, size)
+            except Exception as e:
+                self._ready_at = time.monotonic()
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"⚠ Modèle candidat en échec : {e}")
+                continue
+            elapsed = time.perf_counter() - t0
+            # Rapport cyclique : après `elapsed` de calcul, repos de elapsed * (1 - b) / b
+            self._ready_at = time.monotonic() + elapsed * (1.0 - self.cpu_budget) / self.cpu_budget
+            self.record(primary, shadow, primary_ms, elapsed * 1000, size)
+            if time.monotonic() - last_report >= STATUS_REPORT_INTERVAL:
+                write_status("shadow", self.report())
+                last_report = time.monotonic()
+
+    def record(self, primary, shadow, primary_ms, shadow_ms, size=None):
+        """Comparer les détections des deux modèles sur une image (à la taille d'entrée size)"""
+        primary = [d for d in primary if d['confidence'] >= self.threshold]
+        shadow = [d for d in shadow if d['confidence'] >= self.threshold]
+        primary_top, shadow_top = top_class(primary), top_class(shadow)
+        matched, primary_only, shadow_only = compare_detections(primary, shadow)
+        with self._lock:
+            self.compared += 1
+            if primary_top == shadow_top:
+                self.agreed += 1
+            else:
+                self.disagreements[(primary_top, shadow_top)] += 1
+            self.boxes["matched"] += matched
+            self.boxes["primary_only"] += primary_only
+            self.boxes["shadow_only"] += shadow_only
+            self.sizes[size or "auto"] += 1
+            if primary_ms is not None:
+                self.latency_ms["primary"].append(primary_ms)
+            self.latency_ms["shadow"].append(shadow_ms)
+            self.busy_s += shadow_ms / 1000
+
+    def report(self):
+        """Accord et latences du candidat par rapport au modèle en service"""
+        with self._lock:
+            primary = percentiles(list(self.latency_ms["primary"]))
+            shadow = percentiles(list(self.latency_ms["shadow"]))
+            elapsed = time.monotonic() - self.started_at
+            return {
+                'model': self.model_path,
+                'model_name': Path(self.model_path).name,
+                'sample_every': self.sample_every,
+                'cpu_budget': self.cpu_budget,
+                'sizes': {str(size): count for size, count in self.sizes.most_common()},
+                'offered': self.offered,
+                'sampled': self.sampled,
+                'skipped': self.skipped,
+                'compared': self.compared,
+                'errors': self.errors,
+                'agreement': round(self.agreed / self.compared, 4) if self.compared else None,
+                'boxes': dict(self.boxes),
+                'latency_ms': {'primary': primary, 'shadow': shadow},
+                'speedup': (round(primary['p50'] / shadow['p50'], 2)
+                            if primary and shadow and shadow['p50'] else None),
+                'cpu_share': round(self.busy_s / elapsed, 3) if elapsed > 0 else None,
+                'disagreements': [
+                    {'primary': p, 'shadow': s, 'count': count}
+                    for (p, s), count in self.disagreements.most_common(10)
+                ],
+            }
+
+    def close(self, timeout=5.0):
+        """Arrêter le thread candidat et publier le dernier état"""
+        if self._thread is not None:
+            try:
+                self._jobs.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=timeout)
+            self._thread = None
+            write_status("shadow", self.report())
@@ -0,0 +1,223 @@
+"""
+Smart Bin SI - File des tris physiques (travaux asynchrones)
+- Le tri mécanique (commande Arduino + SORTING_DURATION d'attente) est exécuté
+  par un thread dédié, un travail après l'autre : les requêtes HTTP ne font que
+  déposer un travail et reçoivent aussitôt son identifiant
+- Chaque travail passe par les états queued → sorting → done / failed
+- Chaque changement d'état est publié comme événement (numéroté) pour les
+  clients qui suivent la progression (Server-Sent Events côté interface admin)
+- Le port série ne peut pas être partagé : tant qu'un détecteur (ou le
+  multi-postes) tourne et publie son état, la file refuse de l'ouvrir ; elle
+  le referme dès qu'elle est inactive (SERIAL_IDLE_SECONDS) ou qu'un autre
+  composant le réclame, pour qu'un détecteur lancé ensuite puisse le prendre
+"""
+
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from config import ARDUINO_PORT, BAUD_RATE, SORTING_DURATION, STATUS_REPORT_INTERVAL
+from status_report import read_status
+
+MAX_JOBS_KEPT = 500      # Travaux terminés conservés pour /api/waste/jobs/<id>
+MAX_EVENTS_KEPT = 1000   # Événements conservés pour les clients qui se reconnectent
+SERIAL_OWNERS = ("detector", "multi_station")   # Composants qui ouvrent eux-mêmes le port série
+OWNER_STALE_SECONDS = 3 * STATUS_REPORT_INTERVAL
+SERIAL_IDLE_SECONDS = 10.0  # File vide depuis N s : port série refermé
+
+
+def serial_port_owner():
+    """
+    Composant qui détient actuellement le port série, ou None.
+    Un composant est considéré actif tant que son état a été publié récemment.
+    """
+    for name in SERIAL_OWNERS:
+        status = read_status(name)
+        if status and time.time() - status.get("updated_at", 0) < OWNER_STALE_SECONDS:
+            return name
+    return None
+
+
+class SortQueue:
+    """
+    File de tris physiques servie par un seul thread (un seul Arduino)
+    Le port série est ouvert par le thread au premier travail, gardé pendant une
+    série de tris, puis refermé quand la file est inactive ou qu'un autre
+    composant le détient.
+    """
+
+    def __init__(self, port=ARDUINO_PORT, baud_rate=BAUD_RATE, sorting_duration=SORTING_DURATION,
+                 idle_seconds=SERIAL_IDLE_SECONDS):
+        """
+        Args:
+            port: Port série de l'Arduino
+            baud_rate: Vitesse du port série
+            sorting_duration: Durée d'un tri mécanique (secondes)
+            idle_seconds: Inactivité après laquelle le port série est refermé
+        """
+        self.port = port
+        self.baud_rate = baud_rate
+        self.sorting_duration = sorting_duration
+        self.idle_seconds = idle_seconds
+        self._serial = None
+        self._pending = queue.Queue()
+        self._jobs = OrderedDict()
+        self._events = deque(maxlen=MAX_EVENTS_KEPT)
+        self._event_seq = itertools.count(1)
+        self._last_event = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._current = None
+
+    def start(self):
+        """Démarrer le thread de tri (une seule fois)"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="sort-queue", daemon=True)
+                self._thread.start()
+        return self
+
+    # ---------- Dépôt et suivi des travaux ----------
+
+    def submit(self, item_name, bin_color, confidence=1.0):
+        """
+        Déposer un tri ; retourne le travail (dict) avec son identifiant.
+        Le travail est exécuté dans l'ordre d'arrivée.
+        """
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'item_name': item_name,
+            'bin_color': bin_color,
+            'confidence': confidence,
+            'status': 'queued',
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+        }
+        with self._cond:
+            self._jobs[job['id']] = job
+            while len(self._jobs) > MAX_JOBS_KEPT:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest['status'] in ('queued', 'sorting'):
+                    break
+                del self._jobs[oldest_id]
+            # Travaux en attente, plus celui en cours de tri
+            job['position'] = self._pending.qsize() + (self._current is not None) + 1
+            self._publish(job)
+        self._pending.put(job['id'])
+        return dict(job)
+
+    def get_job(self, job_id):
+        """Copie d'un travail, ou None s'il est inconnu (ou trop ancien)"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        """Nombre de travaux par état"""
+        with self._cond:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return {'pending': self._pending.qsize(), 'jobs': counts}
+
+    def wait_events(self, after=0, timeout=15.0):
+        """
+        Événements publiés après le numéro after (attend au plus timeout s).
+        Retourne une liste de (numéro, travail) ; vide si rien de nouveau.
+        Un numéro supérieur au dernier publié (client d'avant un redémarrage
+        du serveur) repart de zéro.
+        """
+        with self._cond:
+            if after > self._last_event:
+                after = 0
+            self._cond.wait_for(lambda: self._last_event > after, timeout=timeout)
+            return [(seq, job) for seq, job in self._events if seq > after]
+
+    def _publish(self, job):
+        """Enregistrer un changement d'état (appelé avec le verrou)"""
+        seq = next(self._event_seq)
+        self._events.append((seq, dict(job)))
+        self._last_event = seq
+        self._cond.notify_all()
+
+    def _set_status(self, job_id, status, error=None):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['status'] = status
+            job['error'] = error
+            if status == 'sorting':
+                job['started_at'] = time.time()
+                self._current = job_id
+            else:
+                job['finished_at'] = time.time()
+                if self._current == job_id:
+                    self._current = None
+            job.pop('position', None)
+            self._publish(job)
+
+    # ---------- Thread de tri ----------
+
+    def _close_serial(self):
+        """Rendre le port série (détecteur ou multi-postes qui démarre)"""
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except Exception as e:
+                print(f"⚠ Fermeture du port série : {e}")
+            self._serial = None
+
+    def _worker(self):
+        from waste_classifier import open_serial, send_sort_command
+
+        while True:
+            try:
+                job_id = self._pending.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                self._close_serial()
+                continue
+            with self._cond:
+                job = self._jobs.get(job_id)
+                # Compté dans les positions dès sa sortie de la file d'attente
+                self._current = job_id if job else None
+            if job is None:
+                continue
+            self._set_status(job_id, 'sorting')
+            try:
+                # Vérifié à chaque travail : un détecteur lancé depuis le dernier tri
+                # attend que le port lui soit rendu
+                owner = serial_port_owner()
+                if owner is not None:
+                    self._close_serial()
+                    self._set_status(job_id, 'failed', f"Port série utilisé par {owner}")
+                    continue
+                if self._serial is None:
+                    self._serial = open_serial(self.port, self.baud_rate)
+                if not send_sort_command(job['bin_color'], ser=self._serial):
+                    self._set_status(job_id, 'failed', "Échec de l'envoi de la commande Arduino")
+                    continue
+                # Attendre la fin du tri mécanique avant le travail suivant
+                if self._serial and self._serial.is_open:
+                    time.sleep(self.sorting_duration)
+                self._set_status(job_id, 'done')
+            except Exception as e:
+                self._set_status(job_id, 'failed', str(e))
+
+
+_sort_queue = None
+_sort_queue_lock = threading.Lock()
+
+
+def get_sort_queue():
+    """File de tri du processus (créée et démarrée au premier appel)"""
+    global _sort_queue
+    with _sort_queue_lock:
+        if _sort_queue is None:
+            _sort_queue = SortQueue().start()
+        return _sort_queue
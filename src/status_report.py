@@ -0,0 +1,51 @@
+"""
+Smart Bin SI - Rapports d'état des composants
+Chaque composant (détecteur, postes, ...) écrit son état dans un petit fichier JSON
+sous STATUS_DIR ; l'interface admin les relit sans dépendre du processus qui tourne.
+"""
+
+import json
+import os
+import time
+
+from config import STATUS_DIR
+
+
+def write_status(name, payload):
+    """
+    Écrit l'état d'un composant (remplacement atomique du fichier).
+
+    Args:
+        name: Nom du composant (ex: "multi_station")
+        payload: Dictionnaire sérialisable en JSON
+    """
+    STATUS_DIR.mkdir(parents=True, exist_ok=True)
+    data = dict(payload)
+    data["updated_at"] = time.time()
+    path = STATUS_DIR / f"{name}.json"
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_status(name):
+    """Retourne l'état d'un composant, ou None s'il n'a jamais été écrit."""
+    path = STATUS_DIR / f"{name}.json"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_all_status():
+    """Retourne {nom_composant: état} pour tous les composants connus."""
+    if not STATUS_DIR.exists():
+        return {}
+    status = {}
+    for path in sorted(STATUS_DIR.glob("*.json")):
+        data = read_status(path.stem)
+        if data is not None:
+            status[path.stem] = data
+    return status
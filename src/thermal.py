@@ -0,0 +1,221 @@
+"""
+Smart Bin SI - Surveillance thermique et niveaux de performance
+- Lit les zones thermiques Linux et les fréquences CPU / GPU dans sysfs
+  (racine configurable : THERMAL_SYSFS_ROOT, pour simuler un Jetson en test)
+- Choisit un niveau de fonctionnement selon la zone la plus chaude :
+    full        : inférence normale
+    reduced     : une inférence toutes les THERMAL_REDUCED_STRIDE images
+    motion_only : inférence seulement quand quelque chose bouge dans l'image
+- Hystérésis : on ne redescend d'un niveau que THERMAL_HYSTERESIS_C degrés
+  sous son seuil, pour ne pas basculer en permanence autour d'un seuil
+- Le temps passé dans chaque niveau est comptabilisé pour les rapports
+"""
+
+import time
+from pathlib import Path
+
+from config import (
+    THERMAL_SYSFS_ROOT, THERMAL_POLL_INTERVAL, THERMAL_REDUCED_C, THERMAL_MOTION_ONLY_C,
+    THERMAL_HYSTERESIS_C, THERMAL_REDUCED_STRIDE, MOTION_THRESHOLD, MOTION_HOLD_SECONDS,
+)
+
+TIERS = ("full", "reduced", "motion_only")
+
+# Noms des nœuds devfreq du GPU selon les modules Jetson (Nano, Xavier, Orin)
+GPU_DEVFREQ_NAMES = ("gpu", "gp10b", "gv11b", "ga10b")
+
+
+# ============================================
+# LECTURE SYSFS
+# ============================================
+
+def _read_number(path):
+    try:
+        return int(Path(path).read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def read_thermal_zones(root=THERMAL_SYSFS_ROOT):
+    """Températures des zones thermiques {type: °C} (vide si indisponible)"""
+    zones = {}
+    for zone in sorted(Path(root, "class", "thermal").glob("thermal_zone*")):
+        millideg = _read_number(zone / "temp")
+        if millideg is None:
+            continue
+        try:
+            name = (zone / "type").read_text().strip()
+        except OSError:
+            name = zone.name
+        zones[name] = millideg / 1000.0
+    return zones
+
+
+def read_cpu_freqs(root=THERMAL_SYSFS_ROOT):
+    """Fréquences CPU {cpuN: (MHz actuels, MHz max)}"""
+    freqs = {}
+    for cpufreq in sorted(Path(root, "devices", "system", "cpu").glob("cpu[0-9]*/cpufreq")):
+        cur = _read_number(cpufreq / "scaling_cur_freq")
+        if cur is None:
+            continue
+        max_freq = _read_number(cpufreq / "cpuinfo_max_freq")
+        freqs[cpufreq.parent.name] = (cur // 1000, max_freq // 1000 if max_freq else None)
+    return freqs
+
+
+def read_gpu_freq(root=THERMAL_SYSFS_ROOT):
+    """Fréquence GPU (MHz actuels, MHz max) via devfreq, ou None"""
+    for node in sorted(Path(root, "class", "devfreq").glob("*")):
+        if not any(name in node.name for name in GPU_DEVFREQ_NAMES):
+            continue
+        cur = _read_number(node / "cur_freq")
+        if cur is None:
+            continue
+        max_freq = _read_number(node / "max_freq")
+        return cur // 1_000_000, max_freq // 1_000_000 if max_freq else None
+    return None
+
+
+# ============================================
+# NIVEAUX DE PERFORMANCE
+# ============================================
+
+class ThermalMonitor:
+    """
+    Choix du niveau de performance selon la température (avec hystérésis)
+    et décision, image par image, de lancer ou non l'inférence.
+    """
+
+    def __init__(self, root=THERMAL_SYSFS_ROOT, interval=THERMAL_POLL_INTERVAL,
+                 reduced_c=THERMAL_REDUCED_C, motion_only_c=THERMAL_MOTION_ONLY_C,
+                 hysteresis_c=THERMAL_HYSTERESIS_C, reduced_stride=THERMAL_REDUCED_STRIDE):
+        """
+        Args:
+            root: Racine sysfs (/sys sur la machine, un dossier factice en test)
+            interval: Intervalle entre deux lectures (secondes)
+            reduced_c: Température de passage en niveau reduced (°C)
+            motion_only_c: Température de passage en niveau motion_only (°C)
+            hysteresis_c: Écart sous le seuil pour redescendre d'un niveau (°C)
+            reduced_stride: En niveau reduced, une inférence toutes les N images
+        """
+        self.root = root
+        self.interval = interval
+        self.thresholds = {"reduced": reduced_c, "motion_only": motion_only_c}
+        self.hysteresis_c = hysteresis_c
+        self.reduced_stride = max(1, int(reduced_stride))
+        self.tier = "full"
+        self.temperature = None
+        self.hottest_zone = None
+        self.cpu_freqs = {}
+        self.gpu_freq = None
+        self.available = bool(read_thermal_zones(root))
+        self.time_in_tier = {tier: 0.0 for tier in TIERS}
+        self.transitions = 0
+        self._tier_since = None  # Début du niveau actuel (première lecture)
+        self._next_poll = 0.0
+        self._frame = 0
+        # Détection de mouvement (niveau motion_only)
+        self._previous_small = None
+        self._motion_until = 0.0
+
+    def _target_tier(self, temperature):
+        """Niveau visé pour une température, compte tenu du niveau actuel (hystérésis)"""
+        current = TIERS.index(self.tier)
+        target = 0
+        for index, tier in enumerate(TIERS[1:], start=1):
+            threshold = self.thresholds[tier]
+            # Pour rester dans un niveau déjà atteint, il suffit d'être au-dessus
+            # du seuil moins l'hystérésis
+            if index <= current:
+                threshold -= self.hysteresis_c
+            if temperature >= threshold:
+                target = index
+        return TIERS[target]
+
+    def poll(self, now=None):
+        """
+        Relire les capteurs (au plus une fois par intervalle) et changer de niveau si besoin
+
+        Retourne:
+            bool: True si le niveau a changé
+        """
+        now = time.monotonic() if now is None else now
+        if self._tier_since is None:
+            self._tier_since = now
+        if now < self._next_poll:
+            return False
+        self._next_poll = now + self.interval
+        zones = read_thermal_zones(self.root)
+        self.available = bool(zones)
+        if not zones:
+            return False
+        self.hottest_zone, self.temperature = max(zones.items(), key=lambda item: item[1])
+        self.cpu_freqs = read_cpu_freqs(self.root)
+        self.gpu_freq = read_gpu_freq(self.root)
+
+        tier = self._target_tier(self.temperature)
+        if tier == self.tier:
+            return False
+        self._switch(tier, now)
+        return True
+
+    def _switch(self, tier, now):
+        self.time_in_tier[self.tier] += now - self._tier_since
+        self._tier_since = now
+        previous, self.tier = self.tier, tier
+        self.transitions += 1
+        freqs = ""
+        if self.cpu_freqs:
+            cur = min(f[0] for f in self.cpu_freqs.values())
+            freqs += f", CPU {cur} MHz"
+        if self.gpu_freq:
+            freqs += f", GPU {self.gpu_freq[0]} MHz"
+        print(f"🌡 Niveau {previous} → {tier} ({self.hottest_zone} {self.temperature:.1f}°C{freqs})")
+        self._previous_small = None
+
+    def allow_inference(self, frame, now=None):
+        """
+        Faut-il lancer l'inférence sur cette image, au niveau actuel ?
+
+        Args:
+            frame: Image courante (utilisée en niveau motion_only)
+        """
+        self._frame += 1
+        if self.tier == "full":
+            return True
+        if self.tier == "reduced":
+            return self._frame % self.reduced_stride == 0
+        now = time.monotonic() if now is None else now
+        if self._motion(frame):
+            # Garder l'inférence active un moment : le suivi a besoin de
+            # plusieurs détections consécutives pour déclencher le tri
+            self._motion_until = now + MOTION_HOLD_SECONDS
+        return now < self._motion_until
+
+    def _motion(self, frame):
+        """Différence moyenne avec l'image précédente, sur une vignette en niveaux de gris"""
+        import cv2
+
+        small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (160, 120),
+                           interpolation=cv2.INTER_AREA)
+        previous, self._previous_small = self._previous_small, small
+        if previous is None:
+            return False
+        return float(cv2.absdiff(small, previous).mean()) > MOTION_THRESHOLD
+
+    def report(self, now=None):
+        """État thermique et temps passé par niveau (secondes)"""
+        now = time.monotonic() if now is None else now
+        time_in_tier = dict(self.time_in_tier)
+        if self._tier_since is not None:
+            time_in_tier[self.tier] += now - self._tier_since
+        return {
+            'available': self.available,
+            'tier': self.tier,
+            'temperature_c': self.temperature,
+            'hottest_zone': self.hottest_zone,
+            'cpu_mhz': {cpu: f[0] for cpu, f in self.cpu_freqs.items()},
+            'gpu_mhz': self.gpu_freq[0] if self.gpu_freq else None,
+            'transitions': self.transitions,
+            'time_in_tier_s': {tier: round(t, 1) for tier, t in time_in_tier.items()},
+        }
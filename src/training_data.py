@@ -0,0 +1,359 @@
+"""
+Smart Bin SI - Images d'apprentissage
+Écriture des exemples pour le réentraînement YOLO dans TRAINING_DIR :
+- data/training_images/<classe>/ok_<horodatage>.jpg (+ .txt au format YOLO)
+- data/training_images/_errors/<classe>/err_<horodatage>.jpg (détections erronées)
+Utilisé par le détecteur et par la validation de la file de révision.
+
+Déduplication : chaque image écrite est résumée par une empreinte perceptuelle
+(dHash 64 bits). Une nouvelle image dont l'empreinte est à moins de
+DEDUP_HAMMING_DISTANCE bits d'une image du même dossier n'est pas écrite
+(objet immobile devant la caméra). L'index est un journal en ajout seul
+(TRAINING_DIR/.phash_index.tsv), relu au démarrage. Les statistiques sont
+publiées (status_report « training_dedup ») par le processus qui écrit les
+exemples, c'est-à-dire l'interface admin quand elle valide la file de révision.
+"""
+
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from config import TRAINING_DIR, SAVE_IMAGES, DEDUP_HAMMING_DISTANCE
+from status_report import write_status
+
+HASH_INDEX_PATH = TRAINING_DIR / ".phash_index.tsv"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def normalize_class_name(class_name):
+    """Nom de classe utilisé pour les dossiers (minuscules, sans espaces)"""
+    return class_name.strip().lower().replace(" ", "_")
+
+
+def _sample_folder(class_name, correct):
+    """Dossier d'un exemple (bonne détection ou erreur)"""
+    if correct:
+        return TRAINING_DIR / class_name
+    return TRAINING_DIR / "_errors" / class_name
+
+
+def _sample_base(folder, correct):
+    """Nom de base (sans extension) d'un nouvel exemple dans son dossier"""
+    folder.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    prefix = "ok" if correct else "err"
+    return folder / f"{prefix}_{timestamp}"
+
+
+# ============================================
+# EMPREINTES PERCEPTUELLES (DÉDUPLICATION)
+# ============================================
+
+def dhash(gray):
+    """
+    Empreinte dHash 64 bits d'une image en niveaux de gris : vignette 9x8,
+    un bit par comparaison de deux pixels voisins. Deux images presque
+    identiques ont des empreintes à faible distance de Hamming.
+    """
+    import cv2
+
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def frame_dhash(frame):
+    """Empreinte d'une image OpenCV (BGR ou niveaux de gris)"""
+    import cv2
+
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return dhash(gray)
+
+
+def file_dhash(path):
+    """Empreinte d'une image sur disque (décodage JPEG réduit au 1/8, rapide), ou None"""
+    import cv2
+
+    gray = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    return dhash(gray) if gray is not None else None
+
+
+def _popcount64(values):
+    """Nombre de bits à 1 de chaque entier d'un tableau uint64"""
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def hamming_distances(hashes, value):
+    """Distance de Hamming entre chaque empreinte d'un tableau uint64 et une empreinte"""
+    return _popcount64(np.asarray(hashes, dtype=np.uint64) ^ np.uint64(value))
+
+
+class PerceptualHashIndex:
+    """
+    Empreintes des images d'apprentissage, par dossier (classe)
+    Journal TSV en ajout seul : "add<TAB>dossier<TAB>fichier<TAB>empreinte<TAB>octets"
+    et "skip<TAB>dossier<TAB>octets estimés" pour les écritures évitées.
+    """
+
+    def __init__(self, path=HASH_INDEX_PATH, root=TRAINING_DIR, max_distance=DEDUP_HAMMING_DISTANCE):
+        """
+        Args:
+            path: Journal de l'index
+            root: Dossier des images d'apprentissage
+            max_distance: Distance de Hamming maximale d'un quasi-doublon (bits)
+        """
+        self.path = path
+        self.root = root
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._hashes = {}   # dossier → np.uint64[]
+        self._names = {}    # dossier → [fichiers]
+        self.writes = 0
+        self.bytes_written = 0
+        self.skipped = 0
+        self.bytes_saved = 0
+        self._load()
+
+    def _load(self):
+        """Relire le journal (ou indexer les images existantes s'il n'existe pas)"""
+        if not self.path.exists():
+            self.rebuild()
+            return
+        entries = {}
+        stale = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if fields[0] == "add" and len(fields) == 5:
+                    entries[(fields[1], fields[2])] = (int(fields[3], 16), int(fields[4]))
+                elif fields[0] == "skip" and len(fields) == 3:
+                    self.skipped += 1
+                    self.bytes_saved += int(fields[2])
+        for (folder, name), (value, size) in entries.items():
+            if not (self.root / folder / name).exists():
+                stale += 1
+                continue
+            self._add(folder, name, value)
+            self.writes += 1
+            self.bytes_written += size
+        if stale:
+            # Images supprimées à la main : compacter le journal
+            self._rewrite()
+
+    def rebuild(self):
+        """Indexer toutes les images présentes sous TRAINING_DIR (réécrit le journal)"""
+        self._hashes.clear()
+        self._names.clear()
+        self.writes = self.bytes_written = 0
+        if self.root.exists():
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in sorted(filenames):
+                    if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    value = file_dhash(path)
+                    if value is None:
+                        continue
+                    folder = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+                    self._add(folder, filename, value)
+                    self.writes += 1
+                    self.bytes_written += os.path.getsize(path)
+        self._rewrite()
+
+    def _rewrite(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for folder, names in self._names.items():
+                for name, value in zip(names, self._hashes[folder]):
+                    size = _file_size(self.root / folder / name)
+                    f.write(f"add\t{folder}\t{name}\t{int(value):016x}\t{size}\n")
+            for _ in range(self.skipped):
+                f.write(f"skip\t-\t{self.bytes_saved // max(self.skipped, 1)}\n")
+        os.replace(tmp_path, self.path)
+
+    def _add(self, folder, name, value):
+        self._hashes[folder] = np.append(self._hashes.get(folder, np.empty(0, np.uint64)),
+                                         np.uint64(value))
+        self._names.setdefault(folder, []).append(name)
+
+    def _append(self, line):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def find_duplicate(self, folder, value):
+        """Fichier du dossier dont l'empreinte est à moins de max_distance bits, ou None"""
+        hashes = self._hashes.get(folder)
+        if self.max_distance is None or hashes is None or not len(hashes):
+            return None
+        distances = hamming_distances(hashes, value)
+        best = int(distances.argmin())
+        if distances[best] <= self.max_distance:
+            return self._names[folder][best]
+        return None
+
+    def check(self, folder, value):
+        """
+        Décider d'écrire une image : retourne le fichier existant presque identique
+        (l'écriture est alors comptée comme évitée), ou None s'il faut l'écrire.
+        """
+        with self._lock:
+            duplicate = self.find_duplicate(folder, value)
+            if duplicate is not None:
+                # Taille estimée : moyenne des images déjà écrites
+                estimate = self.bytes_written // self.writes if self.writes else 0
+                self.skipped += 1
+                self.bytes_saved += estimate
+                self._append(f"skip\t{folder}\t{estimate}\n")
+            return duplicate
+
+    def record(self, folder, name, value, size):
+        """Enregistrer une image écrite"""
+        with self._lock:
+            self._add(folder, name, value)
+            self.writes += 1
+            self.bytes_written += size
+            self._append(f"add\t{folder}\t{name}\t{value:016x}\t{size}\n")
+
+    def stats(self):
+        """Écritures faites / évitées et octets économisés"""
+        return {
+            'indexed': sum(len(names) for names in self._names.values()),
+            'writes': self.writes,
+            'skipped': self.skipped,
+            'bytes_saved': self.bytes_saved,
+            'max_distance': self.max_distance,
+        }
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+_hash_index = None
+_hash_index_lock = threading.Lock()
+
+
+def get_hash_index():
+    """Index des empreintes (chargé au premier appel)"""
+    global _hash_index
+    with _hash_index_lock:
+        if _hash_index is None:
+            _hash_index = PerceptualHashIndex()
+        return _hash_index
+
+
+def dedup_stats():
+    """Statistiques de déduplication (écritures et octets évités), None avant la première image"""
+    index = _hash_index
+    return index.stats() if index is not None else None
+
+
+def _publish_dedup_stats():
+    """Publier les statistiques du processus courant (lues par /api/runtime/status)"""
+    try:
+        write_status("training_dedup", dedup_stats())
+    except OSError:
+        pass
+
+
+def write_yolo_label(label_path, bbox, class_id, width, height):
+    """Fichier label YOLO (une ligne : class_id x_center y_center width height, normalisé 0-1)"""
+    x1, y1, x2, y2 = [float(x) for x in bbox]
+    x_center = ((x1 + x2) / 2) / width
+    y_center = ((y1 + y2) / 2) / height
+    box_width = (x2 - x1) / width
+    box_height = (y2 - y1) / height
+    with open(label_path, "w") as f:
+        f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {box_width:.6f} {box_height:.6f}\n")
+
+
+def write_training_sample(frame, class_name, bbox=None, class_id=None, correct=True):
+    """
+    Sauvegarde une image (tableau OpenCV) pour le réentraînement YOLO.
+
+    Args:
+        frame: Image à sauvegarder
+        class_name: Nom de la classe (ex: plastic_bottle)
+        bbox: [x1, y1, x2, y2] optionnel → génère un .txt au format YOLO
+        class_id: index de la classe (pour le .txt YOLO)
+        correct: True = bonne détection, False = erreur (sauvegardé dans _errors/)
+
+    Retourne:
+        Path de l'image écrite, ou None si SAVE_IMAGES est désactivé ou si
+        une image presque identique existe déjà dans le dossier
+    """
+    if not SAVE_IMAGES:
+        return None
+    import cv2
+
+    class_name = normalize_class_name(class_name)
+    folder = _sample_folder(class_name, correct)
+    folder_key = folder.relative_to(TRAINING_DIR).as_posix()
+    index = get_hash_index()
+    value = frame_dhash(frame)
+    duplicate = index.check(folder_key, value)
+    if duplicate is not None:
+        print(f"⊘ Image presque identique à {duplicate} ({class_name}) : non sauvegardée")
+        _publish_dedup_stats()
+        return None
+    base = _sample_base(folder, correct)
+    filename = base.with_suffix(".jpg")
+    cv2.imwrite(str(filename), frame)
+    index.record(folder_key, filename.name, value, _file_size(filename))
+    _publish_dedup_stats()
+    if bbox is not None and class_id is not None and len(bbox) == 4:
+        h, w = frame.shape[:2]
+        write_yolo_label(base.with_suffix(".txt"), bbox, class_id, w, h)
+    print(f"💾 Image sauvegardée pour apprentissage : {filename.name} ({class_name})")
+    return filename
+
+
+def import_training_sample(image_path, class_name, bbox=None, class_id=None,
+                           width=None, height=None, correct=True):
+    """
+    Copie une image JPEG déjà sur disque (ex: file de révision) comme exemple
+    d'apprentissage, sans la réencoder.
+
+    Args:
+        image_path: Image source (.jpg)
+        class_name: Nom de la classe
+        bbox, class_id: Pour le .txt YOLO (ignorés si width/height inconnus)
+        width, height: Dimensions de l'image source
+        correct: True = bonne détection, False = erreur (sauvegardé dans _errors/)
+
+    Retourne:
+        Path de l'image écrite, ou None si SAVE_IMAGES est désactivé ou si
+        une image presque identique existe déjà dans le dossier
+    """
+    if not SAVE_IMAGES:
+        return None
+    class_name = normalize_class_name(class_name)
+    folder = _sample_folder(class_name, correct)
+    folder_key = folder.relative_to(TRAINING_DIR).as_posix()
+    index = get_hash_index()
+    value = file_dhash(image_path)
+    if value is not None:
+        duplicate = index.check(folder_key, value)
+        if duplicate is not None:
+            print(f"⊘ Image presque identique à {duplicate} ({class_name}) : non ajoutée")
+            _publish_dedup_stats()
+            return None
+    base = _sample_base(folder, correct)
+    filename = base.with_suffix(".jpg")
+    shutil.copyfile(image_path, filename)
+    if value is not None:
+        index.record(folder_key, filename.name, value, _file_size(filename))
+        _publish_dedup_stats()
+    if bbox is not None and class_id is not None and len(bbox) == 4 and width and height:
+        write_yolo_label(base.with_suffix(".txt"), bbox, class_id, width, height)
+    print(f"💾 Image ajoutée pour apprentissage : {filename.name} ({class_name})")
+    return filename
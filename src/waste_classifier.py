@@ -3,6 +3,7 @@ Smart Bin SI - Base de données (objet → bac) + Arduino (tri)
 Utilisé par yolo_detector.py pour le tri et l'apprentissage des associations.
 """
 
+import re
 import sqlite3
 import serial
 import serial.tools.list_ports
@@ -13,7 +14,7 @@ from datetime import datetime
 try:
     from config import (
         DB_PATH, ARDUINO_PORT, BAUD_RATE, SORTING_DURATION,
-        VALID_BINS, WASTE_TO_BIN_MAPPING,
+        VALID_BINS, WASTE_TO_BIN_MAPPING, ITEM_ALIASES,
     )
 except ImportError:
     import sys
@@ -21,13 +22,26 @@ except ImportError:
     sys.path.insert(0, str(Path(__file__).resolve().parent))
     from config import (
         DB_PATH, ARDUINO_PORT, BAUD_RATE, SORTING_DURATION,
-        VALID_BINS, WASTE_TO_BIN_MAPPING,
+        VALID_BINS, WASTE_TO_BIN_MAPPING, ITEM_ALIASES,
     )
 
 # Connexions globales
 _conn = None
 _serial = None
 
+# Index de recherche objet → bac, construit une fois à l'init puis mis à jour au fil de l'eau
+# (voir normalize_item_name) :
+#   _item_index  : clé normalisée → (nom de l'objet, bac)  [config + table waste_classification]
+#   _alias_index : clé normalisée d'un alias → clé de l'objet [ITEM_ALIASES + table item_aliases]
+#   _class_index : id de classe du modèle → clé de l'objet
+_item_index = None
+_alias_index = {}
+_class_index = {}
+
+# Tables d'agrégats : granularité → (table, longueur du préfixe ISO du timestamp)
+ROLLUP_TABLES = {"hour": "sorting_rollup_hourly", "day": "sorting_rollup_daily"}
+ROLLUP_BUCKET_LENGTH = {"hour": 13, "day": 10}  # '2026-02-19T14' / '2026-02-19'
+
 
 def init_database():
     """Crée la base SQLite et toutes les tables si besoin."""
@@ -56,6 +70,12 @@ def init_database():
         )
     """)
     
+    # Index pour la pagination par curseur (timestamp, id) avec ou sans filtre.
+    # SQLite ajoute implicitement le rowid (= id) en fin d'index.
+    _conn.execute("CREATE INDEX IF NOT EXISTS idx_history_timestamp ON sorting_history (timestamp)")
+    _conn.execute("CREATE INDEX IF NOT EXISTS idx_history_bin_timestamp ON sorting_history (bin_color, timestamp)")
+    _conn.execute("CREATE INDEX IF NOT EXISTS idx_history_item_timestamp ON sorting_history (item_name, timestamp)")
+    
     # Table 3 : État des bacs (remplissage, dernière vidange)
     _conn.execute("""
         CREATE TABLE IF NOT EXISTS bin_status (
@@ -67,6 +87,56 @@ def init_database():
         )
     """)
     
+    # Tables 4 et 5 : Agrégats par heure / par jour (maintenus à chaque détection)
+    for table in ROLLUP_TABLES.values():
+        _conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket TEXT NOT NULL,
+                bin_color TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                confidence_sum REAL NOT NULL DEFAULT 0.0,
+                PRIMARY KEY (bucket, bin_color, item_name)
+            )
+        """)
+    # Table 6 : File de révision (mode apprentissage, validée depuis l'interface admin)
+    _conn.execute("""
+        CREATE TABLE IF NOT EXISTS review_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            detected_class TEXT NOT NULL,
+            class_id INTEGER,
+            confidence REAL,
+            bbox TEXT,
+            frame_path TEXT NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            created_at TEXT NOT NULL,
+            reviewed_at TEXT,
+            final_class TEXT,
+            reason TEXT
+        )
+    """)
+    _conn.execute("CREATE INDEX IF NOT EXISTS idx_review_status ON review_queue (status, id)")
+    # Base créée avant l'ajout de la raison de capture
+    review_columns = {row[1] for row in _conn.execute("PRAGMA table_info(review_queue)")}
+    if "reason" not in review_columns:
+        _conn.execute("ALTER TABLE review_queue ADD COLUMN reason TEXT")
+    
+    # Table 7 : Alias d'objets (autre nom → objet connu)
+    _conn.execute("""
+        CREATE TABLE IF NOT EXISTS item_aliases (
+            alias TEXT PRIMARY KEY,
+            item_name TEXT NOT NULL,
+            created_at TEXT
+        )
+    """)
+    
+    # Base existante sans agrégats : les construire une fois depuis l'historique
+    if (_conn.execute("SELECT 1 FROM sorting_rollup_daily LIMIT 1").fetchone() is None
+            and _conn.execute("SELECT 1 FROM sorting_history LIMIT 1").fetchone() is not None):
+        rebuild_rollups(commit=False)
+    
     # Initialiser les bacs s'ils n'existent pas
     from config import VALID_BINS
     for bin_color in VALID_BINS:
@@ -76,22 +146,154 @@ def init_database():
         """, (bin_color, datetime.now().isoformat()))
     
     _conn.commit()
+    build_lookup_index()
 
 
-def init_serial_connection():
-    """Ouvre la connexion série vers l'Arduino. En mode simulation si pas d'Arduino."""
-    global _serial
-    if _serial is not None:
-        return
+# ============================================
+# INDEX DE RECHERCHE (NOMS, ALIAS, CLASSES)
+# ============================================
+
+def _singular(word):
+    """Forme singulière simple d'un mot anglais (bottles → bottle, boxes → box)."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_item_name(item_name):
+    """
+    Clé de recherche d'un objet : minuscules, séparateurs (espace, -, ., /)
+    remplacés par '_', dernier mot au singulier.
+    'Plastic Bottles' / 'plastic-bottle' / 'plastic_bottle' → 'plastic_bottle'
+    """
+    words = re.split(r"[\s_\-./]+", str(item_name).strip().lower())
+    words = [w for w in words if w]
+    if not words:
+        return ""
+    words[-1] = _singular(words[-1])
+    return "_".join(words)
+
+
+def build_lookup_index():
+    """
+    Construit l'index objet → bac (la DB est prioritaire sur config) et les alias.
+    Appelé par init_database ; ensuite save_to_database / add_alias le tiennent à jour.
+    """
+    global _item_index, _alias_index
+    _item_index = {}
+    for item_name, bin_color in WASTE_TO_BIN_MAPPING.items():
+        _item_index[normalize_item_name(item_name)] = (item_name, bin_color)
+    aliases = dict(ITEM_ALIASES)
+    if _conn:
+        try:
+            for item_name, bin_color in _conn.execute(
+                    "SELECT item_name, bin_color FROM waste_classification"):
+                _item_index[normalize_item_name(item_name)] = (item_name, bin_color)
+            aliases.update(_conn.execute("SELECT alias, item_name FROM item_aliases").fetchall())
+        except sqlite3.OperationalError:
+            pass
+    _alias_index = {
+        normalize_item_name(alias): normalize_item_name(item_name)
+        for alias, item_name in aliases.items()
+    }
+
+
+def set_default_mapping(mapping, aliases=None):
+    """
+    Remplace le mapping par défaut (et les alias de config) pendant l'exécution,
+    puis reconstruit l'index. Les associations apprises en base restent prioritaires.
+    """
+    global WASTE_TO_BIN_MAPPING, ITEM_ALIASES
+    WASTE_TO_BIN_MAPPING = dict(mapping)
+    if aliases is not None:
+        ITEM_ALIASES = dict(aliases)
+    build_lookup_index()
+
+
+def register_model_classes(names):
+    """
+    Associe les ids de classe du modèle (dict int → nom) à l'index.
+    Retourne la liste des classes du modèle sans bac connu.
+    """
+    global _class_index
+    _class_index = {int(class_id): normalize_item_name(name) for class_id, name in dict(names).items()}
+    return [
+        dict(names)[class_id] for class_id in sorted(_class_index)
+        if resolve_item(class_id) is None
+    ]
+
+
+def resolve_item(item):
+    """
+    Résout un objet (nom ou id de classe du modèle) en (nom de l'objet, bac), ou None.
+    Recherche en mémoire uniquement (O(1), sans requête SQL).
+    """
+    if _item_index is None:
+        build_lookup_index()
+    if isinstance(item, int):
+        key = _class_index.get(item)
+        if key is None:
+            return None
+    else:
+        key = normalize_item_name(item)
+    entry = _item_index.get(key)
+    if entry is None and key in _alias_index:
+        entry = _item_index.get(_alias_index[key])
+    return entry
+
+
+def add_alias(alias, item_name):
+    """Enregistre un alias (autre nom) pour un objet connu. Retourne True si enregistré."""
+    alias_key = normalize_item_name(alias)
+    item_key = normalize_item_name(item_name)
+    if not _conn or not alias_key or resolve_item(item_key) is None:
+        return False
+    try:
+        _conn.execute("""
+            INSERT INTO item_aliases (alias, item_name, created_at) VALUES (?, ?, ?)
+            ON CONFLICT(alias) DO UPDATE SET item_name = excluded.item_name
+        """, (alias_key, item_key, datetime.now().isoformat()))
+        _conn.commit()
+    except Exception:
+        return False
+    _alias_index[alias_key] = item_key
+    return True
+
+
+def get_aliases():
+    """Alias connus : {alias: objet} (config + base)"""
+    if _item_index is None:
+        build_lookup_index()
+    return dict(sorted(_alias_index.items()))
+
+
+def open_serial(port=ARDUINO_PORT, baud_rate=BAUD_RATE):
+    """
+    Ouvre une connexion série vers un Arduino (un par poste de tri).
+    Retourne l'objet Serial, ou None (mode simulation) si pas d'Arduino.
+    """
     try:
-        _serial = serial.Serial(ARDUINO_PORT, BAUD_RATE, timeout=1)
+        ser = serial.Serial(port, baud_rate, timeout=1)
         # Laisser le temps à l'Arduino de reset
         import time
         time.sleep(2)
-        print("✓ Arduino connecté")
+        print(f"✓ Arduino connecté ({port})")
+        return ser
     except Exception as e:
-        print(f"⚠ Arduino non détecté ({e}) - mode simulation")
-        _serial = None
+        print(f"⚠ Arduino non détecté sur {port} ({e}) - mode simulation")
+        return None
+
+
+def init_serial_connection():
+    """Ouvre la connexion série vers l'Arduino. En mode simulation si pas d'Arduino."""
+    global _serial
+    if _serial is not None:
+        return
+    _serial = open_serial(ARDUINO_PORT, BAUD_RATE)
 
 
 def init_serial():
@@ -101,10 +303,11 @@ def init_serial():
 
 def cleanup():
     """Ferme la DB et la série."""
-    global _conn, _serial
+    global _conn, _serial, _item_index
     if _conn:
         _conn.close()
         _conn = None
+    _item_index = None
     if _serial and _serial.is_open:
         _serial.close()
         _serial = None
@@ -113,24 +316,14 @@ def cleanup():
 def get_bin_color(item_name):
     """
     Retourne la couleur du bac pour un objet (sans sauvegarder).
-    Cherche en DB, sinon mapping par défaut dans config.
+    - item_name: nom de l'objet (séparateurs / pluriel indifférents), alias,
+      ou id de classe du modèle (voir register_model_classes)
+    La DB est prioritaire sur le mapping par défaut de config (index en mémoire).
     """
-    if not item_name:
+    if item_name is None or item_name == "":
         return None
-    item_name = item_name.strip().lower()
-    # 1. Base de données
-    if _conn:
-        try:
-            row = _conn.execute(
-                "SELECT bin_color FROM waste_classification WHERE item_name = ?",
-                (item_name,)
-            ).fetchone()
-            if row:
-                return row[0]
-        except sqlite3.OperationalError:
-            pass
-    # 2. Mapping par défaut (config)
-    return WASTE_TO_BIN_MAPPING.get(item_name)
+    entry = resolve_item(item_name)
+    return entry[1] if entry else None
 
 
 def save_to_database(item_name, bin_color):
@@ -148,6 +341,8 @@ def save_to_database(item_name, bin_color):
                 usage_count = usage_count + 1
         """, (item_name, bin_color, now))
         _conn.commit()
+        if _item_index is not None:
+            _item_index[normalize_item_name(item_name)] = (item_name, bin_color)
         return True
     except Exception:
         return False
@@ -175,12 +370,17 @@ def ask_user_for_bin(item_name):
     return None
 
 
-def send_sort_command(bin_color):
-    """Envoie la commande de tri à l'Arduino."""
-    if _serial and _serial.is_open:
+def send_sort_command(bin_color, ser=None):
+    """
+    Envoie la commande de tri à l'Arduino.
+    - ser: connexion série d'un poste (par défaut celle ouverte par init_serial_connection)
+    """
+    if ser is None:
+        ser = _serial
+    if ser and ser.is_open:
         try:
-            _serial.write(f"{bin_color}\n".encode())
-            _serial.flush()
+            ser.write(f"{bin_color}\n".encode())
+            ser.flush()
         except Exception as e:
             print(f"⚠ Erreur envoi Arduino : {e}")
             return False
@@ -189,18 +389,22 @@ def send_sort_command(bin_color):
     return True
 
 
-def classify_and_sort(item_name, ask_if_unknown=True, auto_mode=False, confidence=1.0):
+def classify_and_sort(item_name, ask_if_unknown=True, auto_mode=False, confidence=1.0,
+                      send_command=True):
     """
     Détermine le bac pour l'objet, enregistre si nouveau, envoie la commande de tri.
     - ask_if_unknown: si True, demande à l'utilisateur pour un objet inconnu
     - auto_mode: si True, utilise uniquement le mapping sans demander
     - confidence: confiance de la détection (0-1)
+    - send_command: si False, n'enregistre que la détection (le tri physique
+      est confié à l'appelant, ex: sort_queue pour l'API)
     Retourne la couleur du bac utilisée, ou None.
     """
     if not item_name:
         return None
     item_name = item_name.strip().lower()
-    bin_color = get_bin_color(item_name)
+    entry = resolve_item(item_name)
+    bin_color = entry[1] if entry else None
 
     if bin_color is None:
         if ask_if_unknown and not auto_mode:
@@ -215,7 +419,7 @@ def classify_and_sort(item_name, ask_if_unknown=True, auto_mode=False, confidenc
             try:
                 _conn.execute(
                     "UPDATE waste_classification SET usage_count = usage_count + 1 WHERE item_name = ?",
-                    (item_name,)
+                    (entry[0],)
                 )
                 _conn.commit()
             except Exception:
@@ -225,6 +429,9 @@ def classify_and_sort(item_name, ask_if_unknown=True, auto_mode=False, confidenc
         # LOG LA DÉTECTION
         log_detection(bin_color, item_name, confidence)
         
+        if not send_command:
+            return bin_color
+        
         # Envoyer commande Arduino
         send_sort_command(bin_color)
         if _serial and _serial.is_open:
@@ -247,15 +454,53 @@ def get_stats():
         return []
 
 
+def _update_rollups(bin_color, item_name, timestamp, count, confidence_sum):
+    """Ajoute des détections aux agrégats horaires et journaliers (sans commit)."""
+    for granularity, table in ROLLUP_TABLES.items():
+        bucket = timestamp[:ROLLUP_BUCKET_LENGTH[granularity]]
+        _conn.execute(f"""
+            INSERT INTO {table} (bucket, bin_color, item_name, count, confidence_sum)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(bucket, bin_color, item_name) DO UPDATE SET
+                count = count + excluded.count,
+                confidence_sum = confidence_sum + excluded.confidence_sum
+        """, (bucket, bin_color, item_name or "", count, confidence_sum))
+
+
+def rebuild_rollups(commit=True):
+    """Reconstruit entièrement les agrégats depuis sorting_history et les archives."""
+    if not _conn:
+        return False
+    import history_archive
+    for granularity, table in ROLLUP_TABLES.items():
+        length = ROLLUP_BUCKET_LENGTH[granularity]
+        _conn.execute(f"DELETE FROM {table}")
+        _conn.execute(f"""
+            INSERT INTO {table} (bucket, bin_color, item_name, count, confidence_sum)
+            SELECT substr(timestamp, 1, {length}), bin_color, COALESCE(item_name, ''),
+                   COUNT(*), SUM(confidence)
+            FROM sorting_history
+            GROUP BY 1, 2, 3
+        """)
+    # Les lignes archivées sont plus anciennes que toute la base : on les ajoute
+    for _, bin_color, item_name, timestamp, confidence in history_archive.iter_archived_rows():
+        _update_rollups(bin_color, item_name, timestamp, 1, confidence)
+    if commit:
+        _conn.commit()
+    return True
+
+
 def log_detection(bin_color, item_name, confidence=1.0):
-    """Enregistre une détection dans l'historique."""
+    """Enregistre une détection dans l'historique (et dans les agrégats)."""
     if not _conn:
         return False
     try:
+        timestamp = datetime.now().isoformat()
         _conn.execute("""
             INSERT INTO sorting_history (bin_color, item_name, timestamp, confidence)
             VALUES (?, ?, ?, ?)
-        """, (bin_color, item_name, datetime.now().isoformat(), confidence))
+        """, (bin_color, item_name, timestamp, confidence))
+        _update_rollups(bin_color, item_name, timestamp, 1, confidence)
         
         # Mise à jour du bac : +1 item
         _conn.execute("""
@@ -272,6 +517,105 @@ def log_detection(bin_color, item_name, confidence=1.0):
         return False
 
 
+def normalize_timestamp(value):
+    """
+    Timestamp ISO 8601 → format stocké dans sorting_history (heure locale sans
+    fuseau, comme datetime.now().isoformat()), ou None s'il est invalide.
+    Un timestamp avec fuseau (ex: '...Z', '+02:00') est converti en heure locale.
+    """
+    try:
+        parsed = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def classify_batch(events):
+    """
+    Enregistre un lot de détections en une seule transaction (ingestion, sans Arduino).
+    - events: liste de dicts {item_name, confidence (défaut 1.0), timestamp (ISO, défaut maintenant)}
+    Les bacs sont résolus par l'index en mémoire (resolve_item) ; les objets inconnus sont ignorés.
+    Un timestamp illisible rend l'évènement invalide (il fausserait la pagination et les agrégats).
+    Historique, agrégats, compteurs d'usage et état des bacs sont écrits ensemble
+    (tout ou rien). Retourne {'logged': n, 'per_bin': {bac: n}, 'unknown': [objets], 'invalid': n}.
+    """
+    if not _conn:
+        return None
+    now = datetime.now().isoformat()
+    
+    history_rows = []
+    usage = {}
+    per_bin = {}
+    rollups = {}
+    unknown = set()
+    invalid = 0
+    for event in events:
+        try:
+            item_name = str(event.get("item_name", "")).strip().lower()
+            confidence = float(event.get("confidence", 1.0))
+        except (AttributeError, TypeError, ValueError):
+            invalid += 1
+            continue
+        if not item_name:
+            invalid += 1
+            continue
+        entry = resolve_item(item_name)
+        if entry is None:
+            unknown.add(item_name)
+            continue
+        bin_color = entry[1]
+        timestamp = normalize_timestamp(event.get("timestamp")) if event.get("timestamp") else now
+        if timestamp is None:
+            invalid += 1
+            continue
+        history_rows.append((bin_color, item_name, timestamp, confidence))
+        usage[entry[0]] = usage.get(entry[0], 0) + 1
+        per_bin[bin_color] = per_bin.get(bin_color, 0) + 1
+        # Agrégats pré-sommés par tranche : une seule écriture par (tranche, bac, objet)
+        for granularity in ROLLUP_TABLES:
+            key = (granularity, timestamp[:ROLLUP_BUCKET_LENGTH[granularity]], bin_color, item_name)
+            total = rollups.setdefault(key, [0, 0.0])
+            total[0] += 1
+            total[1] += confidence
+    
+    try:
+        with _conn:  # commit unique, ou rollback complet en cas d'erreur
+            _conn.executemany("""
+                INSERT INTO sorting_history (bin_color, item_name, timestamp, confidence)
+                VALUES (?, ?, ?, ?)
+            """, history_rows)
+            for granularity, table in ROLLUP_TABLES.items():
+                _conn.executemany(f"""
+                    INSERT INTO {table} (bucket, bin_color, item_name, count, confidence_sum)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(bucket, bin_color, item_name) DO UPDATE SET
+                        count = count + excluded.count,
+                        confidence_sum = confidence_sum + excluded.confidence_sum
+                """, [
+                    (bucket, bin_color, item_name, count, confidence_sum)
+                    for (g, bucket, bin_color, item_name), (count, confidence_sum) in rollups.items()
+                    if g == granularity
+                ])
+            _conn.executemany(
+                "UPDATE waste_classification SET usage_count = usage_count + ? WHERE item_name = ?",
+                [(count, item_name) for item_name, count in usage.items()]
+            )
+            _conn.executemany("""
+                UPDATE bin_status
+                SET item_count = item_count + ?,
+                    fill_level = fill_level + 0.5 * ?
+                WHERE bin_color = ?
+            """, [(count, count, bin_color) for bin_color, count in per_bin.items()])
+    except Exception as e:
+        print(f"⚠ Erreur classify_batch : {e}")
+        return None
+    
+    return {'logged': len(history_rows), 'per_bin': per_bin,
+            'unknown': sorted(unknown), 'invalid': invalid}
+
+
 def get_bin_status():
     """Retourne l'état des 3 bacs (remplissage, items, dernière vidange)."""
     if not _conn:
@@ -318,6 +662,166 @@ def get_detection_history(limit=50):
         return []
 
 
+def history_filters(bin_color=None, item_name=None, min_confidence=None,
+                    max_confidence=None, since=None, until=None):
+    """Construit la clause WHERE (et ses paramètres) des filtres d'historique."""
+    clauses, params = [], []
+    if bin_color:
+        clauses.append("bin_color = ?")
+        params.append(bin_color)
+    if item_name:
+        clauses.append("item_name = ?")
+        params.append(item_name.strip().lower())
+    if min_confidence is not None:
+        clauses.append("confidence >= ?")
+        params.append(min_confidence)
+    if max_confidence is not None:
+        clauses.append("confidence <= ?")
+        params.append(max_confidence)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    return clauses, params
+
+
+def encode_history_cursor(timestamp, row_id):
+    """Curseur opaque pointant juste après une ligne d'historique."""
+    return f"{timestamp}|{row_id}"
+
+
+def decode_history_cursor(cursor):
+    """Retourne (timestamp, id) depuis un curseur, ou None s'il est invalide."""
+    try:
+        timestamp, row_id = cursor.rsplit("|", 1)
+        return timestamp, int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_detection_history_page(limit=50, cursor=None, bin_color=None, item_name=None,
+                               min_confidence=None, max_confidence=None,
+                               since=None, until=None, include_archive=False):
+    """
+    Page d'historique, du plus récent au plus ancien, paginée par curseur.
+    La pagination se fait sur (timestamp, id) et non par OFFSET : chaque page
+    coûte le même prix quelle que soit sa profondeur dans l'historique.
+    - cursor: valeur next_cursor de la page précédente (None = première page)
+    - since / until: bornes ISO sur le timestamp (until exclu)
+    - include_archive: continuer dans les archives mensuelles une fois la base épuisée
+    Retourne (lignes, next_cursor) ; lignes = (id, bin_color, item_name, timestamp, confidence),
+    next_cursor = None s'il n'y a plus de page.
+    """
+    if not _conn:
+        return [], None
+    filters = (bin_color, item_name, min_confidence, max_confidence, since, until)
+    position = None
+    if cursor:
+        position = decode_history_cursor(cursor)
+        if position is None:
+            return [], None
+        # Une seule borne haute sur timestamp : sinon SQLite peut garder until
+        # comme point de départ du parcours d'index et remonter jusqu'au curseur
+        if until and position[0] < until:
+            until = None
+    clauses, params = history_filters(
+        bin_color, item_name, min_confidence, max_confidence, since, until
+    )
+    if position is not None:
+        clauses.append("timestamp <= ? AND (timestamp, id) < (?, ?)")
+        params.extend((position[0], *position))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    try:
+        rows = _conn.execute(f"""
+            SELECT id, bin_color, item_name, timestamp, confidence
+            FROM sorting_history
+            {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (*params, limit + 1)).fetchall()
+    except Exception as e:
+        print(f"⚠ Erreur get_detection_history_page : {e}")
+        return [], None
+    if include_archive and len(rows) <= limit:
+        # Base épuisée : les archives contiennent les lignes plus anciennes
+        import history_archive
+        archive_position = (rows[-1][3], rows[-1][0]) if rows else position
+        rows += history_archive.read_archived_page(
+            limit + 1 - len(rows), archive_position, *filters
+        )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_history_cursor(last[3], last[0])
+
+
+def get_analytics(since=None, until=None, granularity="day", group_by="bin"):
+    """
+    Agrégats de tri sur une période, lus dans les tables d'agrégats
+    (jamais dans l'historique brut : le coût dépend du nombre de tranches, pas de détections).
+    - granularity: "hour" ou "day" (taille des tranches)
+    - group_by: "bin", "item" ou None (total par tranche)
+    - since / until: bornes ISO ramenées au début de leur tranche (until exclu) :
+      seules des tranches complètes sont retournées, comme dans les tables d'agrégats
+    Retourne une liste de dicts {bucket, key, count, mean_confidence}, triée par tranche.
+    """
+    if not _conn or granularity not in ROLLUP_TABLES:
+        return []
+    key_column = {"bin": "bin_color", "item": "item_name"}.get(group_by)
+    length = ROLLUP_BUCKET_LENGTH[granularity]
+    clauses, params = [], []
+    if since:
+        clauses.append("bucket >= ?")
+        params.append(since[:length])
+    if until:
+        clauses.append("bucket < ?")
+        params.append(until[:length])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    key_select = key_column if key_column else "NULL"
+    group = "bucket, key" if key_column else "bucket"
+    try:
+        rows = _conn.execute(f"""
+            SELECT bucket, {key_select} AS key, SUM(count), SUM(confidence_sum)
+            FROM {ROLLUP_TABLES[granularity]}
+            {where}
+            GROUP BY {group}
+            ORDER BY bucket ASC
+        """, params).fetchall()
+    except Exception as e:
+        print(f"⚠ Erreur get_analytics : {e}")
+        return []
+    return [
+        {
+            'bucket': bucket,
+            'key': key,
+            'count': count,
+            'mean_confidence': round(confidence_sum / count, 4) if count else 0.0,
+        }
+        for bucket, key, count, confidence_sum in rows
+    ]
+
+
+def apply_retention_policy(retention_days=None, vacuum=False):
+    """
+    Archive les détections plus anciennes que la rétention configurée
+    (HISTORY_RETENTION_DAYS, None = désactivé) et retourne le nombre de lignes déplacées.
+    - vacuum: compacter la base ensuite (scripts/archive_history.py uniquement)
+    """
+    if not _conn:
+        return 0
+    import history_archive
+    if retention_days is None:
+        retention_days = history_archive.HISTORY_RETENTION_DAYS
+    try:
+        return history_archive.archive_old_history(_conn, retention_days, vacuum=vacuum)
+    except Exception as e:
+        print(f"⚠ Erreur archivage de l'historique : {e}")
+        return 0
+
+
 # ============================================
 # MODE MANUEL (sans caméra) : saisie du nom d'objet
 # ============================================
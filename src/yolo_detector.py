@@ -1,52 +1,283 @@
 """
 Smart Bin SI - Détecteur YOLO avec apprentissage au fur et à mesure
 - Détecte les objets via caméra
-- Demande ta validation : si tu dis "oui c'est correct", l'image est sauvegardée pour réentraîner le modèle
+- Mode apprentissage : les détections sont mises en file de révision (sans bloquer le tri) ;
+  une fois confirmées depuis l'interface admin, les images servent à réentraîner le modèle
 - Utilise waste_classifier pour le tri (DB + Arduino)
 """
 
 import cv2
-import torch
 import time
 import numpy as np
 from pathlib import Path
-from datetime import datetime
 
 import waste_classifier
+from review_queue import ReviewQueue
+from training_data import write_training_sample
+from camera import get_csi_pipeline, open_camera, FrameGrabber, frame_age_ms
+from runtime_settings import SettingsWatcher, group_changes
+from adaptive_control import AdaptiveController
+from thermal import ThermalMonitor
+from active_learning import CapturePolicy
+from cascade import RoiClassifier, DetectionCascade
+from preprocess import Preprocessor, scale_boxes
+from onnx_detector import OnnxResults, decode_predictions
+from shadow_eval import ShadowEvaluator
+from overlay import OverlayRenderer, WINDOW_NAME
+from frame_share import FramePublisher
+from status_report import write_status
 from config import (
-    MODEL_PATH, CONFIDENCE_THRESHOLD, IOU_THRESHOLD,
-    CAMERA_SOURCE, USE_CSI_CAMERA, FRAME_WIDTH, FRAME_HEIGHT, SHOW_DISPLAY,
+    MODEL_PATH, CONFIDENCE_THRESHOLD, IOU_THRESHOLD, EXPLICIT_PREPROCESS, USE_INFERENCE_SERVER,
+    FRAME_HEIGHT, SHOW_DISPLAY,
+    CAMERA_SOURCE, USE_CSI_CAMERA, FRAME_WIDTH, CAMERA_FPS, CAMERA_FOURCC,
+    CAMERA_BUFFER_SIZE, CAMERA_THREADED_CAPTURE,
     AUTO_SORT_DELAY, MIN_DETECTIONS, LEARNING_MODE, SAVE_IMAGES,
-    TRAINING_DIR, BIN_COLORS,
+    TRAINING_DIR, BIN_COLORS, DETECTION_ROI, CONFIG_RELOAD_INTERVAL,
+    STATUS_REPORT_INTERVAL, THERMAL_MONITOR, ACTIVE_LEARNING, CASCADE_CLASSIFIER,
+    SHADOW_MODEL_PATH, SHADOW_THREADS, PREVIEW_STREAM, TARGET_FPS,
 )
 
+DEFAULT_INPUT_SIZE = 640  # Taille d'entrée par défaut d'AutoShape (YOLOv5)
+
 
 # ============================================
-# SUPPORT CAMÉRA CSI JETSON
+# CHARGEMENT DU MODÈLE ET LECTURE DES RÉSULTATS
 # ============================================
 
-def get_csi_pipeline(camera_id=0, width=640, height=480, fps=30):
+def load_model(model_path=MODEL_PATH, threads=None):
+    """
+    Charger le modèle YOLO depuis un fichier
+    Supporte YOLOv5 et YOLOv8 via torch.hub ou ultralytics, et les modèles
+    ONNX (FP32 / FP16 / INT8, voir quantize.py) via onnxruntime
+    
+    Args:
+        model_path: Chemin vers les poids YOLO entraînés (fichier .pt ou .onnx)
+        threads: Threads de calcul CPU du modèle ONNX (None = tous les cœurs)
+    
+    Retourne:
+        model: Modèle YOLO prêt pour l'inférence
+    """
+    if Path(model_path).suffix == ".onnx":
+        # Modèle exporté : onnxruntime suffit, torch n'est pas nécessaire
+        from onnx_detector import OnnxDetector
+        print(f"📦 Chargement du modèle ONNX depuis : {model_path}")
+        model = OnnxDetector(model_path, threads=threads)
+        print(f"✓ Modèle ONNX chargé ({model.precision or 'précision inconnue'}, "
+              f"entrée {model.input_size}, {model.session.get_providers()[0]})")
+        return model
+    
+    # Import tardif : les processus qui passent par le serveur d'inférence n'ont pas besoin de torch
+    import torch
+    
+    print(f"📦 Chargement du modèle depuis : {model_path}")
+    
+    if not Path(model_path).exists():
+        print(f"⚠ Fichier du modèle introuvable : {model_path}")
+        print("   Utilisation du YOLOv5s par défaut (pré-entraîné sur COCO)")
+        print("   Pour utiliser un modèle custom, entraîne-le d'abord !")
+        
+        # Charger YOLOv5s pré-entraîné comme solution de secours
+        model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
+    else:
+        # Charger le modèle custom entraîné
+        try:
+            model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path)
+            print("✓ Modèle custom chargé avec succès")
+        except Exception as e:
+            print(f"✗ Erreur lors du chargement du modèle custom : {e}")
+            print("   Retour au YOLOv5s pré-entraîné")
+            model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
+    
+    # Définir les paramètres du modèle
+    model.conf = CONFIDENCE_THRESHOLD
+    model.iou = IOU_THRESHOLD
+    
+    # Utiliser le GPU si disponible (important pour Jetson)
+    if torch.cuda.is_available():
+        model = model.cuda()
+        print("✓ Accélération GPU activée")
+    else:
+        print("⚠ Exécution sur CPU (plus lent)")
+    
+    return TorchDetector(model, explicit=EXPLICIT_PREPROCESS, pin_memory=torch.cuda.is_available())
+
+
+class TorchDetector:
+    """
+    Modèle YOLOv5 torch.hub (AutoShape) avec prétraitement explicite (preprocess.py) :
+    conversion BGR → RGB, tampons réutilisés d'une image à l'autre, boîtes ramenées
+    à l'image d'origine. Même interface que le modèle torch.hub : model(image(s), size),
+    model.names, model.conf / model.iou, résultats lus par results_to_detections
+    """
+    
+    fixed_size = False
+    
+    def __init__(self, model, explicit=True, pin_memory=False):
+        """
+        Args:
+            model: Modèle AutoShape chargé par torch.hub
+            explicit: False = prétraitement interne d'AutoShape (images converties en RGB)
+            pin_memory: Tampon hôte en mémoire verrouillée (GPU)
+        """
+        self.model = model
+        self.names = model.names
+        self.conf = model.conf
+        self.iou = model.iou
+        self.explicit = explicit
+        self.pin_memory = pin_memory
+        stride = getattr(model, "stride", 32)
+        self.stride = int(stride.max()) if hasattr(stride, "max") else int(stride)
+        self.preprocessors = {}  # Un jeu de tampons par taille d'entrée
+    
+    def __call__(self, frames, size=DEFAULT_INPUT_SIZE):
+        """Détection sur une image BGR ou une liste d'images BGR"""
+        import torch
+        
+        frames = list(frames) if isinstance(frames, (list, tuple)) else [frames]
+        size = size or DEFAULT_INPUT_SIZE
+        if not self.explicit:
+            # AutoShape attend des images RGB
+            self.model.conf, self.model.iou = self.conf, self.iou
+            return self.model([frame[:, :, ::-1] for frame in frames], size=size)
+        if any(frame.shape != frames[0].shape for frame in frames):
+            # Tailles différentes (plusieurs caméras) : une image à la fois
+            results = [self(frame, size) for frame in frames]
+            return OnnxResults([r.xyxy[0] for r in results],
+                               tuple(np.mean([r.t for r in results], axis=0)))
+        
+        preprocessor = self.preprocessors.get(size)
+        if preprocessor is None:
+            preprocessor = Preprocessor(size, stride=self.stride, pin_memory=self.pin_memory)
+            self.preprocessors[size] = preprocessor
+        t0 = time.perf_counter()
+        _, scale, pad = preprocessor(frames)
+        tensor = preprocessor.tensor(next(self.model.parameters()).device)
+        t1 = time.perf_counter()
+        with torch.no_grad():
+            # Tenseur déjà prétraité : AutoShape le passe tel quel au réseau
+            output = self.model(tensor)
+        if isinstance(output, (list, tuple)):
+            output = output[0]
+        output = output.float().cpu().numpy()
+        t2 = time.perf_counter()
+        xyxy = [scale_boxes(decode_predictions(output[i], self.conf, self.iou), scale, pad, frame.shape)
+                for i, frame in enumerate(frames)]
+        t3 = time.perf_counter()
+        times = tuple((end - start) * 1000 / len(frames) for start, end in ((t0, t1), (t1, t2), (t2, t3)))
+        return OnnxResults(xyxy, times)
+
+
+def results_to_detections(results, names, index=0):
     """
-    Créer un pipeline GStreamer pour caméra CSI Jetson
+    Convertir les résultats YOLO d'une image en liste de détections
     
     Args:
-        camera_id: ID du capteur caméra (0 ou 1)
-        width: Largeur de l'image
-        height: Hauteur de l'image
-        fps: Fréquence d'images
+        results: Résultats de détection YOLO (éventuellement sur un lot d'images)
+        names: Noms des classes du modèle (dict int -> str)
+        index: Position de l'image dans le lot
     
     Retourne:
-        str: Chaîne de pipeline GStreamer
+        list: Déchets détectés avec [nom_classe, id_classe, confiance, bbox]
+    """
+    detections = []
+    
+    # Extraire les résultats (format dépend de YOLOv5 vs YOLOv8)
+    try:
+        # Format YOLOv5
+        predictions = results.pandas().xyxy[index]
+        
+        for idx, row in predictions.iterrows():
+            class_name = row['name']
+            confidence = row['confidence']
+            bbox = [row['xmin'], row['ymin'], row['xmax'], row['ymax']]
+            
+            detections.append({
+                'class': class_name,
+                'class_id': int(row['class']),
+                'confidence': confidence,
+                'bbox': bbox
+            })
+    except:
+        # Analyse alternative si pandas non disponible
+        pred = results.xyxy[index]
+        if hasattr(pred, "cpu"):
+            pred = pred.cpu().numpy()
+        for detection in pred:
+            x1, y1, x2, y2, conf, cls = detection
+            class_name = names[int(cls)]
+            
+            detections.append({
+                'class': class_name,
+                'class_id': int(cls),
+                'confidence': float(conf),
+                'bbox': [float(x1), float(y1), float(x2), float(y2)]
+            })
+    
+    return detections
+
+
+# ============================================
+# FILTRAGE TEMPOREL DES DÉTECTIONS
+# ============================================
+
+class DetectionTracker:
     """
-    return (
-        f"nvarguscamerasrc sensor-id={camera_id} ! "
-        f"video/x-raw(memory:NVMM), width={width}, height={height}, "
-        f"format=NV12, framerate={fps}/1 ! "
-        f"nvvidconv flip-method=0 ! "
-        f"video/x-raw, width={width}, height={height}, format=BGRx ! "
-        f"videoconvert ! "
-        f"video/x-raw, format=BGR ! appsink"
-    )
+    Suivi des détections consécutives d'une caméra
+    Déclenche le tri quand le même objet est vu MIN_DETECTIONS fois de suite
+    """
+    
+    def __init__(self, min_detections=MIN_DETECTIONS, sort_delay=AUTO_SORT_DELAY):
+        """
+        Args:
+            min_detections: Nombre de détections consécutives avant tri
+            sort_delay: Délai minimum entre deux tris (secondes)
+        """
+        self.min_detections = min_detections
+        self.sort_delay = sort_delay
+        self.last_detection = None
+        self.detection_count = 0
+        self.last_sort_time = 0
+    
+    def reset(self):
+        """Réinitialiser le compteur de détections"""
+        self.detection_count = 0
+        self.last_detection = None
+    
+    def should_trigger_sort(self, detection):
+        """
+        Décider si on doit déclencher l'action de tri
+        Utilise un filtrage temporel pour éviter les faux positifs
+        
+        Args:
+            detection: Dictionnaire de détection actuel
+        
+        Retourne:
+            bool: True si on doit trier maintenant
+        """
+        current_time = time.time()
+        
+        # Vérifier si assez de temps s'est écoulé depuis le dernier tri
+        if current_time - self.last_sort_time < self.sort_delay:
+            return False
+        
+        # Vérifier si le même objet est détecté plusieurs fois
+        if detection and self.last_detection:
+            if detection['class'] == self.last_detection['class']:
+                self.detection_count += 1
+            else:
+                self.detection_count = 1
+                self.last_detection = detection
+        else:
+            self.detection_count = 1
+            self.last_detection = detection
+        
+        # Déclencher si le minimum de détections consécutives est atteint
+        if self.detection_count >= self.min_detections:
+            self.detection_count = 0
+            self.last_sort_time = current_time
+            return True
+        
+        return False
 
 
 # ============================================
@@ -70,23 +301,82 @@ class WasteDetector:
         print("🤖 SMART BIN SI - DÉTECTEUR YOLO")
         print("="*50)
         
-        # Charger le modèle YOLO
-        self.model = self.load_model(model_path)
+        # Charger le modèle YOLO (ou utiliser celui du serveur d'inférence)
+        self.inference_client = None
+        if USE_INFERENCE_SERVER:
+            from inference_server import InferenceClient
+            self.model = None
+            self.inference_client = InferenceClient()
+        else:
+            self.model = self.load_model(model_path)
         
         # Suivi des détections
-        self.last_detection = None
-        self.detection_count = 0
-        self.last_sort_time = 0
+        self.tracker = DetectionTracker()
         self.last_frame = None  # Pour sauvegarder l'image lors de corrections
         
+        # Âge des images (capture → fin du traitement), en ms
+        self.frame_age = 0.0
+        self.frame_age_max = 0.0
+        self.frame_age_total = 0.0
+        self.frames_processed = 0
+        
         # Initialiser les connexions via waste_classifier
         waste_classifier.init_serial_connection()
         waste_classifier.init_database()
+        waste_classifier.apply_retention_policy()
+        
+        # Classes du modèle → bacs (recherche par id de classe, sans requête SQL)
+        names = self.inference_client.names if self.inference_client is not None else self.model.names
+        unmapped = waste_classifier.register_model_classes(names)
+        if unmapped:
+            print(f"⚠ Classes du modèle sans bac : {', '.join(unmapped)}")
         
         # Dossier pour les images d'apprentissage (quand tu confirmes "correct")
         if SAVE_IMAGES:
             TRAINING_DIR.mkdir(parents=True, exist_ok=True)
         
+        # File de révision : les validations se font depuis l'interface admin
+        self.review_queue = ReviewQueue().start() if LEARNING_MODE else None
+        # Apprentissage actif : seules les images incertaines sont mises en file
+        self.capture_policy = CapturePolicy() if LEARNING_MODE and ACTIVE_LEARNING else None
+        
+        # Zone de détection et rechargement de la configuration à chaud
+        self.roi = DETECTION_ROI
+        self.grabber = None
+        self.renderer = None
+        self.settings = SettingsWatcher(interval=CONFIG_RELOAD_INTERVAL) if CONFIG_RELOAD_INTERVAL else None
+        
+        # Régulation de cadence (taille d'entrée + pas d'images)
+        self.controller = self.make_controller()
+        self.last_detections = []
+        self.full_inferences = 0  # Inférences YOLO complet (la cascade peut s'en passer)
+        self.full_ms = 0.0
+        
+        # Cascade : classifieur de la zone de dépôt, YOLO seulement quand il hésite
+        self.cascade = None
+        if CASCADE_CLASSIFIER:
+            self.cascade = DetectionCascade(RoiClassifier(CASCADE_CLASSIFIER), model_names=names)
+            print(f"✓ Cascade activée ({len(self.cascade.classifier.labels)} classes de zone)")
+        
+        # Modèle candidat en observation : comparé au modèle en service, sans effet sur le tri
+        self.shadow = None
+        if SHADOW_MODEL_PATH:
+            if Path(SHADOW_MODEL_PATH).exists():
+                shadow_model = load_model(SHADOW_MODEL_PATH, threads=SHADOW_THREADS)
+                self.shadow = ShadowEvaluator(
+                    lambda image, size: results_to_detections(
+                        shadow_model(image, size=size) if size else shadow_model(image), shadow_model.names),
+                    SHADOW_MODEL_PATH,
+                ).start()
+                print(f"✓ Modèle candidat en observation : {Path(SHADOW_MODEL_PATH).name}")
+            else:
+                print(f"⚠ Modèle candidat introuvable : {SHADOW_MODEL_PATH}")
+        
+        # Niveaux de performance selon la température (Jetson sans ventilateur)
+        self.thermal = ThermalMonitor() if THERMAL_MONITOR else None
+        if self.thermal is not None and not self.thermal.available:
+            print("ℹ Aucune zone thermique lisible : surveillance thermique inactive")
+        
         print("✓ Détecteur initialisé\n")
     
     def load_model(self, model_path):
@@ -94,37 +384,7 @@ class WasteDetector:
         Charger le modèle YOLO depuis un fichier
         Supporte YOLOv5 et YOLOv8 via torch.hub ou ultralytics
         """
-        print(f"📦 Chargement du modèle depuis : {model_path}")
-        
-        if not Path(model_path).exists():
-            print(f"⚠ Fichier du modèle introuvable : {model_path}")
-            print("   Utilisation du YOLOv5s par défaut (pré-entraîné sur COCO)")
-            print("   Pour utiliser un modèle custom, entraîne-le d'abord !")
-            
-            # Charger YOLOv5s pré-entraîné comme solution de secours
-            model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-        else:
-            # Charger le modèle custom entraîné
-            try:
-                model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path)
-                print("✓ Modèle custom chargé avec succès")
-            except Exception as e:
-                print(f"✗ Erreur lors du chargement du modèle custom : {e}")
-                print("   Retour au YOLOv5s pré-entraîné")
-                model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-        
-        # Définir les paramètres du modèle
-        model.conf = CONFIDENCE_THRESHOLD
-        model.iou = IOU_THRESHOLD
-        
-        # Utiliser le GPU si disponible (important pour Jetson)
-        if torch.cuda.is_available():
-            model = model.cuda()
-            print("✓ Accélération GPU activée")
-        else:
-            print("⚠ Exécution sur CPU (plus lent)")
-        
-        return model
+        return load_model(model_path)
     
     def detect_waste(self, frame):
         """
@@ -136,8 +396,9 @@ class WasteDetector:
         Retourne:
             results: Résultats de détection YOLO
         """
-        # Exécuter l'inférence
-        results = self.model(frame)
+        # Exécuter l'inférence (taille d'entrée choisie par la régulation de cadence)
+        size = self.controller.size
+        results = self.model(frame, size=size) if size else self.model(frame)
         return results
     
     def process_detections(self, results):
@@ -148,40 +409,177 @@ class WasteDetector:
             results: Résultats de détection YOLO
         
         Retourne:
-            list: Déchets détectés avec [nom_classe, confiance, bbox]
+            list: Déchets détectés avec [nom_classe, id_classe, confiance, bbox]
         """
-        detections = []
+        return results_to_detections(results, self.model.names)
+    
+    def infer(self, frame):
+        """
+        Détecter les déchets sur une image (modèle local ou serveur d'inférence)
         
-        # Extraire les résultats (format dépend de YOLOv5 vs YOLOv8)
-        try:
-            # Format YOLOv5
-            predictions = results.pandas().xyxy[0]
-            
-            for idx, row in predictions.iterrows():
-                class_name = row['name']
-                confidence = row['confidence']
-                bbox = [row['xmin'], row['ymin'], row['xmax'], row['ymax']]
-                
-                detections.append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'bbox': bbox
-                })
-        except:
-            # Analyse alternative si pandas non disponible
-            pred = results.xyxy[0].cpu().numpy()
-            for detection in pred:
-                x1, y1, x2, y2, conf, cls = detection
-                class_name = self.model.names[int(cls)]
-                
-                detections.append({
-                    'class': class_name,
-                    'confidence': float(conf),
-                    'bbox': [float(x1), float(y1), float(x2), float(y2)]
-                })
+        Args:
+            frame: Image OpenCV (format BGR)
         
+        Retourne:
+            list: Déchets détectés avec [nom_classe, id_classe, confiance, bbox]
+        """
+        if self.cascade is not None:
+            return self.cascade.infer(frame, self.roi, self.infer_full)
+        return self.infer_full(frame)
+    
+    def infer_full(self, frame):
+        """
+        Détection par le modèle YOLO complet (modèle local ou serveur d'inférence,
+        taille fixée par le serveur) ; sa durée est gardée pour le modèle candidat
+        """
+        t0 = time.perf_counter()
+        if self.inference_client is not None:
+            detections = self.inference_client.detect(frame)
+        else:
+            detections = self.process_detections(self.detect_waste(frame))
+        self.full_ms = (time.perf_counter() - t0) * 1000
+        self.full_inferences += 1
         return detections
     
+    def in_roi(self, detection):
+        """True si le centre de la détection est dans la zone de détection"""
+        if self.roi is None:
+            return True
+        x1, y1, x2, y2 = detection['bbox']
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        rx1, ry1, rx2, ry2 = self.roi
+        return rx1 <= cx <= rx2 and ry1 <= cy <= ry2
+    
+    def open_grabber(self):
+        """
+        Ouvrir la caméra avec les paramètres en cours (config rechargée le cas échéant)
+        
+        Retourne:
+            bool: False si la caméra ne s'ouvre pas
+        """
+        values = self.settings.values if self.settings is not None else {}
+        cap = open_camera(
+            values.get('CAMERA_SOURCE', CAMERA_SOURCE),
+            use_csi=values.get('USE_CSI_CAMERA', USE_CSI_CAMERA),
+            width=values.get('FRAME_WIDTH', FRAME_WIDTH),
+            height=values.get('FRAME_HEIGHT', FRAME_HEIGHT),
+            fps=values.get('CAMERA_FPS', CAMERA_FPS),
+            fourcc=values.get('CAMERA_FOURCC', CAMERA_FOURCC),
+            buffer_size=values.get('CAMERA_BUFFER_SIZE', CAMERA_BUFFER_SIZE),
+        )
+        if not cap.isOpened():
+            return False
+        self.grabber = FrameGrabber(
+            cap, threaded=values.get('CAMERA_THREADED_CAPTURE', CAMERA_THREADED_CAPTURE)
+        ).start()
+        return True
+    
+    def make_controller(self, target_fps=TARGET_FPS, camera_fps=CAMERA_FPS):
+        """
+        Régulateur de cadence adapté au modèle chargé : avec le serveur
+        d'inférence ou un modèle ONNX, la taille est fixe et seul le pas varie
+        
+        Args:
+            target_fps: Cadence visée pour la boucle
+            camera_fps: Cadence de la caméra (None = inconnue)
+        
+        Retourne:
+            AdaptiveController: Régulateur neuf
+        """
+        if self.inference_client is not None or getattr(self.model, "fixed_size", False):
+            return AdaptiveController(target_fps=target_fps, sizes=[None], camera_fps=camera_fps)
+        return AdaptiveController(target_fps=target_fps, camera_fps=camera_fps)
+    
+    def apply_settings(self, changes):
+        """
+        Appliquer une configuration rechargée : seuls les composants dont un
+        paramètre a changé sont mis à jour (le modèle n'est rechargé que si
+        MODEL_PATH change, la caméra n'est rouverte que si un réglage caméra change)
+        
+        Args:
+            changes: {paramètre: nouvelle valeur} (voir SettingsWatcher.poll)
+        """
+        groups, restart = group_changes(changes)
+        values = self.settings.values
+        
+        if 'weights' in groups:
+            if self.inference_client is not None:
+                print("⚠ MODEL_PATH : modèle géré par le serveur d'inférence (le redémarrer)")
+            else:
+                self.model = self.load_model(values['MODEL_PATH'])
+                groups.setdefault('model', {})
+                unmapped = waste_classifier.register_model_classes(self.model.names)
+                if unmapped:
+                    print(f"⚠ Classes du modèle sans bac : {', '.join(unmapped)}")
+                if self.cascade is not None:
+                    self.cascade.class_ids = {name: idx for idx, name in self.model.names.items()}
+                # Tailles d'entrée du nouveau modèle (fixe pour un ONNX)
+                self.controller = self.make_controller(self.controller.target_fps,
+                                                       self.controller.camera_fps)
+        
+        if 'model' in groups:
+            if self.inference_client is not None:
+                print("⚠ Seuils du modèle : gérés par le serveur d'inférence (le redémarrer)")
+            else:
+                self.model.conf = values['CONFIDENCE_THRESHOLD']
+                self.model.iou = values['IOU_THRESHOLD']
+            if self.capture_policy is not None:
+                self.capture_policy.threshold = values['CONFIDENCE_THRESHOLD']
+            if self.shadow is not None:
+                self.shadow.threshold = values['CONFIDENCE_THRESHOLD']
+        
+        if 'tracker' in groups:
+            self.tracker.min_detections = values['MIN_DETECTIONS']
+            self.tracker.sort_delay = values['AUTO_SORT_DELAY']
+            self.tracker.reset()
+        
+        if 'roi' in groups:
+            self.roi = values.get('DETECTION_ROI')
+        
+        if 'mapping' in groups:
+            waste_classifier.set_default_mapping(
+                values['WASTE_TO_BIN_MAPPING'], values.get('ITEM_ALIASES', {})
+            )
+        
+        if 'sorting' in groups:
+            waste_classifier.SORTING_DURATION = values['SORTING_DURATION']
+        
+        if 'adaptive' in groups:
+            self.controller.target_fps = values['TARGET_FPS']
+        
+        if 'camera' in groups:
+            self.controller.camera_fps = values.get('CAMERA_FPS', CAMERA_FPS)
+        
+        if 'camera' in groups and self.grabber is not None:
+            print("📷 Réglages caméra modifiés : réouverture")
+            self.grabber.release()
+            if not self.open_grabber():
+                print("✗ Échec d'ouverture de la caméra avec les nouveaux réglages")
+                self.grabber = None
+        
+        for group, keys in groups.items():
+            applied = ", ".join(
+                f"{k}={v!r}" if len(repr(v)) <= 40 else f"{k}=({type(v).__name__} modifié)"
+                for k, v in keys.items()
+            )
+            print(f"🔧 Configuration appliquée à chaud ({group}) : {applied}")
+        if restart:
+            print(f"ℹ Pris en compte au prochain redémarrage : {', '.join(restart)}")
+    
+    def report(self, fps):
+        """Publier l'état du détecteur (cadence, âge des images, régulation)"""
+        write_status("detector", {
+            'fps': fps,
+            'frames': self.frames_processed,
+            'frame_age_ms': round(self.frame_age, 1),
+            'frame_age_max_ms': round(self.frame_age_max, 1),
+            'adaptive': self.controller.report(),
+            'thermal': self.thermal.report() if self.thermal is not None else None,
+            'active_learning': self.capture_policy.report() if self.capture_policy is not None else None,
+            'cascade': self.cascade.report() if self.cascade is not None else None,
+            'review': self.review_queue.report() if self.review_queue is not None else None,
+        })
+    
     def should_trigger_sort(self, detection):
         """
         Décider si on doit déclencher l'action de tri
@@ -193,85 +591,84 @@ class WasteDetector:
         Retourne:
             bool: True si on doit trier maintenant
         """
-        current_time = time.time()
-        
-        # Vérifier si assez de temps s'est écoulé depuis le dernier tri
-        if current_time - self.last_sort_time < AUTO_SORT_DELAY:
-            return False
-        
-        # Vérifier si le même objet est détecté plusieurs fois
-        if detection and self.last_detection:
-            if detection['class'] == self.last_detection['class']:
-                self.detection_count += 1
-            else:
-                self.detection_count = 1
-                self.last_detection = detection
-        else:
-            self.detection_count = 1
-            self.last_detection = detection
-        
-        # Déclencher si le minimum de détections consécutives est atteint
-        if self.detection_count >= MIN_DETECTIONS:
-            self.detection_count = 0
-            self.last_sort_time = current_time
-            return True
+        return self.tracker.should_trigger_sort(detection)
+    
+    def record_frame_age(self, age_ms):
+        """
+        Enregistrer l'âge d'une image traitée (capture → fin du traitement)
         
-        return False
+        Args:
+            age_ms: Âge de l'image en millisecondes
+        """
+        self.frame_age = age_ms
+        self.frame_age_max = max(self.frame_age_max, age_ms)
+        self.frame_age_total += age_ms
+        self.frames_processed += 1
     
-    def get_bin_color_for_display(self, waste_class):
+    def get_bin_color_for_display(self, waste_class, class_id=None):
         """
         Obtenir la couleur du bac pour l'affichage (sans trier)
         
         Args:
             waste_class: Nom de la classe de déchet
+            class_id: Id de la classe dans le modèle (recherche directe si connu)
         
         Retourne:
             str: Couleur du bac ou None
         """
-        # Chercher en base de données sans sauvegarder
-        bin_color = waste_classifier.get_bin_color(waste_class)
-        return bin_color
+        # Index en mémoire (pas de requête SQL par détection et par image)
+        if class_id is not None:
+            bin_color = waste_classifier.get_bin_color(class_id)
+            if bin_color:
+                return bin_color
+        return waste_classifier.get_bin_color(waste_class)
     
-    def draw_detections(self, frame, detections):
+    def display_boxes(self, detections):
         """
-        Dessiner les boîtes de détection et labels sur l'image
+        Détections à afficher, avec la couleur du bac de chaque déchet
         
         Args:
-            frame: Image OpenCV
             detections: Liste des dictionnaires de détection
         
         Retourne:
-            frame: Image annotée
+            list: [(x1, y1, x2, y2, classe, confiance, bac)] pour OverlayRenderer
         """
-        for det in detections:
-            x1, y1, x2, y2 = [int(v) for v in det['bbox']]
-            class_name = det['class']
-            confidence = det['confidence']
-            
-            # Obtenir la couleur du bac pour ce déchet (juste pour affichage)
-            bin_color = self.get_bin_color_for_display(class_name)
-            
-            color = BIN_COLORS.get(bin_color, BIN_COLORS["unknown"])
-            
-            # Dessiner la boîte
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            
-            # Dessiner le label
-            label = f"{class_name} ({confidence:.2f})"
-            if bin_color:
-                label += f" -> {bin_color}"
-            else:
-                label += " -> ?"
-            
-            # Fond pour le texte
-            (text_width, text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
-            cv2.rectangle(frame, (x1, y1-text_height-10), (x1+text_width, y1), color, -1)
-            
-            # Texte
-            cv2.putText(frame, label, (x1, y1-5), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+        return [(*det['bbox'], det['class'], det['confidence'],
+                 self.get_bin_color_for_display(det['class'], det.get('class_id')))
+                for det in detections]
+    
+    def overlay_texts(self, fps_display, detections, frame_height):
+        """
+        Lignes d'information de la fenêtre : [(texte, (x, y), échelle, couleur)]
         
-        return frame
+        Args:
+            fps_display: Cadence affichée
+            detections: Détections de l'image
+            frame_height: Hauteur de l'image (ligne du mode en bas)
+        """
+        # Info FPS et détections
+        texts = [(f"FPS: {fps_display} | Detections: {len(detections)}"
+                  f" | Age: {self.frame_age:.0f}ms", (10, 30), 0.7, (0, 255, 0))]
+        
+        # Suivi de détection
+        if self.tracker.last_detection:
+            texts.append((f"Suivi: {self.tracker.last_detection['class']} "
+                          f"({self.tracker.detection_count}/{self.tracker.min_detections})", (10, 60), 0.6, (255, 255, 0)))
+        
+        # Point de fonctionnement de la régulation
+        if self.controller.target_fps:
+            texts.append((f"Taille: {self.controller.size or 'auto'} | Pas: {self.controller.stride}",
+                          (10, 90), 0.6, (0, 200, 255)))
+        
+        # Niveau thermique (hors niveau normal)
+        if self.thermal is not None and self.thermal.tier != "full":
+            texts.append((f"Thermique: {self.thermal.tier} ({self.thermal.temperature:.0f}C)",
+                          (10, 120), 0.6, (0, 0, 255)))
+        
+        # Mode
+        mode_text = "Mode: Apprentissage" if LEARNING_MODE else "Mode: Auto"
+        texts.append((mode_text, (10, frame_height - 10), 0.6, (255, 0, 255)))
+        return texts
     
     def save_image_for_training(self, frame, class_name, bbox=None, class_id=None, correct=True):
         """
@@ -286,121 +683,119 @@ class WasteDetector:
             class_id: index de la classe (pour le .txt YOLO)
             correct: True = bonne détection, False = erreur (sauvegardé dans _errors/)
         """
-        if not SAVE_IMAGES:
-            return
-        class_name = class_name.strip().lower().replace(" ", "_")
-        if correct:
-            folder = TRAINING_DIR / class_name
-        else:
-            folder = TRAINING_DIR / "_errors" / class_name
-        folder.mkdir(parents=True, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        prefix = "ok" if correct else "err"
-        base = f"{prefix}_{timestamp}"
-        filename = folder / f"{base}.jpg"
-        cv2.imwrite(str(filename), frame)
-        # Fichier label YOLO (une ligne : class_id x_center y_center width height, normalisé 0-1)
-        if bbox is not None and class_id is not None and len(bbox) == 4:
-            h, w = frame.shape[:2]
-            x1, y1, x2, y2 = [float(x) for x in bbox]
-            x_center = ((x1 + x2) / 2) / w
-            y_center = ((y1 + y2) / 2) / h
-            width = (x2 - x1) / w
-            height = (y2 - y1) / h
-            label_path = folder / f"{base}.txt"
-            with open(label_path, "w") as f:
-                f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
-        print(f"💾 Image sauvegardée pour apprentissage : {filename.name} ({class_name})")
+        write_training_sample(frame, class_name, bbox=bbox, class_id=class_id, correct=correct)
     
     def _class_name_to_id(self, class_name):
         """Retourne l'index de la classe dans le modèle (pour le label YOLO)."""
-        if not hasattr(self.model, "names"):
+        if self.inference_client is not None:
+            names = self.inference_client.names
+        elif hasattr(self.model, "names"):
+            names = self.model.names  # dict int -> str
+        else:
             return None
-        names = self.model.names  # dict int -> str
         for idx, name in names.items():
             if name == class_name:
                 return idx
         return None
 
-    def handle_correction(self, frame, best_detection):
+    def queue_for_review(self, frame, detection, reason=None):
         """
-        Demande si la détection est correcte ; si oui, sauvegarde l'image (+ label YOLO) pour réentraînement.
+        Met la détection en file de révision (mode apprentissage), sans attendre.
+        La confirmation ou la correction se fait depuis l'interface admin ;
+        une détection confirmée est sauvegardée (+ label YOLO) pour réentraînement.
         
         Args:
-            frame: Image actuelle
-            best_detection: dict avec 'class', 'confidence', 'bbox'
+            frame: Image de la détection
+            detection: dict avec 'class', 'confidence', 'bbox'
+            reason: Raison de la mise en file (sort, manual, unknown, low_confidence, flicker, disagreement)
         """
-        detected_class = best_detection["class"]
-        bbox = best_detection.get("bbox")
-        class_id = self._class_name_to_id(detected_class)
-        
-        print(f"\n⚠ YOLO a détecté : '{detected_class}'")
-        print("Est-ce correct ?")
-        print("  y - Oui, c'est correct → image sauvegardée pour améliorer le modèle")
-        print("  n - Non, corriger le nom")
-        print("  skip - Ignorer")
-        
-        choice = input("Votre choix : ").strip().lower()
+        if self.review_queue is None:
+            return False
+        class_id = detection.get("class_id")
+        if class_id is None:
+            class_id = self._class_name_to_id(detection["class"])
+        if self.review_queue.enqueue(frame, detection, class_id, reason):
+            print(f"📝 '{detection['class']}' ajouté à la file de révision ({reason or 'manuel'}, "
+                  f"{self.review_queue.pending} en attente)")
+            return True
+        if self.review_queue.pending >= self.review_queue.max_pending:
+            print(f"⚠ File de révision pleine ({self.review_queue.max_pending}) - détection non mise en file")
+        else:
+            print(f"⊘ '{detection['class']}' presque identique à une image récente - non mise en file")
+        return False
+    
+    def sort_detection(self, frame, detection):
+        """
+        Trie une détection sans jamais attendre de saisie clavier.
+        Un objet inconnu n'est pas trié : il part en file de révision, où le
+        bon nom est donné depuis l'interface admin.
         
-        if choice == 'y':
-            print("✓ Détection confirmée → image sauvegardée pour réentraînement")
-            self.save_image_for_training(
-                frame, detected_class, bbox=bbox, class_id=class_id, correct=True
-            )
-            return detected_class
+        Args:
+            frame: Image de la détection
+            detection: dict avec 'class', 'confidence', 'bbox'
         
-        elif choice == 'n':
-            print("\nQuel est le vrai nom de cet objet ?")
-            correct_name = input("Nom correct : ").strip()
-            
-            if correct_name:
-                correct_name = correct_name.strip().lower().replace(" ", "_")
-                self.save_image_for_training(frame, correct_name, correct=True)
-                self.save_image_for_training(frame, detected_class, correct=False)
-                print(f"✓ Correction enregistrée : {detected_class} → {correct_name}")
-                return correct_name
-        
-        print("⊘ Détection ignorée")
-        return None
+        Retourne:
+            str: Couleur du bac, ou None si l'objet est inconnu
+        """
+        bin_color = waste_classifier.classify_and_sort(
+            detection['class'],
+            ask_if_unknown=False,
+            auto_mode=True,
+            confidence=detection.get('confidence', 1.0)
+        )
+        if bin_color is None:
+            print(f"❓ Objet inconnu : {detection['class']} - non trié")
+            self.queue_for_review(frame, detection, "unknown")
+        return bin_color
     
     def run_camera_detection(self):
         """
         Boucle principale : capturer images, détecter déchets, déclencher tri
         """
-        # Initialiser la caméra
-        if USE_CSI_CAMERA:
-            print("📷 Ouverture caméra CSI...")
-            pipeline = get_csi_pipeline(width=FRAME_WIDTH, height=FRAME_HEIGHT)
-            cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
-        else:
-            print(f"📷 Ouverture caméra : {CAMERA_SOURCE}")
-            cap = cv2.VideoCapture(CAMERA_SOURCE)
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
-        
-        if not cap.isOpened():
+        # Initialiser la caméra (basse latence : on traite toujours la dernière image)
+        if not self.open_grabber():
             print("✗ Échec d'ouverture de la caméra")
             return
         
         print("✓ Caméra prête")
+        
+        # Fenêtre et aperçu de l'interface admin tenus par le thread d'affichage
+        # (aucun des deux en mode sans écran et sans aperçu)
+        if SHOW_DISPLAY or PREVIEW_STREAM:
+            self.renderer = OverlayRenderer(
+                window=WINDOW_NAME if SHOW_DISPLAY else None,
+                publisher=FramePublisher() if PREVIEW_STREAM else None,
+            ).start()
+        if not SHOW_DISPLAY:
+            print("ℹ Mode sans affichage : touches inactives, arrêt par Ctrl+C")
+        
         print("\n" + "="*50)
         print("CONTRÔLES :")
         print("  'q' - Quitter")
         print("  's' - Forcer le tri de la détection actuelle")
         print("  'r' - Réinitialiser le compteur de détections")
         if LEARNING_MODE:
-            print("  'c' - Corriger la dernière détection")
+            print("  'c' - Mettre la dernière détection en file de révision")
         print("  'stats' - Voir les statistiques")
         print("="*50 + "\n")
         
         fps_time = time.time()
         fps_counter = 0
         fps_display = 0
+        last_report = time.monotonic()
         
         try:
             while True:
-                # Capturer l'image
-                ret, frame = cap.read()
+                # Configuration modifiée (admin) : appliquer sans redémarrer
+                if self.settings is not None:
+                    changes = self.settings.poll(time.monotonic())
+                    if changes:
+                        self.apply_settings(changes)
+                if self.grabber is None:
+                    break
+                
+                # Capturer l'image (la plus récente disponible)
+                ret, frame, capture_ts = self.grabber.read()
                 if not ret:
                     print("✗ Échec de lecture de l'image")
                     break
@@ -408,41 +803,54 @@ class WasteDetector:
                 # Sauvegarder la dernière frame pour corrections
                 self.last_frame = frame.copy()
                 
-                # Exécuter la détection YOLO
-                results = self.detect_waste(frame)
-                detections = self.process_detections(results)
+                # Exécuter la détection YOLO (une image sur N si la régulation l'impose ;
+                # entre deux inférences, les dernières détections restent affichées)
+                inferred = self.controller.should_infer()
+                if self.thermal is not None:
+                    self.thermal.poll()
+                    inferred = self.thermal.allow_inference(frame) and inferred
+                if inferred:
+                    full_before = self.full_inferences
+                    detections = self.infer(frame)
+                    self.last_detections = detections
+                    if self.shadow is not None and self.full_inferences != full_before:
+                        # Comparaison à chemin et taille égaux : seulement si YOLO complet a tourné
+                        self.shadow.submit(frame, detections, self.full_ms, self.controller.size)
+                else:
+                    detections = self.last_detections
                 
-                # Dessiner les détections
-                if SHOW_DISPLAY:
-                    frame = self.draw_detections(frame, detections)
+                # Vérifier si on doit déclencher le tri (détections dans la zone uniquement,
+                # et seulement sur une image réellement analysée)
+                candidates = [d for d in detections if self.in_roi(d)] if inferred else []
                 
-                # Vérifier si on doit déclencher le tri
-                if detections:
-                    best_detection = max(detections, key=lambda x: x['confidence'])
+                # Apprentissage actif : capturer les images où le modèle hésite
+                if self.capture_policy is not None and inferred:
+                    capture = self.capture_policy.evaluate(candidates)
+                    if capture is not None:
+                        reason, uncertain = capture
+                        self.queue_for_review(self.last_frame, uncertain, reason)
+                
+                if candidates:
+                    best_detection = max(candidates, key=lambda x: x['confidence'])
                     
                     if self.should_trigger_sort(best_detection):
                         waste_class = best_detection['class']
                         
-                        # En mode apprentissage, demander confirmation
-                        if LEARNING_MODE:
-                            corrected_class = self.handle_correction(self.last_frame, best_detection)
-                            if corrected_class is None:
-                                continue  # Ignoré par l'utilisateur
-                            waste_class = corrected_class
+                        # En mode apprentissage, validation différée (file de révision) ;
+                        # avec l'apprentissage actif, seuls les cas incertains y vont
+                        if LEARNING_MODE and self.capture_policy is None:
+                            self.queue_for_review(self.last_frame, best_detection, "sort")
                         
                         print(f"\n🎯 TRI AUTO DÉCLENCHÉ : {waste_class}")
                         
-                        # Utiliser waste_classifier pour le tri
-                        # ask_if_unknown=True pour permettre d'apprendre
-                        bin_color = waste_classifier.classify_and_sort(
-                            waste_class,
-                            ask_if_unknown=True,
-                            auto_mode=False
-                        )
+                        bin_color = self.sort_detection(self.last_frame, best_detection)
                         
                         if bin_color:
                             print(f"✓ Trié vers le bac {bin_color}")
                 
+                # Âge de l'image au moment où son traitement est terminé
+                self.record_frame_age(frame_age_ms(capture_ts))
+                
                 # Calculer les FPS
                 fps_counter += 1
                 if time.time() - fps_time > 1.0:
@@ -450,28 +858,19 @@ class WasteDetector:
                     fps_counter = 0
                     fps_time = time.time()
                 
-                # Afficher les infos sur l'image
-                if SHOW_DISPLAY:
-                    # Info FPS et détections
-                    info_text = f"FPS: {fps_display} | Detections: {len(detections)}"
-                    cv2.putText(frame, info_text, (10, 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    
-                    # Suivi de détection
-                    if self.last_detection:
-                        status_text = f"Suivi: {self.last_detection['class']} ({self.detection_count}/{MIN_DETECTIONS})"
-                        cv2.putText(frame, status_text, (10, 60), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-                    
-                    # Mode
-                    mode_text = "Mode: Apprentissage" if LEARNING_MODE else "Mode: Auto"
-                    cv2.putText(frame, mode_text, (10, FRAME_HEIGHT - 10), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
-                    
-                    cv2.imshow('Smart Bin - Detection', frame)
+                # Régulation de cadence et rapport d'état
+                self.controller.record_frame()
+                if time.monotonic() - last_report >= STATUS_REPORT_INTERVAL:
+                    self.report(fps_display)
+                    last_report = time.monotonic()
+                
+                # Affichage (thread dédié, seulement pour les images qui seront montrées)
+                if self.renderer is not None and self.renderer.due():
+                    self.renderer.submit(frame, self.display_boxes(detections),
+                                         self.overlay_texts(fps_display, detections, frame.shape[0]), self.roi)
                 
-                # Gérer les entrées clavier
-                key = cv2.waitKey(1) & 0xFF
+                # Gérer les entrées clavier (reçues par le thread d'affichage)
+                key = self.renderer.poll_key() if self.renderer is not None else -1
                 
                 if key == ord('q'):
                     print("\n👋 Arrêt de la détection...")
@@ -483,29 +882,17 @@ class WasteDetector:
                         best = max(detections, key=lambda x: x['confidence'])
                         waste_class = best['class']
                         print(f"\n⚡ TRI MANUEL FORCÉ : {waste_class}")
-                        waste_classifier.classify_and_sort(
-                            waste_class,
-                            ask_if_unknown=True,
-                            auto_mode=False
-                        )
+                        self.sort_detection(self.last_frame, best)
                 
                 elif key == ord('r'):
                     # Réinitialiser le compteur
-                    self.detection_count = 0
-                    self.last_detection = None
+                    self.tracker.reset()
                     print("\n↻ Compteur de détections réinitialisé")
                 
                 elif key == ord('c') and LEARNING_MODE:
-                    # Corriger la dernière détection
-                    if self.last_detection:
-                        corrected = self.handle_correction(
-                            self.last_frame,
-                            self.last_detection
-                        )
-                        if corrected:
-                            bin_color = waste_classifier.ask_user_for_bin(corrected)
-                            if bin_color:
-                                waste_classifier.save_to_database(corrected, bin_color)
+                    # Envoyer la dernière détection en révision (correction depuis l'admin)
+                    if self.tracker.last_detection:
+                        self.queue_for_review(self.last_frame, self.tracker.last_detection, "manual")
                 
                 # Commande textuelle pour stats
                 # (Note: ne fonctionne que si on redirige stdin, sinon utiliser 's' dans le menu)
@@ -515,11 +902,21 @@ class WasteDetector:
         
         finally:
             # Nettoyage
-            cap.release()
-            if SHOW_DISPLAY:
-                cv2.destroyAllWindows()
+            if self.grabber is not None:
+                self.grabber.release()
+            if self.frames_processed:
+                print(f"\n⏱ Âge des images : moyenne {self.frame_age_total / self.frames_processed:.0f} ms, "
+                      f"max {self.frame_age_max:.0f} ms ({self.frames_processed} images)")
+            if self.renderer is not None:
+                self.renderer.close()
             
+            if self.review_queue is not None:
+                self.review_queue.close()
+            if self.shadow is not None:
+                self.shadow.close()
             waste_classifier.cleanup()
+            if self.inference_client is not None:
+                self.inference_client.close()
             
             print("\n✓ Système de détection arrêté\n")
 